@@ -0,0 +1,114 @@
+#!/bin/bash
+
+# Права пользователя: ozon:acl:<user_id> = биты (1 whitelist, 2 admin, 4 superuser)
+# и сброс кэша прав в ozon:user:{<user_id>}, чтобы правка действовала сразу.
+#
+# Использование:
+#   scripts/acl-set.sh <user_id> <роль>[,<роль>...]   роли: whitelist, admin, superuser
+#   scripts/acl-set.sh <user_id> none                  отозвать все права
+#   scripts/acl-set.sh --migrate                       перенести прежние права в ozon:acl:<id>:
+#       ключи ozon:acl:{whitelist,admins,superadmins}:<id>, множества SADD
+#       ozon:acl:{whitelist,admins,superadmins} и JSON-массивы ozon:acl:{whitelist,admin,superuser}
+
+set -e
+
+if [ -f .env ]; then
+    export $(cat .env | grep -v '^#' | xargs)
+fi
+
+REDIS_HOST=${REDIS_HOST:-localhost}
+REDIS_PORT=${REDIS_PORT:-6379}
+REDIS_PASSWORD=${REDIS_PASSWORD:-}
+
+if [ -n "$REDIS_PASSWORD" ]; then
+    REDIS_CLI="redis-cli -h $REDIS_HOST -p $REDIS_PORT -a $REDIS_PASSWORD"
+else
+    REDIS_CLI="redis-cli -h $REDIS_HOST -p $REDIS_PORT"
+fi
+
+role_bits() {
+    local bits=0
+    IFS=',' read -ra ROLES <<< "$1"
+    for role in "${ROLES[@]}"; do
+        case "$(echo $role | xargs)" in
+            whitelist) bits=$((bits | 1)) ;;
+            admin)     bits=$((bits | 3)) ;;
+            superuser) bits=$((bits | 7)) ;;
+            none)      ;;
+            *) echo "❌ Unknown role: $role" >&2; exit 1 ;;
+        esac
+    done
+    echo $bits
+}
+
+set_acl() {
+    local user_id=$1 bits=$2
+    # Пустые или нечисловые биты не пишутся: SET ozon:acl:<id> "" отнял бы все права
+    if ! [[ "$bits" =~ ^[0-9]+$ ]]; then
+        echo "❌ Bad ACL bits for $user_id: '$bits'" >&2
+        exit 1
+    fi
+    if [ "$bits" -eq 0 ]; then
+        $REDIS_CLI DEL "ozon:acl:$user_id" > /dev/null
+    else
+        $REDIS_CLI SET "ozon:acl:$user_id" "$bits" > /dev/null
+    fi
+    # Кэш прав в состоянии пользователя — иначе правка вступит в силу через 5 минут
+    $REDIS_CLI HDEL "ozon:user:{$user_id}" acl acl_exp > /dev/null
+    echo "   ozon:acl:$user_id = $bits"
+}
+
+if [ "$1" = "--migrate" ]; then
+    echo "🔁 Migrating legacy ACL stores → ozon:acl:<id>..."
+    declare -A BITS
+    # 1. Строки ozon:acl:{whitelist,admins,superadmins}:<id> (прежний основной workflow)
+    for pair in whitelist:1 admins:3 superadmins:7; do
+        list=${pair%%:*}; bit=${pair##*:}
+        for key in $($REDIS_CLI --scan --pattern "ozon:acl:$list:*"); do
+            user_id=${key##*:}
+            BITS[$user_id]=$(( ${BITS[$user_id]:-0} | bit ))
+        done
+    done
+    # 2. Множества SADD ozon:acl:{whitelist,admins,superadmins} (прежний redis-init.sh)
+    # 3. JSON-массивы ozon:acl:{whitelist,admin,superuser} (прежний ozord_telegram_core_access)
+    LISTS=()
+    for pair in whitelist:1 admins:3 superadmins:7 admin:3 superuser:7; do
+        list=${pair%%:*}; bit=${pair##*:}; key="ozon:acl:$list"
+        case "$($REDIS_CLI TYPE "$key")" in
+            set)    members=$($REDIS_CLI SMEMBERS "$key") ;;
+            string) members=$($REDIS_CLI GET "$key" | tr -d '[]" ' | tr ',' '\n') ;;
+            *)      continue ;;
+        esac
+        LISTS+=("$key")
+        for user_id in $members; do
+            [[ "$user_id" =~ ^[0-9]+$ ]] || continue
+            BITS[$user_id]=$(( ${BITS[$user_id]:-0} | bit ))
+        done
+    done
+    # Уже выданные биты не урезаются: перенос только добавляет роли
+    for user_id in "${!BITS[@]}"; do
+        current=$($REDIS_CLI GET "ozon:acl:$user_id")
+        set_acl "$user_id" "$(( ${BITS[$user_id]} | ${current:-0} ))"
+    done
+    # Пароль — из окружения (.env), а не открытым текстом в выводе
+    HINT="redis-cli -h $REDIS_HOST -p $REDIS_PORT"
+    if [ -n "$REDIS_PASSWORD" ]; then
+        HINT="$HINT -a \"\$REDIS_PASSWORD\""
+    fi
+    echo "✅ ${#BITS[@]} users migrated; old keys are kept — remove them with:"
+    echo "   $HINT --scan --pattern 'ozon:acl:*:*' | xargs -r $HINT DEL"
+    if [ ${#LISTS[@]} -gt 0 ]; then
+        echo "   $HINT DEL ${LISTS[*]}"
+    fi
+    exit 0
+fi
+
+if [ -z "$1" ] || [ -z "$2" ]; then
+    echo "Usage: $0 <user_id> <whitelist|admin|superuser|none>[,...] | --migrate"
+    exit 1
+fi
+
+# exit 1 в role_bits выходит только из подстановки — код возврата проверяется здесь
+bits=$(role_bits "$2") || exit 1
+set_acl "$1" "$bits"
+echo "✅ ACL updated"
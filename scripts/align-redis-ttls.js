@@ -4,6 +4,7 @@
  * 
  * Specification:
  * - ozon:sess:*:csv = 259200 (72 hours) - dataset/cache
+ * - ozon:sess:*:meta = 259200 (72 hours) - dataset metadata
  * - ozon:sess:*:dates = 86400 (24 hours) - selection/session
  * - ozon:ui:* = 86400 (24 hours) - UI state
  */
@@ -25,14 +26,14 @@ let changedCount = 0;
 workflow.nodes.forEach(node => {
   if (node.type === 'n8n-nodes-base.redis' && node.parameters.operation === 'set') {
     const key = node.parameters.key;
-    const currentTTL = node.parameters.options?.ttl;
+    const currentTTL = node.parameters.expire ? node.parameters.ttl : undefined;
     
     if (!key) return;
     
     let newTTL = null;
     
-    // Check if key contains csv
-    if (key.includes(':csv')) {
+    // Check if key contains csv or its metadata
+    if (key.includes(':csv') || key.includes(':meta') || key.includes(':agg') || key.includes(':hist')) {
       newTTL = TTL_72H;
     }
     // Check if key contains dates or is UI key
@@ -41,10 +42,9 @@ workflow.nodes.forEach(node => {
     }
     
     if (newTTL && currentTTL !== newTTL) {
-      if (!node.parameters.options) {
-        node.parameters.options = {};
-      }
-      node.parameters.options.ttl = newTTL;
+      // Redis-нода n8n читает TTL из expire/ttl, options.ttl она не знает
+      node.parameters.expire = true;
+      node.parameters.ttl = newTTL;
       const ttlHours = (newTTL / 3600).toFixed(0);
       console.log(`✅ ${node.name}: ${currentTTL || 'no TTL'} → ${newTTL} (${ttlHours}h)`);
       console.log(`   Key pattern: ${key.substring(0, 60)}...`);
@@ -62,5 +62,6 @@ console.log(`📊 Total connections: ${Object.keys(workflow.connections).length}
 
 console.log('\nTTL Summary:');
 console.log(`  ozon:sess:*:csv → 259200s (72h) - Dataset cache`);
+console.log(`  ozon:sess:*:meta → 259200s (72h) - Dataset metadata`);
 console.log(`  ozon:sess:*:dates → 86400s (24h) - User selection`);
 console.log(`  ozon:ui:*:* → 86400s (24h) - UI state`);
@@ -0,0 +1,78 @@
+#!/usr/bin/env node
+/**
+ * perf(acl): права — биты в ozon:acl:<uid>, проверка — один GET
+ *
+ * Было три представления одних и тех же прав:
+ *   - основной workflow: ozon:acl:whitelist:<uid> и ozon:acl:admins:<uid>,
+ *     два последовательных GET при холодном кэше;
+ *   - ozord_telegram_core_access: ozon:acl:superuser/admin/whitelist —
+ *     целые JSON-массивы, три GET, JSON.parse и Array.includes на каждый
+ *     апдейт: O(продавцов) по сети и CPU;
+ *   - scripts/redis-init.sh: множества (SADD) под теми же именами.
+ *
+ * Стало (src/user-state.js): ozon:acl:<uid> = биты ACL_WHITELIST |
+ * ACL_ADMIN | ACL_SUPERUSER одним числом. Основной workflow: Get ACL →
+ * Pack ACL → Save ACL (кэш в ozon:user:<uid> — поле того же HGETALL, что
+ * и остальное состояние). ozord_telegram_core_access: Redis Get: acl →
+ * Compute ACL Flags.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, findNode, replaceInCode, region, connect, renameNode, removeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Moving ACL to per-user bits...\n');
+
+// ─── Основной workflow ───────────────────────────────────────────────────────
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+if (findNode(wf, 'Get ACL')) {
+  console.error('❌ Get ACL already exists (already applied?)');
+  process.exit(1);
+}
+
+renameNode(wf, 'Check Whitelist', 'Get ACL');
+requireNode(wf, 'Get ACL').parameters.key = '=ozon:acl:{{ $json.user_id }}';
+removeNode(wf, 'Check Admin');
+connect(wf, 'Get ACL', [['Pack ACL']]);
+
+const pack = requireNode(wf, 'Pack ACL');
+replaceInCode(pack, '// Кэш ACL в ozon:user:<uid>: биты из ozon:acl:* живут ACL_CACHE_MS', '// Кэш ACL в ozon:user:<uid>: биты из ozon:acl:<uid> живут ACL_CACHE_MS');
+// renameNode уже поправил $('Check Whitelist') → $('Get ACL')
+replaceInCode(pack, "aclBits($('Get ACL').first().json.value, $json.value)", 'aclBits($json.value)');
+
+const validate = requireNode(wf, 'Validate Whitelist');
+replaceInCode(validate, 'const isSu = suIds.includes(uid);\n', '');
+replaceInCode(validate, '// биты ACL: кэш из ozon:user:<uid> или только что прочитанные ozon:acl:* (Pack ACL)', '// биты ACL: кэш из ozon:user:<uid> или только что прочитанный ozon:acl:<uid> (Pack ACL)');
+replaceInCode(validate, 'const isWhitelisted = (acl & ACL_WHITELIST) !== 0;', 'const isSu = suIds.includes(uid) || (acl & ACL_SUPERUSER) !== 0;\nconst isWhitelisted = (acl & ACL_WHITELIST) !== 0;');
+saveWorkflow(main);
+console.log('✅ ACL Known? → Get ACL (ozon:acl:<uid>) → Pack ACL → Save ACL');
+
+// ─── ozord_telegram_core_access ──────────────────────────────────────────────
+const access = loadWorkflow('ozord_telegram_core_access');
+const awf = access.workflow;
+renameNode(awf, 'Redis Get: whitelist[]', 'Redis Get: acl');
+const get = requireNode(awf, 'Redis Get: acl');
+get.parameters = { operation: 'get', propertyName: 'value', key: '=ozon:acl:{{ $json.context.user_id }}', keyType: 'string' };
+get.position = [-600, 200];
+removeNode(awf, 'Redis Get: superuser[]');
+removeNode(awf, 'Redis Get: admin[]');
+connect(awf, 'Extract & Normalize Update', [['Redis Get: acl']]);
+connect(awf, 'Redis Get: acl', [['Compute ACL Flags']]);
+requireNode(awf, 'Compute ACL Flags').parameters.jsCode = region('src/user-state.js') +
+  "const ctx = $('Extract & Normalize Update').first().json.context || {};\n" +
+  '// Права — биты ozon:acl:<uid>: один GET и побитовое И вместо трёх списков и includes\n' +
+  'const acl = aclBits($json.value);\n' +
+  'const is_superuser = (acl & ACL_SUPERUSER) !== 0;\n' +
+  'const is_admin     = is_superuser || (acl & ACL_ADMIN) !== 0;\n' +
+  'const in_whitelist = is_admin || (acl & ACL_WHITELIST) !== 0;\n' +
+  'return [{ json: { ...ctx, is_superuser, is_admin, in_whitelist } }];';
+// Ветка 0 IF — true: разрешённым — Return (allowed). Раньше ветки были перепутаны,
+// и whitelist получал отказ, а посторонние — доступ
+connect(awf, 'Allowed?', [['Return (allowed)'], ['Return (denied)']]);
+saveWorkflow(access);
+console.log('✅ ozord_telegram_core_access: Redis Get: acl (ozon:acl:<uid>) → Compute ACL Flags');
+
+syncAll({ quiet: true });
+console.log('\n✅ ACL is one per-user key with flag bits');
@@ -0,0 +1,93 @@
+#!/usr/bin/env node
+/**
+ * perf(calendar): скелет сетки месяца из meta.daysByMonth, клик — только отметки
+ *
+ * Было: «Render Calendar (smart)», «Render Calendar Grid» и «Render Grid +
+ * Header/Counter» на каждый клик собирали 7×N кнопок заново, а основной
+ * workflow ещё и фильтровал все availableDates под месяц.
+ *
+ * Стало (src/calendar-grid.js): скелет месяца — клавиатура без отметок ☑ —
+ * строится из доступных дней месяца, посчитанных при загрузке
+ * (meta.daysByMonth); рендер накладывает отметки выбранных дней и строку
+ * «Итого». Одна реализация сетки на три ноды, стили smart и grid.
+ *
+ * Скелет между апдейтами не хранится: разобрать сохранённый скелет из JSON
+ * дороже, чем собрать заново (scripts/bench_calendar_render.js).
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, replaceInCode, region } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Building calendar grids from month skeletons...\n');
+
+// ─── Основной workflow ───────────────────────────────────────────────────────
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+const render = requireNode(wf, 'Render Calendar (smart)');
+if (render.parameters.jsCode.includes('src/calendar-grid.js')) {
+  console.error('❌ Render Calendar (smart) already uses src/calendar-grid.js (already applied?)');
+  process.exit(1);
+}
+
+const ensure = requireNode(wf, 'Ensure Month (smart)');
+replaceInCode(ensure, 'availableDates: available, selectedDates: selected,', 'availableDates: available, daysByMonth: meta.daysByMonth || {}, selectedDates: selected,');
+
+render.parameters.jsCode = region('src/calendar-grid.js') + `// Скелет месяца из meta.daysByMonth; на клик — только отметки ☑ и строка «Итого»
+const {
+  chat_id, month, minMonth, maxMonth, daysByMonth,
+  selectedDates,
+  selectionSummary = { totalOrders: 0, totalRevenue: 0 }
+} = $json;
+const grid = buildCalendarGrid(month, { minMonth, maxMonth, daysByMonth }, 'smart');
+const selected = Array.isArray(selectedDates) ? selectedDates : [];
+const setSel = new Set(selected);
+const MAX = 3;
+let selectedLine = 'Выберите до 3 дат:';
+if (setSel.size) {
+  const preview = Array.from(setSel).slice(0, 5).join(', ');
+  selectedLine = \`Выбрано (\${setSel.size}/\${MAX}): \${preview}\`;
+}
+const mini = \`Итого: заказы \${selectionSummary.totalOrders} • сумма \${selectionSummary.totalRevenue.toFixed(2)} ₽\`;
+const controls = [];
+controls.push({ text: (setSel.size? '✅ Готово':'🔒 Готово'), callback_data: (setSel.size? 'dates:done':'noop') });
+controls.push({ text: '🧹 Сброс', callback_data: 'dates:reset' });
+const fileRow = [
+  { text: '📤 Загрузить файл', callback_data: 'file:upload' },
+  { text: '🧯 Очистить файл',  callback_data: 'file:clear'  }
+];
+const kb = { inline_keyboard: [...overlayCalendarGrid(grid, selected), controls, fileRow] };
+const text = \`📅 <b>Мультивыбор дат</b>\\\\nЗагружено: <b>\${minMonth}</b> … <b>\${maxMonth}</b>\\\\n\${selectedLine}\\\\n\${mini}\`;
+return [{ json: { chat_id, text, parse_mode: 'HTML', reply_markup: kb } }];
+`;
+
+saveWorkflow(main);
+console.log('✅ Render Calendar (smart): buildCalendarGrid + overlayCalendarGrid');
+
+// ─── Саб-workflow ozord_calendar_* ───────────────────────────────────────────
+const GRID_LOOP = /\/\/ Навигация\n[\s\S]*?\n\/\/ Кнопки действий\n|\/\/ ======= GRID \(7×5\) =======\n[\s\S]*?\n\/\/ ======= ACTIONS & FOOTER =======\n/;
+for (const [file, name] of [['ozord_calendar_render_grid', 'Render Calendar Grid'], ['ozord_calendar_ui_header_and_counters', 'Render Grid + Header/Counter']]) {
+  const sub = loadWorkflow(file);
+  const model = requireNode(sub.workflow, 'Prepare Calendar Model');
+  replaceInCode(model, 'selectedDates: selected, availDays: Array.from(availDays) }', 'selectedDates: selected, availDays: Array.from(availDays), daysByMonth: { [month]: daysByMonth[month] || [] } }');
+  const node = requireNode(sub.workflow, name);
+  let code = node.parameters.jsCode;
+  const loop = code.match(GRID_LOOP);
+  if (!loop) {
+    console.error(`❌ ${file} → ${name}: grid loop not found`);
+    process.exit(1);
+  }
+  const tail = loop[0].startsWith('// Навигация') ? '// Кнопки действий\n' : '// ======= ACTIONS & FOOTER =======\n';
+  code = code.replace(loop[0], () => '// Сетка — общий скелет месяца (src/calendar-grid.js) + отметки выбранных дней\n' +
+    "const [navRow, ...rows] = overlayCalendarGrid(buildCalendarGrid(month, { minMonth, maxMonth, daysByMonth }, 'grid'), Array.from(setSel));\n" + tail);
+  code = code
+    .replace("function daysInMonth(ym){ const [y,m]=ym.split('-').map(Number); return new Date(y, m, 0).getDate(); }\n", () => region('src/calendar-grid.js'))
+    .replace('selectedDates=[], availDays=[] } = $json;\nconst setAvail = new Set(availDays);\n', 'selectedDates=[], daysByMonth={} } = $json;\n')
+    .replace('const total = daysInMonth(month);\nconst hasPrev = month > minMonth;\nconst hasNext = month < maxMonth;\n', '');
+  node.parameters.jsCode = code;
+  saveWorkflow(sub);
+  console.log(`✅ ${file} → ${name}: buildCalendarGrid + overlayCalendarGrid`);
+}
+
+syncAll({ quiet: true });
+console.log('\n✅ Calendar grids overlay the selection on a month skeleton');
@@ -0,0 +1,50 @@
+#!/usr/bin/env node
+/**
+ * fix(redis): новая сессия и file:clear забывают живой message_id календаря
+ *
+ * Было: «Del calendar_msg_id (reset)» и «Del calendar_msg_id» в
+ * ozord_files_session_and_clear удаляли ozon:ui:<uid>:calendar_msg_id —
+ * ключ без hash tag, который никто больше не пишет. Живые id календаря
+ * оставались, и после новой загрузки бот правил старое сообщение.
+ *
+ * Стало — оба места, где id календаря живёт сейчас:
+ *   Del calendar_msg_id        DEL ozon:ui:{<uid>}:calendar:message_id  (ozord_ui_orchestrator)
+ *   Clear calendar_msg_id      HSET ozon:user:{<uid>} calendar_msg_id null calendar_render null
+ *                              (src/user-state.js: null затирает поле)
+ * Так же в ветке новой сессии (… (reset)).
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, connect, addNode, redisNode } = require('./lib/workflow-edit');
+const { USER_STATE_TTL_SEC } = require('../src/user-state');
+
+const UID = "$('Extract User Data').first().json.user_id";
+
+console.log('📝 Clearing the live calendar message id in ozord_files_session_and_clear...\n');
+
+const files = loadWorkflow('ozord_files_session_and_clear');
+const wf = files.workflow;
+
+for (const [suffix, next] of [[' (reset)', null], ['', 'AnswerCallback (cleared)']]) {
+  const del = requireNode(wf, `Del calendar_msg_id${suffix}`);
+  del.parameters.key = `=ozon:ui:{{ '{' + ${UID} + '}' }}:calendar:message_id`;
+  const name = `Clear calendar_msg_id${suffix}`;
+  addNode(wf, redisNode(wf, {
+    id: `clear-calendar-msg-id${suffix ? '-reset' : ''}`,
+    name,
+    position: [del.position[0] + 240, del.position[1]],
+    operation: 'set',
+    key: `=ozon:user:{{ '{' + ${UID} + '}' }}`,
+    value: 'calendar_msg_id null calendar_render null',
+    ttl: USER_STATE_TTL_SEC,
+    extra: { keyType: 'hash', valueIsJSON: false },
+  }));
+  connect(wf, del.name, [[name]]);
+  if (next) {
+    requireNode(wf, next).position[0] += 240;
+    connect(wf, name, [[next]]);
+  }
+  console.log(`✅ ${del.name} → ${name}${next ? ` → ${next}` : ''}`);
+}
+saveWorkflow(files);
+
+console.log('\n✅ Both routes drop ozon:ui:{<uid>}:calendar:message_id and the calendar_msg_id field');
@@ -0,0 +1,70 @@
+#!/usr/bin/env node
+/**
+ * fix(dates): журнал нажатий не копится — сброс и суточная пауза его удаляют
+ *
+ * Было: ozon:user:<uid>:taps только рос, а каждый тоггл, сброс и «Готово»
+ * читали (LRANGE 0 -1) и сворачивали его целиком — с первого нажатия
+ * сессии, хотя записи до последнего сброса выбор уже не меняют.
+ *
+ * Стало (src/date-taps.js):
+ *   Reset Dates ─────────────────────────────→ Drop Tap Log (DEL) → Push Date Tap
+ *   Toggle Date → Unavailable? ─ нет → Dead Tap Log? ─ да → Drop Tap Log
+ *                                                    └ нет → Push Date Tap
+ * Сброс удаляет журнал перед своим RPUSH — после него в журнале только
+ * сброс и более поздние нажатия. Тап по календарю, чья группа ui в
+ * ozon:user:<uid> истекла (рендера не было сутки, как и нажатий), тоже
+ * начинает журнал заново. foldDateTaps сворачивает с последнего сброса.
+ * Брошенные журналы по-прежнему подбирает scripts/redis_sweeper.py.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, connect, addNode, redisNode, ifNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const UID = "$('Extract User Data').first().json.user_id";
+
+console.log('📝 Compacting the date tap log...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+if (wf.nodes.some(n => n.name === 'Drop Tap Log')) {
+  console.error('❌ Drop Tap Log already exists (already applied?)');
+  process.exit(1);
+}
+
+// Группа ui (cal_month и др.) живёт сутки с последнего рендера — как выбор в журнале
+const toggle = requireNode(wf, 'Toggle Date');
+replaceInCode(toggle,
+  "return [{ json: { user_id: u.user_id, unavailable: false, dateStr, tap: encodeDateTap('t', dateStr, u.callback_query_id) } }];",
+  "// Календарь без живой группы ui — сутки без рендера и нажатий: журнал мёртв, начинаем заново\n" +
+  "const deadLog = !$('User Context').first().json.ctx.calMonth;\n" +
+  "return [{ json: { user_id: u.user_id, unavailable: false, dateStr, deadLog, tap: encodeDateTap('t', dateStr, u.callback_query_id) } }];"
+);
+
+requireNode(wf, 'Push Date Tap').position = [368, 1240];
+requireNode(wf, 'Get Date Taps').position = [592, 1240];
+requireNode(wf, 'Fold Date Taps').position = [816, 1240];
+addNode(wf, ifNode({
+  id: 'dead-tap-log',
+  name: 'Dead Tap Log?',
+  position: [144, 1240],
+  condition: '={{ $json.deadLog === true }}',
+}));
+addNode(wf, redisNode(wf, {
+  id: 'drop-tap-log',
+  name: 'Drop Tap Log',
+  position: [144, 1432],
+  operation: 'delete',
+  key: `=ozon:user:{{ '{' + ${UID} + '}' }}:taps`,
+}));
+connect(wf, 'Unavailable?', [['Answer Callback (unavailable)'], ['Dead Tap Log?']]);
+connect(wf, 'Dead Tap Log?', [['Drop Tap Log'], ['Push Date Tap']]);
+connect(wf, 'Reset Dates', [['Drop Tap Log']]);
+connect(wf, 'Drop Tap Log', [['Push Date Tap']]);
+saveWorkflow(main);
+console.log('✅ Reset Dates → Drop Tap Log → Push Date Tap');
+console.log('✅ Unavailable? → Dead Tap Log? → (Drop Tap Log →) Push Date Tap');
+
+syncAll({ quiet: true });
+console.log('\n✅ The tap log starts over on reset and after a day without taps');
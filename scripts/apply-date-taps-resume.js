@@ -0,0 +1,76 @@
+#!/usr/bin/env node
+/**
+ * perf(dates): рендер после окна слияния продолжает свёртку, а не считает заново
+ *
+ * Было: «Take Latest Tap» после окна перечитывал журнал и сворачивал его
+ * целиком — ещё раз то, что «Fold Date Taps» этого же нажатия уже свернул
+ * до окна. Рендер стоил O(длины журнала), а не O(нажатий за окно).
+ *
+ * Стало (src/date-taps.js): свёртка нажатия сохраняет снимок (checkpoint:
+ * число записей, последняя запись, выбор, версия, «Итого»), и «Take Latest
+ * Tap» продолжает с него — проходит только записи, дописанные за окно.
+ * Если журнал за окно пересоздан (сброс удалил ключ), снимок не совпадёт с
+ * журналом и свёртка пойдёт с последнего сброса. То же в
+ * ozord_dates_toggle_and_limit.
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, replaceInCode } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Resuming the tap fold after the coalesce window...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// «Итого» ведёт уже первая свёртка — иначе снимок нечем продолжить
+const fold = requireNode(wf, 'Fold Date Taps');
+replaceInCode(fold,
+  "const { selected, version, outcome } = foldDateTaps($json.taps, { id: u.callback_query_id });\n" +
+  "return [{ json: { user_id: u.user_id, selectedDates: selected, datesVersion: version, hitLimit: outcome === 'blocked', toggled: outcome } }];",
+  "const meta = $('User Context').first().json.ctx.meta || {};\n" +
+  "const { selected, version, outcome, checkpoint } = foldDateTaps($json.taps, { id: u.callback_query_id, dayTotals: meta.dayTotals || {}, checkpoint: true });\n" +
+  "return [{ json: { user_id: u.user_id, selectedDates: selected, datesVersion: version, hitLimit: outcome === 'blocked', toggled: outcome, checkpoint } }];"
+);
+const take = requireNode(wf, 'Take Latest Tap');
+replaceInCode(take,
+  '// Окно слияния: рендерит только последнее нажатие журнала — по свежей свёртке\n',
+  '// Окно слияния: рендерит только последнее нажатие журнала — свёртка продолжает снимок\n' +
+  '// «Fold Date Taps» и проходит только записи, дописанные за окно\n'
+);
+replaceInCode(take,
+  "const { selected, version, summary } = foldDateTaps($json.taps, { dayTotals: meta.dayTotals || {} });",
+  "const from = $('Fold Date Taps').first().json.checkpoint;\n" +
+  "const { selected, version, summary } = foldDateTaps($json.taps, { dayTotals: meta.dayTotals || {}, from });"
+);
+saveWorkflow(main);
+console.log('✅ Fold Date Taps → checkpoint → Take Latest Tap (resumes the fold)');
+
+const sub = loadWorkflow('ozord_dates_toggle_and_limit');
+const swf = sub.workflow;
+const limit = requireNode(swf, 'Toggle with Limit (max 3)');
+replaceInCode(limit,
+  'const { selected, version, outcome } = foldDateTaps($json.taps, { id: p.callback_query_id });',
+  'const { selected, version, outcome, checkpoint } = foldDateTaps($json.taps, { id: p.callback_query_id, checkpoint: true });'
+);
+replaceInCode(limit,
+  "if (outcome === 'blocked') return [{ json: { changed: false, reason: 'limit', selected: sorted, version } }];\n" +
+  'return [{ json: { changed: true, reason: outcome, selected: sorted, version } }];',
+  "if (outcome === 'blocked') return [{ json: { changed: false, reason: 'limit', selected: sorted, version, checkpoint } }];\n" +
+  'return [{ json: { changed: true, reason: outcome, selected: sorted, version, checkpoint } }];'
+);
+const subTake = requireNode(swf, 'Take Latest Tap');
+replaceInCode(subTake,
+  '// Окно слияния: рендерит только последнее нажатие журнала — по свежей свёртке\n',
+  '// Окно слияния: рендерит только последнее нажатие журнала — свёртка продолжает снимок тоггла\n'
+);
+replaceInCode(subTake,
+  "const { selected, version } = foldDateTaps($json.taps);\nconst reason = $('Toggle with Limit (max 3)').first().json.reason;",
+  "const toggled = $('Toggle with Limit (max 3)').first().json;\n" +
+  'const { selected, version } = foldDateTaps($json.taps, { from: toggled.checkpoint });\n' +
+  'const reason = toggled.reason;'
+);
+saveWorkflow(sub);
+console.log('✅ ozord_dates_toggle_and_limit: Toggle with Limit → checkpoint → Take Latest Tap');
+
+syncAll({ quiet: true });
+console.log('\n✅ The render after the window folds only the taps pushed during it');
@@ -0,0 +1,200 @@
+#!/usr/bin/env node
+/**
+ * fix(dates): атомарный тоггл дат через журнал нажатий
+ *
+ * Было: Toggle Date брал выбор из HGETALL в начале апдейта, правил его в JS
+ * и писал HSET в конце. Два быстрых тапа (или два воркера n8n в queue mode)
+ * читали один и тот же выбор — одно нажатие терялось, лимит в 3 даты
+ * обходился, а поздний рендер календаря затирал более новый.
+ *
+ * Стало (src/date-taps.js): нажатие — RPUSH в ozon:user:<uid>:taps, выбор —
+ * свёртка журнала после LRANGE, рендер с устаревшей версией отбрасывается:
+ *   Toggle Date → Unavailable? ─ нет → Push Date Tap → Get Date Taps → Fold Date Taps → Hit Limit? → …
+ *   Reset Dates ───────────────────→ Push Date Tap
+ *   … → Render Calendar (smart) → Dates Changed?
+ *         ├─ да:  Recheck Date Taps → Drop Stale Render → Save Calendar State
+ *         └─ нет: Save Calendar State
+ * «Готово» сворачивает журнал сам (Get Date Taps (done)); file:clear его удаляет.
+ * Поле dates в ozon:user:<uid> пишут только тоггл и сброс.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, region, connect, addNode, redisNode, codeNode, ifNode, removeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const UID = "$('Extract User Data').first().json.user_id";
+const TAPS_KEY = `=ozon:user:{{ ${UID} }}:taps`;
+const pushTap = (wf, { id, name, position, messageData }) => redisNode(wf, {
+  id, name, position, operation: 'push', extra: { list: TAPS_KEY, messageData, tail: true },
+});
+const getTaps = (wf, { id, name, position }) => redisNode(wf, {
+  id, name, position, operation: 'get', key: TAPS_KEY, propertyName: 'taps', extra: { keyType: 'list' },
+});
+const deleteTaps = (wf, { id, name, position }) => redisNode(wf, { id, name, position, operation: 'delete', key: TAPS_KEY });
+
+console.log('📝 Making date toggles atomic with a tap log...\n');
+
+// ─── Основной workflow ───────────────────────────────────────────────────────
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Тоггл и сброс — запись в журнал
+const toggle = requireNode(wf, 'Toggle Date');
+toggle.parameters.jsCode = region('src/date-taps.js') +
+  '// Нажатие — запись в журнал ozon:user:<uid>:taps; выбор и лимит считает свёртка после RPUSH\n' +
+  "const u = $('Extract User Data').first().json;\n" +
+  "const dateStr = u.callback_data.replace('date:', '');\n" +
+  "const meta = $('User Context').first().json.ctx.meta || {};\n" +
+  'const available = Array.isArray(meta.availableDates) ? meta.availableDates : [];\n' +
+  'if (!available.includes(dateStr)) {\n' +
+  '  return [{ json: { user_id: u.user_id, unavailable: true, dateStr } }];\n' +
+  '}\n' +
+  "return [{ json: { user_id: u.user_id, unavailable: false, dateStr, tap: encodeDateTap('t', dateStr, u.callback_query_id) } }];\n";
+
+const reset = requireNode(wf, 'Reset Dates');
+reset.parameters.jsCode = region('src/date-taps.js') +
+  "const u = $('Extract User Data').first().json;\n" +
+  "return [{ json: { user_id: u.user_id, tap: encodeDateTap('r', '', u.callback_query_id) } }];\n";
+
+addNode(wf, pushTap(wf, { id: 'push-date-tap', name: 'Push Date Tap', position: [144, 1240], messageData: '={{ $json.tap }}' }));
+addNode(wf, getTaps(wf, { id: 'get-date-taps', name: 'Get Date Taps', position: [368, 1240] }));
+addNode(wf, codeNode({
+  id: 'fold-date-taps',
+  name: 'Fold Date Taps',
+  position: [592, 1240],
+  jsCode: region('src/date-taps.js') +
+    '// Выбор — свёртка журнала; исход своего нажатия ищем по callback_query_id\n' +
+    "const u = $('Extract User Data').first().json;\n" +
+    'const { selected, version, outcome } = foldDateTaps($json.taps, { id: u.callback_query_id });\n' +
+    "return [{ json: { user_id: u.user_id, selectedDates: selected, datesVersion: version, hitLimit: outcome === 'blocked', toggled: outcome } }];\n",
+}));
+connect(wf, 'Toggle Date', [['Unavailable?']]);
+connect(wf, 'Unavailable?', [['Answer Callback (unavailable)'], ['Push Date Tap']]);
+connect(wf, 'Reset Dates', [['Push Date Tap']]);
+connect(wf, 'Push Date Tap', [['Get Date Taps']]);
+connect(wf, 'Get Date Taps', [['Fold Date Taps']]);
+connect(wf, 'Fold Date Taps', [['Hit Limit?']]);
+console.log('✅ Toggle Date / Reset Dates → Push Date Tap (RPUSH) → Get Date Taps (LRANGE) → Fold Date Taps → Hit Limit?');
+
+// 2. Даты в ozon:user:<uid> пишет только свёртка; версия идёт дальше к проверке рендера
+const ensure = requireNode(wf, 'Ensure Month (smart)');
+replaceInCode(ensure,
+  "const selected = Array.isArray($json.selectedDates) ? $json.selectedDates : u.ctx.selectedDates;\n// Всё, что маршрут меняет в ozon:user:<uid>, — одним HSET в «Save Calendar State»\nconst state = { dates: selected, cal_month: month };",
+  "// datesVersion есть только после свёртки журнала (тоггл, сброс) — только тогда маршрут пишет dates\nconst datesVersion = Number.isInteger($json.datesVersion) ? $json.datesVersion : null;\nconst selected = datesVersion !== null ? $json.selectedDates : u.ctx.selectedDates;\n// Всё, что маршрут меняет в ozon:user:<uid>, — одним HSET в «Save Calendar State»\nconst state = { cal_month: month };\nif (datesVersion !== null) state.dates = selected;"
+);
+replaceInCode(ensure, 'calendar_msg_id: u.ctx.calendarMsgId, user_state:', 'calendar_msg_id: u.ctx.calendarMsgId, datesVersion, user_state:');
+
+// 3. Устаревший рендер не пишет состояние и не правит сообщение
+addNode(wf, ifNode({
+  id: 'dates-changed',
+  name: 'Dates Changed?',
+  position: [816, 1048],
+  condition: "={{ $('Ensure Month (smart)').first().json.datesVersion !== null }}",
+}));
+addNode(wf, getTaps(wf, { id: 'recheck-date-taps', name: 'Recheck Date Taps', position: [816, 1240] }));
+addNode(wf, codeNode({
+  id: 'drop-stale-render',
+  name: 'Drop Stale Render',
+  position: [1040, 1240],
+  jsCode: region('src/date-taps.js') +
+    '// Журнал вырос после свёртки — более новое нажатие перерисует календарь само\n' +
+    "const mine = $('Ensure Month (smart)').first().json.datesVersion;\n" +
+    'if (foldDateTaps($json.taps).version > mine) return [];\n' +
+    "return [{ json: $('Render Calendar (smart)').first().json }];\n",
+}));
+connect(wf, 'Render Calendar (smart)', [['Dates Changed?']]);
+connect(wf, 'Dates Changed?', [['Recheck Date Taps'], ['Save Calendar State']]);
+connect(wf, 'Recheck Date Taps', [['Drop Stale Render']]);
+connect(wf, 'Drop Stale Render', [['Save Calendar State']]);
+console.log('✅ Render Calendar (smart) → Dates Changed? → Recheck Date Taps → Drop Stale Render → Save Calendar State');
+
+// 4. «Готово» берёт выбор из журнала, а не из снимка в hash
+addNode(wf, getTaps(wf, { id: 'get-date-taps-done', name: 'Get Date Taps (done)', position: [1040, 472] }));
+const done = requireNode(wf, 'Handle Done');
+done.parameters.jsCode = region('src/date-taps.js') + done.parameters.jsCode;
+replaceInCode(done,
+  "const selected=$('User Context').first().json.ctx.selectedDates;",
+  'const selected=foldDateTaps($json.taps).selected;'
+);
+const route = requireNode(wf, 'Route Message');
+const outs = wf.connections['Route Message'].main;
+outs[route.parameters.rules.values.findIndex(r => r.outputKey === 'DatesDone')] = [{ node: 'Get Date Taps (done)', type: 'main', index: 0 }];
+connect(wf, 'Get Date Taps (done)', [['Handle Done']]);
+console.log('✅ dates:done → Get Date Taps (done) → Handle Done');
+
+// 5. file:clear удаляет журнал вместе с сессией
+addNode(wf, deleteTaps(wf, { id: 'del-date-taps', name: 'Del Date Taps', position: [1264, 1320] }));
+connect(wf, 'Del csv_hist', [['Del Date Taps']]);
+connect(wf, 'Del Date Taps', [['Clear Session State']]);
+console.log('✅ file:clear → … → Del csv_hist → Del Date Taps → Clear Session State');
+saveWorkflow(main);
+
+// ─── ozord_dates_toggle_and_limit ────────────────────────────────────────────
+const sub = loadWorkflow('ozord_dates_toggle_and_limit');
+const swf = sub.workflow;
+const parse = requireNode(swf, 'Parse Callback (date:YYYY-MM-DD)');
+parse.parameters.jsCode = region('src/date-taps.js') + parse.parameters.jsCode;
+replaceInCode(parse,
+  'callback_query_id: data.callback_query_id } }];',
+  "callback_query_id: data.callback_query_id, tap: encodeDateTap('t', m[1], data.callback_query_id) } }];"
+);
+removeNode(swf, 'Get Selected Dates');
+addNode(swf, pushTap(swf, {
+  id: 'push-date-tap',
+  name: 'Push Date Tap',
+  position: [160, 300],
+  messageData: "={{ $('Parse Callback (date:YYYY-MM-DD)').first().json.tap }}",
+}));
+addNode(swf, getTaps(swf, { id: 'get-date-taps', name: 'Get Date Taps', position: [420, 300] }));
+const limit = requireNode(swf, 'Toggle with Limit (max 3)');
+limit.position = [660, 300];
+limit.parameters.jsCode = region('src/date-taps.js') +
+  '// Тоггл с лимитом 3 — свёртка журнала ozon:user:<uid>:taps (RPUSH этого нажатия уже в нём)\n' +
+  "const p = $('Parse Callback (date:YYYY-MM-DD)').first().json;\n" +
+  'const { selected, version, outcome } = foldDateTaps($json.taps, { id: p.callback_query_id });\n' +
+  '// Упорядочим по дате для стабильности\n' +
+  'const sorted = selected.slice().sort();\n' +
+  "if (outcome === 'blocked') return [{ json: { changed: false, reason: 'limit', selected: sorted, version } }];\n" +
+  'return [{ json: { changed: true, reason: outcome, selected: sorted, version } }];\n';
+requireNode(swf, 'Is Limit Hit?').position = [900, 300];
+requireNode(swf, 'AnswerCallback (limit 3)').position = [1140, 220];
+addNode(swf, getTaps(swf, { id: 'recheck-date-taps', name: 'Recheck Date Taps', position: [1140, 460] }));
+addNode(swf, codeNode({
+  id: 'drop-stale-render',
+  name: 'Drop Stale Render',
+  position: [1380, 460],
+  jsCode: region('src/date-taps.js') +
+    '// Журнал вырос после свёртки — более новое нажатие перерисует календарь само\n' +
+    "const mine = $('Toggle with Limit (max 3)').first().json;\n" +
+    'if (foldDateTaps($json.taps).version > mine.version) return [];\n' +
+    'return [{ json: mine }];\n',
+}));
+requireNode(swf, 'Persist Selected Dates').position = [1620, 460];
+requireNode(swf, 'Re-render Calendar Grid').position = [1860, 460];
+connect(swf, 'Is Available?', [['Push Date Tap'], ['AnswerCallback (unavailable)']]);
+connect(swf, 'Push Date Tap', [['Get Date Taps']]);
+connect(swf, 'Get Date Taps', [['Toggle with Limit (max 3)']]);
+connect(swf, 'Toggle with Limit (max 3)', [['Is Limit Hit?']]);
+connect(swf, 'Is Limit Hit?', [['AnswerCallback (limit 3)'], ['Recheck Date Taps']]);
+connect(swf, 'Recheck Date Taps', [['Drop Stale Render']]);
+connect(swf, 'Drop Stale Render', [['Persist Selected Dates']]);
+connect(swf, 'Parse Callback (date:YYYY-MM-DD)', [['Get Session (meta)']]);
+saveWorkflow(sub);
+console.log('✅ ozord_dates_toggle_and_limit: Push Date Tap → Get Date Taps → Toggle with Limit (fold) → Recheck → Drop Stale Render → Persist');
+
+// ─── ozord_files_session_and_clear: журнал сбрасывается вместе с выбором ─────
+const files = loadWorkflow('ozord_files_session_and_clear');
+const fwf = files.workflow;
+addNode(fwf, deleteTaps(fwf, { id: 'del-date-taps-reset', name: 'Del date taps (reset)', position: [100, 40] }));
+addNode(fwf, deleteTaps(fwf, { id: 'del-date-taps', name: 'Del date taps', position: [-380, 520] }));
+connect(fwf, 'Persist Session (ozon:sess:<uid>:meta)', [['Del Selected Dates (reset)']]);
+connect(fwf, 'Del Selected Dates (reset)', [['Del date taps (reset)']]);
+connect(fwf, 'Del date taps (reset)', [['Del calendar_msg_id (reset)']]);
+connect(fwf, 'Del selected_dates', [['Del date taps']]);
+connect(fwf, 'Del date taps', [['Del calendar_msg_id']]);
+saveWorkflow(files);
+console.log('✅ ozord_files_session_and_clear: new session and file:clear delete ozon:user:<uid>:taps');
+
+syncAll({ quiet: true });
+console.log('\n✅ Date toggles go through the tap log');
@@ -0,0 +1,71 @@
+#!/usr/bin/env node
+/**
+ * perf(redis): ключи пользователя с hash tag — один слот Redis Cluster на пользователя
+ *
+ * Было: ozon:user:<uid>, ozon:sess:<uid>:csv, ozon:ui:<uid>:<key>:message_id —
+ * в Redis Cluster каждый ключ в своём слоте, ключи одного пользователя на
+ * разных шардах, многоключевые операции маршрута невозможны.
+ *
+ * Стало: id пользователя в фигурных скобках (hash tag) — хешируется только
+ * он, все ключи пользователя в одном слоте (scripts/redis_keys.py):
+ *   ozon:user:{<uid>}, ozon:user:{<uid>}:upload, ozon:user:{<uid>}:taps,
+ *   ozon:sess:{<uid>}:csv|agg|hist|meta|dates, ozon:ui:{<uid>}:<key>:message_id
+ *
+ * Ключ в выражении n8n — «ozon:sess:{{ '{' + <uid> + '}' }}:csv»: литерал
+ * «{» прямо перед «{{» выражение n8n не разберёт. ozon:acl:<uid>,
+ * ozon:parse:* и прежний ozon:ui:<uid>:calendar_msg_id (только удаление при
+ * file:clear) не меняются. Данные под прежними именами переносит
+ * scripts/redis_migrate_keys.py.
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflow, saveWorkflow } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+// ozon:sess:{{ <uid> }}:csv → ozon:sess:{{ '{' + <uid> + '}' }}:csv
+const EXPRESSION = /ozon:(user|sess|ui):\{\{\s*(.+?)\s*\}\}(:calendar_msg_id)?/g;
+// 'ozon:user:' + <uid> + ':upload' → 'ozon:user:{' + <uid> + '}:upload'
+const CONCAT = /'ozon:(user|sess|ui):' \+ (.+?) \+ '(:[a-z_]+)?'/g;
+// `ozon:ui:${user_id}:${key}:message_id` → `ozon:ui:{${user_id}}:${key}:message_id`
+const TEMPLATE = /`ozon:(user|sess|ui):\$\{([^}]+)\}/g;
+
+function retag(value) {
+  return value
+    .replace(EXPRESSION, (m, family, uid, legacy) => (legacy || uid.startsWith("'{'") ? m : `ozon:${family}:{{ '{' + ${uid} + '}' }}`))
+    .replace(CONCAT, (m, family, uid, rest) => `'ozon:${family}:{' + ${uid} + '}${rest || ''}'`)
+    .replace(TEMPLATE, (m, family, uid) => `\`ozon:${family}:{\${${uid}}}`);
+}
+
+/** Все строки параметров, кроме вставок src/*.js (их правит sync-code-nodes). */
+function rewrite(value) {
+  if (Array.isArray(value)) return value.map(rewrite);
+  if (value && typeof value === 'object') return Object.fromEntries(Object.entries(value).map(([k, v]) => [k, rewrite(v)]));
+  if (typeof value !== 'string') return value;
+  return value.split(/(\/\/ #region [^\n]*\n[\s\S]*?\/\/ #endregion[^\n]*)/).map((part, i) => (i % 2 ? part : retag(part))).join('');
+}
+
+console.log('📝 Hash-tagged per-user Redis keys...\n');
+
+const dir = path.join(__dirname, '..', 'workflows');
+let total = 0;
+for (const file of fs.readdirSync(dir).filter(f => f.endsWith('.json')).sort()) {
+  const wf = loadWorkflow(file);
+  const changed = [];
+  for (const node of wf.workflow.nodes) {
+    const before = JSON.stringify(node.parameters);
+    node.parameters = rewrite(node.parameters);
+    if (JSON.stringify(node.parameters) !== before) changed.push(node.name);
+  }
+  if (!changed.length) continue;
+  if (JSON.stringify(wf.workflow).match(/ozon:(user|sess):\{\{ \$/)) {
+    console.error(`❌ ${file}: an untagged key is left`);
+    process.exit(1);
+  }
+  saveWorkflow(wf);
+  total += changed.length;
+  console.log(`✅ ${file}: ${changed.join(', ')}`);
+}
+
+syncAll({ quiet: true });
+console.log(`\n✅ Per-user keys hash-tagged in ${total} nodes`);
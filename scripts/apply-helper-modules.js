@@ -0,0 +1,52 @@
+#!/usr/bin/env node
+/**
+ * refactor(code-nodes): мелкие помощники — в свои модули src/
+ *
+ * Было: ради одного вызова нода встраивала модуль целиком —
+ *   «Ensure CSV/XLSX Document» (parseCacheKey) — весь src/parse-cache.js
+ *   с индексом, LRU и кодеком; «Validate Whitelist», «Generate Main Menu»,
+ *   «Compute ACL Flags» (ACL_*, aclBits) — весь src/user-state.js.
+ *
+ * Стало: src/parse-cache-key.js (PARSE_CACHE_PREFIX, parseCacheKey) и
+ * src/acl-bits.js (ACL_*, aclKey, aclBits) — ноды встраивают только их.
+ * «Pack ACL» (aclBits + packUserState) встраивает оба модуля прав и
+ * состояния.
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, region } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const REGION = rel => new RegExp(`// #region ${rel.replace(/[.]/g, '\\.')}\\n[\\s\\S]*?// #endregion ${rel.replace(/[.]/g, '\\.')}\\n`);
+
+/** Заменяет в ноде регион from на регионы to (пустой массив — убрать). */
+function swapRegion(node, from, to) {
+  const code = node.parameters.jsCode;
+  if (!REGION(from).test(code)) {
+    console.error(`❌ ${node.name}: no ${from} region (already applied?)`);
+    process.exit(1);
+  }
+  node.parameters.jsCode = code.replace(REGION(from), () => to.map(region).join(''));
+}
+
+console.log('📝 Inlining only the helpers each Code node uses...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+for (const name of ['Ensure CSV Document', 'Ensure XLSX Document']) {
+  swapRegion(requireNode(main.workflow, name), 'src/parse-cache.js', ['src/parse-cache-key.js']);
+  console.log(`✅ ${name}: src/parse-cache.js → src/parse-cache-key.js`);
+}
+for (const name of ['Validate Whitelist', 'Generate Main Menu']) {
+  swapRegion(requireNode(main.workflow, name), 'src/user-state.js', ['src/acl-bits.js']);
+  console.log(`✅ ${name}: src/user-state.js → src/acl-bits.js`);
+}
+swapRegion(requireNode(main.workflow, 'Pack ACL'), 'src/user-state.js', ['src/acl-bits.js', 'src/user-state.js']);
+console.log('✅ Pack ACL: src/acl-bits.js + src/user-state.js');
+saveWorkflow(main);
+
+const access = loadWorkflow('ozord_telegram_core_access');
+swapRegion(requireNode(access.workflow, 'Compute ACL Flags'), 'src/user-state.js', ['src/acl-bits.js']);
+saveWorkflow(access);
+console.log('✅ ozord_telegram_core_access → Compute ACL Flags: src/user-state.js → src/acl-bits.js');
+
+syncAll({ quiet: true });
+console.log('\n✅ Code nodes inline only the modules they call');
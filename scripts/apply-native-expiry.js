@@ -0,0 +1,41 @@
+#!/usr/bin/env node
+/**
+ * perf(redis): сессионные ключи со своим TTL, ozord_ttl_guard_for_user удалён
+ *
+ * ozord_ttl_guard_for_user читал files:<uid>, selectedDates:<uid> и
+ * message_id:<uid>, разбирал createdAt в JS и удалял ключи — по одному
+ * пользователю за вызов и по именам, которые ни один workflow больше не
+ * пишет. Вызовов у него не было.
+ *
+ * Теперь каждый сессионный ключ получает TTL при записи (SET ... EX), и
+ * Redis сам забывает сессии без активности. Без TTL оставались:
+ *   - ozon:sess:<uid>:dates (ozord_dates_toggle_and_limit) — 24 ч, как ui;
+ *   - ozon:ui:<uid>:<key>:message_id (ozord_ui_orchestrator) — 24 ч.
+ * Журнал ozon:user:<uid>:taps (push в n8n без TTL), ключи без TTL от
+ * прежних версий и прежние имена подбирает scripts/redis_sweeper.py.
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflow, saveWorkflow, requireNode } = require('./lib/workflow-edit');
+
+const UI_TTL_SEC = 86400;
+
+console.log('📝 Native expiry for session keys...\n');
+
+for (const [file, name] of [
+  ['ozord_dates_toggle_and_limit', 'Persist Selected Dates'],
+  ['ozord_ui_orchestrator', 'Redis Set UI Msg Id'],
+]) {
+  const wf = loadWorkflow(file);
+  const node = requireNode(wf.workflow, name);
+  Object.assign(node.parameters, { expire: true, ttl: UI_TTL_SEC });
+  saveWorkflow(wf);
+  console.log(`✅ ${file}: ${name} → TTL ${UI_TTL_SEC}s`);
+}
+
+const guard = path.join(__dirname, '..', 'workflows', 'ozord_ttl_guard_for_user.n8n.json');
+if (fs.existsSync(guard)) {
+  fs.unlinkSync(guard);
+  console.log('✅ ozord_ttl_guard_for_user removed (no callers; scripts/redis_sweeper.py)');
+}
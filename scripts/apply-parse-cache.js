@@ -0,0 +1,192 @@
+#!/usr/bin/env node
+/**
+ * perf(upload): общий кэш разбора отчётов по file_unique_id
+ *
+ * Было: каждая загрузка CSV — «Get File from Telegram» → «Parse Report File»
+ * с нуля, даже если тот же дневной отчёт FBO уже загрузил другой менеджер.
+ *
+ * Стало (src/parse-cache.js):
+ * - «Ensure CSV Document» считает ключ ozon:parse:f:<file_unique_id>
+ * - Get Parse Cache → Check Parse Cache → Parse Cache Hit?
+ *   - попадание: готовый результат сразу идёт в запись сессии
+ *     (Cache CSV Records → … → календарь), INCR ozon:parse:stats:hit,
+ *     запись становится самой свежей в индексе LRU
+ *   - промах: INCR ozon:parse:stats:miss → скачивание и разбор как раньше;
+ *     после записи сессии результат кладётся в кэш (TTL PARSE_CACHE_TTL_SEC),
+ *     индекс ozon:parse:index вытесняет давно не читанные записи сверх
+ *     PARSE_CACHE_BUDGET_MB
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, region, connect, addNode, redisNode, ifNode, codeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+const { PARSE_CACHE_INDEX_KEY, PARSE_CACHE_TTL_SEC, PARSE_CACHE_BUDGET_MB } = require('../src/parse-cache');
+
+const CACHE = 'src/parse-cache.js';
+const CACHE_KEY = "$('Check Parse Cache').first().json.parse_cache_key";
+
+console.log('📝 Adding the shared parse cache...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Config: TTL и бюджет кэша
+const config = requireNode(wf, 'Config');
+const assignments = config.parameters.assignments.assignments;
+if (assignments.some(a => a.name === 'PARSE_CACHE_TTL_SEC')) {
+  console.error('❌ Config already has PARSE_CACHE_TTL_SEC (already applied?)');
+  process.exit(1);
+}
+assignments.push(
+  { id: 'parse-cache-ttl-field', name: 'PARSE_CACHE_TTL_SEC', value: PARSE_CACHE_TTL_SEC, type: 'number' },
+  { id: 'parse-cache-budget-field', name: 'PARSE_CACHE_BUDGET_MB', value: PARSE_CACHE_BUDGET_MB, type: 'number' },
+);
+console.log('✅ Config: PARSE_CACHE_TTL_SEC, PARSE_CACHE_BUDGET_MB');
+
+// 2. Поиск в кэше до скачивания файла
+const ensure = requireNode(wf, 'Ensure CSV Document');
+ensure.parameters.jsCode = region(CACHE) + ensure.parameters.jsCode;
+replaceInCode(ensure, 'return [{json:$json}];', 'return [{json:{...$json, parse_cache_key:parseCacheKey(d)}}];');
+
+addNode(wf, redisNode(wf, {
+  id: 'get-parse-cache',
+  name: 'Get Parse Cache',
+  position: [-304, 480],
+  operation: 'get',
+  key: '={{ $json.parse_cache_key }}',
+}));
+addNode(wf, codeNode({
+  id: 'check-parse-cache',
+  name: 'Check Parse Cache',
+  position: [-80, 480],
+  jsCode: region(CACHE) +
+    "// Попадание отдаёт тот же json, что и Parse Report File\n" +
+    "const u=$('Extract User Data').first().json; const key=$('Ensure CSV Document').first().json.parse_cache_key;\n" +
+    "const report=$json.value? unpackParsedReport($json.value) : null;\n" +
+    "if(report) return [{json:{...report, hit:true, parse_cache_key:key, chat_id:u.chat_id, user_id:u.user_id}}];\n" +
+    "return [{json:{hit:false, parse_cache_key:key, chat_id:u.chat_id, user_id:u.user_id}}];\n",
+}));
+addNode(wf, ifNode({
+  id: 'parse-cache-hit',
+  name: 'Parse Cache Hit?',
+  position: [144, 480],
+  condition: '={{ $json.hit }}',
+}));
+addNode(wf, redisNode(wf, {
+  id: 'count-parse-cache-hit',
+  name: 'Count Parse Cache Hit',
+  position: [368, 560],
+  operation: 'incr',
+  key: 'ozon:parse:stats:hit',
+}));
+addNode(wf, redisNode(wf, {
+  id: 'get-parse-cache-index-hit',
+  name: 'Get Parse Cache Index (hit)',
+  position: [592, 560],
+  operation: 'get',
+  key: PARSE_CACHE_INDEX_KEY,
+}));
+addNode(wf, codeNode({
+  id: 'touch-parse-cache-index',
+  name: 'Touch Parse Cache Index',
+  position: [816, 560],
+  jsCode: region(CACHE) +
+    `return [{json:{index:JSON.stringify(touchParseCache($json.value, ${CACHE_KEY}))}}];\n`,
+}));
+addNode(wf, redisNode(wf, {
+  id: 'save-parse-cache-index-hit',
+  name: 'Save Parse Cache Index (hit)',
+  position: [1040, 560],
+  operation: 'set',
+  key: PARSE_CACHE_INDEX_KEY,
+  value: '={{ $json.index }}',
+}));
+addNode(wf, redisNode(wf, {
+  id: 'count-parse-cache-miss',
+  name: 'Count Parse Cache Miss',
+  position: [-304, 160],
+  operation: 'incr',
+  key: 'ozon:parse:stats:miss',
+}));
+
+connect(wf, 'Ensure CSV Document', [['Get Parse Cache']]);
+connect(wf, 'Get Parse Cache', [['Check Parse Cache']]);
+connect(wf, 'Check Parse Cache', [['Parse Cache Hit?']]);
+connect(wf, 'Parse Cache Hit?', [['Cache CSV Records', 'Count Parse Cache Hit'], ['Count Parse Cache Miss']]);
+connect(wf, 'Count Parse Cache Hit', [['Get Parse Cache Index (hit)']]);
+connect(wf, 'Get Parse Cache Index (hit)', [['Touch Parse Cache Index']]);
+connect(wf, 'Touch Parse Cache Index', [['Save Parse Cache Index (hit)']]);
+connect(wf, 'Count Parse Cache Miss', [['Get File from Telegram']]);
+requireNode(wf, 'Get File from Telegram').position = [-80, 160];
+console.log('✅ Ensure CSV Document → Get Parse Cache → Parse Cache Hit? (hit: session from cache, miss: download)');
+
+// 3. Запись в кэш после разбора (после записи сессии — пользователь не ждёт)
+addNode(wf, redisNode(wf, {
+  id: 'get-parse-cache-index',
+  name: 'Get Parse Cache Index',
+  position: [368, 400],
+  operation: 'get',
+  key: PARSE_CACHE_INDEX_KEY,
+}));
+addNode(wf, codeNode({
+  id: 'plan-parse-cache',
+  name: 'Plan Parse Cache',
+  position: [592, 400],
+  jsCode: region(CACHE) +
+    "// Допуск в кэш под бюджет: кого вытеснить (LRU) и новый индекс\n" +
+    `const key=${CACHE_KEY}; if(!key) return [];\n` +
+    "const { ttlSec, budgetBytes }=parseCacheSettings($('Config').first().json);\n" +
+    "const payload=packParsedReport($('Parse Report File').first().json);\n" +
+    "const plan=admitParseCache($json.value, key, utf8Length(payload), { ttlSec, budgetBytes });\n" +
+    "if(!plan.admitted) return [];\n" +
+    "return [{json:{ key, payload, ttl:ttlSec, index:JSON.stringify(plan.index), evict:plan.evict }}];\n",
+}));
+addNode(wf, redisNode(wf, {
+  id: 'save-parse-cache',
+  name: 'Save Parse Cache',
+  position: [816, 400],
+  operation: 'set',
+  key: '={{ $json.key }}',
+  value: '={{ $json.payload }}',
+  ttl: '={{ $json.ttl }}',
+}));
+addNode(wf, redisNode(wf, {
+  id: 'save-parse-cache-index',
+  name: 'Save Parse Cache Index',
+  position: [1040, 400],
+  operation: 'set',
+  key: PARSE_CACHE_INDEX_KEY,
+  value: "={{ $('Plan Parse Cache').first().json.index }}",
+}));
+addNode(wf, codeNode({
+  id: 'evicted-parse-cache',
+  name: 'Evicted Parse Cache',
+  position: [1264, 400],
+  jsCode: "return ($('Plan Parse Cache').first().json.evict || []).map(key => ({ json: { key } }));",
+}));
+addNode(wf, redisNode(wf, {
+  id: 'del-evicted-parse-cache',
+  name: 'Del Evicted Parse Cache',
+  position: [1488, 400],
+  operation: 'delete',
+  key: '={{ $json.key }}',
+}));
+connect(wf, 'Parse Report File', [['Cache CSV Records', 'Get Parse Cache Index']]);
+connect(wf, 'Get Parse Cache Index', [['Plan Parse Cache']]);
+connect(wf, 'Plan Parse Cache', [['Save Parse Cache']]);
+connect(wf, 'Save Parse Cache', [['Save Parse Cache Index']]);
+connect(wf, 'Save Parse Cache Index', [['Evicted Parse Cache']]);
+connect(wf, 'Evicted Parse Cache', [['Del Evicted Parse Cache']]);
+console.log('✅ Parse Report File → Get Parse Cache Index → Plan Parse Cache → Save Parse Cache (+ LRU eviction)');
+
+// 4. Calc Initial Month: meta из кэша, если разбора не было
+replaceInCode(requireNode(wf, 'Calc Initial Month'),
+  "'Fetch CSV Meta (for calendar)', 'Parse Report File']",
+  "'Fetch CSV Meta (for calendar)', 'Parse Report File', 'Check Parse Cache']"
+);
+console.log('✅ Calc Initial Month reads meta from Check Parse Cache on a hit');
+
+saveWorkflow(main);
+syncAll({ quiet: true });
+console.log('\n✅ Successfully added the shared parse cache');
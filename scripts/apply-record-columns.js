@@ -0,0 +1,36 @@
+#!/usr/bin/env node
+/**
+ * perf(session): records в колоночном формате (src/record-columns.js)
+ *
+ * Было: ozon:sess:<uid>:csv = { reportType, records: [{order_id, sku, quantity,
+ * price, created_at, status}, ...], totalRecords } — ключи и строки дат
+ * повторяются на каждой строке.
+ *
+ * Стало: словари order_id/sku/status + упакованные колонки кодов,
+ * MSK epoch-минут, количества и цены в копейках. Даты берутся из того же
+ * прохода «Parse Report File», что строит meta и индекс.
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, replaceInCode, region } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Switching ozon:sess:<uid>:csv to the columnar record format...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+const parse = requireNode(wf, 'Parse Report File');
+parse.parameters.jsCode = region('src/record-columns.js') + parse.parameters.jsCode;
+replaceInCode(parse,
+  "const index=createIndexBuilder(); for(const rec of records){ const d=parseAsMsk(rec.created_at); if(!d) continue;",
+  "const index=createIndexBuilder(); const mskMinutes=new Array(records.length); let i=0; for(const rec of records){ const d=parseAsMsk(rec.created_at); mskMinutes[i++]=d?Math.floor(d.getTime()/60000):-1; if(!d) continue;"
+);
+replaceInCode(parse, 'agg:index.build(), chat_id:', 'agg:index.build(), columns:encodeRecords(records, { reportType, mskMinutes }), chat_id:');
+console.log('✅ Parse Report File: encodes records into columns');
+
+requireNode(wf, 'Cache CSV Records').parameters.value = '={{ JSON.stringify($json.columns) }}';
+console.log('✅ Cache CSV Records stores the columnar value');
+
+saveWorkflow(main);
+syncAll({ quiet: true });
+console.log('\n✅ Successfully switched records to the columnar format');
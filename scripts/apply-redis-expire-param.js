@@ -0,0 +1,44 @@
+#!/usr/bin/env node
+/**
+ * fix(redis): TTL сессионных ключей — параметры expire/ttl Redis-ноды
+ *
+ * Было: TTL записывался в options.ttl. Redis-нода n8n такого поля не знает
+ * и молча пишет ключ без срока — ни один SET сессии, UI и кэша разбора не
+ * истекал, хотя apply-native-expiry.js удалил ozord_ttl_guard_for_user как
+ * ненужный.
+ *
+ * Стало: expire: true и ttl: <сек> на верхнем уровне параметров, как у
+ * «Begin Upload» и «Cancel Upload» (incr). scripts/lib/n8n-runner.js больше
+ * не читает options.ttl, поэтому нода в прежнем виде роняет тесты, где
+ * ждут EXPIRE. Ключи, записанные раньше без TTL, добирает
+ * scripts/redis_sweeper.py.
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflow, saveWorkflow } = require('./lib/workflow-edit');
+
+console.log('📝 Redis node TTLs: options.ttl → expire/ttl...\n');
+
+const dir = path.join(__dirname, '..', 'workflows');
+let total = 0;
+for (const file of fs.readdirSync(dir).filter(f => f.endsWith('.json')).sort()) {
+  const wf = loadWorkflow(file);
+  const changed = [];
+  for (const node of wf.workflow.nodes.filter(n => n.type === 'n8n-nodes-base.redis')) {
+    const options = node.parameters.options;
+    if (!options || !('ttl' in options)) continue;
+    const { ttl, ...rest } = options;
+    node.parameters.expire = true;
+    node.parameters.ttl = ttl;
+    if (Object.keys(rest).length) node.parameters.options = rest;
+    else delete node.parameters.options;
+    changed.push(`${node.name} (${ttl})`);
+  }
+  if (!changed.length) continue;
+  saveWorkflow(wf);
+  total += changed.length;
+  console.log(`✅ ${file}: ${changed.join(', ')}`);
+}
+
+console.log(`\n✅ ${total} Redis node(s) set their TTL with expire/ttl`);
@@ -0,0 +1,117 @@
+#!/usr/bin/env node
+/**
+ * perf(calendar): окно слияния рендеров календаря по чату
+ *
+ * Было: каждый тап по дате — полный рендер и editMessageText; пять тапов
+ * за две секунды — пять правок сообщения, из них четыре сразу устаревают
+ * и расходуют лимит Bot API на чат (429 Too Many Requests). Сам тап при
+ * этом не получал answerCallbackQuery, и кнопка «крутилась».
+ *
+ * Стало (src/date-taps.js → RENDER_COALESCE_MS, isLatestDateTap):
+ *   … → Fold Date Taps → Hit Limit?
+ *     ├─ да:  Answer Callback (limit) ─┐
+ *     └─ нет: Answer Callback (tap) ───┴→ Coalesce Window (Wait) → Recheck Date Taps → Take Latest Tap → Ensure Month (smart) → …
+ * Ответ на нажатие уходит сразу. Рендерит только нажатие, последнее в
+ * журнале после окна, — по свежей свёртке. Проверка «Dates Changed? →
+ * Drop Stale Render» после рендера больше не нужна: следующее нажатие
+ * рендерит не раньше, чем через окно.
+ * Окно — поле Config CALENDAR_COALESCE_MS (по умолчанию RENDER_COALESCE_MS).
+ * То же в ozord_dates_toggle_and_limit перед «Persist Selected Dates».
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, region, connect, addNode, redisNode, codeNode, waitNode, removeNode, renameNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+const { RENDER_COALESCE_MS } = require('../src/date-taps');
+
+const answerTap = (sibling, { id, name, position }) => {
+  const node = JSON.parse(JSON.stringify(sibling));
+  node.parameters.jsonBody = "={{ JSON.stringify({ callback_query_id: $('Extract User Data').first().json.callback_query_id }) }}";
+  return Object.assign(node, { id, name, position });
+};
+
+console.log('📝 Coalescing calendar renders per chat...\n');
+
+// ─── Основной workflow ───────────────────────────────────────────────────────
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+const config = requireNode(wf, 'Config').parameters.assignments.assignments;
+if (config.some(a => a.name === 'CALENDAR_COALESCE_MS')) {
+  console.error('❌ Config already has CALENDAR_COALESCE_MS (already applied?)');
+  process.exit(1);
+}
+config.push({ id: 'calendar-coalesce-field', name: 'CALENDAR_COALESCE_MS', value: RENDER_COALESCE_MS, type: 'number' });
+console.log(`✅ Config: CALENDAR_COALESCE_MS = ${RENDER_COALESCE_MS}`);
+
+addNode(wf, answerTap(requireNode(wf, 'Answer Callback (limit)'), { id: 'answer-callback-tap', name: 'Answer Callback (tap)', position: [-80, 664] }));
+addNode(wf, waitNode({
+  id: 'coalesce-window',
+  name: 'Coalesce Window',
+  position: [144, 568],
+  amount: `={{ Number($('Config').first().json.CALENDAR_COALESCE_MS ?? ${RENDER_COALESCE_MS}) / 1000 }}`,
+}));
+// Старая проверка после рендера — её место заняло окно
+for (const name of ['Dates Changed?', 'Recheck Date Taps', 'Drop Stale Render']) {
+  requireNode(wf, name);
+  removeNode(wf, name);
+}
+addNode(wf, redisNode(wf, {
+  id: 'recheck-date-taps-window',
+  name: 'Recheck Date Taps',
+  position: [368, 568],
+  operation: 'get',
+  key: "=ozon:user:{{ $('Extract User Data').first().json.user_id }}:taps",
+  propertyName: 'taps',
+  extra: { keyType: 'list' },
+}));
+addNode(wf, codeNode({
+  id: 'take-latest-tap',
+  name: 'Take Latest Tap',
+  position: [592, 568],
+  jsCode: region('src/date-taps.js') +
+    '// Окно слияния: рендерит только последнее нажатие журнала — по свежей свёртке\n' +
+    "const u = $('Extract User Data').first().json;\n" +
+    'if (!isLatestDateTap($json.taps, u.callback_query_id)) return [];\n' +
+    'const { selected, version } = foldDateTaps($json.taps);\n' +
+    'return [{ json: { user_id: u.user_id, selectedDates: selected, datesVersion: version } }];\n',
+}));
+connect(wf, 'Hit Limit?', [['Answer Callback (limit)'], ['Answer Callback (tap)']]);
+connect(wf, 'Answer Callback (limit)', [['Coalesce Window']]);
+connect(wf, 'Answer Callback (tap)', [['Coalesce Window']]);
+connect(wf, 'Coalesce Window', [['Recheck Date Taps']]);
+connect(wf, 'Recheck Date Taps', [['Take Latest Tap']]);
+connect(wf, 'Take Latest Tap', [['Ensure Month (smart)']]);
+connect(wf, 'Render Calendar (smart)', [['Save Calendar State']]);
+console.log('✅ Hit Limit? → Answer Callback (limit | tap) → Coalesce Window → Recheck Date Taps → Take Latest Tap → Ensure Month (smart)');
+saveWorkflow(main);
+
+// ─── ozord_dates_toggle_and_limit ────────────────────────────────────────────
+const sub = loadWorkflow('ozord_dates_toggle_and_limit');
+const swf = sub.workflow;
+addNode(swf, answerTap(requireNode(swf, 'AnswerCallback (limit 3)'), { id: 'answer_tap', name: 'AnswerCallback (tap)', position: [1140, 380] }));
+addNode(swf, waitNode({ id: 'coalesce_window', name: 'Coalesce Window', position: [1380, 300], amount: RENDER_COALESCE_MS / 1000 }));
+const take = renameNode(swf, 'Drop Stale Render', 'Take Latest Tap');
+take.position = [1860, 300];
+take.parameters.jsCode = region('src/date-taps.js') +
+  '// Окно слияния: рендерит только последнее нажатие журнала — по свежей свёртке\n' +
+  "const p = $('Parse Callback (date:YYYY-MM-DD)').first().json;\n" +
+  'if (!isLatestDateTap($json.taps, p.callback_query_id)) return [];\n' +
+  'const { selected, version } = foldDateTaps($json.taps);\n' +
+  "const reason = $('Toggle with Limit (max 3)').first().json.reason;\n" +
+  'return [{ json: { changed: reason !== \'limit\', reason, selected: selected.slice().sort(), version } }];\n';
+requireNode(swf, 'Recheck Date Taps').position = [1620, 300];
+requireNode(swf, 'Persist Selected Dates').position = [2100, 300];
+requireNode(swf, 'Re-render Calendar Grid').position = [2340, 300];
+connect(swf, 'Is Limit Hit?', [['AnswerCallback (limit 3)'], ['AnswerCallback (tap)']]);
+connect(swf, 'AnswerCallback (limit 3)', [['Coalesce Window']]);
+connect(swf, 'AnswerCallback (tap)', [['Coalesce Window']]);
+connect(swf, 'Coalesce Window', [['Recheck Date Taps']]);
+connect(swf, 'Recheck Date Taps', [['Take Latest Tap']]);
+connect(swf, 'Take Latest Tap', [['Persist Selected Dates']]);
+saveWorkflow(sub);
+console.log('✅ ozord_dates_toggle_and_limit: Answer → Coalesce Window → Recheck Date Taps → Take Latest Tap → Persist → Re-render');
+
+syncAll({ quiet: true });
+console.log('\n✅ Calendar renders are coalesced per chat');
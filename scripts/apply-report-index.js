@@ -0,0 +1,122 @@
+#!/usr/bin/env node
+/**
+ * perf(stats): агрегатный индекс «день × SKU» вместо пересчёта records
+ *
+ * Было: на каждое «Готово» статистика GET-ит ozon:sess:<uid>:csv (все records),
+ * парсит даты каждой строки и фильтрует по выбранным дням — O(records).
+ *
+ * Стало:
+ * - «Parse Report File» за тот же проход строит индекс (src/report-index.js)
+ *   и пишет его в ozon:sess:<uid>:agg (TTL 72ч)
+ * - «Calculate Statistics» (main) и «Calculate Stats» (stats engine) читают
+ *   только :agg и суммируют ячейки выбранных дней — O(дни × SKU)
+ * - классификация статусов одна на всех: точное совпадение, ё == е
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, renameNode, replaceInCode, region,
+  addNode, insertAfter, redisNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const TTL_72H = 259200;
+const AGG_KEY = uidExpr => `=ozon:sess:{{ ${uidExpr} }}:agg`;
+const UID = "$('Extract User Data').first().json.user_id";
+const INDEX = 'src/report-index.js';
+
+console.log('📝 Adding per-day × SKU aggregate index...\n');
+
+// ============================================================================
+// Main workflow
+// ============================================================================
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Parse Report File: индекс строится в том же цикле, что и dayTotals
+const parse = requireNode(wf, 'Parse Report File');
+parse.parameters.jsCode = region(INDEX) + parse.parameters.jsCode;
+replaceInCode(parse,
+  "const setDates=new Set(); const dayTotals={}; for(const rec of records){ const d=parseAsMsk(rec.created_at); if(!d) continue; const day=d.toISOString().split('T')[0]; setDates.add(day); addDayTotal(dayTotals, day, rec.quantity, rec.price, rec.status); }\n",
+  "const setDates=new Set(); const dayTotals={}; const index=createIndexBuilder(); for(const rec of records){ const d=parseAsMsk(rec.created_at); if(!d) continue; const day=d.toISOString().split('T')[0]; setDates.add(day); addDayTotal(dayTotals, day, rec.quantity, rec.price, rec.status); index.add(day, rec.sku, rec.quantity, rec.price, rec.status); }\n"
+);
+replaceInCode(parse, 'totalRecords:records.length, meta, chat_id:', 'totalRecords:records.length, meta, agg:index.build(), chat_id:');
+console.log('✅ Parse Report File: builds the aggregate index');
+
+// 2. Индекс → ozon:sess:<uid>:agg
+addNode(wf, redisNode(wf, {
+  id: 'cache-csv-aggregates',
+  name: 'Cache CSV Aggregates',
+  position: [368, 40],
+  operation: 'set',
+  key: AGG_KEY('$json.user_id'),
+  value: '={{ JSON.stringify($json.agg) }}',
+  ttl: TTL_72H,
+}));
+insertAfter(wf, 'Cache CSV Records', 'Cache CSV Aggregates');
+console.log('✅ Cache CSV Aggregates → ozon:sess:<uid>:agg');
+
+// 3. Статистика по «Готово» читает индекс
+requireNode(wf, 'Get Cached Data (for stats)').parameters.key = AGG_KEY('$json.user_id');
+const stats = requireNode(wf, 'Calculate Statistics');
+stats.parameters.jsCode = region(INDEX) +
+  "// Индекс дневной гранулярности; Handle Done всегда передаёт полный день 00:00–23:59\n" +
+  "function calc(index,dates,st,et){ const bySku={}; for(const [sku,a] of aggregateBySku(index,dates)){ bySku[sku]={totalOrders:a.orders,cancellations:a.cancellations,totalRevenue:a.revenue,weightedPriceSum:a.revenue,weightedQuantitySum:a.revenueQty,avgPrice:a.revenueQty>0?a.revenue/a.revenueQty:0}; } if(!Object.keys(bySku).length) return {date:dates,startTime:st,endTime:et,totalOrders:0,totalCancellations:0,totalRevenue:0,skuStats:{},message:'Нет данных за указанный период'}; let tO=0,tC=0,tR=0; Object.values(bySku).forEach(s=>{ tO+=s.totalOrders; tC+=s.cancellations; tR+=s.totalRevenue;}); return {date:dates,startTime:st,endTime:et,totalOrders:tO,totalCancellations:tC,totalRevenue:tR,skuStats:bySku}; }\n" +
+  "let index=null; try{ index=JSON.parse($('Get Cached Data (for stats)').first().json.value||'null'); }catch(e){}\n" +
+  "const dates=$('Handle Done').first().json.selectedDates||[]; const st=$('Handle Done').first().json.startTime; const et=$('Handle Done').first().json.endTime; const stats=calc(index, dates, st, et);\n" +
+  stats.parameters.jsCode.slice(stats.parameters.jsCode.indexOf('function fmt(s){'));
+console.log('✅ Calculate Statistics sums index cells of the selected days');
+
+// 4. file:clear удаляет и индекс
+for (const [after, name, id, position, uid] of [
+  ['Del csv_meta', 'Del csv_agg', 'del-csv-agg', [1040, 1200], UID],
+  ['Del CSV Meta', 'Del CSV Aggregates', 'del-csv-agg-cache', [2280, 1200], '$json.user_id'],
+]) {
+  addNode(wf, redisNode(wf, { id, name, position, operation: 'delete', key: AGG_KEY(uid) }));
+  insertAfter(wf, after, name);
+}
+console.log('✅ file:clear deletes ozon:sess:<uid>:agg');
+
+saveWorkflow(main);
+
+// ============================================================================
+// ozord_orders_stats_engine
+// ============================================================================
+const engine = loadWorkflow('ozord_orders_stats_engine');
+const get = renameNode(engine.workflow, 'Get CSV Session (records)', 'Get CSV Session (aggregates)');
+get.parameters.key = AGG_KEY('$json.user_id');
+const calcStats = requireNode(engine.workflow, 'Calculate Stats');
+calcStats.parameters.jsCode = region(INDEX) +
+  "// INPUT: { user_id, chat_id, selectedDates[], session }\n" +
+  "// Aggregate index from Redis (ozon:sess:<uid>:agg): { v, skus, days: { day: [[skuIdx, orders, revenueQty, cancellations, revenueKop]] } }\n" +
+  "// Specs: UTC -> MSK (applied at upload), cancellations include returns, revenue statuses list, avg price is weighted by quantity.\n" +
+  "// — rules: ozon_bot_Заказы_spec.txt\n" +
+  "\n" +
+  "let index=null;\n" +
+  "try{ const raw = $('Get CSV Session (aggregates)').first().json.value; index = raw? JSON.parse(raw) : null; }catch(e){ index=null; }\n" +
+  "const selected = Array.isArray($json.selectedDates)? $json.selectedDates : [];\n" +
+  "\n" +
+  "// finalize & overall totals\n" +
+  "const skuStats = {};\n" +
+  "let tOrders=0,tCanc=0,tRev=0;\n" +
+  "for(const [sku, a] of aggregateBySku(index, selected)){\n" +
+  "  const avgPrice = a.revenueQty>0 ? a.revenue/a.revenueQty : 0;\n" +
+  "  skuStats[sku] = { totalOrders:a.revenueQty, cancellations:a.cancellations, avgPrice, totalRevenue:a.revenue };\n" +
+  "  tOrders += a.revenueQty; tCanc += a.cancellations; tRev += a.revenue;\n" +
+  "}\n" +
+  "\n" +
+  "const result = { date: selected, startTime: '00:00', endTime: '24:00', totalOrders:tOrders, totalCancellations:tCanc, totalRevenue:tRev, skuStats };\n" +
+  "return [{ json: { chat_id: $json.chat_id, stats: result } }];";
+saveWorkflow(engine);
+console.log('✅ ozord_orders_stats_engine reads ozon:sess:<uid>:agg');
+
+// ============================================================================
+// ozord_files_session_and_clear
+// ============================================================================
+const files = loadWorkflow('ozord_files_session_and_clear');
+addNode(files.workflow, redisNode(files.workflow, { id: 'clear_agg', name: 'Del agg (session)', position: [-380, 120], operation: 'delete', key: AGG_KEY(UID) }));
+insertAfter(files.workflow, 'Del meta (session)', 'Del agg (session)');
+saveWorkflow(files);
+console.log('✅ ozord_files_session_and_clear: file:clear deletes :agg');
+
+syncAll({ quiet: true });
+console.log('\n✅ Successfully added the aggregate index');
@@ -0,0 +1,58 @@
+#!/usr/bin/env node
+/**
+ * perf(parse): заголовок отчёта → план колонок один раз на файл
+ *
+ * Было: «Parse Report File» пересобирал каждую строку с очищенными ключами
+ * (cleanK на каждый ключ), а pick() на каждое поле каждой строки чистил
+ * имена кандидатов и искал колонку через keys.find с toLowerCase.
+ * Тип отчёта угадывался по нескольким колонкам (FBS-выгрузка с «Оценкой
+ * отгрузки» определялась как FBO).
+ *
+ * Стало: схема (тип + версия) выбирается по реестру src/report-schemas.js
+ * (генерируется из Ozon_*_structure.txt), src/report-schema.js компилирует
+ * для каждого поля список готовых ключей колонок. В цикле — только
+ * r[key] и trim нужных 6 значений. Неизвестная раскладка заголовка —
+ * одно предупреждение на файл (schema.notice).
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, region } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Compiling report headers into a column plan...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const parse = requireNode(main.workflow, 'Parse Report File');
+const code = parse.parameters.jsCode;
+const from = code.indexOf('const RE_BOM=');
+const to = code.indexOf('const setDates=');
+if (from < 0 || to < 0) {
+  console.error('❌ Parse Report File: row mapping block not found');
+  process.exit(1);
+}
+
+const mapping =
+  "const RE_BOM=/^\\uFEFF/;\n" +
+  "const toNum=v=>{const s=String(v??'').replace(/\\s/g,'').replace(',','.'); const n=Number(s); return Number.isFinite(n)?n:0;};\n" +
+  "// Заголовок → план колонок один раз на файл (src/report-schema.js); в цикле только r[key]\n" +
+  "const rows=[]; for(const it of $input.all()){ const r=it.json.row??it.json; if(r) rows.push(r); }\n" +
+  "const plan=compileHeaderPlan(Object.keys(rows[0]||{}), REPORT_SCHEMAS);\n" +
+  "if(plan.notice) console.warn(plan.notice);\n" +
+  "const reportType=plan.reportType;\n" +
+  "const val=(r,keys)=>{ for(const k of keys){ const v=r[k]; if(v===undefined||v===null||v==='') continue; const s=String(v).replace(RE_BOM,'').trim(); if(s!=='') return s; } return ''; };\n" +
+  "const kOrder=plan.fields.order_id.keys, kSku=plan.fields.sku.keys, kQty=plan.fields.quantity.keys, kPrice=plan.fields.price.keys, kDate=plan.fields.created_at.keys, kStatus=plan.fields.status.keys;\n" +
+  "const records=[]; for(const r of rows){ const order_id=val(r,kOrder); const sku=val(r,kSku); if(!order_id||!sku) continue; const q=val(r,kQty); const p=val(r,kPrice); records.push({order_id, sku, quantity:toNum(q===''?1:q), price:toNum(p===''?0:p), created_at:val(r,kDate), status:val(r,kStatus).toLowerCase()}); }\n";
+
+parse.parameters.jsCode = region('src/report-schemas.js') + region('src/report-schema.js') +
+  code.slice(0, from) + mapping + code.slice(to);
+const out = "totalRecords:records.length, meta, ";
+if (!parse.parameters.jsCode.includes(out)) {
+  console.error('❌ Parse Report File: output fragment not found');
+  process.exit(1);
+}
+parse.parameters.jsCode = parse.parameters.jsCode.replace(out,
+  "totalRecords:records.length, schema:{ id:plan.schemaId, version:plan.version, exact:plan.exact, notice:plan.notice }, meta, ");
+saveWorkflow(main);
+console.log('✅ Parse Report File: compiled header plan, positional field access');
+
+syncAll({ quiet: true });
+console.log('\n✅ Successfully switched parsing to the schema registry');
@@ -0,0 +1,126 @@
+#!/usr/bin/env node
+/**
+ * perf(redis): большие отчёты — в локальный колоночный файл, в Redis указатель
+ *
+ * Было: колонки :csv и получасы :hist отчёта на сотни тысяч строк лежат в
+ * Redis целиком (десятки МБ на пользователя даже после сжатия).
+ *
+ * Стало (src/report-spill.js):
+ * - Config: SPILL_DIR (каталог файлов, пусто — выключено) и SPILL_MIN_MB
+ *   (порог по размеру колонок);
+ * - Encode Session Values пишет колонки больше порога в
+ *   <SPILL_DIR>/<uid>-<поколение>.ocol, в :csv и :hist кладёт указатель;
+ *   прежние файлы пользователя удаляются;
+ * - Calculate Statistics и Calculate Stats (ozord_orders_stats_engine):
+ *   окно времени по указателю — получасы только выбранных дней из файла;
+ *   полный день, как и раньше, из :agg;
+ * - Merge Session Report читает колонки и получасы из файла целиком;
+ * - Plan Parse Cache не кладёт в общий кэш отчёты, которые уходят в файл;
+ * - file:clear (основной workflow и ozord_files_session_and_clear):
+ *   Remove Spill Files удаляет файлы пользователя.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, region, insertAfter, addNode, codeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+const { SPILL_DIR, SPILL_MIN_MB } = require('../src/report-spill');
+
+const SPILL = region('src/report-spill.js');
+const COLUMNS = region('src/record-columns.js');
+const REMOVE_CODE = SPILL +
+  "// file:clear: файлы вынесенного отчёта уходят вместе с ключами сессии\n" +
+  "removeSpillFiles(spillSettings($('Config').first().json), $('Extract User Data').first().json.user_id);\n" +
+  "return $input.all();\n";
+
+console.log('📝 Spilling large reports to local columnar files...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Config: каталог и порог
+const assignments = requireNode(wf, 'Config').parameters.assignments.assignments;
+if (assignments.some(a => a.name === 'SPILL_DIR')) {
+  console.error('❌ Config already has SPILL_DIR (already applied?)');
+  process.exit(1);
+}
+assignments.push(
+  { id: 'spill-dir-field', name: 'SPILL_DIR', value: SPILL_DIR, type: 'string' },
+  { id: 'spill-min-mb-field', name: 'SPILL_MIN_MB', value: SPILL_MIN_MB, type: 'number' },
+);
+console.log('✅ Config: SPILL_DIR, SPILL_MIN_MB');
+
+// 2. Запись сессии: большие колонки — в файл, в :csv/:hist — указатель
+const encode = requireNode(wf, 'Encode Session Values');
+encode.parameters.jsCode = COLUMNS + region('src/report-index.js') + SPILL + encode.parameters.jsCode;
+replaceInCode(encode,
+  "// :csv/:agg/:hist в кодеке по типу ключа; большие значения сжимаются\n" +
+  "const codecs=sessionCodecs($('Config').first().json);\n",
+  "// :csv/:agg/:hist в кодеке по типу ключа; большие значения сжимаются,\n" +
+  "// колонки больше SPILL_MIN_MB уходят в файл — в :csv и :hist указатель на него\n" +
+  "const config=$('Config').first().json; const codecs=sessionCodecs(config); const spillCfg=spillSettings(config);\n" +
+  "const spill=spillReport(spillCfg, $json.user_id, $json.upload_gen, $json.columns);\n" +
+  "if(!spill) removeSpillFiles(spillCfg, $json.user_id);\n" +
+  "const pointer=spill && JSON.stringify(spill);\n");
+replaceInCode(encode,
+  "csv_value:encodeSessionValue($json.columns, { codec:codecs.csv }),",
+  "csv_value:pointer || encodeSessionValue($json.columns, { codec:codecs.csv }),");
+replaceInCode(encode,
+  "hist_value:encodeSessionValue($json.hist, { codec:codecs.hist }) }}];",
+  "hist_value:pointer || encodeSessionValue($json.hist, { codec:codecs.hist }) }}];");
+console.log('✅ Encode Session Values: spillReport → pointer in :csv and :hist');
+
+// 3. Статистика: окно времени по указателю — из файла за выбранные дни
+const stats = requireNode(wf, 'Calculate Statistics');
+stats.parameters.jsCode = COLUMNS + SPILL + stats.parameters.jsCode;
+replaceInCode(stats,
+  'const stats=calc(index, hist, dates, st, et);',
+  "// Вынесенный отчёт: получасы выбранных дней читаются из файла, полный день — из :agg\n" +
+  "let lost=false; if(isSpillPointer(hist)){ hist=isFullDay(st,et)? null : spillHistogram(hist, index, dates); lost=!isFullDay(st,et) && !hist; }\n" +
+  "const stats=lost? {date:dates,startTime:st,endTime:et,totalOrders:0,totalCancellations:0,totalRevenue:0,skuStats:{},message:'Файл отчёта больше недоступен — загрузите отчёт заново'} : calc(index, hist, dates, st, et);");
+
+// 4. Слияние: база из файла целиком
+const merge = requireNode(wf, 'Merge Session Report');
+merge.parameters.jsCode = merge.parameters.jsCode.replace('// #region src/session-merge.js', SPILL + '// #region src/session-merge.js');
+replaceInCode(merge,
+  "const merged=mergeSessionReport({ columns:read($json.session_csv), agg:read($json.session_agg), hist:read($json.session_hist), meta:",
+  "// Вынесенный отчёт: колонки и получасы сессии — из файла\n" +
+  "let columns=read($json.session_csv), hist=read($json.session_hist); const agg=read($json.session_agg);\n" +
+  "if(isSpillPointer(columns)){ hist=spillHistogram(columns, agg); columns=spillColumns(columns); }\n" +
+  "const merged=mergeSessionReport({ columns, agg, hist, meta:");
+console.log('✅ Calculate Statistics, Merge Session Report: read the spilled file');
+
+// 5. Общий кэш разбора: отчёт, который уйдёт в файл, в Redis не копируется
+const plan = requireNode(wf, 'Plan Parse Cache');
+plan.parameters.jsCode = plan.parameters.jsCode.replace('// #region src/parse-cache.js', SPILL + '// #region src/parse-cache.js');
+replaceInCode(plan,
+  "const key=$('Check Parse Cache').first().json.parse_cache_key; if(!key) return [];",
+  "const key=$('Check Parse Cache').first().json.parse_cache_key; if(!key) return [];\n" +
+  "if(spillWanted(spillSettings($('Config').first().json), $('Parse Report File').first().json.columns)) return [];");
+console.log('✅ Plan Parse Cache: spilled reports stay out of the shared cache');
+
+// 6. file:clear
+addNode(wf, codeNode({ id: 'remove-spill-files', name: 'Remove Spill Files', position: [1712, 1320], jsCode: REMOVE_CODE }));
+insertAfter(wf, 'Cancel Upload', 'Remove Spill Files');
+console.log('✅ file:clear: Cancel Upload → Remove Spill Files');
+saveWorkflow(main);
+
+const files = loadWorkflow('ozord_files_session_and_clear.n8n.json');
+addNode(files.workflow, codeNode({ id: 'remove-spill-files', name: 'Remove Spill Files', position: [-140, 40], jsCode: REMOVE_CODE }));
+insertAfter(files.workflow, 'Del hist (session)', 'Remove Spill Files');
+saveWorkflow(files);
+console.log('✅ ozord_files_session_and_clear: Del hist (session) → Remove Spill Files');
+
+const engine = loadWorkflow('ozord_orders_stats_engine.n8n.json');
+const calc = requireNode(engine.workflow, 'Calculate Stats');
+calc.parameters.jsCode = COLUMNS + SPILL + calc.parameters.jsCode;
+replaceInCode(calc,
+  '\n// finalize & overall totals',
+  "\n// Spilled report (src/report-spill.js): half-hour slots of the selected days are read from the file\n" +
+  "if(isSpillPointer(hist)) hist = isFullDay(startTime, endTime)? null : spillHistogram(hist, index, selected);\n" +
+  '\n// finalize & overall totals');
+saveWorkflow(engine);
+console.log('✅ ozord_orders_stats_engine → Calculate Stats: spilled histogram');
+
+syncAll({ quiet: true });
+console.log('\n✅ Successfully added report spill files');
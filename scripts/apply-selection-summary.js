@@ -0,0 +1,56 @@
+#!/usr/bin/env node
+/**
+ * perf(calendar): «Итого» выбора ведётся свёрткой журнала нажатий
+ *
+ * Было: «Compute Selection Summary» на каждый рендер суммировал
+ * meta.dayTotals по всем выбранным дням (а до ozon:sess:<uid>:meta —
+ * проходил parseAsMsk по всем records).
+ *
+ * Стало (src/date-taps.js): foldDateTaps с dayTotals прибавляет вклад дня
+ * на «added» и вычитает на «removed», сброс и истечение выбора обнуляют
+ * итог — O(1) на нажатие. «Take Latest Tap» отдаёт итог вместе с выбором,
+ * «Ensure Month (smart)» пробрасывает его на маршрутах тоггла, «Compute
+ * Selection Summary» считает по выбору только без свёртки (открытие
+ * календаря, навигация, загрузка).
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, replaceInCode, region } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Folding the selection summary with the date taps...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+const summary = requireNode(wf, 'Compute Selection Summary');
+if (summary.parameters.jsCode.includes('src/date-taps.js')) {
+  console.error('❌ Compute Selection Summary already uses src/date-taps.js (already applied?)');
+  process.exit(1);
+}
+
+const take = requireNode(wf, 'Take Latest Tap');
+replaceInCode(take, 'const { selected, version } = foldDateTaps($json.taps);',
+  "// «Итого» ведёт та же свёртка: ±вклад дня из meta.dayTotals на каждый тоггл\n" +
+  "const meta = $('User Context').first().json.ctx.meta || {};\n" +
+  'const { selected, version, summary } = foldDateTaps($json.taps, { dayTotals: meta.dayTotals || {} });');
+replaceInCode(take, 'selectedDates: selected, datesVersion: version }', 'selectedDates: selected, datesVersion: version, selectionSummary: summary }');
+
+const ensure = requireNode(wf, 'Ensure Month (smart)');
+replaceInCode(ensure, 'dayTotals: meta.dayTotals || {}, calendar_msg_id',
+  'dayTotals: meta.dayTotals || {}, selectionSummary: datesVersion !== null ? $json.selectionSummary || null : null, calendar_msg_id');
+
+summary.parameters.jsCode = region('src/date-taps.js') +
+  '// «Итого»: после тоггла — из свёртки журнала (±день на нажатие); без свёртки — по выбору из meta.dayTotals\n' +
+  'const selected = Array.isArray($json.selectedDates) ? $json.selectedDates : [];\n' +
+  'const selectionSummary = $json.selectionSummary || summarizeSelection($json.dayTotals, selected);\n' +
+  'return [{\n' +
+  '  json: {\n' +
+  '    ...$json,\n' +
+  '    selectedDates: selected,\n' +
+  '    selectionSummary\n' +
+  '  }\n' +
+  '}];';
+
+saveWorkflow(main);
+syncAll({ quiet: true });
+console.log('✅ Take Latest Tap → Ensure Month (smart) → Compute Selection Summary carry the folded summary');
@@ -0,0 +1,43 @@
+#!/usr/bin/env node
+/**
+ * refactor(codec): сжатие значений сессии — zlib вместо своего DEFLATE
+ *
+ * Было: src/deflate.js — свой deflateRaw/inflate (430 строк) в каждой ноде,
+ * которая пишет или читает :csv/:agg/:hist и кэш разбора, потому что в
+ * Code-ноде якобы нет zlib.
+ *
+ * Стало: src/session-codec.js берёт require('zlib'). Встроенный модуль
+ * Code-ноде разрешается так же, как fs для выноса отчёта на диск:
+ * NODE_FUNCTION_ALLOW_BUILTIN=fs,zlib. Формат ~d1:<base64 raw DEFLATE> не
+ * меняется; без zlib кодек пишет JSON. Регион src/deflate.js уходит из нод,
+ * inflate листов XLSX вернулся в src/xlsx-stream.js.
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflow, saveWorkflow } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const DEFLATE_REGION = /\/\/ #region src\/deflate\.js\n[\s\S]*?\/\/ #endregion src\/deflate\.js\n/;
+
+console.log('📝 Session codec: src/deflate.js → zlib...\n');
+
+const dir = path.join(__dirname, '..', 'workflows');
+let total = 0;
+for (const file of fs.readdirSync(dir).filter(f => f.endsWith('.json')).sort()) {
+  const wf = loadWorkflow(file);
+  const changed = [];
+  for (const node of wf.workflow.nodes.filter(n => n.type === 'n8n-nodes-base.code')) {
+    const code = node.parameters.jsCode || '';
+    if (!DEFLATE_REGION.test(code)) continue;
+    node.parameters.jsCode = code.replace(DEFLATE_REGION, '');
+    changed.push(node.name);
+  }
+  if (!changed.length) continue;
+  saveWorkflow(wf);
+  total += changed.length;
+  console.log(`✅ ${file}: ${changed.join(', ')}`);
+}
+
+syncAll({ quiet: true });
+console.log(`\n✅ ${total} node(s) dropped the src/deflate.js region`);
@@ -0,0 +1,111 @@
+#!/usr/bin/env node
+/**
+ * perf(redis): сжатые значения сессии с заголовком кодека
+ *
+ * Было: ozon:sess:<uid>:csv / :agg / :hist и ozon:parse:f:<id> — JSON-текст
+ * (JSON.stringify в выражении Redis-ноды), ключи в сотни КБ–десятки МБ.
+ *
+ * Стало (src/session-codec.js, src/deflate.js):
+ * - Upload Current? → Encode Session Values → Cache CSV Records/Aggregates/
+ *   Histogram: значения в кодеке по типу ключа (Config SESSION_CODECS),
+ *   большие — «~d1:» + base64(raw DEFLATE), маленькие остаются JSON;
+ * - Plan Parse Cache кладёт в общий кэш значение в кодеке parse, бюджет
+ *   LRU считается по сжатому размеру;
+ * - читатели (Calculate Statistics, Merge Session Report, Check Parse Cache,
+ *   Calculate Stats в ozord_orders_stats_engine) — decodeSessionValue:
+ *   понимают и сжатые значения, и JSON, записанный до этой правки;
+ * - inflate XLSX переехал из src/xlsx-stream.js в src/deflate.js, Parse Report
+ *   File встраивает его регионом.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, region, insertAfter, addNode, codeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+const { SESSION_CODECS } = require('../src/session-codec');
+
+const CODEC = region('src/deflate.js') + region('src/session-codec.js');
+
+console.log('📝 Adding the session value codec...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Config: кодек по типу ключа
+const assignments = requireNode(wf, 'Config').parameters.assignments.assignments;
+if (assignments.some(a => a.name === 'SESSION_CODECS')) {
+  console.error('❌ Config already has SESSION_CODECS (already applied?)');
+  process.exit(1);
+}
+assignments.push({
+  id: 'session-codecs-field',
+  name: 'SESSION_CODECS',
+  value: Object.entries(SESSION_CODECS).map(([part, codec]) => `${part}=${codec}`).join(','),
+  type: 'string',
+});
+console.log('✅ Config: SESSION_CODECS');
+
+// 2. Запись сессии: значения кодируются один раз перед тремя SET
+addNode(wf, codeNode({
+  id: 'encode-session-values',
+  name: 'Encode Session Values',
+  position: [368, 280],
+  jsCode: CODEC +
+    "// :csv/:agg/:hist в кодеке по типу ключа; большие значения сжимаются\n" +
+    "const codecs=sessionCodecs($('Config').first().json);\n" +
+    "return [{json:{ user_id:$json.user_id, chat_id:$json.chat_id,\n" +
+    "  csv_value:encodeSessionValue($json.columns, { codec:codecs.csv }),\n" +
+    "  agg_value:encodeSessionValue($json.agg, { codec:codecs.agg }),\n" +
+    "  hist_value:encodeSessionValue($json.hist, { codec:codecs.hist }) }}];\n",
+}));
+insertAfter(wf, 'Upload Current?', 'Encode Session Values');
+for (const [name, field] of [['Cache CSV Records', 'csv'], ['Cache CSV Aggregates', 'agg'], ['Cache CSV Histogram', 'hist']]) {
+  requireNode(wf, name).parameters.value = `={{ $json.${field}_value }}`;
+}
+console.log('✅ Upload Current? → Encode Session Values → Cache CSV Records (values in the codec)');
+
+// 3. Читатели сессии
+const stats = requireNode(wf, 'Calculate Statistics');
+stats.parameters.jsCode = CODEC + stats.parameters.jsCode;
+replaceInCode(stats,
+  "let index=null; try{ index=JSON.parse($('Get Cached Data (for stats)').first().json.value||'null'); }catch(e){}",
+  "let index=null; try{ index=decodeSessionValue($('Get Cached Data (for stats)').first().json.value); }catch(e){}");
+replaceInCode(stats,
+  "let hist=null; try{ hist=JSON.parse($('Get Cached Hist (for stats)').first().json.value||'null'); }catch(e){}",
+  "let hist=null; try{ hist=decodeSessionValue($('Get Cached Hist (for stats)').first().json.value); }catch(e){}");
+
+const merge = requireNode(wf, 'Merge Session Report');
+merge.parameters.jsCode = CODEC + merge.parameters.jsCode;
+replaceInCode(merge,
+  "const read=v=>{ try{ return v? JSON.parse(v) : null; }catch(e){ return null; } };",
+  'const read=decodeSessionValue;');
+
+for (const name of ['Check Parse Cache', 'Plan Parse Cache']) {
+  const node = requireNode(wf, name);
+  node.parameters.jsCode = CODEC + node.parameters.jsCode;
+}
+replaceInCode(requireNode(wf, 'Plan Parse Cache'),
+  "const payload=packParsedReport($('Parse Report File').first().json);",
+  "const payload=packParsedReport($('Parse Report File').first().json, { codec:sessionCodecs($('Config').first().json).parse });");
+console.log('✅ Calculate Statistics, Merge Session Report, Check/Plan Parse Cache: decodeSessionValue');
+
+// 4. Parse Report File: inflate XLSX из src/deflate.js
+const parse = requireNode(wf, 'Parse Report File');
+parse.parameters.jsCode = region('src/deflate.js') + parse.parameters.jsCode;
+console.log('✅ Parse Report File: src/deflate.js region');
+saveWorkflow(main);
+
+const engine = loadWorkflow('ozord_orders_stats_engine.n8n.json');
+const calc = requireNode(engine.workflow, 'Calculate Stats');
+calc.parameters.jsCode = CODEC + calc.parameters.jsCode;
+replaceInCode(calc,
+  "try{ const raw = $('Get CSV Session (aggregates)').first().json.value; index = raw? JSON.parse(raw) : null; }catch(e){ index=null; }",
+  "try{ index = decodeSessionValue($('Get CSV Session (aggregates)').first().json.value); }catch(e){ index=null; }");
+replaceInCode(calc,
+  "try{ const raw = $('Get CSV Session (hist)').first().json.value; hist = raw? JSON.parse(raw) : null; }catch(e){ hist=null; }",
+  "try{ hist = decodeSessionValue($('Get CSV Session (hist)').first().json.value); }catch(e){ hist=null; }");
+saveWorkflow(engine);
+console.log('✅ ozord_orders_stats_engine → Calculate Stats: decodeSessionValue');
+
+syncAll({ quiet: true });
+console.log('\n✅ Successfully added the session value codec');
@@ -0,0 +1,44 @@
+#!/usr/bin/env node
+/**
+ * perf(merge): повторная загрузка без изменений не перекодирует сессию
+ *
+ * Было: «Merge Session Report» на каждой загрузке с «+» копировал колонки
+ * сессии, собирал строки заказа по всей сессии, а «Encode Session Values»
+ * заново сжимал :csv/:agg/:hist — даже когда в отчёте не было ни одной
+ * новой или изменившейся строки.
+ *
+ * Стало (src/session-merge.js): строки заказа собираются только для
+ * заказов из отчёта, а без изменений слияние возвращает объекты сессии как
+ * есть. Тогда «Merge Session Report» отдаёт session_values — строки :csv,
+ * :agg, :hist в том виде, в каком они лежат в Redis (в том числе указатель
+ * на файл выноса), и «Encode Session Values» пишет их без сжатия и выноса.
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, replaceInCode } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Passing an unchanged merged session through to Redis...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+replaceInCode(requireNode(wf, 'Merge Session Report'),
+  'return [{json:{...merged, chat_id:incoming.chat_id, user_id:incoming.user_id}}];',
+  '// Ничего не изменилось — значения сессии уходят в Redis как были, без кодирования\n' +
+  'const same=merged.columns===columns && merged.agg===agg && merged.hist===hist;\n' +
+  'const values=same ? { session_values:{ csv_value:$json.session_csv, agg_value:$json.session_agg, hist_value:$json.session_hist } } : {};\n' +
+  'return [{json:{...merged, chat_id:incoming.chat_id, user_id:incoming.user_id, ...values}}];'
+);
+console.log('✅ Merge Session Report: session_values when the merge changed nothing');
+
+replaceInCode(requireNode(wf, 'Encode Session Values'),
+  'const config=$(\'Config\').first().json;',
+  '// Слияние без изменений: строки сессии из Redis — как есть (файл выноса тот же)\n' +
+  'if($json.session_values) return [{json:{ user_id:$json.user_id, chat_id:$json.chat_id, ...$json.session_values }}];\n' +
+  'const config=$(\'Config\').first().json;'
+);
+console.log('✅ Encode Session Values: writes session_values unchanged');
+
+saveWorkflow(main);
+syncAll({ quiet: true });
+console.log('\n✅ An unchanged re-upload skips the codec and the spill');
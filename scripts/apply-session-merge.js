@@ -0,0 +1,103 @@
+#!/usr/bin/env node
+/**
+ * feat(upload): слияние нового отчёта с текущей сессией
+ *
+ * Было: каждая загрузка заменяла ozon:sess:<uid>:* целиком — FBO и FBS
+ * вместе не посмотреть, период не продлить.
+ *
+ * Стало: файл с подписью «+» (или merge / добавить / объединить)
+ * сливается с сессией (src/session-merge.js):
+ *   Parse Report File | Parse Cache Hit? → Merge Upload?
+ *     ├─ да:  Get Session CSV/Agg/Hist/Meta (merge) → Merge Session Report → Cache CSV Records
+ *     └─ нет: Cache CSV Records (как раньше)
+ * Строки заказа (order_id + SKU) с тем же отпечатком пропускаются,
+ * изменившиеся и новые правят :agg/:hist/dayTotals/даты инкрементально.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, region, connect, addNode, redisNode, ifNode, codeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+const { MERGE_CAPTION_RE } = require('../src/session-merge');
+
+const UID = "$('Extract User Data').first().json.user_id";
+const SESSION_KEY = part => `=ozon:sess:{{ ${UID} }}:${part}`;
+
+console.log('📝 Adding merge mode for uploads...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Подпись к документу
+const extract = requireNode(wf, 'Extract User Data');
+replaceInCode(extract, "document:m?.document||null}", "document:m?.document||null, caption:m?.caption||''}");
+console.log('✅ Extract User Data: caption');
+
+// 2. Merge Upload? → сессия → Merge Session Report
+addNode(wf, ifNode({
+  id: 'merge-upload',
+  name: 'Merge Upload?',
+  position: [368, 280],
+  condition: `={{ ${MERGE_CAPTION_RE}.test($('Extract User Data').first().json.caption || '') }}`,
+}));
+const gets = [
+  ['Get Session CSV (merge)', 'csv'],
+  ['Get Session Agg (merge)', 'agg'],
+  ['Get Session Hist (merge)', 'hist'],
+  ['Get Session Meta (merge)', 'meta'],
+];
+gets.forEach(([name, part], i) => addNode(wf, redisNode(wf, {
+  id: `get-session-${part}-merge`,
+  name,
+  position: [592 + i * 224, 200],
+  operation: 'get',
+  key: SESSION_KEY(part),
+  propertyName: `session_${part}`,
+})));
+addNode(wf, codeNode({
+  id: 'merge-session-report',
+  name: 'Merge Session Report',
+  position: [1488, 200],
+  jsCode: region('src/record-columns.js') + region('src/report-index.js') + region('src/session-meta.js') + region('src/session-merge.js') +
+    "// Новый отчёт поверх сессии: те же строки заказа пропускаются, изменившиеся правят индексы\n" +
+    "const read=v=>{ try{ return v? JSON.parse(v) : null; }catch(e){ return null; } };\n" +
+    "const incoming=$('Merge Upload?').first().json;\n" +
+    "const merged=mergeSessionReport({ columns:read($json.session_csv), agg:read($json.session_agg), hist:read($json.session_hist), meta:read($json.session_meta) }, incoming);\n" +
+    "return [{json:{...merged, chat_id:incoming.chat_id, user_id:incoming.user_id}}];\n",
+}));
+
+const redirect = (from, to) => {
+  for (const branch of wf.connections[from].main) {
+    for (const l of branch || []) if (l.node === 'Cache CSV Records') l.node = to;
+  }
+};
+redirect('Parse Report File', 'Merge Upload?');
+redirect('Parse Cache Hit?', 'Merge Upload?');
+connect(wf, 'Merge Upload?', [[gets[0][0]], ['Cache CSV Records']]);
+gets.forEach(([name], i) => connect(wf, name, [[i + 1 < gets.length ? gets[i + 1][0] : 'Merge Session Report']]));
+connect(wf, 'Merge Session Report', [['Cache CSV Records']]);
+console.log('✅ Merge Upload? → Get Session CSV/Agg/Hist/Meta (merge) → Merge Session Report → Cache CSV Records');
+
+// 3. Calc Initial Month: meta слитой сессии важнее meta нового файла
+replaceInCode(requireNode(wf, 'Calc Initial Month'),
+  "'Fetch CSV Meta (for calendar)', 'Parse Report File',",
+  "'Fetch CSV Meta (for calendar)', 'Merge Session Report', 'Parse Report File',"
+);
+console.log('✅ Calc Initial Month reads the merged meta');
+
+// 4. Подсказка о загрузке
+const help = requireNode(wf, 'Send Upload Help');
+const before = help.parameters.jsonBody;
+help.parameters.jsonBody = before.replace(
+  'После загрузки я открою календарь выбора дат.',
+  'После загрузки я открою календарь выбора дат.\\n\\nЧтобы добавить отчёт к уже загруженному (FBO и FBS вместе, продление периода), отправьте файл с подписью <b>+</b>.'
+);
+if (help.parameters.jsonBody === before) {
+  console.error('❌ Send Upload Help: text not found');
+  process.exit(1);
+}
+console.log('✅ Send Upload Help mentions the «+» caption');
+
+saveWorkflow(main);
+syncAll({ quiet: true });
+console.log('\n✅ Successfully added merge mode for uploads');
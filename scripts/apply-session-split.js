@@ -0,0 +1,213 @@
+#!/usr/bin/env node
+/**
+ * perf(session): разделить ozon:sess:<uid>:csv на meta и records
+ *
+ * Было: Parse Report File пишет {reportType, records, availableDates, totalRecords}
+ * одной строкой в ozon:sess:<uid>:csv, а календарь/тоггл/навигация/меню
+ * тянут и парсят весь блоб ради availableDates.
+ *
+ * Стало:
+ * - ozon:sess:<uid>:meta — лёгкие метаданные (src/session-meta.js):
+ *   availableDates, months, minMonth/maxMonth, from/to, daysByMonth,
+ *   reportType, totalRecords, dayTotals (для строки «Итого»)
+ * - ozon:sess:<uid>:csv  — только {reportType, records, totalRecords},
+ *   читается исключительно движком статистики
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, renameNode, replaceInCode, region,
+  connect, insertAfter, addNode, redisNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const TTL_72H = 259200;
+const META_KEY = uidExpr => `=ozon:sess:{{ ${uidExpr} }}:meta`;
+const UID = "$('Extract User Data').first().json.user_id";
+const META = 'src/session-meta.js';
+
+console.log('📝 Splitting ozon:sess:<uid>:csv into meta + records...\n');
+
+// ============================================================================
+// Main workflow
+// ============================================================================
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Parse Report File: считаем dayTotals и meta за тот же проход по датам
+const parse = requireNode(wf, 'Parse Report File');
+parse.parameters.jsCode = region(META) + parse.parameters.jsCode;
+replaceInCode(parse,
+  "const setDates=new Set(); for(const rec of records){ const d=parseAsMsk(rec.created_at); if(!d) continue; setDates.add(d.toISOString().split('T')[0]); }\n" +
+  "return [{json:{ reportType, records, availableDates:Array.from(setDates).sort(), totalRecords:records.length, chat_id:$('Extract User Data').first().json.chat_id, user_id:$('Extract User Data').first().json.user_id }}];",
+  "const setDates=new Set(); const dayTotals={}; for(const rec of records){ const d=parseAsMsk(rec.created_at); if(!d) continue; const day=d.toISOString().split('T')[0]; setDates.add(day); addDayTotal(dayTotals, day, rec.quantity, rec.price, rec.status); }\n" +
+  "const meta=buildSessionMeta({ reportType, availableDates:Array.from(setDates), totalRecords:records.length, dayTotals });\n" +
+  "return [{json:{ reportType, records, availableDates:meta.availableDates, totalRecords:records.length, meta, chat_id:$('Extract User Data').first().json.chat_id, user_id:$('Extract User Data').first().json.user_id }}];"
+);
+console.log('✅ Parse Report File: builds session meta');
+
+// 2. Records → :csv, meta → :meta
+addNode(wf, redisNode(wf, {
+  id: 'cache-csv-records',
+  name: 'Cache CSV Records',
+  position: [368, 160],
+  operation: 'set',
+  key: '=ozon:sess:{{ $json.user_id }}:csv',
+  value: '={{ JSON.stringify({ reportType: $json.reportType, records: $json.records, totalRecords: $json.totalRecords }) }}',
+  ttl: TTL_72H,
+}));
+insertAfter(wf, 'Parse Report File', 'Cache CSV Records');
+
+const cacheMeta = requireNode(wf, 'Cache CSV Meta');
+cacheMeta.parameters.key = META_KEY('$json.user_id');
+cacheMeta.parameters.value = '={{ JSON.stringify($json.meta) }}';
+console.log('✅ Cache CSV Records → ozon:sess:<uid>:csv, Cache CSV Meta → ozon:sess:<uid>:meta');
+
+// 3. Все чтения на путях календаря/тоггла/меню → :meta
+for (const name of ['Fetch CSV Meta (for calendar)', 'Fetch CSV Meta (calopen)', 'Fetch Cached Data (for grid)', 'Get CSV Meta (Menu)']) {
+  requireNode(wf, name).parameters.key = META_KEY(UID);
+  console.log(`✅ ${name} → :meta`);
+}
+
+// 4. Тоггл: доступность даты проверяется по meta, а не по несуществующему на этом пути гриду
+addNode(wf, redisNode(wf, {
+  id: 'fetch-csv-meta-toggle',
+  name: 'Fetch CSV Meta (toggle)',
+  position: [-752, 472],
+  operation: 'get',
+  key: META_KEY(UID),
+}));
+insertAfter(wf, 'Get Selected Dates (toggle)', 'Fetch CSV Meta (toggle)');
+
+const toggle = requireNode(wf, 'Toggle Date');
+toggle.parameters.jsCode = region(META) + toggle.parameters.jsCode;
+replaceInCode(toggle,
+  "let available = [];\ntry {\n  const raw = $('Fetch Cached Data (for grid)').first()?.json?.value || $('Fetch CSV Meta (calopen)').first()?.json?.value;\n  const obj = raw ? JSON.parse(raw) : {};\n  available = Array.isArray(obj.availableDates) ? obj.availableDates : [];\n} catch(e){ available = []; }",
+  "const meta = readSessionMeta($, ['Fetch CSV Meta (toggle)']) || {};\nconst available = Array.isArray(meta.availableDates) ? meta.availableDates : [];"
+);
+
+// 5. Навигация: meta тоже нужна (раньше путь cal:* шёл в рендер без дат)
+addNode(wf, redisNode(wf, {
+  id: 'fetch-csv-meta-nav',
+  name: 'Fetch CSV Meta (nav)',
+  position: [-752, 560],
+  operation: 'get',
+  key: META_KEY(UID),
+}));
+insertAfter(wf, 'Handle Calendar Nav', 'Fetch CSV Meta (nav)');
+console.log('✅ Toggle/nav paths read ozon:sess:<uid>:meta');
+
+// 6. Код, который парсил блоб ради availableDates
+const META_SOURCES = "['Fetch Cached Data (for grid)', 'Fetch CSV Meta (nav)', 'Fetch CSV Meta (calopen)', 'Fetch CSV Meta (for calendar)', 'Parse Report File']";
+
+const calc = requireNode(wf, 'Calc Initial Month');
+calc.parameters.jsCode = region(META) +
+  `const meta = readSessionMeta($, ${META_SOURCES}) || {};\n` +
+  "const months = Array.isArray(meta.months) ? meta.months : [];\n" +
+  "if(!months.length) return [{ json: { month:null } }];\n" +
+  "const month = meta.maxMonth;\n" +
+  "return [{ json: { month, months, minMonth: meta.minMonth, maxMonth: meta.maxMonth, user_id: $('Extract User Data').first().json.user_id, chat_id: $('Extract User Data').first().json.chat_id } }];";
+
+const ensure = requireNode(wf, 'Ensure Month (smart)');
+ensure.parameters.jsCode = region(META) + ensure.parameters.jsCode;
+replaceInCode(ensure,
+  "let meta={};\ntry{ const raw=$(\"Fetch CSV Meta (for calendar)\").first()?.json.value || $(\"Fetch CSV (Render)\").first()?.json.value; meta = raw? JSON.parse(raw):{}; }catch(e){ meta={}; }\nconst available = Array.isArray(meta.availableDates)? meta.availableDates:[];\nconst months = Array.from(new Set(available.map(d=>d.slice(0,7)))).sort();\nconst minMonth = months[0]; const maxMonth = months[months.length-1];",
+  `const meta = readSessionMeta($, ${META_SOURCES}) || {};\nconst available = Array.isArray(meta.availableDates)? meta.availableDates:[];\nconst minMonth = meta.minMonth; const maxMonth = meta.maxMonth;`
+);
+
+const summary = requireNode(wf, 'Compute Selection Summary');
+summary.parameters.jsCode = region(META) +
+  "// «Итого» по выбранным дням из meta.dayTotals — records для этого не нужны\n" +
+  "let selected = [];\n" +
+  "try {\n" +
+  "  const rawSel = $('Get Selected Dates').first()?.json?.value;\n" +
+  "  selected = rawSel ? JSON.parse(rawSel) : [];\n" +
+  "} catch(e){ selected = []; }\n" +
+  `const meta = readSessionMeta($, ${META_SOURCES}) || {};\n` +
+  "const dayTotals = meta.dayTotals || {};\n" +
+  "let totalOrders = 0;\n" +
+  "let totalRevenue = 0;\n" +
+  "for (const d of new Set(selected)) {\n" +
+  "  const t = dayTotals[d];\n" +
+  "  if (!t) continue;\n" +
+  "  totalOrders += t[0];\n" +
+  "  totalRevenue += t[1];\n" +
+  "}\n" +
+  "return [{\n" +
+  "  json: {\n" +
+  "    ...$json,\n" +
+  "    selectedDates: selected,\n" +
+  "    selectionSummary: { totalOrders, totalRevenue }\n" +
+  "  }\n" +
+  "}];";
+
+const menu = requireNode(wf, 'Render Orders Menu');
+menu.parameters.jsCode = region(META) + menu.parameters.jsCode;
+replaceInCode(menu,
+  "let meta={};\ntry{ const raw=$('Get CSV Meta (Menu)').first().json.value; meta= raw? JSON.parse(raw):{}; }catch(e){ meta={}; }",
+  "const meta = readSessionMeta($, ['Get CSV Meta (Menu)']) || {};"
+);
+replaceInCode(menu,
+  "  const months = Array.from(new Set((meta.availableDates||[]).map(d=>d.slice(0,7)))).sort();\n",
+  "  const months = meta.months || [];\n"
+);
+console.log('✅ Calc Initial Month / Ensure Month / Selection Summary / Orders Menu use meta');
+
+// 7. Очистка удаляет оба ключа
+for (const [after, name, id, position] of [
+  ['Del csv_data', 'Del csv_meta', 'del-csv-meta', [1040, 1080]],
+  ['Del CSV Cache', 'Del CSV Meta', 'del-csv-meta-cache', [2280, 1080]],
+]) {
+  addNode(wf, redisNode(wf, { id, name, position, operation: 'delete', key: name === 'Del csv_meta' ? META_KEY(UID) : META_KEY('$json.user_id') }));
+  insertAfter(wf, after, name);
+}
+console.log('✅ file:clear deletes ozon:sess:<uid>:meta as well');
+
+saveWorkflow(main);
+
+// ============================================================================
+// ozord_* sub-workflows: все, кроме stats engine, читают только :meta
+// ============================================================================
+for (const [file, oldName, newName] of [
+  ['ozord_calendar_ui_header_and_counters', 'Fetch Session (csv)', 'Fetch Session (meta)'],
+  ['ozord_calendar_render_grid', 'Fetch Session (csv)', 'Fetch Session (meta)'],
+  ['ozord_dates_toggle_and_limit', 'Get Session (csv)', 'Get Session (meta)'],
+  ['ozord_dates_done_guard_and_handoff', 'Get Session (csv)', 'Get Session (meta)'],
+  ['ozord_calendar_nav_guard', 'Get sess:csv', 'Get sess:meta'],
+  ['ozord_orders_menu_render', 'Get sess:csv', 'Get sess:meta'],
+]) {
+  const sub = loadWorkflow(file);
+  const node = renameNode(sub.workflow, oldName, newName);
+  node.parameters.key = node.parameters.key.replace(/:csv$/, ':meta');
+  const note = sub.workflow.nodes.find(n => n.type === 'n8n-nodes-base.stickyNote');
+  if (note) note.parameters.content = note.parameters.content.replace('ozon:sess:<uid>:csv', 'ozon:sess:<uid>:meta');
+  saveWorkflow(sub);
+  console.log(`✅ ${file}: ${oldName} → ${newName}`);
+}
+
+const files = loadWorkflow('ozord_files_session_and_clear');
+const fw = files.workflow;
+const build = requireNode(fw, 'Build File Session (from meta)');
+build.parameters.jsCode = region(META) +
+  "/* INPUT: Parse Report File → { meta } (или availableDates[], totalRecords, reportType)\n" +
+  "   OUTPUT: session = лёгкие метаданные для ozon:sess:<uid>:meta\n" +
+  "*/\n" +
+  "const user_id = $('Extract User Data').first().json.user_id;\n" +
+  "let parsed = {};\n" +
+  "try {\n" +
+  "  parsed = $('Parse Report File').first().json || {};\n" +
+  "} catch(e) { parsed = {}; }\n" +
+  "const session = parsed.meta || buildSessionMeta(parsed);\n" +
+  "if (!session.availableDates.length) {\n" +
+  "  return [{ json: { user_id, session: null } }];\n" +
+  "}\n" +
+  "return [{ json: { user_id, session } }];";
+const persist = renameNode(fw, 'Persist Session (ozon:sess:<uid>:csv)', 'Persist Session (ozon:sess:<uid>:meta)');
+persist.parameters.key = META_KEY(UID);
+persist.parameters.options = { ttl: TTL_72H };
+addNode(fw, redisNode(fw, { id: 'clear_meta', name: 'Del meta (session)', position: [-380, 200], operation: 'delete', key: META_KEY(UID) }));
+insertAfter(fw, 'Del csv (session)', 'Del meta (session)');
+saveWorkflow(files);
+console.log('✅ ozord_files_session_and_clear: session → :meta, file:clear deletes both keys');
+
+syncAll({ quiet: true });
+console.log('\n✅ Successfully split session storage (meta + records)');
@@ -0,0 +1,60 @@
+#!/usr/bin/env node
+/**
+ * perf(parse): потоковый разбор CSV в «Parse Report File»
+ *
+ * Было: «Extract from File (CSV)» превращал каждую строку файла в отдельный
+ * item n8n (объект из ~25 строк), «Parse Report File» копировал их в массив
+ * rows, строил массив records и отдавал его в выход ноды (в execution data)
+ * рядом с колонками. Пик памяти рос кратно размеру файла.
+ *
+ * Стало: «Get File from Telegram» → «Parse Report File» напрямую.
+ * Байты файла читаются окнами по 1 МБ (src/csv-stream.js), каждая строка
+ * сразу сворачивается в индексы :agg/:hist, итоги дней и колонки :csv
+ * (createColumnsBuilder). Ни items на строку, ни rows/records не
+ * создаются; records в выходе ноды больше нет (их никто не читал —
+ * :csv пишется из columns). Строки-объекты (Extract from File XLSX,
+ * тесты) разбираются тем же кодом.
+ */
+
+const { loadWorkflow, saveWorkflow, requireNode, region, connect, removeNode } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Switching report parsing to streaming CSV ingestion...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+const parse = requireNode(wf, 'Parse Report File');
+const code = parse.parameters.jsCode;
+const from = code.indexOf('const RE_BOM=');
+if (from < 0 || !code.includes('columns:encodeRecords(records')) {
+  console.error('❌ Parse Report File: row mapping block not found (already applied?)');
+  process.exit(1);
+}
+
+const body =
+  "const RE_BOM=/^\\uFEFF/;\n" +
+  "const toNum=v=>{const s=String(v??'').replace(/\\s/g,'').replace(',','.'); const n=Number(s); return Number.isFinite(n)?n:0;};\n" +
+  "const val=(r,keys)=>{ for(const k of keys){ const v=r[k]; if(v===undefined||v===null||v==='') continue; const s=String(v).replace(RE_BOM,'').trim(); if(s!=='') return s; } return ''; };\n" +
+  "// Поток: строка → record → индексы, итоги дней и колонки; массивов rows/records нет\n" +
+  "const setDates=new Set(); const dayTotals={}; const index=createIndexBuilder(); let plan=null; let columns=null; let k=null;\n" +
+  "function header(headers, byIndex){ plan=compileHeaderPlan(headers, REPORT_SCHEMAS); if(plan.notice) console.warn(plan.notice); columns=createColumnsBuilder({ reportType:plan.reportType }); const f=plan.fields; const at=x=>byIndex?x.indices:x.keys; k={ order:at(f.order_id), sku:at(f.sku), qty:at(f.quantity), price:at(f.price), date:at(f.created_at), status:at(f.status) }; }\n" +
+  "function addRow(r){ const order_id=val(r,k.order); const sku=val(r,k.sku); if(!order_id||!sku) return; const q=val(r,k.qty); const p=val(r,k.price); const rec={order_id, sku, quantity:toNum(q===''?1:q), price:toNum(p===''?0:p), status:val(r,k.status).toLowerCase()}; const d=parseAsMsk(val(r,k.date)); const t=d?Math.floor(d.getTime()/60000):-1; columns.push(rec, t); if(!d) return; const day=d.toISOString().split('T')[0]; setDates.add(day); addDayTotal(dayTotals, day, rec.quantity, rec.price, rec.status); index.add(day, rec.sku, rec.quantity, rec.price, rec.status, { slot: Math.floor((t % 1440) / 30) }); }\n" +
+  "const file=$input.first();\n" +
+  "if(file && file.binary && file.binary.data){ parseCsvBuffer(await this.helpers.getBinaryDataBuffer(0,'data'), cells=>{ if(plan) addRow(cells); else header(cells, true); }); }\n" +
+  "else { for(const it of $input.all()){ const r=it.json.row??it.json; if(!r) continue; if(!plan) header(Object.keys(r), false); addRow(r); } }\n" +
+  "if(!plan) header([], false);\n" +
+  "const reportType=plan.reportType; const encoded=columns.build();\n" +
+  "const meta=buildSessionMeta({ reportType, availableDates:Array.from(setDates), totalRecords:encoded.totalRecords, dayTotals });\n" +
+  "return [{json:{ reportType, availableDates:meta.availableDates, totalRecords:encoded.totalRecords, schema:{ id:plan.schemaId, version:plan.version, exact:plan.exact, notice:plan.notice }, meta, agg:index.build(), hist:index.buildHistogram(), columns:encoded, chat_id:$('Extract User Data').first().json.chat_id, user_id:$('Extract User Data').first().json.user_id }}];\n";
+
+parse.parameters.jsCode = region('src/csv-stream.js') + code.slice(0, from) + body;
+saveWorkflow(main);
+console.log('✅ Parse Report File: streams CSV bytes, no rows/records arrays');
+
+removeNode(wf, 'Extract from File (CSV)');
+connect(wf, 'Get File from Telegram', [['Parse Report File']]);
+saveWorkflow(main);
+console.log('✅ Get File from Telegram → Parse Report File (Extract from File (CSV) removed)');
+
+syncAll({ quiet: true });
+console.log('\n✅ Successfully switched to streaming ingestion');
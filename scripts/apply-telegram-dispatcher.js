@@ -0,0 +1,63 @@
+#!/usr/bin/env node
+/**
+ * perf(telegram): адрес Bot API — TELEGRAM_API_BASE, вызовы через диспетчер
+ *
+ * Было: каждая HTTP-нода (sendMessage, editMessageText, answerCallbackQuery,
+ * deleteMessage, …) шла прямо на https://api.telegram.org — новое соединение
+ * на вызов, лимиты бота и чата никто не учитывал, серии тапов получали 429.
+ *
+ * Стало: адрес берётся из TELEGRAM_API_BASE —
+ *   основной workflow и подпроцессы с Config: поле Config TELEGRAM_API_BASE;
+ *   подпроцессы с $env:                       переменная окружения n8n.
+ * По умолчанию это по-прежнему https://api.telegram.org; адрес диспетчера
+ * (scripts/telegram-dispatcher.js, например http://127.0.0.1:8081) включает
+ * очередь с лимитами, приоритетом answerCallbackQuery и пулом соединений.
+ * Ноды Telegram (скачивание файла, отправка через credential) идут через
+ * credential n8n и не меняются.
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflow, saveWorkflow, requireNode } = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+const { TELEGRAM_API } = require('../src/telegram-dispatch');
+
+const DIRECT = /^=https:\/\/api\.telegram\.org\/bot\{\{ (\$\('Config'\)\.first\(\)\.json|\$env)\.TELEGRAM_BOT_TOKEN \}\}\//;
+
+console.log('📝 Bot API base URL for the outbound dispatcher...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const config = requireNode(main.workflow, 'Config').parameters.assignments.assignments;
+if (config.some(a => a.name === 'TELEGRAM_API_BASE')) {
+  console.error('❌ Config already has TELEGRAM_API_BASE (already applied?)');
+  process.exit(1);
+}
+config.push({ id: 'telegram-api-base-field', name: 'TELEGRAM_API_BASE', value: TELEGRAM_API, type: 'string' });
+saveWorkflow(main);
+console.log(`✅ Config: TELEGRAM_API_BASE = ${TELEGRAM_API}`);
+
+const dir = path.join(__dirname, '..', 'workflows');
+let total = 0;
+for (const file of fs.readdirSync(dir).filter(f => f.endsWith('.json')).sort()) {
+  const wf = loadWorkflow(file);
+  const changed = [];
+  for (const node of wf.workflow.nodes.filter(n => n.type === 'n8n-nodes-base.httpRequest')) {
+    const url = node.parameters.url || '';
+    const match = DIRECT.exec(url);
+    if (!match) continue;
+    const base = `{{ ${match[1]}.TELEGRAM_API_BASE || '${TELEGRAM_API}' }}`;
+    node.parameters.url = `=${base}/bot{{ ${match[1]}.TELEGRAM_BOT_TOKEN }}/` + url.slice(match[0].length);
+    changed.push(node.name);
+  }
+  if (!changed.length) continue;
+  if (JSON.stringify(wf.workflow.nodes).includes('"=https://api.telegram.org/')) {
+    console.error(`❌ ${file}: a Bot API URL is left unrewritten`);
+    process.exit(1);
+  }
+  saveWorkflow(wf);
+  total += changed.length;
+  console.log(`✅ ${file}: ${changed.length} HTTP node(s)`);
+}
+
+syncAll({ quiet: true });
+console.log(`\n✅ ${total} Bot API calls go to TELEGRAM_API_BASE`);
@@ -0,0 +1,159 @@
+#!/usr/bin/env node
+/**
+ * perf(stats): получасовые гистограммы «день × SKU» для фильтра по времени
+ *
+ * Было: «Calculate Statistics» фильтровал records по времени (filterRecords:
+ * разбор даты и toTimeString() на каждой строке).
+ *
+ * Стало:
+ * - «Parse Report File» пополняет 48 получасовых слотов на (день, SKU)
+ *   и пишет их в ozon:sess:<uid>:hist (TTL 72ч)
+ * - окно startTime–endTime = разность префиксных сумм по слотам
+ *   (src/report-index.js → windowBySku), полный день — дневные ячейки :agg
+ * - :hist читается только для неполного дня (IF «Time Window?»)
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, addNode, insertAfter,
+  redisNode, ifNode, connect,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const TTL_72H = 259200;
+const HIST_KEY = uidExpr => `=ozon:sess:{{ ${uidExpr} }}:hist`;
+const UID = "$('Extract User Data').first().json.user_id";
+const partialWindow = (st, et) => `={{ (${st} || '00:00') !== '00:00' || !['23:59', '24:00'].includes(${et} || '24:00') }}`;
+
+console.log('📝 Adding half-hour histograms for time windows...\n');
+
+// ============================================================================
+// Main workflow
+// ============================================================================
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. Parse Report File: слот получаса из той же MSK-минуты
+const parse = requireNode(wf, 'Parse Report File');
+replaceInCode(parse,
+  'mskMinutes[i++]=d?Math.floor(d.getTime()/60000):-1; if(!d) continue;',
+  'const t=d?Math.floor(d.getTime()/60000):-1; mskMinutes[i++]=t; if(!d) continue;'
+);
+replaceInCode(parse,
+  'index.add(day, rec.sku, rec.quantity, rec.price, rec.status); }',
+  'index.add(day, rec.sku, rec.quantity, rec.price, rec.status, { slot: Math.floor((t % 1440) / 30) }); }'
+);
+replaceInCode(parse, 'agg:index.build(), ', 'agg:index.build(), hist:index.buildHistogram(), ');
+console.log('✅ Parse Report File: builds half-hour histograms');
+
+addNode(wf, redisNode(wf, {
+  id: 'cache-csv-histogram',
+  name: 'Cache CSV Histogram',
+  position: [368, -80],
+  operation: 'set',
+  key: HIST_KEY('$json.user_id'),
+  value: '={{ JSON.stringify($json.hist) }}',
+  ttl: TTL_72H,
+}));
+insertAfter(wf, 'Cache CSV Aggregates', 'Cache CSV Histogram');
+console.log('✅ Cache CSV Histogram → ozon:sess:<uid>:hist');
+
+// 2. Has CSV? → Time Window? → [Get Cached Hist] → Calculate Statistics
+const hasCsv = wf.connections['Has CSV?'].main;
+addNode(wf, ifNode({
+  id: 'time-window-stats',
+  name: 'Time Window? (stats)',
+  position: [3180, 820],
+  condition: partialWindow("$('Handle Done').first().json.startTime", "$('Handle Done').first().json.endTime"),
+}));
+addNode(wf, redisNode(wf, {
+  id: 'get-cached-hist-stats',
+  name: 'Get Cached Hist (for stats)',
+  position: [3400, 760],
+  operation: 'get',
+  key: HIST_KEY(UID),
+}));
+hasCsv[1] = [{ node: 'Time Window? (stats)', type: 'main', index: 0 }];
+connect(wf, 'Time Window? (stats)', [['Get Cached Hist (for stats)'], ['Calculate Statistics']]);
+connect(wf, 'Get Cached Hist (for stats)', [['Calculate Statistics']]);
+
+const stats = requireNode(wf, 'Calculate Statistics');
+replaceInCode(stats,
+  "// Индекс дневной гранулярности; Handle Done всегда передаёт полный день 00:00–23:59\n" +
+  "function calc(index,dates,st,et){ const bySku={}; for(const [sku,a] of aggregateBySku(index,dates)){",
+  "// Полный день — дневные ячейки :agg, окно времени — префиксные суммы получасов :hist\n" +
+  "function calc(index,hist,dates,st,et){ const bySku={}; for(const [sku,a] of windowBySku(index,hist,dates,st,et)){"
+);
+replaceInCode(stats,
+  "let index=null; try{ index=JSON.parse($('Get Cached Data (for stats)').first().json.value||'null'); }catch(e){}\n",
+  "let index=null; try{ index=JSON.parse($('Get Cached Data (for stats)').first().json.value||'null'); }catch(e){}\n" +
+  "let hist=null; try{ hist=JSON.parse($('Get Cached Hist (for stats)').first().json.value||'null'); }catch(e){}\n"
+);
+replaceInCode(stats, 'const stats=calc(index, dates, st, et);', 'const stats=calc(index, hist, dates, st, et);');
+console.log('✅ Calculate Statistics answers time windows from histograms');
+
+// 3. file:clear
+for (const [after, name, id, position, uid] of [
+  ['Del csv_agg', 'Del csv_hist', 'del-csv-hist', [1040, 1320], UID],
+  ['Del CSV Aggregates', 'Del CSV Histogram', 'del-csv-hist-cache', [2280, 1320], '$json.user_id'],
+]) {
+  addNode(wf, redisNode(wf, { id, name, position, operation: 'delete', key: HIST_KEY(uid) }));
+  insertAfter(wf, after, name);
+}
+console.log('✅ file:clear deletes ozon:sess:<uid>:hist');
+
+saveWorkflow(main);
+
+// ============================================================================
+// ozord_orders_stats_engine
+// ============================================================================
+const engine = loadWorkflow('ozord_orders_stats_engine');
+const ew = engine.workflow;
+addNode(ew, ifNode({
+  id: 'time-window',
+  name: 'Time Window?',
+  position: [-550, 200],
+  condition: partialWindow('$json.startTime', '$json.endTime'),
+}));
+addNode(ew, redisNode(ew, {
+  id: 'get-csv-hist',
+  name: 'Get CSV Session (hist)',
+  position: [-420, 60],
+  operation: 'get',
+  key: HIST_KEY('$json.user_id'),
+}));
+connect(ew, 'Get CSV Session (aggregates)', [['Time Window?']]);
+connect(ew, 'Time Window?', [['Get CSV Session (hist)'], ['Calculate Stats']]);
+connect(ew, 'Get CSV Session (hist)', [['Calculate Stats']]);
+for (const [name, x] of [['Calculate Stats', -280], ['Format Message', -40], ['Telegram sendMessage (stats)', 200]]) {
+  requireNode(ew, name).position = [x, 200];
+}
+
+const calcStats = requireNode(ew, 'Calculate Stats');
+replaceInCode(calcStats,
+  "// INPUT: { user_id, chat_id, selectedDates[], session }\n",
+  "// INPUT: { user_id, chat_id, selectedDates[], session, startTime?, endTime? }\n"
+);
+replaceInCode(calcStats,
+  "const selected = Array.isArray($json.selectedDates)? $json.selectedDates : [];\n",
+  "let hist=null;\n" +
+  "try{ const raw = $('Get CSV Session (hist)').first().json.value; hist = raw? JSON.parse(raw) : null; }catch(e){ hist=null; }\n" +
+  "const selected = Array.isArray($json.selectedDates)? $json.selectedDates : [];\n" +
+  "const startTime = $json.startTime || '00:00';\n" +
+  "const endTime = $json.endTime || '24:00';\n"
+);
+replaceInCode(calcStats, 'for(const [sku, a] of aggregateBySku(index, selected)){', 'for(const [sku, a] of windowBySku(index, hist, selected, startTime, endTime)){');
+replaceInCode(calcStats, "startTime: '00:00', endTime: '24:00',", 'startTime, endTime,');
+saveWorkflow(engine);
+console.log('✅ ozord_orders_stats_engine: Time Window? → Get CSV Session (hist)');
+
+// ============================================================================
+// ozord_files_session_and_clear
+// ============================================================================
+const files = loadWorkflow('ozord_files_session_and_clear');
+addNode(files.workflow, redisNode(files.workflow, { id: 'clear_hist', name: 'Del hist (session)', position: [-380, 40], operation: 'delete', key: HIST_KEY(UID) }));
+insertAfter(files.workflow, 'Del agg (session)', 'Del hist (session)');
+saveWorkflow(files);
+console.log('✅ ozord_files_session_and_clear: file:clear deletes :hist');
+
+syncAll({ quiet: true });
+console.log('\n✅ Successfully added half-hour histograms');
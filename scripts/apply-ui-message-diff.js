@@ -0,0 +1,164 @@
+#!/usr/bin/env node
+/**
+ * perf(ui): не править сообщение, если отрисовка не изменилась
+ *
+ * Было: ozord_ui_orchestrator всегда звал editMessageText. Тот же текст и
+ * клавиатура → Telegram отвечает 400 «message is not modified», «Check
+ * Edit Result» считал это провалом и слал sendMessage — второй календарь
+ * в чате и лишний вызов из лимита. Основной workflow так же правил
+ * календарь на каждом рендере, в том числе повторном (тап сверх лимита).
+ *
+ * Стало (src/ui-message.js): рядом с message_id хранится отпечаток
+ * отрисовки — хэши текста и клавиатуры. Одинаковая отрисовка — вызова нет,
+ * изменилась только клавиатура — editMessageReplyMarkup.
+ *
+ * ozord_ui_orchestrator:
+ *   Compute Redis Keys → Redis Get UI Msg Id → Plan UI Edit → Route UI Edit
+ *     ├─ send:   Telegram sendMessage (fallback/new) → Wrap Send Result → Redis Set UI Msg Id
+ *     ├─ text:   Telegram editMessageText ─────────┐
+ *     └─ markup: Telegram editMessageReplyMarkup ──┴→ Check Edit Result → Edit Failed → Send? → …
+ *   ozon:ui:<uid>:<key>:message_id = «<message_id>:<отпечаток>».
+ *
+ * Основной workflow: отпечаток — поле calendar_render в ozon:user:<uid>.
+ *   Render Calendar (smart) → Plan Calendar Edit → Save Calendar State → Route Calendar Edit
+ *     ├─ send:   Send Calendar (smart) → Persist Calendar Msg ID (smart)
+ *     ├─ text:   Edit Calendar (smart)
+ *     └─ markup: Edit Calendar Markup (smart)
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, findNode, replaceInCode, region, connect, addNode, codeNode, switchNode, removeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+const EDITS = { send: 'send', text: 'text', markup: 'markup' };
+
+console.log('📝 Skipping no-op message edits...\n');
+
+// ─── ozord_ui_orchestrator ───────────────────────────────────────────────────
+const orch = loadWorkflow('ozord_ui_orchestrator');
+const owf = orch.workflow;
+if (findNode(owf, 'Plan UI Edit')) {
+  console.error('❌ Plan UI Edit already exists (already applied?)');
+  process.exit(1);
+}
+
+requireNode(owf, 'Compute Redis Keys').parameters.jsCode = region('src/ui-message.js') +
+  "const { chat_id, user_id, key = 'calendar', text, reply_markup, parse_mode = 'HTML' } = $json;\n" +
+  'const uiKey = `ozon:ui:${user_id}:${key}:message_id`;\n' +
+  'const render = uiRenderPrint({ text, reply_markup, parse_mode });\n' +
+  'return [{ json: { chat_id, user_id, key, uiKey, text, reply_markup, parse_mode, render } }];';
+requireNode(owf, 'Redis Get UI Msg Id').parameters.keyType = 'string';
+
+removeNode(owf, 'Has Msg Id?');
+addNode(owf, codeNode({
+  id: 'node_plan_edit',
+  name: 'Plan UI Edit',
+  position: [-120, 200],
+  jsCode: region('src/ui-message.js') +
+    '// Значение ключа — «<message_id>:<отпечаток>»; отпечаток решает, нужен ли вызов и какой\n' +
+    "const k = $('Compute Redis Keys').first().json;\n" +
+    'const { messageId, print } = readUiMessage($json.value);\n' +
+    'return [{ json: { ...k, message_id: messageId, edit: planUiEdit(messageId, print, k.render) } }];',
+}));
+addNode(owf, switchNode({ id: 'node_route_edit', name: 'Route UI Edit', position: [120, 200], value: '={{ $json.edit }}', rules: EDITS }));
+
+const editText = requireNode(owf, 'Telegram editMessageText');
+editText.position = [360, 40];
+editText.parameters.jsonBody = '={{ JSON.stringify({ chat_id: $json.chat_id, message_id: $json.message_id, text: $json.text, parse_mode: $json.parse_mode, reply_markup: $json.reply_markup }) }}';
+const editMarkup = addNode(owf, Object.assign(JSON.parse(JSON.stringify(editText)), { id: 'node_edit_markup', name: 'Telegram editMessageReplyMarkup', position: [360, 200] }));
+editMarkup.parameters.url = editText.parameters.url.replace('/editMessageText', '/editMessageReplyMarkup');
+editMarkup.parameters.jsonBody = '={{ JSON.stringify({ chat_id: $json.chat_id, message_id: $json.message_id, reply_markup: $json.reply_markup }) }}';
+
+const send = requireNode(owf, 'Telegram sendMessage (fallback/new)');
+send.position = [360, 400];
+// После неудачной правки $json — итог Check Edit Result, не сообщение
+send.parameters.jsonBody = "={{ JSON.stringify((k => ({ chat_id: k.chat_id, text: k.text, parse_mode: k.parse_mode, reply_markup: k.reply_markup }))($('Compute Redis Keys').first().json)) }}";
+
+const check = requireNode(owf, 'Check Edit Result');
+check.position = [600, 120];
+check.parameters.jsCode = region('src/ui-message.js') +
+  'const e = $json;\n' +
+  "const p = $('Plan UI Edit').first().json;\n" +
+  '// HTTP-нода отдаёт тело Bot API (или { body } при полном ответе). «message is not modified» —\n' +
+  '// сообщение уже такое, как нужно (отпечатка ещё не было): это не повод слать новое\n' +
+  'if ((e.body || e).ok === true || isMessageNotModified(e)) {\n' +
+  "  return [{ json: { mode: 'edited', message_id: p.message_id, ui_value: packUiMessage(p.message_id, p.render) } }];\n" +
+  '}\n' +
+  '// если edit вернул ошибку (например, message to edit not found) — идём в send\n' +
+  "return [{ json: { mode: 'need_send' } }];";
+requireNode(owf, 'Edit Failed → Send?').position = [840, 120];
+
+const wrap = requireNode(owf, 'Wrap Send Result');
+wrap.position = [840, 400];
+wrap.parameters.jsCode = region('src/ui-message.js') +
+  "const r = $('Telegram sendMessage (fallback/new)').first().json;\n" +
+  'const message_id = r.result ? r.result.message_id : r.message_id;\n' +
+  "return [{ json: { mode: 'sent', message_id, ui_value: packUiMessage(message_id, $('Compute Redis Keys').first().json.render) } }];";
+
+const set = requireNode(owf, 'Redis Set UI Msg Id');
+set.position = [1080, 220];
+set.parameters.key = "={{ $('Compute Redis Keys').first().json.uiKey }}";
+set.parameters.value = '={{ $json.ui_value }}';
+
+connect(owf, 'Redis Get UI Msg Id', [['Plan UI Edit']]);
+connect(owf, 'Plan UI Edit', [['Route UI Edit']]);
+connect(owf, 'Route UI Edit', [['Telegram sendMessage (fallback/new)'], ['Telegram editMessageText'], ['Telegram editMessageReplyMarkup']]);
+connect(owf, 'Telegram editMessageReplyMarkup', [['Check Edit Result']]);
+saveWorkflow(orch);
+console.log('✅ ozord_ui_orchestrator: Plan UI Edit → Route UI Edit (send | text | markup; unchanged — no call)');
+
+// ─── Основной workflow ───────────────────────────────────────────────────────
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+const ensure = requireNode(wf, 'Ensure Month (smart)');
+ensure.parameters.jsCode = ensure.parameters.jsCode.replace(/\/\/ #region src\/user-state\.js\n[\s\S]*?\/\/ #endregion src\/user-state\.js\n/, '');
+replaceInCode(ensure, "// Всё, что маршрут меняет в ozon:user:<uid>, — одним HSET в «Save Calendar State»", "// Всё, что маршрут меняет в ozon:user:<uid>, — одним HSET в «Save Calendar State» (пакует Plan Calendar Edit)");
+replaceInCode(ensure, 'datesVersion, user_state: packUserState(state) }', 'datesVersion, state }');
+
+addNode(wf, codeNode({
+  id: 'plan-calendar-edit',
+  name: 'Plan Calendar Edit',
+  position: [1040, 856],
+  jsCode: region('src/user-state.js') + region('src/ui-message.js') +
+    '// Отпечаток отрисовки сравнивается с сохранённым: тот же календарь не правим, одну клавиатуру — editMessageReplyMarkup\n' +
+    "const m = $('Ensure Month (smart)').first().json;\n" +
+    "const render = uiRenderPrint($json);\n" +
+    "const edit = planUiEdit(m.calendar_msg_id, $('User Context').first().json.ctx.calendarRender, render);\n" +
+    'return [{ json: { ...$json, edit, user_state: packUserState({ ...m.state, calendar_render: render }) } }];\n',
+}));
+const save = requireNode(wf, 'Save Calendar State');
+save.position = [1264, 856];
+save.parameters.value = "={{ $('Plan Calendar Edit').first().json.user_state }}";
+
+const hasMsg = requireNode(wf, 'Has Calendar Msg? (smart)');
+const route = switchNode({
+  id: 'route-calendar-edit',
+  name: 'Route Calendar Edit',
+  position: hasMsg.position,
+  value: "={{ $('Plan Calendar Edit').first().json.edit }}",
+  rules: EDITS,
+});
+removeNode(wf, 'Has Calendar Msg? (smart)');
+addNode(wf, route);
+
+const edit = requireNode(wf, 'Edit Calendar (smart)');
+const markup = addNode(wf, Object.assign(JSON.parse(JSON.stringify(edit)), {
+  id: 'edit-calendar-markup-smart', name: 'Edit Calendar Markup (smart)', position: [edit.position[0], edit.position[1] + 192],
+}));
+markup.parameters.url = edit.parameters.url.replace('/editMessageText', '/editMessageReplyMarkup');
+markup.parameters.jsonBody = "={{ JSON.stringify({ chat_id: $('Ensure Month (smart)').first().json.chat_id, message_id: $('Ensure Month (smart)').first().json.calendar_msg_id, reply_markup: $json.reply_markup }) }}";
+
+const clear = requireNode(wf, 'Clear Session State');
+clear.parameters.value = 'meta null dates null cal_month null calendar_msg_id null calendar_render null';
+
+connect(wf, 'Render Calendar (smart)', [['Plan Calendar Edit']]);
+connect(wf, 'Plan Calendar Edit', [['Save Calendar State']]);
+connect(wf, 'Save Calendar State', [['Route Calendar Edit']]);
+connect(wf, 'Route Calendar Edit', [['Send Calendar (smart)'], ['Edit Calendar (smart)'], ['Edit Calendar Markup (smart)']]);
+saveWorkflow(main);
+console.log('✅ Render Calendar (smart) → Plan Calendar Edit → Save Calendar State → Route Calendar Edit (send | text | markup)');
+
+syncAll({ quiet: true });
+console.log('\n✅ No-op edits are skipped, keyboard-only changes use editMessageReplyMarkup');
@@ -0,0 +1,69 @@
+#!/usr/bin/env node
+/**
+ * fix(upload): поколение загрузки — устаревший разбор не пишет сессию
+ *
+ * Всё, что календарь и «Готово» читают после загрузки, считается в том же
+ * проходе разбора: meta.daysByMonth и dayTotals, индекс :agg, гистограммы
+ * :hist; календарь рендерится и отправляется самой загрузкой. Отдельный
+ * прогрев не нужен, клавиатуры не храним (разбор дороже сборки,
+ * scripts/bench_calendar_render.js).
+ *
+ * Отменять нужно саму загрузку: большой файл разбирается секунды, и
+ * file:clear или новая загрузка за это время не останавливали её —
+ * старый разбор дописывал :csv/:agg/:hist и meta поверх новой сессии или
+ * воскрешал очищенную.
+ *
+ * Стало: ozon:user:<uid>:upload — счётчик поколения.
+ *   Get Parse Cache → Begin Upload (INCR) → Check Parse Cache …
+ *   Merge Upload? / Merge Session Report → Get Upload Generation → Upload Current? → Cache CSV Records …
+ *   file:clear: … Del Date Taps → Cancel Upload (INCR) → Clear Session State …
+ * Загрузка пишет сессию, только если поколение не сменилось с её начала.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, findNode, replaceInCode, connect, addNode, redisNode, ifNode,
+} = require('./lib/workflow-edit');
+
+const UPLOAD_KEY = "ozon:user:{{ $('Extract User Data').first().json.user_id }}:upload";
+const SESSION_TTL = 259200;
+
+console.log('📝 Cancelling stale uploads by generation...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+if (findNode(wf, 'Begin Upload')) {
+  console.error('❌ Begin Upload already exists (already applied?)');
+  process.exit(1);
+}
+
+// INCR в n8n отдаёт только { <key>: значение } — Check Parse Cache берёт ключ кэша у Get Parse Cache
+const incr = (id, name, position) => redisNode(wf, {
+  id, name, position, operation: 'incr', key: '=' + UPLOAD_KEY, extra: { expire: true, ttl: SESSION_TTL },
+});
+addNode(wf, incr('begin-upload', 'Begin Upload', [-192, 600]));
+const check = requireNode(wf, 'Check Parse Cache');
+replaceInCode(check, 'const key=$json.parse_cache_key;\nconst report=$json.value?', "const g=$('Get Parse Cache').first().json; const key=g.parse_cache_key;\nconst report=g.value?");
+replaceInCode(check, 'unpackParsedReport($json.value)', 'unpackParsedReport(g.value)');
+connect(wf, 'Get Parse Cache', [['Begin Upload']]);
+connect(wf, 'Begin Upload', [['Check Parse Cache']]);
+
+addNode(wf, redisNode(wf, {
+  id: 'get-upload-generation', name: 'Get Upload Generation', position: [368, 400],
+  operation: 'get', key: '=' + UPLOAD_KEY, propertyName: 'upload_gen', extra: { keyType: 'string' },
+}));
+addNode(wf, ifNode({
+  id: 'upload-current', name: 'Upload Current?', position: [592, 400],
+  // Чужой INCR (file:clear, новая загрузка) после Begin Upload — результат устарел, сессию не трогаем
+  condition: "={{ Number($json.upload_gen) === $('Begin Upload').first().json['ozon:user:' + $('Extract User Data').first().json.user_id + ':upload'] }}",
+}));
+connect(wf, 'Merge Upload?', [['Get Session CSV (merge)'], ['Get Upload Generation']]);
+connect(wf, 'Merge Session Report', [['Get Upload Generation']]);
+connect(wf, 'Get Upload Generation', [['Upload Current?']]);
+connect(wf, 'Upload Current?', [['Cache CSV Records']]);
+
+addNode(wf, incr('cancel-upload', 'Cancel Upload', [1488, 1320]));
+connect(wf, 'Del Date Taps', [['Cancel Upload']]);
+connect(wf, 'Cancel Upload', [['Clear Session State']]);
+
+saveWorkflow(main);
+console.log('✅ Begin Upload / Cancel Upload bump ozon:user:<uid>:upload; Upload Current? guards the session writes');
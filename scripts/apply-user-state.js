@@ -0,0 +1,295 @@
+#!/usr/bin/env node
+/**
+ * perf(redis): одно чтение состояния пользователя на апдейт
+ *
+ * Было: тап по дате — Check Whitelist → Check Admin → Get Selected Dates
+ * (toggle) → Fetch CSV Meta (toggle) → Persist Selected Dates → Fetch
+ * Cached Data (for grid) → Get Month (Render smart) → … → Get Calendar Msg
+ * ID (smart) → Persist Calendar Msg ID (smart): восемь Redis-нод подряд,
+ * у каждой — подключение, PING, TYPE + GET (keyType automatic) и QUIT.
+ *
+ * Стало: ACL-кэш, meta, выбранные даты, месяц и id календаря — поля hash
+ * ozon:user:<uid> (src/user-state.js):
+ *   Extract User Data → Load User State (HGETALL) → User Context → ACL Known?
+ *     ├─ да:  Validate Whitelist
+ *     └─ нет: Check Whitelist → Check Admin → Pack ACL → Save ACL (HSET) → Validate Whitelist
+ * Маршруты календаря читают контекст «User Context», а пишут в конце
+ * одним HSET «Save Calendar State» (даты, месяц; после загрузки — и meta).
+ * Остальным строковым GET задан keyType string — без лишнего TYPE.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, region, connect, addNode, redisNode, codeNode, ifNode, removeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+const { USER_STATE_TTL_SEC } = require('../src/user-state');
+
+const UID = "$('Extract User Data').first().json.user_id";
+const USER_KEY = `=ozon:user:{{ ${UID} }}`;
+const CTX = "$('User Context').first().json.ctx";
+const UPLOAD_META = "['Merge Session Report', 'Parse Report File', 'Check Parse Cache']";
+const HASH_SET = { keyType: 'hash', valueIsJSON: false };
+
+console.log('📝 Loading user state with one Redis read per update...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+const dropRegion = (node, rel) => {
+  const re = new RegExp(`// #region ${rel.replace(/[./]/g, '\\$&')}\\n[\\s\\S]*?// #endregion ${rel.replace(/[./]/g, '\\$&')}\\n`);
+  if (!re.test(node.parameters.jsCode)) {
+    console.error(`❌ ${node.name}: region ${rel} not found`);
+    process.exit(1);
+  }
+  node.parameters.jsCode = node.parameters.jsCode.replace(re, '');
+};
+const setExpr = (node, param, from, to) => {
+  const before = node.parameters[param];
+  node.parameters[param] = before.replace(from, to);
+  if (node.parameters[param] === before) {
+    console.error(`❌ ${node.name}.${param}: fragment not found: ${from}`);
+    process.exit(1);
+  }
+};
+const setCondition = (name, expr) => {
+  requireNode(wf, name).parameters.conditions.conditions[0].leftValue = expr;
+};
+
+// 1. Load User State → User Context → ACL Known?
+addNode(wf, redisNode(wf, {
+  id: 'load-user-state',
+  name: 'Load User State',
+  position: [-1648, -304],
+  operation: 'get',
+  key: USER_KEY,
+  propertyName: 'state',
+  extra: { keyType: 'hash' },
+}));
+addNode(wf, codeNode({
+  id: 'user-context',
+  name: 'User Context',
+  position: [-1424, -304],
+  jsCode: region('src/user-state.js') +
+    '// Поля ozon:user:<uid> (один HGETALL) → типизированный контекст маршрута\n' +
+    'const { state, ...update } = $json;\n' +
+    'return { json: { ...update, ctx: readUserState(state) }, binary: $binary };\n',
+}));
+addNode(wf, ifNode({
+  id: 'acl-known',
+  name: 'ACL Known?',
+  position: [-1200, -304],
+  condition: '={{ $json.ctx.acl !== null }}',
+}));
+addNode(wf, codeNode({
+  id: 'pack-acl',
+  name: 'Pack ACL',
+  position: [-752, -504],
+  jsCode: region('src/user-state.js') +
+    '// Кэш ACL в ozon:user:<uid>: биты из ozon:acl:* живут ACL_CACHE_MS\n' +
+    "const acl = aclBits($('Check Whitelist').first().json.value, $json.value);\n" +
+    'return [{ json: { ...$json, acl, user_state: packUserState({ acl }) } }];\n',
+}));
+addNode(wf, redisNode(wf, {
+  id: 'save-acl',
+  name: 'Save ACL',
+  position: [-528, -504],
+  operation: 'set',
+  key: USER_KEY,
+  value: '={{ $json.user_state }}',
+  ttl: USER_STATE_TTL_SEC,
+  extra: HASH_SET,
+}));
+requireNode(wf, 'Check Whitelist').position = [-976, -504];
+requireNode(wf, 'Check Admin').position = [-864, -504];
+connect(wf, 'Extract User Data', [['Load User State']]);
+connect(wf, 'Load User State', [['User Context']]);
+connect(wf, 'User Context', [['ACL Known?']]);
+connect(wf, 'ACL Known?', [['Validate Whitelist'], ['Check Whitelist']]);
+connect(wf, 'Check Admin', [['Pack ACL']]);
+connect(wf, 'Pack ACL', [['Save ACL']]);
+connect(wf, 'Save ACL', [['Validate Whitelist']]);
+
+const validate = requireNode(wf, 'Validate Whitelist');
+validate.parameters.jsCode = region('src/user-state.js') + validate.parameters.jsCode;
+replaceInCode(validate,
+  "// читаем результаты Get из двух нод\nconst wRaw = $('Check Whitelist').first().json.value; // '1' | null\nconst aRaw = $('Check Admin').first().json.value;     // '1' | null\n\nconst isWhitelisted = wRaw === '1';\nconst isAdmin = aRaw === '1' || isSu;",
+  "// биты ACL: кэш из ozon:user:<uid> или только что прочитанные ozon:acl:* (Pack ACL)\nlet acl = $('User Context').first().json.ctx.acl;\ntry { acl = $('Pack ACL').first().json.acl; } catch (e) {}\n\nconst isWhitelisted = (acl & ACL_WHITELIST) !== 0;\nconst isAdmin = (acl & ACL_ADMIN) !== 0 || isSu;"
+);
+replaceInCode(validate, '    is_whitelisted: isWhitelisted\n', '    is_whitelisted: isWhitelisted,\n    acl\n');
+const menu = requireNode(wf, 'Generate Main Menu');
+menu.parameters.jsCode = region('src/user-state.js') + menu.parameters.jsCode;
+replaceInCode(menu,
+  "const adminRaw = $('Check Admin').first().json.value;\nconst isAdmin = adminRaw === '1';",
+  "const isAdmin = ($('Validate Whitelist').first().json.acl & ACL_ADMIN) !== 0;"
+);
+console.log('✅ Extract User Data → Load User State → User Context → ACL Known? (ACL cached in ozon:user:<uid>)');
+
+// 2. cal:open раньше cal: — иначе «cal:open» уходил в навигацию с месяцем «open»
+const route = requireNode(wf, 'Route Message');
+const rules = route.parameters.rules.values;
+const calNav = rules.findIndex(r => r.outputKey === 'CalNav');
+const calOpen = rules.findIndex(r => r.outputKey === 'CalOpen');
+rules.splice(calNav, 0, ...rules.splice(calOpen, 1));
+const outs = wf.connections['Route Message'].main;
+outs.splice(calNav, 0, ...outs.splice(calOpen, 1));
+console.log('✅ Route Message: CalOpen is matched before CalNav');
+
+// 3. Календарь: контекст вместо GET, одна запись в конце
+const ensure = requireNode(wf, 'Ensure Month (smart)');
+ensure.parameters.jsCode = region('src/session-meta.js') + region('src/user-state.js') +
+  '// Месяц: навигация / загрузка → сохранённый → первый в отчёте; даты: тоггл / сброс → сохранённые\n' +
+  "const u = $('User Context').first().json;\n" +
+  `const upload = readSessionMeta($, ${UPLOAD_META});\n` +
+  'const meta = upload || u.ctx.meta || {};\n' +
+  'const available = Array.isArray(meta.availableDates)? meta.availableDates:[];\n' +
+  'const minMonth = meta.minMonth; const maxMonth = meta.maxMonth;\n' +
+  'const month = $json.month || u.ctx.calMonth || minMonth || new Date().toISOString().slice(0,7);\n' +
+  'const selected = Array.isArray($json.selectedDates) ? $json.selectedDates : u.ctx.selectedDates;\n' +
+  '// Всё, что маршрут меняет в ozon:user:<uid>, — одним HSET в «Save Calendar State»\n' +
+  'const state = { dates: selected, cal_month: month };\n' +
+  'if (upload) state.meta = upload;\n' +
+  'return [{ json: { chat_id: u.chat_id, user_id: u.user_id, month, minMonth, maxMonth, availableDates: available, selectedDates: selected, dayTotals: meta.dayTotals || {}, calendar_msg_id: u.ctx.calendarMsgId, user_state: packUserState(state) } }];\n';
+
+const summary = requireNode(wf, 'Compute Selection Summary');
+dropRegion(summary, 'src/session-meta.js');
+replaceInCode(summary,
+  "// «Итого» по выбранным дням из meta.dayTotals — records для этого не нужны\nlet selected = [];\ntry {\n  const rawSel = $('Get Selected Dates').first()?.json?.value;\n  selected = rawSel ? JSON.parse(rawSel) : [];\n} catch(e){ selected = []; }\nconst meta = readSessionMeta($, ['Fetch Cached Data (for grid)', 'Fetch CSV Meta (nav)', 'Fetch CSV Meta (calopen)', 'Fetch CSV Meta (for calendar)', 'Parse Report File']) || {};\nconst dayTotals = meta.dayTotals || {};",
+  "// «Итого» по выбранным дням из meta.dayTotals — records для этого не нужны\nconst selected = Array.isArray($json.selectedDates) ? $json.selectedDates : [];\nconst dayTotals = $json.dayTotals || {};"
+);
+
+addNode(wf, redisNode(wf, {
+  id: 'save-calendar-state',
+  name: 'Save Calendar State',
+  position: [1040, 856],
+  operation: 'set',
+  key: USER_KEY,
+  value: "={{ $('Ensure Month (smart)').first().json.user_state }}",
+  ttl: USER_STATE_TTL_SEC,
+  extra: HASH_SET,
+}));
+connect(wf, 'Render Calendar (smart)', [['Save Calendar State']]);
+connect(wf, 'Save Calendar State', [['Has Calendar Msg? (smart)']]);
+setCondition('Has Calendar Msg? (smart)', "={{ !!$('Ensure Month (smart)').first().json.calendar_msg_id }}");
+setExpr(requireNode(wf, 'Edit Calendar (smart)'), 'jsonBody',
+  "$('Get Calendar Msg ID (smart)').first().json.value",
+  "$('Ensure Month (smart)').first().json.calendar_msg_id"
+);
+connect(wf, 'Edit Calendar (smart)', []);
+Object.assign(requireNode(wf, 'Persist Calendar Msg ID (smart)').parameters, {
+  key: USER_KEY,
+  value: "={{ 'calendar_msg_id ' + JSON.stringify($json.result?.message_id || $json.message_id || $json.result?.message?.message_id || null) }}",
+  ...HASH_SET,
+  options: { ttl: USER_STATE_TTL_SEC },
+});
+console.log('✅ Ensure Month (smart) reads User Context; Render → Save Calendar State (HSET) → Edit | Send → Persist Calendar Msg ID (HSET)');
+
+// 4. Тоггл, сброс, навигация, «Готово», меню
+const toggle = requireNode(wf, 'Toggle Date');
+dropRegion(toggle, 'src/session-meta.js');
+replaceInCode(toggle,
+  "const meta = readSessionMeta($, ['Fetch CSV Meta (toggle)']) || {};",
+  `const ctx = ${CTX};\nconst meta = ctx.meta || {};`
+);
+// Недоступный день не сбрасывает выбор
+replaceInCode(toggle,
+  'return [{ json: { user_id: userId, selectedDates: [], hitLimit: false, unavailable: true } }];',
+  'return [{ json: { user_id: userId, selectedDates: ctx.selectedDates, hitLimit: false, unavailable: true } }];'
+);
+replaceInCode(toggle,
+  "let selected = [];\ntry {\n  const rawSel = $('Get Selected Dates (toggle)').first()?.json?.value;\n  selected = rawSel ? JSON.parse(rawSel) : [];\n} catch(e){ selected = []; }",
+  'let selected = ctx.selectedDates.slice();'
+);
+const hitLimit = wf.connections['Hit Limit?'].main;
+hitLimit[1] = [{ node: 'Ensure Month (smart)', type: 'main', index: 0 }];
+outs[rules.findIndex(r => r.outputKey === 'DateSelection')] = [{ node: 'Toggle Date', type: 'main', index: 0 }];
+
+connect(wf, 'Reset Dates', [['Ensure Month (smart)']]);
+connect(wf, 'Handle Calendar Nav', [['Ensure Month (smart)']]);
+
+replaceInCode(requireNode(wf, 'Handle Done'),
+  "let selected=[]; try{ const raw=$('Get Selected Dates (Done)').first().json.value; selected=raw?JSON.parse(raw):[]; }catch(e){}",
+  `const selected=${CTX}.selectedDates;`
+);
+outs[rules.findIndex(r => r.outputKey === 'DatesDone')] = [{ node: 'Handle Done', type: 'main', index: 0 }];
+
+const orders = requireNode(wf, 'Render Orders Menu');
+dropRegion(orders, 'src/session-meta.js');
+replaceInCode(orders, "const meta = readSessionMeta($, ['Get CSV Meta (Menu)']) || {};", `const meta = ${CTX}.meta || {};`);
+connect(wf, 'Handle Menu', [['Render Orders Menu']]);
+console.log('✅ Toggle Date, Reset Dates, Handle Calendar Nav, Handle Done, Render Orders Menu read User Context');
+
+// 5. Открытие календаря и загрузка: meta — из контекста или из только что разобранного файла
+outs[rules.findIndex(r => r.outputKey === 'CalOpen')] = [{ node: 'Has File? (calopen)', type: 'main', index: 0 }];
+setCondition('Has File? (calopen)', `={{ !!${CTX}.meta }}`);
+replaceInCode(requireNode(wf, 'Calc Initial Month'),
+  "const meta = readSessionMeta($, ['Fetch Cached Data (for grid)', 'Fetch CSV Meta (nav)', 'Fetch CSV Meta (calopen)', 'Fetch CSV Meta (for calendar)', 'Merge Session Report', 'Parse Report File', 'Check Parse Cache']) || {};",
+  `const meta = readSessionMeta($, ${UPLOAD_META}) || ${CTX}.meta || {};`
+);
+connect(wf, 'Calc Initial Month', [['Ensure Month (smart)']]);
+connect(wf, 'Cache CSV Histogram', [['Calc Initial Month']]);
+
+replaceInCode(requireNode(wf, 'Merge Session Report'),
+  'meta:read($json.session_meta) }',
+  `meta:${CTX}.meta }`
+);
+connect(wf, 'Get Session Hist (merge)', [['Merge Session Report']]);
+console.log('✅ Has File? (calopen) and Calc Initial Month use User Context; upload meta is saved with the calendar state');
+
+// 6. Очистка файла: :csv/:agg/:hist — DEL, поля сессии и календаря — один HSET
+outs[rules.findIndex(r => r.outputKey === 'FileClear')] = [{ node: 'Has Calendar Msg? (clear)', type: 'main', index: 0 }];
+setCondition('Has Calendar Msg? (clear)', `={{ !!${CTX}.calendarMsgId }}`);
+setExpr(requireNode(wf, 'Delete Calendar Message'), 'jsonBody',
+  "$('Get Calendar Msg ID (clear)').first().json.value",
+  `${CTX}.calendarMsgId`
+);
+addNode(wf, redisNode(wf, {
+  id: 'clear-session-state',
+  name: 'Clear Session State',
+  position: [-528, 856],
+  operation: 'set',
+  key: USER_KEY,
+  value: 'meta null dates null cal_month null calendar_msg_id null',
+  ttl: USER_STATE_TTL_SEC,
+  extra: HASH_SET,
+}));
+connect(wf, 'Del csv_data', [['Del csv_agg']]);
+connect(wf, 'Del csv_hist', [['Clear Session State']]);
+connect(wf, 'Clear Session State', [['Answer Callback (cleared)']]);
+console.log('✅ file:clear → Del csv_data / csv_agg / csv_hist → Clear Session State (HSET)');
+
+// 7. Старые ключи состояния больше не читаются и не пишутся
+const removed = [
+  'Get Selected Dates (toggle)', 'Fetch CSV Meta (toggle)', 'Persist Selected Dates', 'Fetch Cached Data (for grid)',
+  'Get Month (Render smart)', 'Get Selected Dates', 'Fetch CSV Meta (for calendar)', 'Fetch CSV Meta (nav)',
+  'Persist Selected (Reset)', 'Get Selected Dates (Done)', 'Get CSV Meta (Menu)', 'Fetch CSV Meta (calopen)',
+  'Persist Cal Month (initial)', 'Get Calendar Msg ID (smart)', 'Get Calendar Msg ID (clear)', 'Cache CSV Meta',
+  'Get Session Meta (merge)', 'Del csv_meta', 'Del selected_dates', 'Del calendar_msg_id',
+  // Недостижимая цепочка «Clear Cache» (нет входа) по старым ключам
+  'Clear Cache', 'Del CSV Cache', 'Del CSV Meta', 'Del CSV Aggregates', 'Del CSV Histogram', 'Del Selected Dates', 'Del Calendar Msg ID',
+];
+for (const name of removed) {
+  requireNode(wf, name);
+  removeNode(wf, name);
+}
+const refs = new RegExp(`\\$\\((['"])(${removed.map(n => n.replace(/[.*+?^${}()|[\]\\]/g, '\\$&')).join('|')})\\1\\)`);
+for (const n of wf.nodes) {
+  const hit = JSON.stringify(n.parameters).match(refs);
+  if (hit) {
+    console.error(`❌ ${n.name} still references ${hit[2]}`);
+    process.exit(1);
+  }
+}
+console.log(`✅ Removed ${removed.length} nodes`);
+
+// 8. Строковым GET — keyType string: без TYPE перед GET
+let typed = 0;
+for (const n of wf.nodes) {
+  if (n.type !== 'n8n-nodes-base.redis' || n.parameters.operation !== 'get' || n.parameters.keyType) continue;
+  n.parameters.keyType = 'string';
+  typed++;
+}
+console.log(`✅ keyType string on ${typed} GET nodes`);
+
+saveWorkflow(main);
+syncAll({ quiet: true });
+console.log('\n✅ Successfully switched to one user state read per update');
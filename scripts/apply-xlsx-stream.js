@@ -0,0 +1,52 @@
+#!/usr/bin/env node
+/**
+ * perf(parse): потоковый разбор XLSX тем же путём, что CSV
+ *
+ * Было: Ensure XLSX Document → Get XLSX from Telegram → «Extract from File
+ * (XLSX)» (весь лист — items n8n, по объекту на строку) → Parse Report File.
+ * Мимо кэша разбора; «Plan Parse Cache» падал на «Check Parse Cache»,
+ * который на этой ветке не исполнялся.
+ *
+ * Стало: Ensure XLSX Document считает parse_cache_key и идёт в общий путь
+ * загрузки (Get Parse Cache → … → Get File from Telegram → Parse Report
+ * File). «Parse Report File» по сигнатуре ZIP читает XLSX потоково
+ * (src/xlsx-stream.js) и отдаёт ячейки в тот же обработчик строк, что и
+ * parseCsvBuffer: план колонок, индексы, :csv — одни на оба формата.
+ */
+
+const {
+  loadWorkflow, saveWorkflow, requireNode, replaceInCode, region, connect, removeNode,
+} = require('./lib/workflow-edit');
+const { syncAll } = require('./sync-code-nodes');
+
+console.log('📝 Switching XLSX uploads to streaming ingestion...\n');
+
+const main = loadWorkflow('ozon-telegram-bot.json');
+const wf = main.workflow;
+
+// 1. XLSX — в общий путь загрузки с кэшем разбора
+const ensure = requireNode(wf, 'Ensure XLSX Document');
+ensure.parameters.jsCode = region('src/parse-cache.js') + ensure.parameters.jsCode;
+replaceInCode(ensure, 'return [{json:$json}];', 'return [{json:{...$json, parse_cache_key:parseCacheKey(d)}}];');
+connect(wf, 'Ensure XLSX Document', [['Get Parse Cache']]);
+// Ключ кэша — из входа (Redis GET сохраняет json), какая бы Ensure-нода ни сработала
+replaceInCode(requireNode(wf, 'Check Parse Cache'),
+  "const key=$('Ensure CSV Document').first().json.parse_cache_key;",
+  'const key=$json.parse_cache_key;'
+);
+removeNode(wf, 'Get XLSX from Telegram');
+removeNode(wf, 'Extract from File (XLSX)');
+console.log('✅ Ensure XLSX Document → Get Parse Cache (Get XLSX from Telegram, Extract from File (XLSX) removed)');
+
+// 2. Parse Report File: XLSX по сигнатуре ZIP, строки — в тот же обработчик
+const parse = requireNode(wf, 'Parse Report File');
+parse.parameters.jsCode = region('src/xlsx-stream.js') + parse.parameters.jsCode;
+replaceInCode(parse,
+  "if(file && file.binary && file.binary.data){ parseCsvBuffer(await this.helpers.getBinaryDataBuffer(0,'data'), cells=>{ if(plan) addRow(cells); else header(cells, true); }); }",
+  "if(file && file.binary && file.binary.data){ const buf=await this.helpers.getBinaryDataBuffer(0,'data'); const onRow=cells=>{ if(plan) addRow(cells); else header(cells, true); }; if(isXlsxBuffer(buf)) parseXlsxBuffer(buf, onRow); else parseCsvBuffer(buf, onRow); }"
+);
+console.log('✅ Parse Report File: CSV or XLSX bytes, one row handler');
+
+saveWorkflow(main);
+syncAll({ quiet: true });
+console.log('\n✅ Successfully switched XLSX to streaming ingestion');
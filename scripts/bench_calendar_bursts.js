@@ -0,0 +1,129 @@
+#!/usr/bin/env node
+/**
+ * Вызовы Bot API и ответы 429 на сессию с сериями тапов по календарю — до и
+ * после окна слияния рендеров (src/date-taps.js → RENDER_COALESCE_MS).
+ *
+ * Сессия: загрузка отчёта, затем BURSTS серий по BURST_TAPS тапов по датам
+ * с паузой TAP_GAP_MS между тапами и BURST_PAUSE_MS между сериями. Апдейты
+ * исполняются параллельно, как у воркеров n8n в queue mode
+ * (scripts/lib/n8n-runner.js, Redis в памяти). Время модели сжато в
+ * --scale раз, чтобы замер шёл секунды.
+ *
+ * Заглушка Bot API ограничивает сообщения в чате (sendMessage, edit*,
+ * deleteMessage) ведром токенов: CHAT_RATE_PER_SEC в секунду, запас
+ * CHAT_BURST. Сверх него — 429 с retry_after. answerCallbackQuery лимитом
+ * чата не ограничен.
+ *
+ * «До» — workflow из коммита перед окном слияния (или --before=<git rev>).
+ *
+ * Запуск: node scripts/bench_calendar_bursts.js [--scale=0.1] [--before=<rev>]
+ */
+
+const path = require('path');
+const { execFileSync } = require('child_process');
+const { loadWorkflowFile } = require('./lib/n8n-sandbox');
+const { MemoryRedis, runWorkflow } = require('./lib/n8n-runner');
+const { generateReport, toCsv } = require('./lib/synthetic-report');
+const { RENDER_COALESCE_MS } = require('../src/date-taps');
+
+const ROOT = path.join(__dirname, '..');
+const WORKFLOW = 'workflows/ozon-telegram-bot.json';
+const BURSTS = 10;
+const BURST_TAPS = 5;
+const TAP_GAP_MS = 400;
+const BURST_PAUSE_MS = 3000;
+const CHAT_RATE_PER_SEC = 1;
+const CHAT_BURST = 1;
+const CHAT_METHODS = new Set(['sendMessage', 'editMessageText', 'editMessageReplyMarkup', 'deleteMessage']);
+
+const arg = name => (process.argv.find(a => a.startsWith(`--${name}=`)) || '').slice(name.length + 3);
+const SCALE = Number(arg('scale')) || 0.1;
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms * SCALE));
+
+function baselineRev() {
+  if (arg('before')) return arg('before');
+  const git = args => execFileSync('git', args, { cwd: ROOT, encoding: 'utf8' }).trim();
+  const added = git(['log', '-S', 'RENDER_COALESCE_MS', '--format=%H', '--', 'src/date-taps.js']).split('\n').pop();
+  return added ? `${added}^` : 'HEAD';
+}
+
+/** Bot API с лимитом сообщений на чат: ведро токенов во времени модели. */
+function rateLimitedTelegram() {
+  const t0 = Date.now();
+  const now = () => (Date.now() - t0) / SCALE / 1000;
+  const buckets = new Map();
+  const calls = {};
+  let limited = 0;
+  let messageId = 100;
+  const telegram = async (method, body) => {
+    calls[method] = (calls[method] || 0) + 1;
+    if (CHAT_METHODS.has(method)) {
+      const b = buckets.get(body.chat_id) || { tokens: CHAT_BURST, at: now() };
+      b.tokens = Math.min(CHAT_BURST, b.tokens + (now() - b.at) * CHAT_RATE_PER_SEC);
+      b.at = now();
+      buckets.set(body.chat_id, b);
+      if (b.tokens < 1) {
+        limited++;
+        return { ok: false, error_code: 429, description: 'Too Many Requests: retry later', parameters: { retry_after: 1 } };
+      }
+      b.tokens -= 1;
+    }
+    return { ok: true, result: method === 'sendMessage' ? { message_id: ++messageId } : true };
+  };
+  return { telegram, calls, limited: () => limited };
+}
+
+async function session(workflow) {
+  const redis = new MemoryRedis();
+  redis.set('ozon:acl:42', '3');
+  // Прежние ключи прав — для workflow «до»
+  redis.set('ozon:acl:whitelist:42', '1');
+  redis.set('ozon:acl:admins:42', '1');
+  const api = rateLimitedTelegram();
+  const config = { TELEGRAM_BOT_TOKEN: 'bench-token', SUPERUSER_IDS: '1', CALENDAR_COALESCE_MS: RENDER_COALESCE_MS * SCALE };
+  const files = { doc: Buffer.from(toCsv(generateReport({ rows: 2000, days: 20 }))) };
+  const from = { id: 42 };
+  const chat = { id: 42 };
+  const run = async update => {
+    const r = await runWorkflow(workflow, { update, redis, telegram: api.telegram, files, config });
+    if (r.error) throw new Error(`${JSON.stringify(update).slice(0, 80)}: ${r.error.message}`);
+  };
+  await run({ message: { from, chat, document: { file_id: 'doc', file_unique_id: 'bench', file_name: 'orders.csv', mime_type: 'text/csv' } } });
+  // ozon:user:42 — у ревизий до hash tag (--before)
+  const state = [redis.hgetall('ozon:user:{42}'), redis.hgetall('ozon:user:42')].find(h => h.meta);
+  const days = JSON.parse(state.meta).availableDates.slice(0, BURST_TAPS + 2);
+  await sleep(BURST_PAUSE_MS);
+  for (const k of Object.keys(api.calls)) delete api.calls[k];
+
+  let taps = 0;
+  for (let b = 0; b < BURSTS; b++) {
+    const inFlight = [];
+    for (let i = 0; i < BURST_TAPS; i++) {
+      const day = days[(b + i) % days.length];
+      inFlight.push(run({ callback_query: { id: `cb-${++taps}`, from, message: { message_id: 1, chat }, data: `date:${day}` } }));
+      await sleep(TAP_GAP_MS);
+    }
+    await Promise.all(inFlight);
+    await sleep(BURST_PAUSE_MS);
+  }
+  const chatCalls = Object.entries(api.calls).filter(([m]) => CHAT_METHODS.has(m)).reduce((s, [, n]) => s + n, 0);
+  return { taps, calls: api.calls, total: Object.values(api.calls).reduce((s, n) => s + n, 0), chatCalls, limited: api.limited() };
+}
+
+async function main() {
+  const rev = baselineRev();
+  const before = await session(JSON.parse(execFileSync('git', ['show', `${rev}:${WORKFLOW}`], { cwd: ROOT, maxBuffer: 1 << 28 })));
+  const after = await session(loadWorkflowFile(path.join(ROOT, WORKFLOW)));
+  console.log(`🧪 Bot API calls per session: ${WORKFLOW} at ${rev} → working tree`);
+  console.log(`${BURSTS} bursts × ${BURST_TAPS} taps, ${TAP_GAP_MS} ms apart; window ${RENDER_COALESCE_MS} ms; chat limit ${CHAT_RATE_PER_SEC}/s, burst ${CHAT_BURST}\n`);
+  console.log('| | Before | After |');
+  console.log('|---|---|---|');
+  const methods = [...new Set([...Object.keys(before.calls), ...Object.keys(after.calls)])].sort();
+  for (const m of methods) console.log(`| ${m} | ${before.calls[m] || 0} | ${after.calls[m] || 0} |`);
+  console.log(`| total calls | ${before.total} | ${after.total} |`);
+  console.log(`| chat messages per tap | ${(before.chatCalls / before.taps).toFixed(2)} | ${(after.chatCalls / after.taps).toFixed(2)} |`);
+  const rate = s => `${s.limited} (${(100 * s.limited / Math.max(1, s.chatCalls)).toFixed(0)}%)`;
+  console.log(`| 429 responses | ${rate(before)} | ${rate(after)} |`);
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
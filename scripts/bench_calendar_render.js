@@ -0,0 +1,103 @@
+#!/usr/bin/env node
+/**
+ * Время рендера календаря на клик: «Render Calendar (smart)» до скелета
+ * сетки (src/calendar-grid.js) и после.
+ *
+ * Нода исполняется целиком через n8n-sandbox: как и в n8n, каждый запуск
+ * заново компилирует jsCode, так что в замер входит и размер кода. Отдельно —
+ * сама сетка: сборка по availableDates (как раньше), скелет + отметки и
+ * разбор скелета, сохранённого в JSON, — цена кэша скелетов между апдейтами.
+ *
+ * «До» — workflow из коммита перед src/calendar-grid.js (или --before=<rev>).
+ *
+ * Запуск: node scripts/bench_calendar_render.js [--days=365] [--before=<rev>]
+ */
+
+const path = require('path');
+const { execFileSync } = require('child_process');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { buildSessionMeta } = require('../src/session-meta');
+const { buildCalendarGrid, overlayCalendarGrid } = require('../src/calendar-grid');
+
+const ROOT = path.join(__dirname, '..');
+const WORKFLOW = 'workflows/ozon-telegram-bot.json';
+const NODE = 'Render Calendar (smart)';
+const RUNS = 20000;
+const FN_RUNS = 200000;
+
+const arg = name => (process.argv.find(a => a.startsWith(`--${name}=`)) || '').slice(name.length + 3);
+const DAYS = Number(arg('days')) || 365;
+
+function baselineRev() {
+  if (arg('before')) return arg('before');
+  const git = args => execFileSync('git', args, { cwd: ROOT, encoding: 'utf8' }).trim();
+  const added = git(['log', '--diff-filter=A', '--format=%H', '--', 'src/calendar-grid.js']).split('\n').pop();
+  return added ? `${added}^` : 'HEAD';
+}
+
+async function perClickUs(fn, runs = RUNS) {
+  for (let i = 0; i < runs / 10; i++) await fn();
+  const t0 = process.hrtime.bigint();
+  for (let i = 0; i < runs; i++) await fn();
+  return Number(process.hrtime.bigint() - t0) / 1e3 / runs;
+}
+
+function perCallUs(fn) {
+  for (let i = 0; i < FN_RUNS / 10; i++) fn();
+  const t0 = process.hrtime.bigint();
+  for (let i = 0; i < FN_RUNS; i++) fn();
+  return Number(process.hrtime.bigint() - t0) / 1e3 / FN_RUNS;
+}
+
+// Прежняя сборка сетки из «Render Calendar (smart)»: фильтр всех availableDates под месяц
+function scanGrid(month, availableDates, selected) {
+  const total = new Date(...month.split('-').map(Number), 0).getDate();
+  const setAvail = new Set(availableDates.filter(d => d.startsWith(month)));
+  const setSel = new Set(selected);
+  const rows = [];
+  for (let day = 1; day <= total;) {
+    const row = [];
+    for (let i = 0; i < 7 && day <= total; i++, day++) {
+      const full = `${month}-${String(day).padStart(2, '0')}`;
+      row.push(setAvail.has(full) ? { text: (setSel.has(full) ? '☑ ' : '▫ ') + day, callback_data: `date:${full}` } : { text: '· ' + day, callback_data: 'noop' });
+    }
+    rows.push(row);
+  }
+  return rows;
+}
+
+async function main() {
+  const rev = baselineRev();
+  const before = JSON.parse(execFileSync('git', ['show', `${rev}:${WORKFLOW}`], { cwd: ROOT, maxBuffer: 1 << 28 }));
+  const after = loadWorkflowFile(path.join(ROOT, WORKFLOW));
+
+  const dates = [];
+  for (let d = new Date(Date.UTC(2025, 8, 30) - (DAYS - 1) * 86400000); dates.length < DAYS; d.setUTCDate(d.getUTCDate() + 1)) dates.push(d.toISOString().slice(0, 10));
+  const meta = buildSessionMeta({ availableDates: dates });
+  const month = meta.maxMonth;
+  const input = {
+    chat_id: 42, month, minMonth: meta.minMonth, maxMonth: meta.maxMonth, availableDates: dates, daysByMonth: meta.daysByMonth,
+    selectedDates: dates.slice(-3), selectionSummary: { totalOrders: 12, totalRevenue: 4321.5 },
+  };
+  const nodeRows = [
+    ['before', await perClickUs(() => runCodeNode(before, NODE, { input }))],
+    ['after', await perClickUs(() => runCodeNode(after, NODE, { input }))],
+  ];
+  const stored = JSON.stringify(buildCalendarGrid(month, meta));
+  const gridRows = [
+    ['scan availableDates (before)', perCallUs(() => scanGrid(month, dates, input.selectedDates))],
+    ['skeleton + overlay (after)', perCallUs(() => overlayCalendarGrid(buildCalendarGrid(month, meta), input.selectedDates))],
+    [`parse a stored skeleton (${stored.length} B)`, perCallUs(() => JSON.parse(stored))],
+  ];
+
+  console.log(`🧪 ${NODE} per click: ${WORKFLOW} at ${rev} → working tree`);
+  console.log(`${DAYS} available days (${meta.months.length} months), ${input.selectedDates.length} selected, ${RUNS} runs\n`);
+  console.log('| Render Calendar (smart) | µs per click |');
+  console.log('|---|---|');
+  for (const [label, us] of nodeRows) console.log(`| ${label} | ${us.toFixed(1)} |`);
+  console.log('\n| Grid only | µs |');
+  console.log('|---|---|');
+  for (const [label, us] of gridRows) console.log(`| ${label} | ${us.toFixed(2)} |`);
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Peak memory of report ingestion vs file size: streaming pipeline
+(scripts/report_ingest.py) against the previous list(csv.DictReader) approach
+of test_csv_parsing.py / test_full_workflow.py.
+
+Synthetic FBO reports (template row from orders-2025-fbo-test.csv, 300 SKUs,
+90 days) are written to a temp dir; each measurement runs in a fresh
+interpreter and reports its peak RSS (ru_maxrss). Aggregates are bounded by
+the key space (days x SKUs; x 48 half-hours for :hist), not by the row count:
+once every (day, SKU) has occurred, memory stops growing.
+
+Usage:
+    python3 scripts/bench_ingest_memory.py [sizes_mb=10,100,1000] [--legacy-max=100]
+"""
+
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_ingest import ROOT, ingest  # noqa: E402
+
+SAMPLE = os.path.join(ROOT, 'orders-2025-fbo-test.csv')
+STATUSES = [('Доставлен', 0.62), ('Ожидает отгрузки', 0.13), ('Ожидает сборки', 0.09),
+            ('Отменён', 0.07), ('Доставляется', 0.06), ('Возврат', 0.03)]
+
+
+def write_report(path, size_mb, skus=300, days=90, seed=42):
+    with open(SAMPLE, encoding='utf-8-sig') as f:
+        reader = csv.reader(f, delimiter=';')
+        header = next(reader)
+        template = next(reader)
+    col = {h: i for i, h in enumerate(header)}
+    rnd = random.Random(seed)
+    sku_pool = [f'SH-SYN-{i:04d}' for i in range(skus)]
+    prices = [f'{490 + rnd.randrange(40) * 50}.00' for _ in sku_pool]
+    names, weights = zip(*STATUSES)
+    start = 1754006400  # 2025-08-01 UTC
+    target = size_mb << 20
+    written, i = 0, 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        out = csv.writer(f, delimiter=';', lineterminator='\n')
+        f.write('\ufeff')
+        out.writerow(header)
+        while written < target:
+            batch = []
+            for _ in range(10000):
+                row = list(template)
+                s = rnd.randrange(skus)
+                ts = time.gmtime(start + rnd.randrange(days * 86400))
+                order_id = f'{10000000 + i}-{rnd.randrange(10000):04d}'
+                row[col['Номер заказа']] = order_id
+                row[col['Номер отправления']] = f'{order_id}-1'
+                row[col['Принят в обработку']] = f'{ts.tm_mday:02d}.{ts.tm_mon:02d}.{ts.tm_year} {ts.tm_hour}:{ts.tm_min:02d}'
+                row[col['Статус']] = rnd.choices(names, weights)[0]
+                row[col['Артикул']] = sku_pool[s]
+                row[col['Ваша цена']] = prices[s]
+                row[col['Количество']] = '1' if rnd.random() < 0.85 else str(2 + rnd.randrange(3))
+                batch.append(row)
+                i += 1
+            out.writerows(batch)
+            written = f.tell()
+    return i
+
+
+def legacy(path):
+    """As the scripts did before: every row in memory, then records"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f, delimiter=';'))
+    records = [{
+        'order_id': r.get('Номер заказа', ''), 'sku': r.get('Артикул', ''), 'price': r.get('Ваша цена', ''),
+        'quantity': r.get('Количество', ''), 'status': r.get('Статус', ''), 'created_at': r.get('Принят в обработку', ''),
+    } for r in rows]
+    return len(records)
+
+
+def child(mode, path):
+    t0 = time.perf_counter()
+    if mode == 'legacy':
+        n = legacy(path)
+    else:
+        n = ingest(path, histograms=(mode == 'streaming'))['totalRecords']
+    seconds = time.perf_counter() - t0
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'records': n, 'seconds': seconds, 'rss_mb': rss_mb}))
+
+
+def measure(mode, path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, path],
+                         check=True, capture_output=True, text=True)
+    return json.loads(out.stdout)
+
+
+def main(argv):
+    if len(argv) >= 4 and argv[1] == '--child':
+        child(argv[2], argv[3])
+        return 0
+    sizes = [10, 100, 1000]
+    legacy_max = 100
+    for arg in argv[1:]:
+        if arg.startswith('--legacy-max='):
+            legacy_max = int(arg.split('=', 1)[1])
+        else:
+            sizes = [int(s) for s in arg.split(',')]
+
+    print(f'🧪 Ingest peak memory — FBO, 300 SKUs, 90 days (legacy measured up to {legacy_max} MB)\n')
+    print('| File | Rows | Streaming, :agg + :meta | Streaming, + :hist | Streaming rows/s | list(DictReader) |')
+    print('|---|---|---|---|---|---|')
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'fbo-{size}mb.csv')
+            rows = write_report(path, size)
+            a = measure('streaming-agg', path)
+            s = measure('streaming', path)
+            assert a['records'] == s['records'] == rows
+            old = f"{measure('legacy', path)['rss_mb']:.0f} MB" if size <= legacy_max else '—'
+            real = os.path.getsize(path) / (1 << 20)
+            print(f"| {real:.0f} MB | {rows:,} | {a['rss_mb']:.0f} MB | {s['rss_mb']:.0f} MB | {rows / s['seconds']:,.0f} | {old} |", flush=True)
+            os.remove(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
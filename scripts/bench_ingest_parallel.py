@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Scaling of parallel report ingestion (ingest_parallel in
+scripts/report_ingest.py) over 1..N worker processes.
+
+A synthetic FBO report (bench_ingest_memory.write_report: 300 SKUs, 90 days)
+is ingested once in a single pass and then with every worker count; each
+parallel result is checked to be identical to the single pass.
+
+Besides the wall time, every run is broken into its phases, measured
+serially in this process: the quote-aware split, the per-range parse +
+pre-aggregation, the ordered merge and building the agg/hist/meta output
+(the same step as in the single pass). "Critical path" = split + slowest
+range + merge + output is the wall time the run approaches when every range gets its
+own core; on a machine with fewer cores than workers the measured wall time
+is the honest number and the critical path shows what the work allows.
+
+Usage:
+    python3 scripts/bench_ingest_parallel.py [size_mb=200] [--workers=1,2,4,8]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_ingest_memory import write_report  # noqa: E402
+from report_ingest import (  # noqa: E402
+    CHUNK_BYTES, ReportAggregator, _ingest_range, _result, compile_header_plan, ingest, ingest_parallel,
+    iter_lines, iter_rows, split_ranges,
+)
+
+
+def phases(path, parts):
+    """Serial timings of split / each range / merge for `parts` ranges"""
+    t0 = time.perf_counter()
+    header_end, ranges = split_ranges(path, parts)
+    split = time.perf_counter() - t0
+    with open(path, 'rb') as f:
+        plan = compile_header_plan(next(iter_rows(iter_lines([f.read(header_end)]))))
+    partials, range_seconds = [], []
+    for start, end in ranges:
+        t0 = time.perf_counter()
+        partials.append(_ingest_range((path, start, end, plan, True, CHUNK_BYTES)))
+        range_seconds.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    agg = ReportAggregator(plan['reportType'])
+    for part in partials:
+        agg.merge(part)
+    merge = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    result = _result(plan, agg, True)
+    output = time.perf_counter() - t0
+    return split, range_seconds, merge, output, result
+
+
+def main(argv):
+    size = 200
+    workers = [w for w in (1, 2, 4, 8) if w <= max(8, os.cpu_count() or 1)]
+    for arg in argv[1:]:
+        if arg.startswith('--workers='):
+            workers = [int(w) for w in arg.split('=', 1)[1].split(',')]
+        else:
+            size = int(arg)
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f'fbo-{size}mb.csv')
+        rows = write_report(path, size)
+        print(f'🧪 Parallel ingest — FBO {os.path.getsize(path) / (1 << 20):.0f} MB, {rows:,} rows, '
+              f'{cores} CPU core(s) available\n')
+
+        t0 = time.perf_counter()
+        expected = json.dumps(ingest(path), ensure_ascii=False)
+        single = time.perf_counter() - t0
+        print(f'Single pass ingest(): {single:.1f} s, {rows / single:,.0f} rows/s\n')
+
+        print('| Workers | Wall time | Speedup | Split | Slowest range | Merge | agg/hist/meta | Critical path | Work speedup |')
+        print('|---|---|---|---|---|---|---|---|---|')
+        for n in workers:
+            t0 = time.perf_counter()
+            result = ingest_parallel(path, n)
+            wall = time.perf_counter() - t0
+            assert json.dumps(result, ensure_ascii=False) == expected, f'{n} workers: result differs'
+            split, ranges, merge, output, serial = phases(path, n)
+            assert json.dumps(serial, ensure_ascii=False) == expected
+            critical = split + max(ranges) + merge + output
+            print(f'| {n} | {wall:.1f} s | {single / wall:.2f}× | {split:.2f} s | {max(ranges):.1f} s | '
+                  f'{merge:.2f} s | {output:.2f} s | {critical:.1f} s | {single / critical:.2f}× |', flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
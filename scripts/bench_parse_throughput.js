@@ -0,0 +1,63 @@
+#!/usr/bin/env node
+/**
+ * Бенчмарк маппинга строк отчёта в records: прежний pick() с очисткой
+ * ключей на каждой строке против плана колонок (src/report-schema.js),
+ * плюс «Parse Report File» целиком (индексы, колоночный :csv, :meta).
+ *
+ * Запуск: node scripts/bench_parse_throughput.js [rows=100000]
+ */
+
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { generateReport } = require('./lib/synthetic-report');
+const { compileHeaderPlan } = require('../src/report-schema');
+const { REPORT_SCHEMAS } = require('../src/report-schemas');
+const { referenceRecords } = require('./lib/reference-records');
+
+const ROWS = Number(process.argv[2] || 100000);
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+
+const toNum = v => { const s = String(v ?? '').replace(/\s/g, '').replace(',', '.'); const n = Number(s); return Number.isFinite(n) ? n : 0; };
+
+// План колонок: заголовок разбирается один раз, в цикле — доступ по ключам
+function planMap(input) {
+  const plan = compileHeaderPlan(Object.keys(input[0] || {}), REPORT_SCHEMAS);
+  const f = plan.fields;
+  // тот же val(), что в «Parse Report File»
+  const val = (r, keys) => { for (const k of keys) { const v = r[k]; if (v === undefined || v === null || v === '') continue; const s = String(v).replace(/^\uFEFF/, '').trim(); if (s !== '') return s; } return ''; };
+  const records = [];
+  for (const r of input) {
+    const order_id = val(r, f.order_id.keys); const sku = val(r, f.sku.keys);
+    if (!order_id || !sku) continue;
+    const q = val(r, f.quantity.keys);
+    records.push({ order_id, sku, quantity: toNum(q === '' ? 1 : q), price: toNum(val(r, f.price.keys)), created_at: val(r, f.created_at.keys), status: val(r, f.status.keys).toLowerCase() });
+  }
+  return records;
+}
+
+function timeMs(fn, runs = 5) {
+  const times = [];
+  for (let i = 0; i < runs; i++) {
+    const t0 = process.hrtime.bigint();
+    fn();
+    times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  return times.sort((a, b) => a - b)[Math.floor(runs / 2)];
+}
+
+const rate = ms => `${Math.round(ROWS / ms * 1000).toLocaleString('en-US')} rows/s`;
+
+(async () => {
+  console.log(`🧪 Parse throughput — ${ROWS} rows\n`);
+  console.log('| Report | pick() per row | Compiled plan | Parse Report File (end-to-end) |');
+  console.log('|---|---|---|---|');
+  for (const type of ['FBO', 'FBS']) {
+    const rows = generateReport({ rows: ROWS, type }).rows;
+    const legacy = timeMs(() => referenceRecords(rows));
+    const plan = timeMs(() => planMap(rows));
+    const t0 = process.hrtime.bigint();
+    await runCodeNode(MAIN, 'Parse Report File', { input: rows, nodes: { 'Extract User Data': { user_id: '1', chat_id: '1' } } });
+    const full = Number(process.hrtime.bigint() - t0) / 1e6;
+    console.log(`| ${type} | ${rate(legacy)} | ${rate(plan)} | ${rate(full)} |`);
+  }
+})().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,64 @@
+#!/usr/bin/env node
+/**
+ * Бенчмарк колоночного формата records (src/record-columns.js) против
+ * прежнего JSON {reportType, records, totalRecords}: байт на запись,
+ * время кодирования и декодирования.
+ *
+ * records строятся из синтетического отчёта тем же маппингом полей, что
+ * в «Parse Report File» (сама нода на 1M строк работает минуты).
+ *
+ * Запуск: node scripts/bench_record_columns.js [sizes=10000,100000,1000000] [type=FBO]
+ */
+
+const { generateReport } = require('./lib/synthetic-report');
+const { mskMinute, encodeRecords, decodeColumns, decodeRecords } = require('../src/record-columns');
+
+const SIZES = (process.argv[2] || '10000,100000,1000000').split(',').map(Number);
+const TYPE = (process.argv[3] || 'FBO').toUpperCase();
+
+function toRecords(rows) {
+  return rows.map(r => ({
+    order_id: r['Номер заказа'],
+    sku: r['Артикул'],
+    quantity: Number(r['Количество']),
+    price: Number(r['Ваша цена']),
+    created_at: r['Принят в обработку'],
+    status: r['Статус'].toLowerCase(),
+  }));
+}
+
+function median(xs) {
+  const s = [...xs].sort((a, b) => a - b);
+  return s[Math.floor(s.length / 2)];
+}
+
+function timeMs(fn, runs) {
+  const times = [];
+  for (let i = 0; i < runs; i++) {
+    const t0 = process.hrtime.bigint();
+    fn();
+    times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  return median(times);
+}
+
+const fmtMs = ms => (ms < 10 ? ms.toFixed(2) : ms.toFixed(0));
+
+console.log(`🧪 Columnar records vs JSON records — ${TYPE}\n`);
+console.log('| Rows | JSON B/record | Columnar B/record | Ratio | JSON.parse | Columns decode | Records decode | Encode |');
+console.log('|---|---|---|---|---|---|---|---|');
+for (const n of SIZES) {
+  const records = toRecords(generateReport({ rows: n, type: TYPE, days: 90, skus: 300 }).rows);
+  const runs = n >= 1000000 ? 3 : 7;
+  const json = JSON.stringify({ reportType: TYPE, records, totalRecords: n });
+  const mskMinutes = records.map(r => mskMinute(r.created_at));
+  let enc;
+  const encodeMs = timeMs(() => { enc = encodeRecords(records, { reportType: TYPE, mskMinutes }); }, runs);
+  const col = JSON.stringify(enc);
+  const jsonBytes = Buffer.byteLength(json);
+  const colBytes = Buffer.byteLength(col);
+  const parseJson = timeMs(() => JSON.parse(json).records, runs);
+  const parseCols = timeMs(() => decodeColumns(JSON.parse(col)), runs);
+  const parseRecs = timeMs(() => decodeRecords(JSON.parse(col)), runs);
+  console.log(`| ${n} | ${(jsonBytes / n).toFixed(1)} | ${(colBytes / n).toFixed(1)} | ${(jsonBytes / colBytes).toFixed(1)}× | ${fmtMs(parseJson)} ms | ${fmtMs(parseCols)} ms | ${fmtMs(parseRecs)} ms | ${fmtMs(encodeMs)} ms |`);
+}
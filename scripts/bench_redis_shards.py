@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Throughput of session storage sharded over 1..N Redis nodes
+(scripts/redis_shards.py) -- a local multi-instance harness.
+
+Each node is its own process. Worker processes run a bot route against
+ShardedRedis: one pipeline per route with the commands of a date tap plus a
+session read --
+
+    HGETALL ozon:user:{<uid>}, RPUSH + LRANGE ozon:user:{<uid>}:taps,
+    HSET + EXPIRE ozon:user:{<uid>}, GET ozon:sess:{<uid>}:agg
+
+-- for random users out of --users seeded ones (random Telegram-sized
+ids), and the harness reports routes/s per node count. "Nodes/route" counts the nodes a route's pipeline
+went to: 1 with the hash tags; the column "untagged" is the same route with
+the keys named as before the tags (ozon:user:<uid>, ...), which spread over
+the nodes by name.
+
+Backends:
+    standin        (default) a node serves scripts/redis_standin.py over
+                   multiprocessing.connection and holds a lock for
+                   --service-us per command, like a single-threaded Redis
+                   busy with other clients: the node, not the client, is
+                   the bottleneck. The service time is slept, so nodes scale
+                   even on a box with fewer cores than nodes; client-side
+                   CPU still caps the total (watch routes/s flatten when it
+                   does).
+    redis-server   real servers on ports 7000.. (needs redis-server on PATH
+                   and redis-py); --service-us is ignored.
+
+Usage:
+    python3 scripts/bench_redis_shards.py [--nodes=1,2,4] [--workers=16] [--routes=300]
+                                          [--users=5000] [--service-us=250] [--backend=standin]
+
+--routes is per worker.
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing.connection import Client, Listener
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from redis_keys import session_key, user_key  # noqa: E402
+from redis_shards import ShardedRedis  # noqa: E402
+from redis_standin import RedisStandin  # noqa: E402
+
+AUTHKEY = b'bench-redis-shards'
+REDIS_PORT = 7000
+USER_TTL = 72 * 3600
+AGG_BYTES = 2048
+
+
+# ─── standin node ────────────────────────────────────────────────────────────
+def serve_node(addresses, service_us):
+    """Node process: one RedisStandin, one thread per connection, one command at a time."""
+    store = RedisStandin()
+    lock = threading.Lock()
+    with Listener(('127.0.0.1', 0), backlog=128, authkey=AUTHKEY) as listener:
+        addresses.put(listener.address)
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_session, args=(conn, store, lock, service_us), daemon=True).start()
+
+
+def _session(conn, store, lock, service_us):
+    with conn:
+        while True:
+            try:
+                batch = conn.recv()
+            except (EOFError, OSError):
+                return
+            replies = []
+            with lock:
+                done = time.perf_counter() + service_us * len(batch) / 1e6
+                for name, args, kwargs in batch:
+                    try:
+                        replies.append(getattr(store, name)(*args, **kwargs))
+                    except Exception as e:  # returned in place, as Redis does inside a pipeline
+                        replies.append(e)
+                wait = done - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            conn.send(replies)
+
+
+class RemoteNode:
+    """Client of a standin node: a command or a pipeline is one send/recv (one round trip)."""
+
+    def __init__(self, address):
+        self.conn = Client(address, authkey=AUTHKEY)
+
+    def call(self, batch):
+        self.conn.send(batch)
+        replies = self.conn.recv()
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call([(name, args, kwargs)])[0]
+
+    def pipeline(self, transaction=True):
+        return RemotePipeline(self)
+
+    def close(self):
+        self.conn.close()
+
+
+class RemotePipeline:
+    def __init__(self, node):
+        self.node = node
+        self.queue = []
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self.queue.append((name, args, kwargs))
+            return self
+        return queue
+
+    def __len__(self):
+        return len(self.queue)
+
+    def execute(self):
+        queued, self.queue = self.queue, []
+        return self.node.call(queued) if queued else []
+
+
+# ─── backends ────────────────────────────────────────────────────────────────
+def start_nodes(backend, n, service_us):
+    """Start n nodes; returns (endpoints for connect_nodes, stop())."""
+    if backend == 'standin':
+        addresses = mp.Queue()
+        procs = [mp.Process(target=serve_node, args=(addresses, service_us), daemon=True) for _ in range(n)]
+        for p in procs:
+            p.start()
+        # the queue order is arbitrary; any order is a valid slot assignment
+        endpoints = [addresses.get(timeout=30) for _ in procs]
+
+        def stop():
+            for p in procs:
+                p.terminate()
+                p.join()
+        return ('standin', endpoints), stop
+    if backend == 'redis-server':
+        import redis  # optional: only this backend needs redis-py
+
+        if not shutil.which('redis-server'):
+            raise SystemExit('redis-server is not on PATH')
+        ports = [REDIS_PORT + i for i in range(n)]
+        procs = [subprocess.Popen(['redis-server', '--port', str(p), '--save', '', '--appendonly', 'no'],
+                                  stdout=subprocess.DEVNULL) for p in ports]
+        for port in ports:
+            client = redis.Redis(port=port)
+            for _ in range(100):
+                try:
+                    client.ping()
+                    break
+                except redis.ConnectionError:
+                    time.sleep(0.05)
+
+        def stop():
+            for p in procs:
+                p.terminate()
+                p.wait()
+        return ('redis-server', ports), stop
+    raise SystemExit(f'unknown backend {backend}')
+
+
+def connect_nodes(endpoints):
+    backend, nodes = endpoints
+    if backend == 'standin':
+        return [RemoteNode(address) for address in nodes]
+    import redis
+
+    return [redis.Redis(port=port, decode_responses=True) for port in nodes]
+
+
+# ─── the route ───────────────────────────────────────────────────────────────
+def route_keys(uid, tagged=True):
+    if tagged:
+        return user_key(uid), user_key(uid, 'taps'), session_key(uid, 'agg')
+    return f'ozon:user:{uid}', f'ozon:user:{uid}:taps', f'ozon:sess:{uid}:agg'
+
+
+def user_ids(users, seed_value=0):
+    return random.Random(seed_value).sample(range(10 ** 8, 8 * 10 ** 9), users)
+
+
+def seed(client, uids, batch=500):
+    for start in range(0, len(uids), batch):
+        pipe = client.pipeline(transaction=False)
+        for uid in uids[start:start + batch]:
+            user, _, agg = route_keys(uid)
+            pipe.hset(user, mapping={'acl': '3', 'cal_month': '2025-08', 'dates': '[]'})
+            pipe.expire(user, USER_TTL)
+            pipe.set(agg, 'x' * AGG_BYTES, ex=USER_TTL)
+        pipe.execute()
+
+
+def run_route(client, uid, tap):
+    """One date tap + session read; returns the number of nodes the pipeline went to."""
+    user, taps, agg = route_keys(uid)
+    pipe = client.pipeline(transaction=False)
+    pipe.hgetall(user)
+    pipe.rpush(taps, tap)
+    pipe.lrange(taps, 0, -1)
+    pipe.hset(user, mapping={'dates': tap})
+    pipe.expire(user, USER_TTL)
+    pipe.get(agg)
+    nodes = len({client.node_index(k) for k in (user, taps, agg)})
+    state, length, log, _, _, value = pipe.execute()
+    if not state or len(log) != length or value is None:
+        raise AssertionError(f'user {uid}: session is not where the route wrote it')
+    return nodes
+
+
+def worker(endpoints, uids, routes, seed_value, ready, go, results):
+    client = ShardedRedis(connect_nodes(endpoints))
+    rng = random.Random(seed_value)
+    ready.put(os.getpid())
+    go.wait()
+    touched = 0
+    for i in range(routes):
+        touched += run_route(client, rng.choice(uids), f'2025-08-{i % 28 + 1:02d}')
+    results.put((routes, touched))
+
+
+def nodes_per_route(nodes, uids, tagged):
+    shards = ShardedRedis([None] * nodes)
+    return sum(len({shards.node_index(k) for k in route_keys(uid, tagged)}) for uid in uids) / len(uids)
+
+
+def measure(backend, nodes, workers, routes, users, service_us):
+    """Routes/s of `workers` processes over `nodes` nodes; also keys per node and nodes per route."""
+    endpoints, stop = start_nodes(backend, nodes, service_us)
+    try:
+        client = ShardedRedis(connect_nodes(endpoints))
+        uids = user_ids(users)
+        seed(client, uids)
+        keys = [node.dbsize() for node in client.nodes]
+        ready, results, go = mp.Queue(), mp.Queue(), mp.Event()
+        procs = [mp.Process(target=worker, args=(endpoints, uids, routes, i, ready, go, results), daemon=True)
+                 for i in range(workers)]
+        for p in procs:
+            p.start()
+        for _ in procs:
+            ready.get(timeout=60)
+        t0 = time.perf_counter()
+        go.set()
+        done = [results.get(timeout=600) for _ in procs]
+        wall = time.perf_counter() - t0
+        for p in procs:
+            p.join()
+        total = sum(r for r, _ in done)
+        return {'nodes': nodes, 'routes': total, 'seconds': wall, 'rate': total / wall, 'keys': keys,
+                'nodesPerRoute': sum(t for _, t in done) / total}
+    finally:
+        stop()
+
+
+def main(argv):
+    if any(a in ('-h', '--help') for a in argv[1:]):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    opt = lambda name, default: next((a.split('=', 1)[1] for a in argv[1:] if a.startswith(f'--{name}=')), default)
+    node_counts = [int(n) for n in opt('nodes', '1,2,4').split(',')]
+    workers, routes = int(opt('workers', 16)), int(opt('routes', 300))
+    users, service_us = int(opt('users', 5000)), int(opt('service-us', 250))
+    backend = opt('backend', 'standin')
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    print(f'🧪 Sharded session storage — {backend}' + (f', {service_us} µs/command' if backend == 'standin' else '')
+          + f', {workers} workers × {routes} routes, {users:,} users, {cores} CPU core(s)\n')
+    print('| Nodes | Keys per node | Routes/s | Speedup | Nodes/route | Nodes/route untagged |')
+    print('|---|---|---|---|---|---|')
+    base = None
+    for n in node_counts:
+        r = measure(backend, n, workers, routes, users, service_us)
+        base = base or r['rate']
+        print(f"| {n} | {min(r['keys']):,}–{max(r['keys']):,} | {r['rate']:,.0f} | {r['rate'] / base:.2f}× | "
+              f"{r['nodesPerRoute']:.2f} | {nodes_per_route(n, user_ids(users), False):.2f} |", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
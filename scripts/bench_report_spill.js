@@ -0,0 +1,84 @@
+#!/usr/bin/env node
+/**
+ * Бенчмарк выноса отчёта в файл (src/report-spill.js) против значений в
+ * Redis (src/session-codec.js, кодек по умолчанию):
+ *   - сколько байт сессии остаётся в Redis (:csv + :hist);
+ *   - запись: кодирование значений против файла;
+ *   - окно времени за 1 и 3 дня: разбор :hist из Redis против получасов
+ *     выбранных дней из файла (windowBySku в обоих случаях);
+ *   - база слияния: колонки из :csv против полного чтения файла.
+ *
+ * Запуск: node --max-old-space-size=4096 scripts/bench_report_spill.js [sizes=100000,1000000] [type=FBO]
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { generateReport, toCsv } = require('./lib/synthetic-report');
+const { encodeSessionValue, decodeSessionValue } = require('../src/session-codec');
+const { windowBySku } = require('../src/report-index');
+const { decodeColumns } = require('../src/record-columns');
+const { spillReport, spillColumns, spillHistogram } = require('../src/report-spill');
+
+const SIZES = (process.argv[2] || '100000,1000000').split(',').map(Number);
+const TYPE = (process.argv[3] || 'FBO').toUpperCase();
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+
+function median(xs) {
+  const s = [...xs].sort((a, b) => a - b);
+  return s[Math.floor(s.length / 2)];
+}
+
+function timeMs(fn, runs) {
+  const times = [];
+  let out;
+  for (let i = 0; i < runs; i++) {
+    const t0 = process.hrtime.bigint();
+    out = fn();
+    times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  return { ms: median(times), out };
+}
+
+const fmtBytes = b => (b >= 1 << 20 ? `${(b / (1 << 20)).toFixed(2)} MB` : b >= 1024 ? `${(b / 1024).toFixed(1)} KB` : `${b} B`);
+const fmtMs = ms => (ms < 10 ? ms.toFixed(2) : ms.toFixed(0));
+
+async function main() {
+  console.log(`🧪 Report spill vs Redis values — synthetic ${TYPE}\n`);
+  console.log('| Rows | Step | Redis values | Spill file |');
+  console.log('|---|---|---|---|');
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'bench-spill-'));
+  try {
+    for (const n of SIZES) {
+      const [out] = await runCodeNode(MAIN, 'Parse Report File', {
+        input: [{ json: {}, binary: { data: { data: Buffer.from(toCsv(generateReport({ rows: n, type: TYPE }), TYPE)) } } }],
+        nodes: { 'Extract User Data': { user_id: '1', chat_id: '1' } },
+      });
+      const parsed = out.json;
+      const runs = n >= 1000000 ? 3 : 5;
+      const row = (step, a, b) => console.log(`| ${n.toLocaleString('en')} | ${step} | ${a} | ${b} |`);
+
+      const enc = timeMs(() => [encodeSessionValue(parsed.columns, { codec: 'deflate' }), encodeSessionValue(parsed.hist, { codec: 'deflate' })], 1);
+      const spill = timeMs(() => spillReport({ dir, minBytes: 0 }, '1', 1, parsed.columns), runs);
+      const pointer = JSON.stringify(spill.out);
+      const redisBytes = Buffer.byteLength(enc.out[0]) + Buffer.byteLength(enc.out[1]);
+      row(':csv + :hist in Redis', fmtBytes(redisBytes), `${fmtBytes(2 * Buffer.byteLength(pointer))} (file ${fmtBytes(spill.out.bytes)})`);
+      row('write', `${fmtMs(enc.ms)} ms`, `${fmtMs(spill.ms)} ms`);
+
+      for (const k of [1, 3]) {
+        const days = parsed.availableDates.slice(5, 5 + k);
+        const fromRedis = timeMs(() => windowBySku(parsed.agg, decodeSessionValue(enc.out[1]), days, '09:00', '18:00'), runs);
+        const fromFile = timeMs(() => windowBySku(parsed.agg, spillHistogram(spill.out, parsed.agg, days), days, '09:00', '18:00'), runs);
+        row(`window 09–18, ${k} day${k > 1 ? 's' : ''}`, `${fmtMs(fromRedis.ms)} ms`, `${fmtMs(fromFile.ms)} ms`);
+      }
+      const baseRedis = timeMs(() => decodeColumns(decodeSessionValue(enc.out[0])), runs);
+      const baseFile = timeMs(() => decodeColumns(spillColumns(spill.out)), runs);
+      row('merge base (columns)', `${fmtMs(baseRedis.ms)} ms`, `${fmtMs(baseFile.ms)} ms`);
+    }
+  } finally {
+    fs.rmSync(dir, { recursive: true, force: true });
+  }
+}
+
+main().catch(e => { console.error('❌', e); process.exit(1); });
@@ -0,0 +1,144 @@
+#!/usr/bin/env node
+/**
+ * Обмены с Redis и задержка по маршрутам основного workflow — до и после
+ * состояния пользователя одним hash (src/user-state.js).
+ *
+ * Оба workflow исполняются целиком (scripts/lib/n8n-runner.js) на одной и
+ * той же сессии: /start, загрузка отчёта, затем каждый маршрут по
+ * ROUTE_RUNS раз. Обмены считаются как у Redis-ноды n8n v1 (подключение,
+ * PING, команды, QUIT). Задержка маршрута = время Code-нод (замерено) +
+ * сумма RTT по обменам; RTT — логнормальное с медианой --rtt мс. Вызовы
+ * Bot API одинаковы до и после и в задержку не входят.
+ *
+ * «До» — workflow из коммита перед появлением src/user-state.js (или
+ * --before=<git rev>).
+ *
+ * Запуск: node scripts/bench_route_roundtrips.js [--rtt=0.5,2] [--before=<rev>]
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { execFileSync } = require('child_process');
+const { loadWorkflowFile } = require('./lib/n8n-sandbox');
+const { MemoryRedis, runWorkflow, summarizeTrace } = require('./lib/n8n-runner');
+const { SAMPLES } = require('./lib/synthetic-report');
+
+const ROOT = path.join(__dirname, '..');
+const WORKFLOW = 'workflows/ozon-telegram-bot.json';
+// Окно слияния рендеров календаря — ожидание, а не работа; его меряет bench_calendar_bursts.js
+const CONFIG = { TELEGRAM_BOT_TOKEN: 'bench-token', SUPERUSER_IDS: '1', CALENDAR_COALESCE_MS: 0 };
+const ROUTE_RUNS = 30;
+const UPLOAD_RUNS = 5;
+const SAMPLES_PER_ROUTE = 20000;
+const RTT_SIGMA = 0.6;
+
+const arg = name => (process.argv.find(a => a.startsWith(`--${name}=`)) || '').slice(name.length + 3);
+
+function baselineRev() {
+  if (arg('before')) return arg('before');
+  const git = args => execFileSync('git', args, { cwd: ROOT, encoding: 'utf8' }).trim();
+  const added = git(['log', '--diff-filter=A', '--format=%H', '--', 'src/user-state.js']).split('\n').pop();
+  return added ? `${added}^` : 'HEAD';
+}
+
+function loadBaseline(rev) {
+  return JSON.parse(execFileSync('git', ['show', `${rev}:${WORKFLOW}`], { cwd: ROOT, maxBuffer: 1 << 28 }));
+}
+
+/** Прогоняет сессию пользователя; по маршруту — обмены с Redis и время Code-нод. */
+async function profile(workflow) {
+  const redis = new MemoryRedis();
+  redis.set('ozon:acl:42', '3');
+  // Прежние ключи прав — для workflow «до»
+  redis.set('ozon:acl:whitelist:42', '1');
+  redis.set('ozon:acl:admins:42', '1');
+  let messageId = 100;
+  const telegram = async method => ({ ok: true, result: method === 'sendMessage' ? { message_id: ++messageId } : true });
+  const file = fs.readFileSync(SAMPLES.FBO);
+  const from = { id: 42 };
+  const chat = { id: 42 };
+  let uploads = 0;
+  const upload = () => ({ message: { from, chat, document: { file_id: 'doc', file_unique_id: `bench-${++uploads}`, file_name: 'orders.csv', mime_type: 'text/csv' } } });
+  const tap = data => ({ callback_query: { id: 'cb', from, message: { message_id: 1, chat }, data } });
+  const run = async update => {
+    const r = await runWorkflow(workflow, { update, redis, telegram, files: { doc: file }, config: CONFIG });
+    if (r.error) throw new Error(`${JSON.stringify(update).slice(0, 80)}: ${r.error.message}`);
+    return summarizeTrace(r.trace);
+  };
+
+  await run({ message: { from, chat, text: '/start' } });
+  await run(upload());
+  // meta — в ozon:user:{<uid>} (после) или в ozon:sess:<uid>:meta (до); ключи без hash tag — у ревизий до них
+  const meta = JSON.parse(['{42}', '42'].map(u => redis.hgetall(`ozon:user:${u}`).meta || redis.get(`ozon:sess:${u}:meta`)).find(Boolean));
+  const routes = [
+    ['/start', () => ({ message: { from, chat, text: '/start' } })],
+    ['menu:orders', () => tap('menu:orders')],
+    ['upload (CSV, parse cache miss)', upload, UPLOAD_RUNS],
+    ['cal:open', () => tap('cal:open')],
+    ['cal:<month>:prev', () => tap(`cal:${meta.maxMonth}:prev`)],
+    ['date:<day> (toggle)', () => tap(`date:${meta.availableDates[0]}`)],
+    ['dates:reset', () => tap('dates:reset')],
+    ['dates:done', () => tap('dates:done')],
+    ['file:clear', () => tap('file:clear')],
+  ];
+  const out = {};
+  for (const [label, update, runs = ROUTE_RUNS] of routes) {
+    const samples = [];
+    for (let i = 0; i < runs; i++) samples.push(await run(update()));
+    out[label] = {
+      redisNodes: Math.max(...samples.map(s => s.redisNodes)),
+      roundTrips: Math.max(...samples.map(s => s.roundTrips)),
+      codeMs: samples.map(s => s.codeMs),
+    };
+  }
+  return out;
+}
+
+/** Детерминированный ГПСЧ (mulberry32) и логнормальный RTT. */
+function rng(seed) {
+  return () => {
+    seed = (seed + 0x6D2B79F5) >>> 0;
+    let t = seed;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function latency({ roundTrips, codeMs }, rttMs, seed) {
+  const rand = rng(seed);
+  const normal = () => Math.sqrt(-2 * Math.log(1 - rand())) * Math.cos(2 * Math.PI * rand());
+  const out = new Float64Array(SAMPLES_PER_ROUTE);
+  for (let i = 0; i < out.length; i++) {
+    let ms = codeMs[i % codeMs.length];
+    for (let r = 0; r < roundTrips; r++) ms += rttMs * Math.exp(RTT_SIGMA * normal());
+    out[i] = ms;
+  }
+  out.sort();
+  const q = p => out[Math.min(out.length - 1, Math.floor(p * out.length))];
+  return { p50: q(0.5), p99: q(0.99) };
+}
+
+async function main() {
+  const rev = baselineRev();
+  const rtts = (arg('rtt') || '0.5,2').split(',').map(Number);
+  const before = await profile(loadBaseline(rev));
+  const after = await profile(loadWorkflowFile(path.join(ROOT, WORKFLOW)));
+  console.log(`🧪 Redis round trips per route: ${WORKFLOW} at ${rev} → working tree\n`);
+  for (const rtt of rtts) {
+    console.log(`RTT median ${rtt} ms (lognormal, σ=${RTT_SIGMA}); latency = Code nodes + Redis, without Bot API calls\n`);
+    console.log('| Route | Redis nodes | Round trips | p50, ms | p99, ms |');
+    console.log('|---|---|---|---|---|');
+    let seed = 1;
+    for (const label of Object.keys(after)) {
+      const b = before[label];
+      const a = after[label];
+      const lb = latency(b, rtt, seed);
+      const la = latency(a, rtt, seed++);
+      console.log(`| ${label} | ${b.redisNodes} → ${a.redisNodes} | ${b.roundTrips} → ${a.roundTrips} | ${lb.p50.toFixed(1)} → ${la.p50.toFixed(1)} | ${lb.p99.toFixed(1)} → ${la.p99.toFixed(1)} |`);
+    }
+    console.log('');
+  }
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,100 @@
+#!/usr/bin/env node
+/**
+ * Бенчмарк кодеков значений сессии (src/session-codec.js): размер значения
+ * в Redis, время кодирования (объект → строка для SET) и декодирования
+ * (строка из GET → объект) для каждого типа ключа — :csv, :agg, :hist и
+ * общего кэша разбора ozon:parse:f:<id>.
+ *
+ * Значения строит настоящая нода «Parse Report File» из байтов CSV: образцы
+ * FBO/FBS из корня репозитория и синтетические отчёты заданных размеров.
+ *
+ * Кодеки:
+ *   json          как было до кодека (JSON.stringify / JSON.parse)
+ *   ~d1 (deflate) zlib.deflateRawSync — то, что пишет бот
+ *   gzip, brotli  справочно: zlib Node поверх того же JSON + base64
+ *                 (n8n Redis node пишет только строки)
+ *
+ * Запуск: node --max-old-space-size=4096 scripts/bench_session_codec.js [sizes=100000,1000000] [type=FBO]
+ */
+
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES, generateReport, toCsv } = require('./lib/synthetic-report');
+const { encodeSessionValue, decodeSessionValue } = require('../src/session-codec');
+const { packParsedReport } = require('../src/parse-cache');
+
+const SIZES = (process.argv[2] || '100000,1000000').split(',').map(Number);
+const TYPE = (process.argv[3] || 'FBO').toUpperCase();
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+
+const b64 = (encode, decode) => ({
+  encode: v => encode(Buffer.from(JSON.stringify(v))).toString('base64'),
+  decode: s => JSON.parse(decode(Buffer.from(s, 'base64')).toString('utf8')),
+});
+const CODECS = [
+  ['json', { encode: v => JSON.stringify(v), decode: s => JSON.parse(s) }],
+  ['~d1 (deflate)', { encode: v => encodeSessionValue(v, { codec: 'deflate', minBytes: 0 }), decode: decodeSessionValue }],
+  ['gzip', b64(b => zlib.gzipSync(b), b => zlib.gunzipSync(b))],
+  ['brotli q5', b64(b => zlib.brotliCompressSync(b, { params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 5 } }), b => zlib.brotliDecompressSync(b))],
+];
+
+function median(xs) {
+  const s = [...xs].sort((a, b) => a - b);
+  return s[Math.floor(s.length / 2)];
+}
+
+function timeMs(fn, runs) {
+  const times = [];
+  let out;
+  for (let i = 0; i < runs; i++) {
+    const t0 = process.hrtime.bigint();
+    out = fn();
+    times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  return { ms: median(times), out };
+}
+
+const fmtBytes = b => (b >= 1 << 20 ? `${(b / (1 << 20)).toFixed(2)} MB` : b >= 1024 ? `${(b / 1024).toFixed(1)} KB` : `${b} B`);
+const fmtMs = ms => (ms < 10 ? ms.toFixed(2) : ms.toFixed(0));
+
+async function parse(buf) {
+  // Buffer вместо base64: 1M строк в base64 длиннее предела строки V8 (512 МБ)
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', {
+    input: [{ json: {}, binary: { data: { data: buf } } }],
+    nodes: { 'Extract User Data': { user_id: '1', chat_id: '1' } },
+  });
+  return out.json;
+}
+
+function benchInput(label, parsed, runs) {
+  const { v, ...report } = JSON.parse(packParsedReport(parsed));
+  const keys = [[':csv', parsed.columns], [':agg', parsed.agg], [':hist', parsed.hist], ['parse:f', report]];
+  for (const [key, value] of keys) {
+    let jsonBytes = 0;
+    for (const [name, codec] of CODECS) {
+      const enc = timeMs(() => codec.encode(value), runs);
+      const bytes = Buffer.byteLength(enc.out);
+      if (name === 'json') jsonBytes = bytes;
+      const dec = timeMs(() => codec.decode(enc.out), runs);
+      console.log(`| ${label} | ${key} | ${name} | ${fmtBytes(bytes)} | ${(bytes / jsonBytes).toFixed(3)} | ${fmtMs(enc.ms)} | ${fmtMs(dec.ms)} |`);
+    }
+  }
+}
+
+async function main() {
+  console.log(`🧪 Session value codecs — samples + synthetic ${TYPE}\n`);
+  console.log('| Input | Key | Codec | Value | vs JSON | Encode ms | Decode ms |');
+  console.log('|---|---|---|---|---|---|---|');
+  for (const file of Object.values(SAMPLES)) {
+    const parsed = await parse(fs.readFileSync(file));
+    benchInput(`${path.basename(file)} (${parsed.totalRecords})`, parsed, 9);
+  }
+  for (const n of SIZES) {
+    const parsed = await parse(Buffer.from(toCsv(generateReport({ rows: n, type: TYPE }), TYPE)));
+    benchInput(`${TYPE} ${n.toLocaleString('en')} rows`, parsed, n >= 1000000 ? 1 : 3);
+  }
+}
+
+main().catch(e => { console.error('❌', e); process.exit(1); });
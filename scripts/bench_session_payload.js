@@ -0,0 +1,80 @@
+#!/usr/bin/env node
+/**
+ * Бенчмарк: сколько байт каждый маршрут вытаскивает из Redis до и после
+ * разделения ozon:sess:<uid>:csv на :meta, :agg (индекс статистики) и :csv (records).
+ *
+ * Прогоняет настоящий код ноды «Parse Report File» на синтетическом отчёте,
+ * меряет размеры значений ключей и время JSON.parse на каждом маршруте.
+ *
+ * Запуск: node scripts/bench_session_payload.js [rows=150000] [type=FBO]
+ */
+
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { generateReport } = require('./lib/synthetic-report');
+
+const ROWS = Number(process.argv[2] || 150000);
+const TYPE = (process.argv[3] || 'FBO').toUpperCase();
+
+// Какие ключи сессии читает каждый маршрут (GET-ноды по пути исполнения)
+const ROUTES = [
+  ['menu:orders (main)', ['blob'], ['meta']],
+  ['cal:open (main)', ['blob', 'blob'], ['meta', 'meta']],
+  ['date:* toggle (main)', ['blob'], ['meta', 'meta']],
+  ['menu:calendar (ozord_calendar_ui_header)', ['blob'], ['meta']],
+  ['cal:* nav (ozord_calendar_nav_guard → ui_header)', ['blob', 'blob'], ['meta', 'meta']],
+  ['date:* (ozord_dates_toggle_and_limit → render_grid)', ['blob', 'blob'], ['meta', 'meta']],
+  ['dates:done (done_guard → stats_engine)', ['blob', 'blob'], ['meta', 'agg']],
+  ['dates:done (main)', ['blob'], ['agg']],
+];
+
+function median(xs) {
+  const s = [...xs].sort((a, b) => a - b);
+  return s[Math.floor(s.length / 2)];
+}
+
+function parseMs(str, runs = 5) {
+  const times = [];
+  for (let i = 0; i < runs; i++) {
+    const t0 = process.hrtime.bigint();
+    JSON.parse(str);
+    times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  return median(times);
+}
+
+const fmtBytes = b => (b >= 1 << 20 ? `${(b / (1 << 20)).toFixed(2)} MB` : b >= 1024 ? `${(b / 1024).toFixed(1)} KB` : `${b} B`);
+
+async function main() {
+  console.log(`🧪 Session payload per route — ${ROWS} ${TYPE} rows\n`);
+  const workflow = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+  const report = generateReport({ rows: ROWS, type: TYPE });
+  const [parsed] = await runCodeNode(workflow, 'Parse Report File', {
+    input: report.rows,
+    nodes: { 'Extract User Data': { user_id: '1', chat_id: '1' } },
+  });
+  const { reportType, records, availableDates, totalRecords, meta, agg, columns } = parsed.json;
+
+  const payloads = {
+    blob: JSON.stringify({ reportType, records, availableDates, totalRecords }),
+    meta: JSON.stringify(meta),
+    agg: JSON.stringify(agg),
+    records: JSON.stringify(columns),
+  };
+  const cost = {};
+  for (const [k, v] of Object.entries(payloads)) cost[k] = { bytes: Buffer.byteLength(v), ms: parseMs(v) };
+
+  console.log(`ozon:sess:<uid>:csv (before, monolithic) ${fmtBytes(cost.blob.bytes)}, JSON.parse ${cost.blob.ms.toFixed(1)} ms`);
+  console.log(`ozon:sess:<uid>:meta                     ${fmtBytes(cost.meta.bytes)}, JSON.parse ${cost.meta.ms.toFixed(3)} ms`);
+  console.log(`ozon:sess:<uid>:agg                      ${fmtBytes(cost.agg.bytes)}, JSON.parse ${cost.agg.ms.toFixed(3)} ms`);
+  console.log(`ozon:sess:<uid>:csv  (after, columnar)   ${fmtBytes(cost.records.bytes)}, JSON.parse ${cost.records.ms.toFixed(1)} ms\n`);
+
+  console.log('| Route | Before | After | JSON.parse before → after |');
+  console.log('|---|---|---|---|');
+  for (const [route, before, after] of ROUTES) {
+    const sum = (keys, f) => keys.reduce((s, k) => s + cost[k][f], 0);
+    console.log(`| ${route} | ${fmtBytes(sum(before, 'bytes'))} | ${fmtBytes(sum(after, 'bytes'))} | ${sum(before, 'ms').toFixed(1)} ms → ${sum(after, 'ms').toFixed(2)} ms |`);
+  }
+}
+
+main().catch(e => { console.error('❌', e); process.exit(1); });
@@ -0,0 +1,117 @@
+#!/usr/bin/env node
+/**
+ * Вызовы Bot API в час пик: прямо из HTTP-нод и через диспетчер
+ * (src/telegram-dispatch.js, scripts/telegram-dispatcher.js).
+ *
+ * USERS пользователей одновременно проходят одну сессию, как её шлёт
+ * workflow после окна слияния рендеров: BURST_TAPS тапов по датам через
+ * TAP_GAP_MS (на каждый answerCallbackQuery), одна правка календаря
+ * (editMessageText), затем «Готово» — answerCallbackQuery, deleteMessage и
+ * два sendMessage с отчётом.
+ *
+ * Заглушка Telegram (scripts/lib/telegram-stub.js) — по HTTP, с лимитами
+ * бота (30/с) и чата (1/с, запас CHAT_BURST), задержкой ответа LATENCY_MS и
+ * HANDSHAKE_MS на новое соединение (TCP + TLS до api.telegram.org).
+ *
+ *   direct         — как HTTP-нода n8n: новое соединение на вызов, 429 —
+ *                    ошибка ноды;
+ *   direct + retry — то же с «Retry On Fail» (3 попытки через 1 с);
+ *   dispatcher     — вызовы идут на диспетчер (локально, без TLS), он
+ *                    отправляет их в заглушку по пулу keep-alive.
+ *
+ * Запуск: node scripts/bench_telegram_dispatch.js [--users=20]
+ */
+
+const http = require('http');
+const { startTelegramStub } = require('./lib/telegram-stub');
+const { createDispatcherServer } = require('./telegram-dispatcher');
+const { DISPATCH_LIMITS, LatencyWindow, methodClass } = require('../src/telegram-dispatch');
+
+const TOKEN = 'bench-token';
+const BURST_TAPS = 5;
+const TAP_GAP_MS = 150;
+const COALESCE_MS = 300;
+const LATENCY_MS = 40;
+const HANDSHAKE_MS = 80;
+const CHAT_BURST = 3;
+const N8N_RETRIES = 3;
+const N8N_RETRY_WAIT_MS = 1000;
+
+const arg = name => (process.argv.find(a => a.startsWith(`--${name}=`)) || '').slice(name.length + 3);
+const USERS = Number(arg('users')) || 20;
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+/** Один вызов, как HTTP-нода n8n: без keep-alive. */
+function call(base, method, body) {
+  return new Promise((resolve, reject) => {
+    const req = http.request(`${base}/bot${TOKEN}/${method}`, { method: 'POST', agent: false, headers: { 'content-type': 'application/json' } }, res => {
+      const chunks = [];
+      res.on('data', c => chunks.push(c));
+      res.on('end', () => resolve({ status: res.statusCode, body: JSON.parse(Buffer.concat(chunks).toString('utf8')) }));
+    });
+    req.on('error', reject);
+    req.end(JSON.stringify(body));
+  });
+}
+
+async function session(base, chatId, retries, stats) {
+  const node = async (method, body) => {
+    const t0 = Date.now();
+    let res;
+    for (let attempt = 0; attempt <= retries; attempt++) {
+      if (attempt) await sleep(N8N_RETRY_WAIT_MS);
+      res = await call(base, method, body);
+      if (res.body.ok) break;
+    }
+    stats.latency[methodClass(method)].add(Date.now() - t0);
+    stats[res.body.ok ? 'ok' : 'failed']++;
+  };
+  const pending = [];
+  for (let i = 0; i < BURST_TAPS; i++) {
+    pending.push(node('answerCallbackQuery', { callback_query_id: `${chatId}-${i}` }));
+    await sleep(TAP_GAP_MS);
+  }
+  await sleep(COALESCE_MS);
+  await node('editMessageText', { chat_id: chatId, message_id: 1, text: 'calendar' });
+  await node('answerCallbackQuery', { callback_query_id: `${chatId}-done` });
+  await node('deleteMessage', { chat_id: chatId, message_id: 1 });
+  await node('sendMessage', { chat_id: chatId, text: 'report 1/2' });
+  await node('sendMessage', { chat_id: chatId, text: 'report 2/2' });
+  await Promise.all(pending);
+}
+
+async function measure(mode) {
+  const stub = await startTelegramStub({ chatPerSec: 1, chatBurst: CHAT_BURST, latencyMs: LATENCY_MS, handshakeMs: HANDSHAKE_MS });
+  let base = stub.url;
+  let dispatcher = null;
+  if (mode === 'dispatcher') {
+    dispatcher = createDispatcherServer({ upstream: stub.url, limits: { ...DISPATCH_LIMITS, chatBurst: CHAT_BURST } });
+    await new Promise(resolve => dispatcher.server.listen(0, '127.0.0.1', resolve));
+    base = `http://127.0.0.1:${dispatcher.server.address().port}`;
+  }
+  const stats = { ok: 0, failed: 0, latency: { answer: new LatencyWindow(), send: new LatencyWindow(), edit: new LatencyWindow() } };
+  const t0 = Date.now();
+  await Promise.all(Array.from({ length: USERS }, (_, i) => sleep(i * 10).then(() => session(base, 1000 + i, mode === 'direct + retry' ? N8N_RETRIES : 0, stats))));
+  const wall = Date.now() - t0;
+  if (dispatcher) {
+    dispatcher.server.close();
+    dispatcher.transport.close();
+  }
+  await stub.close();
+  return { mode, wall, ...stats, upstream: stub.stats.requests, limited: stub.stats.limited, connections: stub.stats.connections };
+}
+
+async function main() {
+  console.log(`🧪 Bot API calls at peak: ${USERS} users × (${BURST_TAPS} taps + 1 edit + done: answer, delete, 2 × send)`);
+  console.log(`Stub: bot 30/s, chat 1/s (burst ${CHAT_BURST}), ${LATENCY_MS} ms per call, +${HANDSHAKE_MS} ms per new connection\n`);
+  console.log('| Mode | Calls ok / failed | Upstream requests | 429 from Telegram | Connections | answer p50 / p95, ms | edit p50 / p95, ms | send p50 / p95, ms | Wall, s |');
+  console.log('|---|---|---|---|---|---|---|---|---|');
+  for (const mode of ['direct', 'direct + retry', 'dispatcher']) {
+    const r = await measure(mode);
+    const lat = c => { const s = r.latency[c].summary(); return `${s.p50} / ${s.p95}`; };
+    console.log(`| ${mode} | ${r.ok} / ${r.failed} | ${r.upstream} | ${r.limited} | ${r.connections} | ${lat('answer')} | ${lat('edit')} | ${lat('send')} | ${(r.wall / 1000).toFixed(1)} |`);
+  }
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
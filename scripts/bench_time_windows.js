@@ -0,0 +1,57 @@
+#!/usr/bin/env node
+/**
+ * Бенчмарк фильтра по времени: прежний проход по records (filterRecords из
+ * «Calculate Statistics») против префиксных сумм получасовых гистограмм
+ * (src/report-index.js → windowBySku).
+ *
+ * Запуск: node scripts/bench_time_windows.js [rows=150000] [days=3]
+ */
+
+const { generateReport } = require('./lib/synthetic-report');
+const { mskMinute } = require('../src/record-columns');
+const { TIME_PRESETS, createIndexBuilder, isFullDay, windowBySku } = require('../src/report-index');
+
+const ROWS = Number(process.argv[2] || 150000);
+const DAYS = Number(process.argv[3] || 3);
+
+// Прежняя реализация из «Calculate Statistics»
+function parseAsMsk(s){ if(!s) return null; let d=s; if(/^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$/.test(d)) d=d.replace(' ','T')+'Z'; const base=new Date(d); if(isNaN(base)) return null; return new Date(base.getTime()+3*3600*1000);}
+function filterRecords(records, dates, st, et){ const set=new Set(dates); return records.filter(r=>{ const dd=parseAsMsk(r.created_at); if(!dd) return false; const ds=dd.toISOString().split('T')[0]; if(!set.has(ds)) return false; const tm=dd.toTimeString().slice(0,5); return tm>=st && tm<=et; }); }
+
+function timeMs(fn, runs = 5) {
+  const times = [];
+  for (let i = 0; i < runs; i++) {
+    const t0 = process.hrtime.bigint();
+    fn();
+    times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  return times.sort((a, b) => a - b)[Math.floor(runs / 2)];
+}
+
+// FBS-формат дат: его прежний parseAsMsk разбирал корректно
+const rows = generateReport({ rows: ROWS, type: 'FBS', days: 60, skus: 120 }).rows;
+const records = rows.map(r => ({ order_id: r['Номер заказа'], sku: r['Артикул'], quantity: Number(r['Количество']), price: Number(r['Ваша цена']), created_at: r['Принят в обработку'], status: r['Статус'].toLowerCase() }));
+const builder = createIndexBuilder();
+for (const r of records) {
+  const t = mskMinute(r.created_at);
+  builder.add(new Date(t * 60000).toISOString().slice(0, 10), r.sku, r.quantity, r.price, r.status, { slot: Math.floor((t % 1440) / 30) });
+}
+const agg = builder.build();
+const histValue = JSON.stringify(builder.buildHistogram());
+const recordsValue = JSON.stringify({ records });
+const dates = Object.keys(agg.days).slice(0, DAYS);
+
+console.log(`🧪 Time windows — ${ROWS} rows, ${dates.length} selected days, ${agg.skus.length} SKUs\n`);
+console.log(`:hist ${(histValue.length / 1024).toFixed(0)} KB, records ${(recordsValue.length / (1 << 20)).toFixed(1)} MB\n`);
+console.log('| Window | Records rescan | Histogram (JSON.parse + prefix) | Histogram, warm |');
+console.log('|---|---|---|---|');
+for (const [name, [st, et]] of Object.entries({ ...TIME_PRESETS, 'произвольный': ['10:30', '14:00'] })) {
+  const endInclusive = et === '24:00' ? '23:59' : et;
+  const scan = timeMs(() => filterRecords(JSON.parse(recordsValue).records, dates, st, endInclusive));
+  // Полный день :hist не читает — хватает дневных ячеек :agg
+  const cold = timeMs(() => windowBySku(agg, isFullDay(st, et) ? null : JSON.parse(histValue), dates, st, et));
+  const hist = JSON.parse(histValue);
+  windowBySku(agg, hist, dates, st, et);
+  const warm = timeMs(() => windowBySku(agg, hist, dates, st, et));
+  console.log(`| ${name} (${st}–${et}) | ${scan.toFixed(1)} ms | ${cold.toFixed(2)} ms | ${warm.toFixed(3)} ms |`);
+}
@@ -0,0 +1,95 @@
+#!/usr/bin/env node
+/**
+ * Бенчмарк загрузки XLSX против CSV на одном и том же синтетическом отчёте:
+ * «Parse Report File» на байтах CSV, на байтах XLSX (потоковое чтение,
+ * src/xlsx-stream.js) и прежний путь XLSX — весь лист в items (строки-
+ * объекты, как у Extract from File), затем разбор объектов.
+ *
+ * xlsx-read — только чтение листа (строки отбрасываются); для него же
+ * живая куча после GC каждые 5000 строк: окно распаковки, строка листа
+ * и sharedStrings, без роста от самого листа.
+ *
+ * Каждый замер — в отдельном процессе: время разбора и пик RSS сверх
+ * процесса, уже прочитавшего файл.
+ *
+ * Запуск: node scripts/bench_xlsx_ingest.js [rows=100000,300000]
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { execFileSync } = require('child_process');
+
+const MODES = ['csv', 'xlsx', 'xlsx-items', 'xlsx-read'];
+
+async function child(mode, file) {
+  const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+  const { parseXlsxBuffer } = require('../src/xlsx-stream');
+  const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+  const buf = fs.readFileSync(file);
+  const base = process.memoryUsage().rss;
+  const peakMb = () => (Math.max(process.resourceUsage().maxRSS * 1024, process.memoryUsage().rss) - base) / 1048576;
+  const t0 = process.hrtime.bigint();
+  let input;
+  if (mode === 'xlsx-read') {
+    global.gc();
+    const heap0 = process.memoryUsage().heapUsed;
+    let n = -1, live = 0, gcMs = 0;
+    parseXlsxBuffer(buf, () => {
+      if (++n % 5000) return;
+      const g = process.hrtime.bigint();
+      global.gc();
+      live = Math.max(live, process.memoryUsage().heapUsed - heap0);
+      gcMs += Number(process.hrtime.bigint() - g) / 1e6;
+    });
+    const ms = Number(process.hrtime.bigint() - t0) / 1e6 - gcMs;
+    process.stdout.write(JSON.stringify({ ms, rssMb: peakMb(), liveMb: live / 1048576, records: n }));
+    return;
+  }
+  if (mode === 'xlsx-items') {
+    // Прежний путь: лист целиком в items n8n, по объекту на строку
+    let headers = null;
+    input = [];
+    parseXlsxBuffer(buf, cells => {
+      if (!headers) { headers = cells; return; }
+      const row = {};
+      headers.forEach((h, i) => { row[h] = cells[i] ?? ''; });
+      input.push({ json: row });
+    });
+  } else {
+    input = [{ json: {}, binary: { data: { data: buf.toString('base64') } } }];
+  }
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', { input, nodes: { 'Extract User Data': { user_id: '1', chat_id: '1' } } });
+  const ms = Number(process.hrtime.bigint() - t0) / 1e6;
+  process.stdout.write(JSON.stringify({ ms, rssMb: peakMb(), records: out.json.totalRecords }));
+}
+
+async function main() {
+  const { generateReport, toCsv, toXlsx } = require('./lib/synthetic-report');
+  const sizes = (process.argv[2] || '100000,300000').split(',').map(Number);
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'bench-xlsx-'));
+  console.log('🧪 XLSX vs CSV ingestion (Parse Report File, FBO)\n');
+  console.log('| Rows | File | Size | Time | rows/s | Peak RSS over file | Live heap (reader) |');
+  console.log('|---|---|---|---|---|---|---|');
+  try {
+    for (const rows of sizes) {
+      const report = generateReport({ rows, type: 'FBO', days: 90, skus: 300 });
+      const files = { csv: path.join(dir, 'r.csv'), xlsx: path.join(dir, 'r.xlsx') };
+      fs.writeFileSync(files.csv, toCsv(report, 'FBO'));
+      fs.writeFileSync(files.xlsx, toXlsx(report));
+      for (const mode of MODES) {
+        const file = files[mode === 'csv' ? 'csv' : 'xlsx'];
+        const r = JSON.parse(execFileSync(process.execPath, ['--max-old-space-size=8192', '--expose-gc', __filename, `--child=${mode}`, file], { maxBuffer: 1 << 20 }));
+        if (r.records !== rows) throw new Error(`${mode}: ${r.records} records, expected ${rows}`);
+        const size = `${(fs.statSync(file).size / 1048576).toFixed(1)} MB`;
+        console.log(`| ${rows.toLocaleString('en-US')} | ${mode} | ${size} | ${(r.ms / 1000).toFixed(2)} s | ${Math.round(rows / r.ms * 1000).toLocaleString('en-US')} | ${r.rssMb.toFixed(0)} MB | ${r.liveMb === undefined ? '' : `${r.liveMb.toFixed(1)} MB`} |`);
+      }
+    }
+  } finally {
+    fs.rmSync(dir, { recursive: true, force: true });
+  }
+}
+
+const childArg = process.argv.find(a => a.startsWith('--child='));
+(childArg ? child(childArg.slice(8), process.argv[process.argv.length - 1]) : main())
+  .catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,91 @@
+#!/usr/bin/env node
+/**
+ * Генерирует реестр схем отчётов src/report-schemas.js из описаний
+ * Ozon_FBO_report_Заказы_structure.txt и Ozon_FBS_report_Заказы_structure.txt.
+ *
+ * Новая раскладка выгрузки Ozon = новый файл описания + новая запись
+ * в SOURCES со следующей версией; старые версии остаются в реестре.
+ *
+ * Запуск:
+ *   node scripts/build-report-schemas.js          # перегенерировать
+ *   node scripts/build-report-schemas.js --check  # CI: упасть, если реестр устарел
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const ROOT = path.join(__dirname, '..');
+const OUT = path.join(ROOT, 'src', 'report-schemas.js');
+const SOURCES = [
+  { type: 'FBO', version: 1, file: 'Ozon_FBO_report_Заказы_structure.txt' },
+  { type: 'FBS', version: 1, file: 'Ozon_FBS_report_Заказы_structure.txt' },
+];
+
+// «24. ☒ Акции» — в описаниях буква колонки X местами отрисована как ☒
+const COLUMN_RE = /^(\d+)\.\s+(?:\[([A-Z]+)\]|☒)\s+(.+?)\s*$/;
+const DTYPE_RE = /^\s*Тип данных:\s*(\S+)/;
+
+function columnLetter(i) {
+  let s = '';
+  for (let n = i + 1; n > 0; n = Math.floor((n - 1) / 26)) s = String.fromCharCode(65 + ((n - 1) % 26)) + s;
+  return s;
+}
+
+function parseStructure(file) {
+  const lines = fs.readFileSync(path.join(ROOT, file), 'utf8').split(/\r?\n/);
+  const columns = [];
+  for (const line of lines) {
+    const m = COLUMN_RE.exec(line);
+    if (m) {
+      const index = Number(m[1]) - 1;
+      if (index !== columns.length) throw new Error(`${file}: column ${m[1]} out of order`);
+      if (m[2] && m[2] !== columnLetter(index)) throw new Error(`${file}: column ${m[1]} is [${m[2]}], expected [${columnLetter(index)}]`);
+      columns.push({ name: m[3], dtype: null });
+      continue;
+    }
+    const d = DTYPE_RE.exec(line);
+    if (d && columns.length && !columns[columns.length - 1].dtype) columns[columns.length - 1].dtype = d[1];
+  }
+  if (!columns.length) throw new Error(`${file}: no columns found`);
+  return columns;
+}
+
+function render() {
+  const schemas = SOURCES.map(({ type, version, file }) => {
+    const columns = parseStructure(file);
+    return { id: `${type.toLowerCase()}-v${version}`, type, version, source: file, columns: columns.map(c => c.name), dtypes: columns.map(c => c.dtype) };
+  });
+  const body = schemas.map(s => '  ' + JSON.stringify(s)).join(',\n');
+  return `/**
+ * Реестр схем отчётов Ozon «Заказы» (FBO/FBS) по версиям.
+ *
+ * Сгенерировано scripts/build-report-schemas.js из Ozon_*_report_Заказы_structure.txt —
+ * не править руками.
+ */
+
+const REPORT_SCHEMAS = [
+${body},
+];
+
+if (typeof module !== 'undefined') {
+  module.exports = { REPORT_SCHEMAS };
+}
+`;
+}
+
+if (require.main === module) {
+  const code = render();
+  const current = fs.existsSync(OUT) ? fs.readFileSync(OUT, 'utf8') : '';
+  if (process.argv.includes('--check')) {
+    if (current !== code) {
+      console.error('❌ src/report-schemas.js is out of date — run node scripts/build-report-schemas.js');
+      process.exit(1);
+    }
+    console.log('✅ src/report-schemas.js is up to date');
+  } else {
+    fs.writeFileSync(OUT, code);
+    console.log(`✅ src/report-schemas.js: ${SOURCES.map(s => `${s.type} v${s.version}`).join(', ')}`);
+  }
+}
+
+module.exports = { parseStructure, render };
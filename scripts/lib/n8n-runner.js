@@ -0,0 +1,341 @@
+/**
+ * Исполнение workflow n8n целиком — для тестов маршрутов и бенчмарков.
+ *
+ * Порядок — как executionOrder v1: ветка за веткой в глубину, по порядку
+ * выходов. Code — через n8n-sandbox, IF v2 / Switch v3 — условия filter v2,
+ * Set — assignments, Redis v1 — на MemoryRedis, HTTP Request и Telegram —
+ * в заглушку telegram(method, body), Wait (интервал) — в sleep(ms). Выражения «={{ … }}» вычисляются как JS
+ * с $json, $env и $('<node>').
+ *
+ * Сетевые обмены с Redis считаются так, как их делает Redis-нода n8n v1:
+ * каждая нода открывает своё подключение (connect, PING … QUIT), GET с
+ * keyType automatic сперва спрашивает TYPE, SET с TTL досылает EXPIRE.
+ */
+
+const { runCodeNode, asItems } = require('./n8n-sandbox');
+
+/** Обмены на каждую исполненную Redis-ноду сверх самих команд. */
+const REDIS_NODE_OVERHEAD = ['CONNECT', 'PING', 'QUIT'];
+
+/** Строки, hash и списки в памяти с TTL — столько Redis, сколько нужно workflow. */
+class MemoryRedis {
+  constructor({ now = () => Date.now() } = {}) {
+    this.now = now;
+    this.data = new Map();
+    this.expiresAt = new Map();
+  }
+
+  live(key) {
+    const at = this.expiresAt.get(key);
+    if (at !== undefined && at <= this.now()) {
+      this.data.delete(key);
+      this.expiresAt.delete(key);
+    }
+    return this.data.has(key);
+  }
+
+  type(key) {
+    if (!this.live(key)) return 'none';
+    const v = this.data.get(key);
+    return v instanceof Map ? 'hash' : Array.isArray(v) ? 'list' : 'string';
+  }
+
+  get(key) {
+    return this.type(key) === 'string' ? this.data.get(key) : null;
+  }
+
+  set(key, value) {
+    this.data.set(key, String(value));
+    this.expiresAt.delete(key);
+  }
+
+  hgetall(key) {
+    return this.type(key) === 'hash' ? Object.fromEntries(this.data.get(key)) : {};
+  }
+
+  hset(key, pairs) {
+    if (this.type(key) !== 'hash') {
+      this.data.set(key, new Map());
+      this.expiresAt.delete(key);
+    }
+    const h = this.data.get(key);
+    for (let i = 0; i + 1 < pairs.length; i += 2) h.set(pairs[i], String(pairs[i + 1]));
+  }
+
+  hdel(key, fields) {
+    if (this.type(key) !== 'hash') return 0;
+    const h = this.data.get(key);
+    return fields.filter(f => h.delete(f)).length;
+  }
+
+  push(key, value, { tail = true } = {}) {
+    if (this.type(key) !== 'list') {
+      this.data.set(key, []);
+      this.expiresAt.delete(key);
+    }
+    const list = this.data.get(key);
+    if (tail) list.push(String(value)); else list.unshift(String(value));
+    return list.length;
+  }
+
+  lrange(key) {
+    return this.type(key) === 'list' ? this.data.get(key).slice() : [];
+  }
+
+  del(key) {
+    const had = this.live(key);
+    this.data.delete(key);
+    this.expiresAt.delete(key);
+    return had ? 1 : 0;
+  }
+
+  incr(key) {
+    const v = Number(this.get(key) || 0) + 1;
+    this.data.set(key, String(v));
+    return v;
+  }
+
+  expire(key, sec) {
+    if (this.live(key)) this.expiresAt.set(key, this.now() + Number(sec) * 1000);
+  }
+}
+
+/** Ищет конец «{{ … }}»: первое «}}», после которого выражение компилируется. */
+function splitTemplate(tpl) {
+  const parts = [];
+  let pos = 0;
+  while (pos < tpl.length) {
+    const open = tpl.indexOf('{{', pos);
+    if (open < 0) { parts.push(tpl.slice(pos)); break; }
+    if (open > pos) parts.push(tpl.slice(pos, open));
+    let close = tpl.indexOf('}}', open + 2);
+    for (; close >= 0; close = tpl.indexOf('}}', close + 1)) {
+      try { new Function(`return (${tpl.slice(open + 2, close)});`); break; } catch (e) { /* следующее «}}» */ }
+    }
+    if (close < 0) throw new Error(`Unterminated expression: ${tpl.slice(open, open + 60)}`);
+    parts.push({ expr: tpl.slice(open + 2, close) });
+    pos = close + 2;
+  }
+  return parts;
+}
+
+function evaluate(value, scope) {
+  if (typeof value !== 'string' || !value.startsWith('=')) return value;
+  const parts = splitTemplate(value.slice(1));
+  const run = expr => new Function('$json', '$', '$env', `return (${expr});`)(scope.$json, scope.$, scope.$env || {});
+  if (parts.length === 1 && typeof parts[0] === 'object') return run(parts[0].expr);
+  return parts.map(p => {
+    if (typeof p === 'string') return p;
+    const v = run(p.expr);
+    if (v === undefined || v === null) return '';
+    return typeof v === 'object' ? JSON.stringify(v) : String(v);
+  }).join('');
+}
+
+function checkCondition(c, scope) {
+  const left = evaluate(c.leftValue, scope);
+  const right = evaluate(c.rightValue, scope);
+  const { type, operation } = c.operator;
+  if (type === 'boolean') return operation === 'true' ? left === true : left === false;
+  if (type === 'string') {
+    if (left === undefined || left === null) return false;
+    const s = String(left);
+    if (operation === 'equals') return s === right;
+    if (operation === 'notEquals') return s !== right;
+    if (operation === 'startsWith') return s.startsWith(right);
+    if (operation === 'endsWith') return s.endsWith(right);
+    if (operation === 'contains') return s.includes(right);
+  }
+  throw new Error(`Unsupported condition operator: ${type}.${operation}`);
+}
+
+function checkConditions(conditions, scope) {
+  const results = conditions.conditions.map(c => checkCondition(c, scope));
+  return conditions.combinator === 'or' ? results.some(Boolean) : results.every(Boolean);
+}
+
+/**
+ * @param {object} workflow  распарсенный workflow JSON
+ * @param {object} opts
+ *   update    — апдейт Telegram (выход Telegram Trigger) или вход саб-workflow
+ *   redis     — MemoryRedis (общий между запусками — состояние пользователя)
+ *   telegram  — async (method, body) => ответ Bot API
+ *   files     — { file_id: Buffer } для Telegram «file: download»
+ *   config    — значения полей Set-нод по имени (то, что вписывают в Config)
+ *   sleep     — async (ms) => … для Wait-нод; по умолчанию setTimeout
+ *   env       — $env в выражениях и Code-нодах
+ *   builtins  — встроенные модули, которые Code-нодам отдаёт require (['fs', 'zlib'])
+ * @returns {Promise<{ executed: object, trace: object[], error: Error|null }>}
+ *   trace — по записи на исполненную ноду: { node, type, ms, redis: [команды], keys: [ключи Redis] }
+ */
+async function runWorkflow(workflow, { update, redis = new MemoryRedis(), telegram = async () => ({ ok: true, result: true }), files = {}, config = {}, sleep = ms => new Promise(resolve => setTimeout(resolve, ms)), env = {}, builtins = [] } = {}) {
+  const byName = new Map(workflow.nodes.map(n => [n.name, n]));
+  const executed = {};
+  const trace = [];
+  const $ = name => {
+    if (!(name in executed)) throw new Error(`Referenced node is unexecuted: ${name}`);
+    const items = executed[name];
+    return { first: () => items[0], last: () => items[items.length - 1], all: () => items, item: items[0] };
+  };
+
+  async function redisNode(node, items) {
+    const p = node.parameters;
+    const commands = [...REDIS_NODE_OVERHEAD];
+    const keys = [];
+    const out = [];
+    for (const item of items) {
+      const scope = { $json: item.json, $, $env: env };
+      const key = p.operation === 'push' ? evaluate(p.list, scope) : evaluate(p.key, scope);
+      keys.push(key);
+      // TTL — только expire/ttl, как в Redis-ноде n8n; options.ttl нода не читает
+      const ttl = p.expire ? evaluate(p.ttl, scope) : null;
+      if (p.operation === 'get') {
+        let type = p.keyType || 'automatic';
+        if (type === 'automatic') {
+          commands.push('TYPE');
+          type = redis.type(key);
+        }
+        let value = null;
+        if (type === 'hash') { commands.push('HGETALL'); value = redis.hgetall(key); }
+        else if (type === 'list') { commands.push('LRANGE'); value = redis.lrange(key); }
+        else if (type === 'string') { commands.push('GET'); value = redis.get(key); }
+        out.push({ json: { ...item.json, [p.propertyName || 'propertyName']: value }, binary: item.binary });
+        continue;
+      }
+      if (p.operation === 'set') {
+        const value = evaluate(p.value, scope);
+        if (p.keyType === 'hash') {
+          if (p.valueIsJSON !== false) throw new Error(`${node.name}: hash with valueIsJSON sends one HSET per field`);
+          commands.push('HSET');
+          redis.hset(key, String(value).split(' '));
+        } else {
+          commands.push('SET');
+          redis.set(key, value);
+        }
+      } else if (p.operation === 'delete') {
+        commands.push('DEL');
+        redis.del(key);
+      } else if (p.operation === 'push') {
+        commands.push(p.tail ? 'RPUSH' : 'LPUSH');
+        redis.push(key, evaluate(p.messageData, scope), { tail: !!p.tail });
+      } else if (p.operation === 'incr') {
+        // Как в n8n: на выходе только { <key>: новое значение }
+        commands.push('INCR');
+        const value = redis.incr(key);
+        if (ttl) { commands.push('EXPIRE'); redis.expire(key, ttl); }
+        out.push({ json: { [key]: value } });
+        continue;
+      } else {
+        throw new Error(`${node.name}: unsupported Redis operation ${p.operation}`);
+      }
+      if (ttl) { commands.push('EXPIRE'); redis.expire(key, ttl); }
+      out.push(item);
+    }
+    return { outputs: [out], commands, keys };
+  }
+
+  async function httpNode(node, items) {
+    const scope = { $json: items[0].json, $, $env: env };
+    const url = evaluate(node.parameters.url, scope);
+    const raw = evaluate(node.parameters.jsonBody, scope);
+    const body = typeof raw === 'string' ? JSON.parse(raw) : raw;
+    const res = await telegram(url.slice(url.lastIndexOf('/') + 1), body);
+    return { outputs: [[{ json: res }]] };
+  }
+
+  async function telegramNode(node, items) {
+    const p = node.parameters;
+    const scope = { $json: items[0].json, $, $env: env };
+    if (p.resource === 'file') {
+      const fileId = evaluate(p.fileId, scope);
+      const buf = files[fileId];
+      if (!buf) throw new Error(`${node.name}: no file ${fileId}`);
+      const res = await telegram('getFile', { file_id: fileId });
+      return { outputs: [[{ json: res, binary: { data: { data: buf.toString('base64') } } }]] };
+    }
+    const res = await telegram('sendMessage', { chat_id: evaluate(p.chatId, scope), text: evaluate(p.text, scope) });
+    return { outputs: [[{ json: res }]] };
+  }
+
+  async function execute(node, items) {
+    const p = node.parameters;
+    const type = node.type.replace('n8n-nodes-base.', '');
+    const scope = { $json: (items[0] || { json: {} }).json, $, $env: env };
+    switch (type) {
+      case 'telegramTrigger':
+      case 'executeWorkflowTrigger':
+        return { outputs: [items] };
+      case 'set': {
+        const fields = {};
+        for (const a of p.assignments.assignments) fields[a.name] = a.name in config ? config[a.name] : evaluate(a.value, scope);
+        return { outputs: [items.map(i => ({ json: p.includeOtherFields ? { ...i.json, ...fields } : fields, binary: i.binary }))] };
+      }
+      case 'code':
+        return { outputs: [await runCodeNode(workflow, node.name, { input: items, nodes: executed, env, builtins })] };
+      case 'if': {
+        const pass = checkConditions(p.conditions, scope);
+        return { outputs: pass ? [items, []] : [[], items] };
+      }
+      case 'switch': {
+        const outputs = p.rules.values.map(() => []);
+        const hit = p.rules.values.findIndex(r => checkConditions(r.conditions, scope));
+        if (hit >= 0) outputs[hit] = items;
+        return { outputs };
+      }
+      case 'wait': {
+        const unit = { seconds: 1000, minutes: 60000, hours: 3600000, days: 86400000 }[p.unit || 'hours'];
+        await sleep(Number(evaluate(p.amount, scope)) * unit);
+        return { outputs: [items] };
+      }
+      case 'redis':
+        return redisNode(node, items);
+      case 'httpRequest':
+        return httpNode(node, items);
+      case 'telegram':
+        return telegramNode(node, items);
+      default:
+        throw new Error(`${node.name}: unsupported node type ${node.type}`);
+    }
+  }
+
+  async function visit(name, items) {
+    const node = byName.get(name);
+    if (!node) throw new Error(`Node not found: ${name}`);
+    const t0 = process.hrtime.bigint();
+    const { outputs, commands, keys } = await execute(node, items);
+    const ms = Number(process.hrtime.bigint() - t0) / 1e6;
+    executed[name] = outputs.flat();
+    trace.push({ node: name, type: node.type.replace('n8n-nodes-base.', ''), ms, redis: commands || null, keys: keys || null });
+    const conns = (workflow.connections[name] || {}).main || [];
+    for (let i = 0; i < conns.length; i++) {
+      if (!outputs[i] || !outputs[i].length) continue;
+      for (const link of conns[i] || []) await visit(link.node, outputs[i]);
+    }
+  }
+
+  // Саб-workflow без триггера (вызов через Execute Workflow) — с ноды без входов
+  const targets = new Set(Object.values(workflow.connections).flatMap(c => (c.main || []).flat().map(l => l.node)));
+  const trigger = workflow.nodes.find(n => n.type === 'n8n-nodes-base.telegramTrigger' || n.type === 'n8n-nodes-base.executeWorkflowTrigger')
+    || workflow.nodes.find(n => n.type !== 'n8n-nodes-base.stickyNote' && !targets.has(n.name));
+  let error = null;
+  try {
+    await visit(trigger.name, asItems(update));
+  } catch (e) {
+    error = e;
+  }
+  return { executed, trace, error };
+}
+
+/** Сводка трассы: Redis-ноды, обмены с Redis, вызовы Bot API, время Code-нод. */
+function summarizeTrace(trace) {
+  const redis = trace.filter(t => t.redis);
+  return {
+    redisNodes: redis.length,
+    roundTrips: redis.reduce((s, t) => s + t.redis.length, 0),
+    commands: redis.flatMap(t => t.redis.filter(c => !REDIS_NODE_OVERHEAD.includes(c))),
+    httpCalls: trace.filter(t => t.type === 'httpRequest' || t.type === 'telegram').length,
+    codeMs: trace.filter(t => t.type === 'code').reduce((s, t) => s + t.ms, 0),
+  };
+}
+
+module.exports = { REDIS_NODE_OVERHEAD, MemoryRedis, evaluate, runWorkflow, summarizeTrace };
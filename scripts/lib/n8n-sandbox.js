@@ -0,0 +1,64 @@
+/**
+ * Минимальная эмуляция n8n Code node для тестов и бенчмарков.
+ *
+ * Выполняет jsCode ноды из workflow JSON с подставленными $input, $json,
+ * $('<node>') и this.helpers.getBinaryDataBuffer (binary.<prop>.data — base64,
+ * как в n8n без filesystem-режима). Обращение к ноде, которой нет в `nodes`,
+ * бросает ошибку — так же, как n8n для неисполненной ноды. require отдаёт
+ * только встроенные модули из `builtins` (NODE_FUNCTION_ALLOW_BUILTIN в n8n),
+ * относительный путь ('./report-index') не находится. module, как и в n8n,
+ * определён — встроенный модуль не может по нему решать, что он в Node.
+ */
+
+const fs = require('fs');
+
+const AsyncFunction = Object.getPrototypeOf(async function () {}).constructor;
+
+function loadWorkflowFile(file) {
+  return JSON.parse(fs.readFileSync(file, 'utf8'));
+}
+
+function asItems(value) {
+  if (value === undefined || value === null) return [];
+  const arr = Array.isArray(value) ? value : [value];
+  return arr.map(v => (v && typeof v === 'object' && 'json' in v ? v : { json: v }));
+}
+
+function accessor(items) {
+  return {
+    first: () => items[0],
+    last: () => items[items.length - 1],
+    all: () => items,
+    item: items[0],
+  };
+}
+
+/**
+ * @param {object} workflow  распарсенный workflow JSON
+ * @param {string} nodeName  имя Code-ноды
+ * @param {object} opts      { input: items|json, nodes: { name: items|json }, env, builtins: ['fs', 'zlib'] }
+ * @returns {Promise<Array<{json: object}>>}
+ */
+async function runCodeNode(workflow, nodeName, { input = [], nodes = {}, env = {}, builtins = [] } = {}) {
+  const node = workflow.nodes.find(n => n.name === nodeName);
+  if (!node) throw new Error(`Node not found: ${nodeName}`);
+  const items = asItems(input);
+  const $ = name => {
+    if (!(name in nodes)) throw new Error(`Referenced node is unexecuted: ${name}`);
+    return accessor(asItems(nodes[name]));
+  };
+  const $input = accessor(items);
+  const sandboxRequire = name => {
+    if (name.startsWith('.') || !builtins.includes(name)) throw new Error(`Cannot find module '${name}'`);
+    return require(name);
+  };
+  const fn = new AsyncFunction('$input', '$json', '$', '$binary', '$env', '$workflow', 'require', 'module', node.parameters.jsCode);
+  const first = items[0] || { json: {} };
+  const helpers = {
+    getBinaryDataBuffer: async (itemIndex, prop) => Buffer.from(items[itemIndex].binary[prop].data, 'base64'),
+  };
+  const out = await fn.call({ helpers }, $input, first.json, $, first.binary, env, { id: workflow.id || 'sandbox' }, sandboxRequire, { exports: {} });
+  return asItems(out);
+}
+
+module.exports = { loadWorkflowFile, runCodeNode, asItems };
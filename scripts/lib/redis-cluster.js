@@ -0,0 +1,37 @@
+/**
+ * Слот Redis Cluster для ключа — тот же расчёт, что в scripts/redis_keys.py:
+ * CRC16 (XMODEM) по hash tag (часть между первой «{» и следующей «}», если
+ * она не пуста), иначе по всему ключу, по модулю 16384. Нужен тестам, чтобы
+ * проверить, что ключи одного маршрута ложатся в один слот.
+ */
+
+const CLUSTER_SLOTS = 16384;
+
+const CRC16 = Array.from({ length: 256 }, (_, byte) => {
+  let crc = byte << 8;
+  for (let i = 0; i < 8; i++) crc = (crc & 0x8000 ? (crc << 1) ^ 0x1021 : crc << 1) & 0xffff;
+  return crc;
+});
+
+function crc16(buf) {
+  let crc = 0;
+  for (const byte of buf) crc = ((crc << 8) & 0xffff) ^ CRC16[((crc >> 8) ^ byte) & 0xff];
+  return crc;
+}
+
+function keySlot(key) {
+  let buf = Buffer.from(String(key));
+  const start = buf.indexOf('{');
+  if (start >= 0) {
+    const end = buf.indexOf('}', start + 1);
+    if (end > start + 1) buf = buf.subarray(start + 1, end);
+  }
+  return crc16(buf) % CLUSTER_SLOTS;
+}
+
+/** Номер узла, которому принадлежит слот, когда узлы делят слоты равными диапазонами подряд. */
+function slotNode(slot, nodes) {
+  return Math.floor((slot * nodes) / CLUSTER_SLOTS);
+}
+
+module.exports = { CLUSTER_SLOTS, crc16, keySlot, slotNode };
@@ -0,0 +1,36 @@
+/**
+ * Эталонный маппинг строк отчёта в records — код «Parse Report File» до
+ * плана колонок (pick() с очисткой ключей на каждой строке). Тесты
+ * сравнивают с ним выход ноды, бенчмарки — скорость.
+ */
+
+const RE_BOM = /^\uFEFF/; const RE_NBSP = /\u00A0/g; const RE_Q = /^"+|"+$/g; const RE_S = /\s+/g;
+const cleanK = k => String(k ?? '').replace(RE_BOM, '').replace(RE_NBSP, ' ').replace(RE_Q, '').trim().replace(RE_S, ' ');
+const cleanV = v => String(v ?? '').replace(RE_BOM, '').trim();
+const toNum = v => { const s = String(v ?? '').replace(/\s/g, '').replace(',', '.'); const n = Number(s); return Number.isFinite(n) ? n : 0; };
+
+function pick(rec, cands, fb = '') {
+  for (const name of cands) { const ck = cleanK(name); if (rec[ck] !== undefined && String(rec[ck]).trim() !== '') return rec[ck]; }
+  const keys = Object.keys(rec);
+  for (const name of cands) { const cl = cleanK(name).toLowerCase(); const f = keys.find(k => k.toLowerCase() === cl); if (f && String(rec[f]).trim() !== '') return rec[f]; }
+  return fb;
+}
+
+/** @param {object[]} input строки-объекты, как из Extract from File */
+function referenceRecords(input) {
+  const rows = input.map(row => { const o = {}; for (const k of Object.keys(row)) o[cleanK(k)] = cleanV(row[k]); return o; });
+  const records = [];
+  for (const r of rows) {
+    const order_id = pick(r, ['Номер заказа', '№ заказа']);
+    const sku = pick(r, ['Артикул продавца', 'Артикул', 'OZON id', 'OZON ID']);
+    const quantity = toNum(pick(r, ['Количество', 'Кол-во'], 1));
+    const price = toNum(pick(r, ['Ваша цена', 'Сумма отправления'], 0));
+    const created_at = pick(r, ['Принят в обработку', 'Дата отгрузки', 'Дата отгрузки без просрочки', 'Фактическая дата передачи в доставку']);
+    const status = pick(r, ['Статус'], '');
+    if (!order_id || !sku) continue;
+    records.push({ order_id: String(order_id), sku: String(sku), quantity, price, created_at: String(created_at), status: String(status).toLowerCase() });
+  }
+  return records;
+}
+
+module.exports = { referenceRecords };
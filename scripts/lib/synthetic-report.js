@@ -0,0 +1,202 @@
+/**
+ * Генератор синтетических отчётов Ozon (FBO/FBS) для бенчмарков.
+ *
+ * Заголовки и «шаблонная» строка берутся из orders-2025-*-test.csv,
+ * меняются только поля, влияющие на расчёты: номер заказа, артикул,
+ * дата, статус, цена, количество. Генератор детерминирован (seed).
+ */
+
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const ROOT = path.join(__dirname, '..', '..');
+const SAMPLES = {
+  FBO: path.join(ROOT, 'orders-2025-fbo-test.csv'),
+  FBS: path.join(ROOT, 'orders-2025-fbs-test.csv'),
+};
+const STATUSES = [
+  ['Доставлен', 0.62], ['Ожидает отгрузки', 0.13], ['Ожидает сборки', 0.09],
+  ['Отменён', 0.07], ['Доставляется', 0.06], ['Возврат', 0.03],
+];
+
+function mulberry32(seed) {
+  let a = seed >>> 0;
+  return () => {
+    a = (a + 0x6D2B79F5) >>> 0;
+    let t = a;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function splitCsvLine(line) {
+  const out = [];
+  let cur = '';
+  let q = false;
+  for (let i = 0; i < line.length; i++) {
+    const ch = line[i];
+    if (q) {
+      if (ch === '"' && line[i + 1] === '"') { cur += '"'; i++; }
+      else if (ch === '"') q = false;
+      else cur += ch;
+    } else if (ch === '"') q = true;
+    else if (ch === ';') { out.push(cur); cur = ''; }
+    else cur += ch;
+  }
+  out.push(cur);
+  return out;
+}
+
+function loadTemplate(type) {
+  const text = fs.readFileSync(SAMPLES[type], 'utf8').replace(/^\uFEFF/, '');
+  const [head, first] = text.split(/\r?\n/);
+  const headers = splitCsvLine(head);
+  const values = splitCsvLine(first);
+  const row = {};
+  headers.forEach((h, i) => { row[h] = values[i] ?? ''; });
+  return { headers, row };
+}
+
+/** Читает CSV-выгрузку так же, как Extract from File (CSV): массив объектов по заголовкам. */
+function loadReportRows(file) {
+  const text = fs.readFileSync(file, 'utf8').replace(/^\uFEFF/, '');
+  const lines = text.split(/\r?\n/).filter(l => l.trim());
+  const headers = splitCsvLine(lines[0]);
+  return lines.slice(1).map(line => {
+    const values = splitCsvLine(line);
+    const row = {};
+    headers.forEach((h, i) => { row[h] = values[i] ?? ''; });
+    return row;
+  });
+}
+
+const pad = n => String(n).padStart(2, '0');
+
+function formatDate(type, ts) {
+  const d = new Date(ts);
+  const [Y, M, D, h, m, s] = [d.getUTCFullYear(), pad(d.getUTCMonth() + 1), pad(d.getUTCDate()), d.getUTCHours(), pad(d.getUTCMinutes()), pad(d.getUTCSeconds())];
+  return type === 'FBO' ? `${D}.${M}.${Y} ${h}:${m}` : `${Y}-${M}-${D} ${pad(h)}:${m}:${s}`;
+}
+
+/**
+ * @param {object} opts { rows, type: 'FBO'|'FBS', days, skus, seed, start }
+ * @returns {{ headers: string[], rows: object[] }} строки как у Extract from File (CSV)
+ */
+function generateReport({ rows = 10000, type = 'FBO', days = 60, skus = 120, seed = 42, start = Date.UTC(2025, 7, 1) } = {}) {
+  const rand = mulberry32(seed);
+  const { headers, row: template } = loadTemplate(type);
+  const skuPool = Array.from({ length: skus }, (_, i) => `SH-SYN-${String(i).padStart(4, '0')}`);
+  const pricePool = skuPool.map(() => (490 + Math.floor(rand() * 40) * 50).toFixed(2));
+  const out = new Array(rows);
+  for (let i = 0; i < rows; i++) {
+    const s = Math.floor(rand() * skus);
+    let r = rand();
+    let status = STATUSES[0][0];
+    for (const [name, w] of STATUSES) { if ((r -= w) <= 0) { status = name; break; } }
+    const ts = start + Math.floor(rand() * days * 86400) * 1000;
+    const qty = rand() < 0.85 ? 1 : 2 + Math.floor(rand() * 3);
+    const orderId = `${String(10000000 + i)}-${String(Math.floor(rand() * 10000)).padStart(4, '0')}`;
+    out[i] = {
+      ...template,
+      'Номер заказа': orderId,
+      'Номер отправления': `${orderId}-1`,
+      'Принят в обработку': formatDate(type, ts),
+      'Статус': status,
+      'Артикул': skuPool[s],
+      'Ваша цена': pricePool[s],
+      'Количество': String(qty),
+    };
+  }
+  return { headers, rows: out };
+}
+
+function csvCell(type, v) {
+  const s = String(v ?? '');
+  if (type === 'FBS') return s === '' ? '' : `"${s.replace(/"/g, '""')}"`;
+  return /[;"\n]/.test(s) ? `"${s.replace(/"/g, '""')}"` : s;
+}
+
+/** Сериализует отчёт в CSV с теми же правилами кавычек, что у исходных выгрузок. */
+function toCsv({ headers, rows }, type = 'FBO') {
+  const lines = [headers.map(h => csvCell(type, h)).join(';')];
+  for (const r of rows) lines.push(headers.map(h => csvCell(type, r[h])).join(';'));
+  return '\uFEFF' + lines.join('\n') + '\n';
+}
+
+const xmlEscape = s => s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+const colName = i => (i >= 26 ? colName(Math.floor(i / 26) - 1) : '') + String.fromCharCode(65 + (i % 26));
+
+/** 'DD.MM.YYYY H:MM' | 'YYYY-MM-DD HH:MM:SS' → серийная дата Excel (1900), иначе null. */
+function excelSerial(v) {
+  let m = /^(\d{2})\.(\d{2})\.(\d{4}) (\d{1,2}):(\d{2})$/.exec(v);
+  let ms;
+  if (m) ms = Date.UTC(+m[3], +m[2] - 1, +m[1], +m[4], +m[5]);
+  else if ((m = /^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})$/.exec(v))) ms = Date.UTC(+m[1], +m[2] - 1, +m[3], +m[4], +m[5], +m[6]);
+  else return null;
+  return ms / 86400000 + 25569;
+}
+
+/** Минимальный ZIP (deflate) из { имя: текст }. */
+function zip(files) {
+  const locals = [], central = [];
+  let offset = 0;
+  for (const [name, text] of Object.entries(files)) {
+    const raw = Buffer.from(text, 'utf8');
+    const data = zlib.deflateRawSync(raw);
+    const nameBuf = Buffer.from(name, 'utf8');
+    const head = Buffer.alloc(30);
+    head.writeUInt32LE(0x04034B50, 0); head.writeUInt16LE(20, 4); head.writeUInt16LE(0x0800, 6); head.writeUInt16LE(8, 8);
+    head.writeUInt32LE(zlib.crc32(raw), 14); head.writeUInt32LE(data.length, 18); head.writeUInt32LE(raw.length, 22); head.writeUInt16LE(nameBuf.length, 26);
+    const dir = Buffer.alloc(46);
+    dir.writeUInt32LE(0x02014B50, 0); dir.writeUInt16LE(20, 4); dir.writeUInt16LE(20, 6); dir.writeUInt16LE(0x0800, 8); dir.writeUInt16LE(8, 10);
+    dir.writeUInt32LE(zlib.crc32(raw), 16); dir.writeUInt32LE(data.length, 20); dir.writeUInt32LE(raw.length, 24); dir.writeUInt16LE(nameBuf.length, 28);
+    dir.writeUInt32LE(offset, 42);
+    locals.push(head, nameBuf, data);
+    central.push(dir, nameBuf);
+    offset += head.length + nameBuf.length + data.length;
+  }
+  const size = central.reduce((s, b) => s + b.length, 0);
+  const end = Buffer.alloc(22);
+  end.writeUInt32LE(0x06054B50, 0); end.writeUInt16LE(central.length / 2, 8); end.writeUInt16LE(central.length / 2, 10);
+  end.writeUInt32LE(size, 12); end.writeUInt32LE(offset, 16);
+  return Buffer.concat([...locals, ...central, end]);
+}
+
+/**
+ * Сериализует отчёт в XLSX, как его сохраняет Excel: строки — в sharedStrings
+ * (или inline, strings: 'inline'), числа — числами, даты — серийными числами
+ * со стилем даты (dates: 'serial') или текстом (dates: 'text'). Пустые ячейки
+ * не пишутся.
+ */
+function toXlsx({ headers, rows }, { strings = 'shared', dates = 'serial' } = {}) {
+  const sst = [], sstIndex = new Map();
+  const cell = (ref, v) => {
+    const s = String(v ?? '');
+    if (s === '') return '';
+    const serial = dates === 'serial' ? excelSerial(s) : null;
+    if (serial !== null) return `<c r="${ref}" s="1"><v>${serial}</v></c>`;
+    if (/^-?\d+(\.\d+)?$/.test(s) && s.length < 15) return `<c r="${ref}"><v>${Number(s)}</v></c>`;
+    if (strings === 'inline') return `<c r="${ref}" t="inlineStr"><is><t>${xmlEscape(s)}</t></is></c>`;
+    let i = sstIndex.get(s);
+    if (i === undefined) { i = sst.length; sst.push(s); sstIndex.set(s, i); }
+    return `<c r="${ref}" t="s"><v>${i}</v></c>`;
+  };
+  const cols = headers.map((_, i) => colName(i));
+  const sheetRows = [headers, ...rows.map(r => headers.map(h => r[h]))].map((values, n) =>
+    `<row r="${n + 1}">${values.map((v, i) => cell(`${cols[i]}${n + 1}`, v)).join('')}</row>`);
+  const ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"';
+  const rel = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships';
+  return zip({
+    '[Content_Types].xml': '<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"><Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/><Default Extension="xml" ContentType="application/xml"/><Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/><Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/><Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/><Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/></Types>',
+    '_rels/.rels': `<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"><Relationship Id="rId1" Type="${rel}/officeDocument" Target="xl/workbook.xml"/></Relationships>`,
+    'xl/workbook.xml': `<?xml version="1.0" encoding="UTF-8" standalone="yes"?><workbook ${ns} xmlns:r="${rel}"><workbookPr/><sheets><sheet name="Заказы" sheetId="1" r:id="rId1"/></sheets></workbook>`,
+    'xl/_rels/workbook.xml.rels': `<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"><Relationship Id="rId1" Type="${rel}/worksheet" Target="worksheets/sheet1.xml"/><Relationship Id="rId2" Type="${rel}/sharedStrings" Target="sharedStrings.xml"/><Relationship Id="rId3" Type="${rel}/styles" Target="styles.xml"/></Relationships>`,
+    'xl/styles.xml': `<?xml version="1.0" encoding="UTF-8" standalone="yes"?><styleSheet ${ns}><numFmts count="1"><numFmt numFmtId="164" formatCode="dd\\.mm\\.yyyy\\ hh:mm"/></numFmts><cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs></styleSheet>`,
+    'xl/sharedStrings.xml': `<?xml version="1.0" encoding="UTF-8" standalone="yes"?><sst ${ns} count="${sst.length}" uniqueCount="${sst.length}">${sst.map(s => `<si><t xml:space="preserve">${xmlEscape(s)}</t></si>`).join('')}</sst>`,
+    'xl/worksheets/sheet1.xml': `<?xml version="1.0" encoding="UTF-8" standalone="yes"?><worksheet ${ns}><sheetData>${sheetRows.join('')}</sheetData></worksheet>`,
+  });
+}
+
+module.exports = { SAMPLES, generateReport, toCsv, toXlsx, splitCsvLine, loadTemplate, loadReportRows };
@@ -0,0 +1,106 @@
+/**
+ * Локальная заглушка Bot API для тестов и бенчмарка диспетчера
+ * (src/telegram-dispatch.js): HTTP-сервер с путями /bot<token>/<method>,
+ * лимитами как у Telegram и счётчиками.
+ *
+ *   - сообщения (send*, edit*, delete*): чат — chatPerSec в секунду с запасом
+ *     chatBurst, бот — botPerSec в секунду с запасом botBurst. Сверх лимита —
+ *     HTTP 429 и parameters.retry_after в секундах;
+ *   - latencyMs — время ответа; handshakeMs — добавка к первому запросу
+ *     нового соединения (TCP + TLS до api.telegram.org);
+ *   - failNext(n) — следующие n запросов обрываются без ответа;
+ *   - stallNext(n) — следующие n вызовов выполняются (попадают в calls), но
+ *     ответа нет: у клиента таймаут, хотя сообщение уже отправлено.
+ *
+ * stats: connections (принятые соединения), requests, limited (ответы 429);
+ * calls — принятые вызовы { method, body, at } по порядку.
+ */
+
+const http = require('http');
+const { TokenBucket, isChatMethod } = require('../../src/telegram-dispatch');
+
+function startTelegramStub({ chatPerSec = 1, chatBurst = 1, botPerSec = 30, botBurst = 30, latencyMs = 0, handshakeMs = 0 } = {}) {
+  const stats = { connections: 0, requests: 0, limited: 0 };
+  const calls = [];
+  const chats = new Map();
+  const bot = new TokenBucket(botPerSec, botBurst, Date.now());
+  let messageId = 1000;
+  let failing = 0;
+  let stalling = 0;
+
+  const limited = (res, waitMs) => {
+    stats.limited++;
+    const retryAfter = Math.max(1, Math.ceil(waitMs / 1000));
+    res.writeHead(429, { 'content-type': 'application/json' });
+    res.end(JSON.stringify({ ok: false, error_code: 429, description: `Too Many Requests: retry after ${retryAfter}`, parameters: { retry_after: retryAfter } }));
+  };
+
+  const handle = (req, res, text, stall) => {
+    const match = /^\/bot[^/]+\/(\w+)$/.exec(req.url);
+    if (!match) {
+      res.writeHead(404, { 'content-type': 'application/json' });
+      res.end(JSON.stringify({ ok: false, error_code: 404, description: 'Not Found' }));
+      return;
+    }
+    const method = match[1];
+    const body = text ? JSON.parse(text) : {};
+    const now = Date.now();
+    if (isChatMethod(method) && body.chat_id != null) {
+      const key = String(body.chat_id);
+      if (!chats.has(key)) chats.set(key, new TokenBucket(chatPerSec, chatBurst, now));
+      const wait = Math.max(bot.wait(now), chats.get(key).wait(now));
+      if (wait > 0) return limited(res, wait);
+      chats.get(key).take(now);
+      bot.take(now);
+    }
+    calls.push({ method, body, at: now });
+    if (stall) return;
+    const result = method.startsWith('send') ? { message_id: ++messageId, chat: { id: body.chat_id }, text: body.text } : true;
+    res.writeHead(200, { 'content-type': 'application/json' });
+    res.end(JSON.stringify({ ok: true, result }));
+  };
+
+  const server = http.createServer((req, res) => {
+    stats.requests++;
+    if (failing > 0) {
+      failing--;
+      req.socket.destroy();
+      return;
+    }
+    const chunks = [];
+    req.on('data', c => chunks.push(c));
+    req.on('end', () => {
+      const delay = latencyMs + (req.socket.handshakeDone ? 0 : handshakeMs);
+      req.socket.handshakeDone = true;
+      const text = Buffer.concat(chunks).toString('utf8');
+      const stall = stalling > 0;
+      if (stall) stalling--;
+      if (delay > 0) setTimeout(() => handle(req, res, text, stall), delay);
+      else handle(req, res, text, stall);
+    });
+  });
+  server.keepAliveTimeout = 60000;
+  server.on('connection', () => stats.connections++);
+
+  return new Promise(resolve => {
+    server.listen(0, '127.0.0.1', () => {
+      resolve({
+        url: `http://127.0.0.1:${server.address().port}`,
+        stats,
+        calls,
+        failNext(n = 1) {
+          failing += n;
+        },
+        stallNext(n = 1) {
+          stalling += n;
+        },
+        close: () => new Promise(done => {
+          server.closeAllConnections();
+          server.close(() => done());
+        }),
+      });
+    });
+  });
+}
+
+module.exports = { startTelegramStub };
@@ -0,0 +1,219 @@
+/**
+ * Общие хелперы для apply-*.js скриптов: загрузка/сохранение workflow,
+ * поиск, переименование и вставка нод с сохранением связей.
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const WORKFLOWS_DIR = path.join(__dirname, '..', '..', 'workflows');
+
+function workflowPath(name) {
+  return path.join(WORKFLOWS_DIR, name.endsWith('.json') ? name : `${name}.n8n.json`);
+}
+
+function loadWorkflow(name) {
+  const file = workflowPath(name);
+  return { file, workflow: JSON.parse(fs.readFileSync(file, 'utf8')) };
+}
+
+function saveWorkflow({ file, workflow }) {
+  fs.writeFileSync(file, JSON.stringify(workflow, null, 2));
+}
+
+function findNode(workflow, name) {
+  return workflow.nodes.find(n => n.name === name) || null;
+}
+
+function requireNode(workflow, name) {
+  const node = findNode(workflow, name);
+  if (!node) {
+    console.error(`❌ ${name} node not found in ${workflow.name}`);
+    process.exit(1);
+  }
+  return node;
+}
+
+function escapeRe(s) {
+  return s.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+/**
+ * Переименовывает ноду: имя, ключ в connections, ссылки в связях
+ * и обращения $('<name>') / $("<name>") в коде и выражениях.
+ */
+function renameNode(workflow, oldName, newName) {
+  const node = requireNode(workflow, oldName);
+  node.name = newName;
+
+  if (workflow.connections[oldName]) {
+    workflow.connections[newName] = workflow.connections[oldName];
+    delete workflow.connections[oldName];
+  }
+  for (const conn of Object.values(workflow.connections)) {
+    for (const branch of conn.main || []) {
+      for (const link of branch || []) {
+        if (link.node === oldName) link.node = newName;
+      }
+    }
+  }
+
+  const ref = new RegExp(`\\$\\((['"])${escapeRe(oldName)}\\1\\)`, 'g');
+  const rewrite = value => {
+    if (typeof value === 'string') return value.replace(ref, (_, q) => `$(${q}${newName}${q})`);
+    if (Array.isArray(value)) return value.map(rewrite);
+    if (value && typeof value === 'object') {
+      for (const k of Object.keys(value)) value[k] = rewrite(value[k]);
+    }
+    return value;
+  };
+  for (const n of workflow.nodes) n.parameters = rewrite(n.parameters);
+  return node;
+}
+
+/** Точечная замена в jsCode; падает, если фрагмент не найден (скрипт уже применён?). */
+function replaceInCode(node, from, to) {
+  const code = node.parameters.jsCode || '';
+  if (!code.includes(from)) {
+    console.error(`❌ ${node.name}: fragment not found: ${from.slice(0, 80)}...`);
+    process.exit(1);
+  }
+  node.parameters.jsCode = code.replace(from, () => to);
+}
+
+/** Заготовка региона под модуль из src/ — заполняется scripts/sync-code-nodes.js. */
+function region(rel) {
+  return `// #region ${rel}\n// #endregion ${rel}\n`;
+}
+
+function link(node, index = 0) {
+  return { node, type: 'main', index };
+}
+
+/** Задаёт выходы ноды: outputs — массив веток, каждая ветка — массив имён. */
+function connect(workflow, from, outputs) {
+  workflow.connections[from] = { main: outputs.map(branch => branch.map(name => link(name))) };
+}
+
+/** Вставляет newName между from и всеми её прямыми потомками (ветка 0). */
+function insertAfter(workflow, from, newName) {
+  const conn = workflow.connections[from];
+  const downstream = conn && conn.main && conn.main[0] ? conn.main[0] : [];
+  workflow.connections[newName] = { main: [downstream] };
+  workflow.connections[from] = { main: [[link(newName)], ...((conn && conn.main) || []).slice(1)] };
+}
+
+function addNode(workflow, node) {
+  if (findNode(workflow, node.name)) {
+    console.error(`❌ ${node.name} already exists in ${workflow.name}`);
+    process.exit(1);
+  }
+  workflow.nodes.push(node);
+  return node;
+}
+
+/** Redis-нода с теми же credentials, что и у остальных Redis-нод workflow. */
+function redisNode(workflow, { id, name, position, operation, key, value, ttl, propertyName = 'value', extra = {} }) {
+  const sibling = workflow.nodes.find(n => n.type === 'n8n-nodes-base.redis' && n.credentials);
+  const parameters = { operation, key };
+  if (operation === 'get') parameters.propertyName = propertyName;
+  if (value !== undefined) parameters.value = value;
+  Object.assign(parameters, extra);
+  if (ttl) Object.assign(parameters, { expire: true, ttl });
+  const node = { parameters, type: 'n8n-nodes-base.redis', typeVersion: 1, position, id, name };
+  if (sibling) node.credentials = sibling.credentials;
+  return node;
+}
+
+/** Code-нода (v2); общий код из src/ — через region() в начале jsCode. */
+function codeNode({ id, name, position, jsCode }) {
+  return { parameters: { jsCode }, type: 'n8n-nodes-base.code', typeVersion: 2, position, id, name };
+}
+
+/** IF-нода (v2.2) с одним булевым условием; ветка 0 — true, 1 — false. */
+function ifNode({ id, name, position, condition }) {
+  return {
+    parameters: {
+      conditions: {
+        options: { caseSensitive: true, typeValidation: 'strict', version: 2 },
+        conditions: [{ leftValue: condition, rightValue: 'true', operator: { type: 'boolean', operation: 'true', singleValue: true } }],
+        combinator: 'and',
+      },
+    },
+    type: 'n8n-nodes-base.if',
+    typeVersion: 2.2,
+    position,
+    id,
+    name,
+  };
+}
+
+/**
+ * Switch-нода (v3.2) по значению выражения: rules — { outputKey: значение },
+ * ветка i — i-е правило; значение без правила никуда не идёт.
+ */
+function switchNode({ id, name, position, value, rules }) {
+  return {
+    parameters: {
+      rules: {
+        values: Object.entries(rules).map(([outputKey, equals]) => ({
+          outputKey,
+          conditions: {
+            options: { caseSensitive: true, typeValidation: 'strict', version: 2 },
+            conditions: [{ leftValue: value, rightValue: equals, operator: { type: 'string', operation: 'equals' } }],
+            combinator: 'and',
+          },
+          renameOutput: true,
+        })),
+      },
+      options: {},
+    },
+    type: 'n8n-nodes-base.switch',
+    typeVersion: 3.2,
+    position,
+    id,
+    name,
+  };
+}
+
+/** Wait-нода (v1.1) «After Time Interval»: amount — число или выражение. */
+function waitNode({ id, name, position, amount, unit = 'seconds' }) {
+  return {
+    parameters: { amount, unit },
+    type: 'n8n-nodes-base.wait',
+    typeVersion: 1.1,
+    position,
+    id,
+    name,
+    webhookId: require('crypto').randomUUID(),
+  };
+}
+
+function removeNode(workflow, name) {
+  workflow.nodes = workflow.nodes.filter(n => n.name !== name);
+  delete workflow.connections[name];
+  for (const conn of Object.values(workflow.connections)) {
+    conn.main = (conn.main || []).map(branch => (branch || []).filter(l => l.node !== name));
+  }
+}
+
+module.exports = {
+  WORKFLOWS_DIR,
+  workflowPath,
+  loadWorkflow,
+  saveWorkflow,
+  findNode,
+  requireNode,
+  renameNode,
+  replaceInCode,
+  region,
+  connect,
+  insertAfter,
+  addNode,
+  redisNode,
+  codeNode,
+  ifNode,
+  switchNode,
+  waitNode,
+  removeNode,
+};
@@ -33,9 +33,9 @@ if [ -n "$SUPER_ADMINS" ]; then
     for admin_id in "${ADMINS[@]}"; do
         admin_id=$(echo $admin_id | xargs) # trim whitespace
         echo "   Adding super admin: $admin_id"
-        $REDIS_CLI SADD ozon:acl:superadmins "$admin_id" > /dev/null
-        $REDIS_CLI SADD ozon:acl:admins "$admin_id" > /dev/null
-        $REDIS_CLI SADD ozon:acl:whitelist "$admin_id" > /dev/null
+        # Биты прав: 1 whitelist | 2 admin | 4 superuser (src/acl-bits.js)
+        $REDIS_CLI SET "ozon:acl:$admin_id" 7 > /dev/null
+        $REDIS_CLI HDEL "ozon:user:{$admin_id}" acl acl_exp > /dev/null
     done
     echo "   ✅ Super admins initialized"
 else
@@ -47,12 +47,10 @@ echo "📊 Current Redis keys:"
 $REDIS_CLI KEYS "ozon:*"
 
 echo ""
-echo "👥 Whitelist users:"
-$REDIS_CLI SMEMBERS ozon:acl:whitelist
-
-echo ""
-echo "👑 Admin users:"
-$REDIS_CLI SMEMBERS ozon:acl:admins
+echo "👥 Users with access (ozon:acl:<user_id> = bits):"
+for key in $($REDIS_CLI --scan --pattern 'ozon:acl:[0-9]*'); do
+    echo "   $key = $($REDIS_CLI GET "$key")"
+done
 
 echo ""
 echo "✅ Redis initialization complete!"
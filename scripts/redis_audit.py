@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Memory audit of the bot's Redis keyspace: where the bytes are, per key
+pattern and per user. Read-only.
+
+The keyspace is walked with SCAN in batches. Every key gets one MEMORY USAGE
+(with SAMPLES: nested values are estimated from that many elements, as the
+server does by default) and one TTL, pipelined: one round trip per batch,
+plus one more when the batch holds UI message ids. Keys are grouped by the
+patterns in PATTERNS (docs/REDIS_SETUP.md); the report has:
+
+    patterns   per pattern: keys, bytes, largest key, keys/bytes without TTL
+    sessions   the top-N users by bytes over all their keys (ozon:user:{<uid>}*,
+               ozon:sess:{<uid>}:*, ozon:ui:{<uid>}:*, legacy per-user keys),
+               with the bytes of each part
+    noTtl      the top-N biggest keys without TTL among patterns that are
+               written with one (a leak: nothing will ever free them)
+    orphans    ozon:ui:{<uid>}:<key>:message_id whose ozon:user:{<uid>} is gone:
+               the message it points to is no longer driven by any state
+
+Output is one JSON object (--json) with a timestamp, to append to a log and
+graph over time, or a short text summary.
+
+Usage:
+    python3 scripts/redis_audit.py                          # text summary
+    python3 scripts/redis_audit.py --json --top=50          # machine-readable
+    python3 scripts/redis_audit.py --batch=500 --pause-ms=20 --samples=0
+    python3 scripts/redis_audit.py --match='ozon:sess:*'
+
+--samples=0 measures nested values exactly (slower on big hashes and lists).
+Connection: as scripts/redis_sweeper.py (REDIS_URL or REDIS_HOST/PORT/PASSWORD).
+"""
+
+import json
+import re
+import sys
+import time
+
+from redis_keys import user_key
+from redis_sweeper import DEFAULT_BATCH, connect
+
+DEFAULT_TOP = 20
+DEFAULT_SAMPLES = 5
+
+# (name, pattern, expires): first match wins; group 'uid' is the owning user;
+# expires -- the bot writes these keys with a TTL, so one without is a leak
+T = r'\{(?P<uid>[^{}:]+)\}'  # per-user hash tag, scripts/redis_keys.py
+PATTERNS = [
+    # legacy ACL stores migrated by scripts/acl-set.sh --migrate: per-user strings
+    # and SADD sets (whitelist|admins|superadmins), JSON arrays (whitelist|admin|superuser)
+    ('ozon:acl:<legacy>', re.compile(r'^ozon:acl:(whitelist|admins?|superadmins|superuser)(:|$)'), False),
+    ('ozon:acl:<uid>', re.compile(r'^ozon:acl:(?P<uid>\d+)$'), False),
+    ('ozon:user:{<uid>}', re.compile(rf'^ozon:user:{T}$'), True),
+    ('ozon:user:{<uid>}:upload', re.compile(rf'^ozon:user:{T}:upload$'), True),
+    ('ozon:user:{<uid>}:taps', re.compile(rf'^ozon:user:{T}:taps$'), False),
+    ('ozon:sess:{<uid>}:csv', re.compile(rf'^ozon:sess:{T}:csv$'), True),
+    ('ozon:sess:{<uid>}:agg', re.compile(rf'^ozon:sess:{T}:agg$'), True),
+    ('ozon:sess:{<uid>}:hist', re.compile(rf'^ozon:sess:{T}:hist$'), True),
+    ('ozon:sess:{<uid>}:meta', re.compile(rf'^ozon:sess:{T}:meta$'), True),
+    ('ozon:sess:{<uid>}:dates', re.compile(rf'^ozon:sess:{T}:dates$'), True),
+    ('ozon:ui:{<uid>}:<key>:message_id', re.compile(rf'^ozon:ui:{T}:[^:]+:message_id$'), True),
+    ('ozon:parse:f:<file_unique_id>', re.compile(r'^ozon:parse:f:'), True),
+    ('ozon:parse:index', re.compile(r'^ozon:parse:index$'), False),
+    ('ozon:parse:stats:*', re.compile(r'^ozon:parse:stats:'), False),
+    ('ozon:audit:<date>', re.compile(r'^ozon:audit:'), True),
+    ('ozon:ui:<uid>:calendar_msg_id', re.compile(r'^ozon:ui:(?P<uid>[^:]+):calendar_msg_id$'), False),
+    ('ozon:user|sess|ui:<uid>:* (untagged)', re.compile(r'^ozon:(user|sess|ui):(?P<uid>[^{}:]+)(:|$)'), False),
+    ('files:<uid>', re.compile(r'^files:(?P<uid>[^:]+)$'), False),
+    ('selectedDates:<uid>', re.compile(r'^selectedDates:(?P<uid>[^:]+)$'), False),
+    ('message_id:<uid>', re.compile(r'^message_id:(?P<uid>[^:]+)$'), False),
+    ('ozon:cache:*', re.compile(r'^ozon:cache:'), False),
+    ('ozon:*', re.compile(r'^ozon:'), False),
+]
+OTHER = '<other>'
+UI_MESSAGE_ID = 'ozon:ui:{<uid>}:<key>:message_id'
+
+
+def classify(key):
+    """(pattern name, uid or None, expires) of the first matching pattern."""
+    for name, pattern, expires in PATTERNS:
+        m = pattern.search(key)
+        if m:
+            return name, m.groupdict().get('uid'), expires
+    return OTHER, None, False
+
+
+def _part(name):
+    """Short name of a per-user pattern for the session breakdown: 'sess:csv', 'user', 'ui:message_id'."""
+    parts = [p for p in name.split(':') if p not in ('ozon', '<uid>', '{<uid>}', '<key>')]
+    return ':'.join(parts) or name
+
+
+def _keep_top(items, n):
+    """Trim a list of {'key', 'bytes'} to the n biggest (in place, amortised)."""
+    if len(items) > 2 * n:
+        items.sort(key=lambda x: (-x['bytes'], x['key']))
+        del items[n:]
+
+
+def audit(client, batch=DEFAULT_BATCH, top=DEFAULT_TOP, samples=DEFAULT_SAMPLES, match=None, pause_ms=0,
+          sleep=time.sleep, now=None):
+    """Walk the keyspace and return the report described in the module docstring."""
+    patterns = {}
+    users = {}
+    no_ttl, orphans = [], []
+    orphan_keys = orphan_bytes = 0
+    report = {'at': int(time.time() if now is None else now), 'scanned': 0, 'batches': 0, 'bytes': 0,
+              'samples': samples}
+    cursor = 0
+    while True:
+        cursor, keys = client.scan(cursor=cursor, match=match, count=batch)
+        cursor = int(cursor)
+        report['scanned'] += len(keys)
+        report['batches'] += 1
+        if keys:
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.memory_usage(key, samples=samples)
+                pipe.ttl(key)
+            replies = pipe.execute()
+            ui = []
+            for i, key in enumerate(keys):
+                size, ttl = replies[2 * i], replies[2 * i + 1]
+                if size is None or ttl == -2:
+                    continue  # deleted between SCAN and the pipeline
+                name, uid, expires = classify(key)
+                p = patterns.setdefault(name, {'keys': 0, 'bytes': 0, 'maxKey': None, 'maxBytes': 0,
+                                               'noTtl': {'keys': 0, 'bytes': 0}})
+                p['keys'] += 1
+                p['bytes'] += size
+                report['bytes'] += size
+                if size > p['maxBytes']:
+                    p['maxKey'], p['maxBytes'] = key, size
+                if ttl == -1:
+                    p['noTtl']['keys'] += 1
+                    p['noTtl']['bytes'] += size
+                    if expires:
+                        no_ttl.append({'key': key, 'pattern': name, 'bytes': size})
+                        _keep_top(no_ttl, top)
+                if uid is not None and name != 'ozon:acl:<uid>':
+                    u = users.setdefault(uid, {'keys': 0, 'bytes': 0, 'parts': {}})
+                    u['keys'] += 1
+                    u['bytes'] += size
+                    part = _part(name)
+                    u['parts'][part] = u['parts'].get(part, 0) + size
+                if name == UI_MESSAGE_ID:
+                    ui.append((key, uid, size))
+            if ui:
+                owners = sorted({uid for _, uid, _ in ui})
+                pipe = client.pipeline(transaction=False)
+                for uid in owners:
+                    pipe.exists(user_key(uid))
+                alive = {uid for uid, n in zip(owners, pipe.execute()) if n}
+                for key, uid, size in ui:
+                    if uid not in alive:
+                        orphan_keys += 1
+                        orphan_bytes += size
+                        orphans.append(key)
+                if len(orphans) > 2 * top:
+                    orphans.sort()
+                    del orphans[top:]
+        if cursor == 0:
+            break
+        if pause_ms:
+            sleep(pause_ms / 1000)
+
+    ranked = sorted(users.items(), key=lambda kv: (-kv[1]['bytes'], kv[0]))
+    no_ttl.sort(key=lambda x: (-x['bytes'], x['key']))
+    report['patterns'] = dict(sorted(patterns.items(), key=lambda kv: (-kv[1]['bytes'], kv[0])))
+    report['users'] = len(users)
+    report['sessions'] = [{'uid': uid, **u} for uid, u in ranked[:top]]
+    report['noTtl'] = no_ttl[:top]
+    report['orphans'] = {'keys': orphan_keys, 'bytes': orphan_bytes, 'sample': sorted(orphans)[:top]}
+    return report
+
+
+def _kb(n):
+    return f'{n / 1024:.1f} KB' if n < 1 << 20 else f'{n / (1 << 20):.2f} MB'
+
+
+def main(argv):
+    if any(a in ('-h', '--help') for a in argv[1:]):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    opt = lambda name, default: next((a.split('=', 1)[1] for a in argv[1:] if a.startswith(f'--{name}=')), default)
+    report = audit(connect(), batch=int(opt('batch', DEFAULT_BATCH)), top=int(opt('top', DEFAULT_TOP)),
+                   samples=int(opt('samples', DEFAULT_SAMPLES)), match=opt('match', None),
+                   pause_ms=int(opt('pause-ms', 0)))
+    if '--json' in argv[1:]:
+        json.dump(report, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+        print()
+        return 0
+    print(f"{report['scanned']} keys in {report['batches']} batches, {_kb(report['bytes'])}, {report['users']} users")
+    print('\nBy pattern:')
+    for name, p in report['patterns'].items():
+        extra = f", no TTL {p['noTtl']['keys']} ({_kb(p['noTtl']['bytes'])})" if p['noTtl']['keys'] else ''
+        print(f"  {name:34} {p['keys']:>8} keys {_kb(p['bytes']):>12}{extra}")
+    print(f"\nTop {len(report['sessions'])} sessions:")
+    for s in report['sessions']:
+        parts = ', '.join(f'{k} {_kb(v)}' for k, v in sorted(s['parts'].items(), key=lambda kv: -kv[1]))
+        print(f"  {s['uid']:>12} {_kb(s['bytes']):>12}  {parts}")
+    if report['noTtl']:
+        print('\nBiggest keys without TTL:')
+        for k in report['noTtl']:
+            print(f"  {k['key']} {_kb(k['bytes'])}")
+    o = report['orphans']
+    print(f"\nOrphaned UI message ids: {o['keys']} ({_kb(o['bytes'])})")
+    for key in o['sample']:
+        print(f'  {key}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
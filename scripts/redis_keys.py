@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Names of the bot's Redis keys and their Redis Cluster hash slots.
+
+Every per-user key carries the user id as a hash tag, so all of a user's
+state hashes to one slot -- one shard in Redis Cluster, one node behind
+scripts/redis_shards.py -- and a route's reads and writes never cross shards:
+
+    ozon:user:{<uid>}                 hash: ACL cache, meta, dates, calendar (src/user-state.js)
+    ozon:user:{<uid>}:upload          upload generation (INCR)
+    ozon:user:{<uid>}:taps            date tap log (src/date-taps.js)
+    ozon:sess:{<uid>}:csv|agg|hist|meta|dates
+    ozon:ui:{<uid>}:<key>:message_id  live message id + render print (src/ui-message.js)
+
+Keys that belong to no single user keep their names and spread by name:
+ozon:acl:<uid> (written by admins, read once per ACL cache period),
+ozon:parse:* (the shared parse cache) and ozon:audit:*.
+
+Keys written before the tags (ozon:user:<uid>, ozon:sess:<uid>:csv, ...)
+are renamed by scripts/redis_migrate_keys.py.
+
+Usage:
+    python3 scripts/redis_keys.py 'ozon:sess:{42}:csv' ozon:acl:42   # slot of each key
+    python3 scripts/redis_keys.py --nodes=4 'ozon:user:{42}'        # and its node
+"""
+
+import re
+import sys
+
+CLUSTER_SLOTS = 16384
+
+TAGGED_USER_KEY_RE = re.compile(r'^ozon:(?P<family>user|sess|ui):\{(?P<uid>[^{}:]+)\}(?P<rest>:.*)?$')
+UNTAGGED_USER_KEY_RE = re.compile(r'^ozon:(?P<family>user|sess|ui):(?P<uid>[^{}:]+)(?P<rest>:.*)?$')
+# ozon:ui:<uid>:calendar_msg_id predates ozon:ui:<uid>:<key>:message_id; nothing reads it
+LEGACY_UI_KEY_RE = re.compile(r'^ozon:ui:[^:]+:calendar_msg_id$')
+
+
+def user_tag(uid):
+    return '{%s}' % uid
+
+
+def user_key(uid, suffix=''):
+    """ozon:user:{<uid>}, or ozon:user:{<uid>}:<suffix> (upload, taps)."""
+    return f'ozon:user:{user_tag(uid)}' + (f':{suffix}' if suffix else '')
+
+
+def session_key(uid, part):
+    """ozon:sess:{<uid>}:<part> -- csv, agg, hist, meta, dates."""
+    return f'ozon:sess:{user_tag(uid)}:{part}'
+
+
+def ui_message_key(uid, key):
+    return f'ozon:ui:{user_tag(uid)}:{key}:message_id'
+
+
+def tagged_key(key):
+    """Current name of a per-user key written before the hash tags; None for any other key."""
+    m = UNTAGGED_USER_KEY_RE.match(key)
+    if not m or LEGACY_UI_KEY_RE.match(key):
+        return None
+    return f"ozon:{m.group('family')}:{user_tag(m.group('uid'))}{m.group('rest') or ''}"
+
+
+def _crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+        table.append(crc)
+    return table
+
+
+_CRC16 = _crc16_table()
+
+
+def crc16(data):
+    """CRC16-CCITT (XMODEM), the checksum Redis Cluster hashes keys with."""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def key_slot(key):
+    """
+    Hash slot of key as Redis Cluster computes it: only the part between the
+    first '{' and the next '}' is hashed, when that part is not empty.
+    """
+    data = key.encode('utf-8') if isinstance(key, str) else key
+    start = data.find(b'{')
+    if start >= 0:
+        end = data.find(b'}', start + 1)
+        if end > start + 1:
+            data = data[start + 1:end]
+    return crc16(data) % CLUSTER_SLOTS
+
+
+def slot_node(slot, nodes):
+    """Index of the node owning slot when nodes split the slots in contiguous equal ranges."""
+    return slot * nodes // CLUSTER_SLOTS
+
+
+def main(argv):
+    keys = [a for a in argv[1:] if not a.startswith('--')]
+    if not keys or any(a in ('-h', '--help') for a in argv[1:]):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    nodes = next((int(a.split('=', 1)[1]) for a in argv[1:] if a.startswith('--nodes=')), 0)
+    for key in keys:
+        slot = key_slot(key)
+        print(f'{key}\t{slot}' + (f'\tnode {slot_node(slot, nodes)}' if nodes else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
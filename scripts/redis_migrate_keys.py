@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Migrate earlier session keys to the current layout: cursor-based SCAN in
+batches, pipelined reads and writes, throttled to a target ops/sec and
+resumable from a saved cursor.
+
+    ozon:user:<uid>*, ozon:sess:<uid>:*, ozon:ui:<uid>:<key>:message_id
+                         renamed to the hash-tagged names (scripts/redis_keys.py):
+                           ozon:user:{<uid>}*, ozon:sess:{<uid>}:*, ...
+                         RENAMENX keeps the value and its TTL; when the tagged
+                         key already exists it is newer and the old one is dropped
+    selectedDates:<uid>  JSON array of YYYY-MM-DD (or {"dates"|"selectedDates": [...],
+                         "createdAt": <sec>}) ->
+                           ozon:user:{<uid>}:taps         one toggle per date (src/date-taps.js)
+                           ozon:user:{<uid>}              dates + ui_exp (src/user-state.js)
+                           ozon:sess:{<uid>}:dates        the same array, 24h
+    message_id:<uid>     message id (or {"message_id": .., "createdAt": <sec>}) ->
+                           ozon:user:{<uid>}              calendar_msg_id + ui_exp
+                           ozon:ui:{<uid>}:calendar:message_id   24h (src/ui-message.js)
+    files:<uid>          not convertible: the current session (:meta/:agg/:hist/:csv)
+                         is built by parsing the uploaded report, so the user uploads
+                         again; only counted here, scripts/redis_sweeper.py removes them
+
+Per user the selection and the calendar message move together, in one
+MULTI/EXEC per batch with the UNLINK of the legacy keys, so a crash never
+leaves a user half-migrated. Legacy state is not written over newer state:
+when the user already has a live ui group in ozon:user:{<uid>} the legacy keys
+are superseded and only deleted. Legacy values older than 24h (createdAt)
+are stale: already an empty selection for the bot, deleted as well.
+Unreadable values are left in place and counted. The renames run first, so
+the live ui group check sees state written before the tags.
+
+Run it against the single server the bot used so far, before the keys are
+spread over several nodes: a rename moves a key to another hash slot.
+
+The cursor is saved to the state file after every batch; an interrupted run
+continues from it (re-running a batch is harmless: migrated sources are
+gone). The state file is removed when the walk completes.
+
+Usage:
+    python3 scripts/redis_migrate_keys.py --dry-run                  # report only
+    python3 scripts/redis_migrate_keys.py --batch=1000 --ops=20000   # migrate
+    python3 scripts/redis_migrate_keys.py --state=/tmp/m.json --restart --json
+
+Connection: REDIS_URL, or REDIS_HOST / REDIS_PORT / REDIS_PASSWORD (as in
+scripts/redis-init.sh). Needs the redis package (pip install redis).
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+from redis_keys import session_key, tagged_key, ui_message_key, user_key
+from redis_sweeper import connect
+
+UI_STATE_MS = 86400 * 1000
+UI_TTL_SEC = 86400
+USER_STATE_TTL_SEC = 259200
+DATES_LIMIT = 3
+DEFAULT_BATCH = 500
+DEFAULT_OPS = 10000
+DEFAULT_STATE = '.redis-migrate-keys.json'
+
+PATTERNS = ['ozon:user:*', 'ozon:sess:*', 'ozon:ui:*', 'selectedDates:*', 'message_id:*', 'files:*']
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+OUTCOMES = ('migrated', 'superseded', 'stale', 'invalid', 'files')
+
+
+def _decode(raw):
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return raw
+
+
+def _created_ms(value):
+    created = value.get('createdAt') if isinstance(value, dict) else None
+    try:
+        return int(float(created) * 1000) if created is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_selected_dates(raw):
+    """(dates, createdAt ms or None) from a selectedDates:<uid> value; None when unreadable."""
+    value = _decode(raw)
+    dates = value
+    if isinstance(value, dict):
+        dates = value.get('dates', value.get('selectedDates'))
+    if not isinstance(dates, list) or not all(isinstance(d, str) and DATE_RE.match(d) for d in dates):
+        return None
+    return list(dict.fromkeys(dates))[:DATES_LIMIT], _created_ms(value)
+
+
+def parse_message_id(raw):
+    """(message_id, createdAt ms or None) from a message_id:<uid> value; None when unreadable."""
+    value = _decode(raw)
+    msg = value.get('message_id', value.get('messageId')) if isinstance(value, dict) else value
+    try:
+        msg = int(msg)
+    except (TypeError, ValueError):
+        return None
+    return (msg, _created_ms(value)) if msg > 0 else None
+
+
+def plan_user(uid, dates_raw, msg_raw, ui_exp, now_ms):
+    """
+    (outcome, writes) for one user: writes is [(method, args, kwargs)] for the
+    redis client, legacy keys excluded (the caller unlinks them).
+    """
+    dates = parse_selected_dates(dates_raw) if dates_raw is not None else None
+    msg = parse_message_id(msg_raw) if msg_raw is not None else None
+    if (dates_raw is not None and dates is None) or (msg_raw is not None and msg is None):
+        return 'invalid', []
+    try:
+        live_ui = int(float(ui_exp)) > now_ms if ui_exp is not None else False
+    except ValueError:
+        live_ui = False
+    if live_ui:
+        return 'superseded', []
+    created = [p[1] for p in (dates, msg) if p is not None and p[1] is not None]
+    at = max(created) if created else now_ms
+    if now_ms - at > UI_STATE_MS:
+        return 'stale', []
+
+    state_key = user_key(uid)
+    fields = {'ui_exp': str(at + UI_STATE_MS)}
+    writes = []
+    if dates is not None:
+        selected = dates[0]
+        fields['dates'] = json.dumps(selected)
+        taps = [f'{at}|t|{d}|migrated' for d in selected]
+        if taps:
+            writes.append(('rpush', (user_key(uid, 'taps'),) + tuple(taps), {}))
+        writes.append(('set', (session_key(uid, 'dates'), json.dumps(selected)), {'ex': UI_TTL_SEC, 'nx': True}))
+    if msg is not None:
+        fields['calendar_msg_id'] = str(msg[0])
+        writes.append(('set', (ui_message_key(uid, 'calendar'), str(msg[0])), {'ex': UI_TTL_SEC, 'nx': True}))
+    writes.append(('hset', (state_key,), {'mapping': fields}))
+    writes.append(('expire', (state_key, USER_STATE_TTL_SEC), {}))
+    return 'migrated', writes
+
+
+def empty_report(dry_run):
+    return {'dryRun': dry_run, 'scanned': 0, 'batches': 0, 'ops': 0, 'elapsedSec': 0.0,
+            'users': {o: 0 for o in OUTCOMES}, 'deletedKeys': 0, 'retag': {'renamed': 0, 'superseded': 0}}
+
+
+def retag_batch(client, keys, report, dry_run):
+    """Rename the untagged per-user keys of one SCAN page; returns the number of Redis ops spent."""
+    moves = [(key, tagged_key(key)) for key in keys]
+    moves = [(key, new) for key, new in moves if new]
+    if not moves:
+        return 0
+    check = client.pipeline(transaction=False)
+    for _, new in moves:
+        check.exists(new)
+    taken = check.execute()
+    write = client.pipeline(transaction=True)
+    for (key, new), exists in zip(moves, taken):
+        report['retag']['superseded' if exists else 'renamed'] += 1
+        # RENAMENX guards against a tagged key written since the check; the UNLINK then drops the older one
+        write.renamenx(key, new)
+        write.unlink(key)
+    if not dry_run:
+        write.execute()
+        return len(moves) * 3
+    return len(moves)
+
+
+def migrate_batch(client, keys, report, now_ms, dry_run):
+    """Migrate the users behind one SCAN page; returns the number of Redis ops spent."""
+    uids = {}
+    for key in keys:
+        prefix, uid = key.split(':', 1)
+        if prefix == 'files':
+            report['users']['files'] += 1
+        else:
+            uids.setdefault(uid, prefix)
+    if not uids:
+        return 0
+
+    read = client.pipeline(transaction=False)
+    for uid in uids:
+        read.get(f'selectedDates:{uid}')
+        read.get(f'message_id:{uid}')
+        read.hget(user_key(uid), 'ui_exp')
+        read.hget(f'ozon:user:{uid}', 'ui_exp')  # not renamed yet: dry-run, or a key written meanwhile
+    replies = read.execute()
+    ops = len(uids) * 4
+
+    write = client.pipeline(transaction=True)
+    for i, (uid, prefix) in enumerate(uids.items()):
+        dates_raw, msg_raw, ui_exp, untagged_ui_exp = replies[i * 4:i * 4 + 4]
+        ui_exp = ui_exp if ui_exp is not None else untagged_ui_exp
+        if dates_raw is None and msg_raw is None:
+            continue
+        if prefix == 'message_id' and dates_raw is not None:
+            continue  # the user was handled (or counted unreadable) by the selectedDates:* pass
+        outcome, writes = plan_user(uid, dates_raw, msg_raw, ui_exp, now_ms)
+        report['users'][outcome] += 1
+        if outcome == 'invalid':
+            continue
+        for method, args, kwargs in writes:
+            getattr(write, method)(*args, **kwargs)
+        legacy = [k for k, raw in ((f'selectedDates:{uid}', dates_raw), (f'message_id:{uid}', msg_raw)) if raw is not None]
+        write.unlink(*legacy)
+        report['deletedKeys'] += len(legacy)
+    if len(write) and not dry_run:
+        ops += len(write)
+        write.execute()
+    return ops
+
+
+def load_state(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_state(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def migrate(client, batch=DEFAULT_BATCH, ops_per_sec=DEFAULT_OPS, dry_run=False, state_path=None,
+            restart=False, now_ms=None, max_batches=None, progress=None, clock=time.monotonic, sleep=time.sleep):
+    """
+    Walk PATTERNS with SCAN and migrate batch by batch, sleeping to stay under
+    ops_per_sec (0 disables throttling). With state_path the cursor and the
+    report so far are saved after every batch (not in dry-run) and picked up
+    by the next call; max_batches stops early, as an interrupted run would.
+    Returns the report.
+    """
+    state = None if restart or dry_run or not state_path else load_state(state_path)
+    report = state['report'] if state else empty_report(dry_run)
+    pattern_i, cursor = (state['pattern'], state['cursor']) if state else (0, 0)
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    start = clock()
+    base_elapsed, base_ops, ops, batches = report['elapsedSec'], report['ops'], 0, 0
+    while pattern_i < len(PATTERNS):
+        cursor, keys = client.scan(cursor=cursor, match=PATTERNS[pattern_i], count=batch)
+        cursor = int(cursor)
+        if PATTERNS[pattern_i].startswith('ozon:'):
+            ops += 1 + retag_batch(client, keys, report, dry_run)
+        else:
+            ops += 1 + migrate_batch(client, keys, report, now_ms, dry_run)
+        report['scanned'] += len(keys)
+        report['batches'] += 1
+        batches += 1
+        if cursor == 0:
+            pattern_i += 1
+        if ops_per_sec:
+            ahead = ops / ops_per_sec - (clock() - start)
+            if ahead > 0:
+                sleep(ahead)
+        report['ops'] = base_ops + ops
+        report['elapsedSec'] = round(base_elapsed + clock() - start, 3)
+        if state_path and not dry_run:
+            save_state(state_path, {'pattern': pattern_i, 'cursor': cursor, 'report': report})
+        if progress:
+            progress(report)
+        if max_batches and batches >= max_batches and pattern_i < len(PATTERNS):
+            return dict(report, done=False)
+    if state_path and not dry_run and os.path.exists(state_path):
+        os.remove(state_path)
+    return dict(report, done=True)
+
+
+def throughput(report):
+    secs = report['elapsedSec'] or 1e-9
+    return report['scanned'] / secs, report['ops'] / secs
+
+
+def main(argv):
+    if any(a in ('-h', '--help') for a in argv[1:]):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    opt = lambda name, default: next((a.split('=', 1)[1] for a in argv[1:] if a.startswith(f'--{name}=')), default)
+    last = [0.0]
+
+    def progress(report):
+        if time.monotonic() - last[0] >= 5:
+            last[0] = time.monotonic()
+            keys_s, ops_s = throughput(report)
+            print(f"… {report['scanned']} keys, {keys_s:,.0f} keys/s, {ops_s:,.0f} ops/s", file=sys.stderr)
+
+    report = migrate(connect(), batch=int(opt('batch', DEFAULT_BATCH)), ops_per_sec=int(opt('ops', DEFAULT_OPS)),
+                     dry_run='--dry-run' in argv[1:], state_path=opt('state', DEFAULT_STATE),
+                     restart='--restart' in argv[1:], progress=progress)
+    if '--json' in argv[1:]:
+        json.dump(report, sys.stdout, separators=(',', ':'))
+        print()
+        return 0
+    keys_s, ops_s = throughput(report)
+    users, retag = report['users'], report['retag']
+    print(f"hash tags: {retag['renamed']} keys {'would be ' if report['dryRun'] else ''}renamed, "
+          f"{retag['superseded']} dropped for a newer tagged key")
+    print(f"{'Dry run: ' if report['dryRun'] else ''}{report['scanned']} keys in {report['batches']} batches, "
+          f"{report['elapsedSec']:.1f}s ({keys_s:,.0f} keys/s, {ops_s:,.0f} ops/s)")
+    print(f"users: {users['migrated']} migrated, {users['superseded']} superseded by newer state, "
+          f"{users['stale']} stale, {users['invalid']} unreadable (kept)")
+    print(f"{users['files']} files:<uid> sessions need a re-upload (left for scripts/redis_sweeper.py)")
+    print(f"{report['deletedKeys']} legacy keys {'would be ' if report['dryRun'] else ''}deleted")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Session storage over several Redis nodes: client-side sharding by Redis
+Cluster hash slot (scripts/redis_keys.py).
+
+The 16384 slots are split into contiguous equal ranges, one per node, as
+`redis-cli --cluster create` assigns them, so the same keys land together
+whether they sit behind this client or in a real cluster. With the per-user
+hash tags all of a user's keys share one slot: a route's pipeline goes to
+one node in one round trip.
+
+ShardedRedis takes redis-py clients (or anything with their interface, such
+as scripts/redis_standin.py) and speaks the subset the maintenance scripts
+use:
+
+    single-key commands   routed by the key (the first argument)
+    exists/unlink/delete  split per node, replies summed
+    scan                  walks node after node; the cursor carries the node
+    pipeline()            one pipeline per node touched, replies in queue
+                          order; transaction=True is one MULTI/EXEC per node,
+                          atomic per user because a user's keys share a node
+    rename/renamenx       both keys must share a node (CROSSSLOT otherwise,
+                          as in a cluster)
+
+Usage:
+    REDIS_SHARDS=redis://r1:6379,redis://r2:6379 python3 scripts/redis_sweeper.py
+    python3 scripts/redis_shards.py 'ozon:sess:{42}:csv' ...   # node of each key
+
+With REDIS_SHARDS set, scripts/redis_sweeper.py, redis_audit.py and
+redis_migrate_keys.py connect through this client (see connect()).
+"""
+
+import os
+import sys
+
+from redis_keys import key_slot, slot_node
+
+MULTI_KEY = ('exists', 'unlink', 'delete')
+
+
+class CrossSlotError(ValueError):
+    """Keys of one command live on different nodes."""
+
+
+class ShardedRedis:
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        if not self.nodes:
+            raise ValueError('ShardedRedis needs at least one node')
+
+    def node_index(self, key):
+        return slot_node(key_slot(key), len(self.nodes))
+
+    def node_for(self, key):
+        return self.nodes[self.node_index(key)]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def command(key, *args, **kwargs):
+            return getattr(self.node_for(key), name)(key, *args, **kwargs)
+        return command
+
+    def _split(self, name, keys):
+        by_node = {}
+        for key in keys:
+            by_node.setdefault(self.node_index(key), []).append(key)
+        return sum(getattr(self.nodes[i], name)(*ks) for i, ks in by_node.items())
+
+    def exists(self, *keys):
+        return self._split('exists', keys)
+
+    def unlink(self, *keys):
+        return self._split('unlink', keys)
+
+    def delete(self, *keys):
+        return self._split('delete', keys)
+
+    def _same_node(self, src, dst):
+        i = self.node_index(src)
+        if self.node_index(dst) != i:
+            raise CrossSlotError(f"CROSSSLOT {src} and {dst} don't hash to the same node")
+        return self.nodes[i]
+
+    def rename(self, src, dst):
+        return self._same_node(src, dst).rename(src, dst)
+
+    def renamenx(self, src, dst):
+        return self._same_node(src, dst).renamenx(src, dst)
+
+    def scan(self, cursor=0, match=None, count=10):
+        """SCAN over all nodes: cursor = node cursor * len(nodes) + node index."""
+        n = len(self.nodes)
+        cursor = int(cursor)
+        node, inner = cursor % n, cursor // n
+        inner, keys = self.nodes[node].scan(cursor=inner, match=match, count=count)
+        inner = int(inner)
+        if inner:
+            return inner * n + node, keys
+        return (node + 1 if node + 1 < n else 0), keys
+
+    def dbsize(self):
+        return sum(node.dbsize() for node in self.nodes)
+
+    def pipeline(self, transaction=True):
+        return ShardedPipeline(self, transaction)
+
+
+class ShardedPipeline:
+    def __init__(self, client, transaction):
+        self.client = client
+        self.transaction = transaction
+        self.queue = []  # (reply slot, node index, method, args, kwargs)
+        self.replies = 0
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            at = self.replies
+            self.replies += 1
+            if name in MULTI_KEY:
+                by_node = {}
+                for key in args:
+                    by_node.setdefault(self.client.node_index(key), []).append(key)
+                for i, keys in by_node.items():
+                    self.queue.append((at, i, name, tuple(keys), kwargs))
+            else:
+                i = self.client.node_index(args[0])
+                if name in ('rename', 'renamenx') and self.client.node_index(args[1]) != i:
+                    raise CrossSlotError(f"CROSSSLOT {args[0]} and {args[1]} don't hash to the same node")
+                self.queue.append((at, i, name, args, kwargs))
+            return self
+        return queue
+
+    def __len__(self):
+        return self.replies
+
+    def execute(self):
+        """One execute() per node touched; replies in the order commands were queued."""
+        queued, self.queue, count, self.replies = self.queue, [], self.replies, 0
+        by_node = {}
+        for entry in queued:
+            by_node.setdefault(entry[1], []).append(entry)
+        out = [None] * count
+        summed = set()
+        for i, entries in by_node.items():
+            pipe = self.client.nodes[i].pipeline(transaction=self.transaction)
+            for _, _, name, args, kwargs in entries:
+                getattr(pipe, name)(*args, **kwargs)
+            for (at, _, name, _, _), reply in zip(entries, pipe.execute()):
+                if name in MULTI_KEY:
+                    out[at] = (out[at] or 0) + reply if at in summed else reply
+                    summed.add(at)
+                else:
+                    out[at] = reply
+        return out
+
+
+def connect_shards(urls):
+    import redis  # optional: only the CLI talks to real servers
+
+    return ShardedRedis([redis.Redis.from_url(url.strip(), decode_responses=True) for url in urls.split(',') if url.strip()])
+
+
+def main(argv):
+    keys = [a for a in argv[1:] if not a.startswith('--')]
+    urls = os.environ.get('REDIS_SHARDS', '')
+    if not keys or not urls or any(a in ('-h', '--help') for a in argv[1:]):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    nodes = [u.strip() for u in urls.split(',') if u.strip()]
+    for key in keys:
+        print(f'{key}\t{key_slot(key)}\t{nodes[slot_node(key_slot(key), len(nodes))]}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-in for the subset of redis-py the maintenance scripts use
+(redis_sweeper.py, redis_migrate_keys.py, redis_audit.py), for tests and benchmarks without
+a server.
+
+Semantics follow Redis where the scripts depend on them:
+
+    SCAN       a cursor walk that returns every key present for the whole
+               walk exactly once, whatever is written or deleted meanwhile;
+               MATCH filters after COUNT, as on the server
+    pipeline   commands are queued and run on execute(); one execute() is one
+               round trip (round_trips), every queued command one op (ops)
+    TTL        -1 without expiry, -2 for a missing key; time does not pass
+
+Values are str (strings), list (lists) or dict (hashes); numbers are stored
+as str like Redis does. decode_responses=True behaviour: everything is str.
+"""
+
+import fnmatch
+import json
+import re
+
+
+class RedisStandin:
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.order = []
+        self.slot = {}
+        self.round_trips = 0
+        self.ops = 0
+
+    # ─── keyspace ────────────────────────────────────────────────────────────
+    def _store(self, key, value):
+        if key not in self.slot:
+            self.slot[key] = len(self.order)
+            self.order.append(key)
+        self.data[key] = value
+
+    def _drop(self, key):
+        if key not in self.data:
+            return 0
+        del self.data[key]
+        self.expiry.pop(key, None)
+        self.order[self.slot.pop(key)] = None
+        return 1
+
+    def scan(self, cursor=0, match=None, count=10):
+        self.round_trips += 1
+        self.ops += 1
+        cursor = int(cursor)
+        end = min(cursor + (count or 10), len(self.order))
+        keys = [k for k in self.order[cursor:end] if k is not None]
+        if match is not None:
+            matches = re.compile(fnmatch.translate(match)).match
+            keys = [k for k in keys if matches(k)]
+        return (end if end < len(self.order) else 0), keys
+
+    def exists(self, *keys):
+        return sum(1 for k in keys if k in self.data)
+
+    def unlink(self, *keys):
+        return sum(self._drop(k) for k in keys)
+
+    delete = unlink
+
+    def rename(self, src, dst):
+        if src not in self.data:
+            raise ValueError('ERR no such key')
+        value, ttl = self.data[src], self.expiry.get(src)
+        self._drop(dst)
+        self._drop(src)
+        self._store(dst, value)
+        if ttl is not None:
+            self.expiry[dst] = ttl
+        return True
+
+    def renamenx(self, src, dst):
+        if dst in self.data:
+            return False
+        return self.rename(src, dst)
+
+    def ttl(self, key):
+        if key not in self.data:
+            return -2
+        return self.expiry.get(key, -1)
+
+    def expire(self, key, seconds):
+        if key not in self.data:
+            return False
+        self.expiry[key] = int(seconds)
+        return True
+
+    def memory_usage(self, key, samples=None):
+        if key not in self.data:
+            return None
+        return len(key) + len(json.dumps(self.data[key], ensure_ascii=False).encode('utf-8')) + 48
+
+    def dbsize(self):
+        return len(self.data)
+
+    # ─── strings ─────────────────────────────────────────────────────────────
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self._store(key, str(value))
+        self.expiry.pop(key, None)
+        if ex:
+            self.expiry[key] = int(ex)
+        return True
+
+    # ─── lists ───────────────────────────────────────────────────────────────
+    def rpush(self, key, *values):
+        lst = self.data.get(key) or []
+        lst = lst + [str(v) for v in values]
+        self._store(key, lst)
+        return len(lst)
+
+    def lindex(self, key, index):
+        lst = self.data.get(key) or []
+        try:
+            return lst[index]
+        except IndexError:
+            return None
+
+    def lrange(self, key, start, stop):
+        lst = self.data.get(key) or []
+        return lst[start:] if stop == -1 else lst[start:stop + 1]
+
+    # ─── hashes ──────────────────────────────────────────────────────────────
+    def hget(self, key, field):
+        return (self.data.get(key) or {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key) or {})
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        h = dict(self.data.get(key) or {})
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for f in items if f not in h)
+        h.update({f: str(v) for f, v in items.items()})
+        self._store(key, h)
+        return added
+
+    def pipeline(self, transaction=True):
+        return Pipeline(self)
+
+
+class Pipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queue = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.queue.append((command, args, kwargs))
+            return self
+        return queue
+
+    def __len__(self):
+        return len(self.queue)
+
+    def execute(self):
+        self.client.round_trips += 1
+        self.client.ops += len(self.queue)
+        queued, self.queue = self.queue, []
+        return [command(*args, **kwargs) for command, args, kwargs in queued]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Redis sweeper for the bot's session keys: cursor-based SCAN in batches,
+native expiry instead of per-user guards.
+
+Session keys carry their own TTL (set by the workflows on every write, see
+docs/REDIS_SETUP.md), so Redis expires idle sessions by itself. The sweeper
+catches what native expiry cannot:
+
+    expire   a current session key without a TTL (written by an old workflow
+             version or by hand) gets the TTL its writers use
+    stale    ozon:user:{<uid>}:taps -- the n8n push operation cannot set a TTL;
+             a log whose last tap is older than DATE_TAPS_TTL is already an
+             empty selection (src/date-taps.js) and is deleted
+    legacy   key names no workflow reads any more (files:<uid>,
+             selectedDates:<uid>, message_id:<uid>, ozon:cache:*,
+             ozon:ui:<uid>:calendar_msg_id, per-user keys without the
+             {<uid>} hash tag such as ozon:sess:<uid>:csv) are deleted; run
+             scripts/redis_migrate_keys.py first to keep live sessions
+
+Anything else -- ACL, the shared parse-cache index and counters, unknown
+keys -- is never touched.
+
+With --spill-dir the sweeper also deletes report files spilled out of Redis
+(src/report-spill.js, <uid>-<gen>.ocol) that no ozon:sess:{<uid>}:csv points
+to any more: the session expired or was replaced while the file stayed.
+Files younger than SPILL_GRACE_SEC are kept -- an upload writes the file
+before the pointer. One pipelined GET per batch of files.
+
+Load on Redis is bounded: one SCAN with COUNT=batch, then at most three
+pipelined round trips per batch (TTL/LINDEX, MEMORY USAGE of the candidates,
+UNLINK/EXPIRE), and an optional pause between batches. UNLINK frees memory in
+a background thread, so deleting a big :csv does not block the server.
+
+Usage:
+    python3 scripts/redis_sweeper.py --dry-run              # report only
+    python3 scripts/redis_sweeper.py                        # expire + delete
+    python3 scripts/redis_sweeper.py --batch=500 --pause-ms=50 --json
+    python3 scripts/redis_sweeper.py --spill-dir=/home/node/.n8n/ozon-spill
+
+Connection: REDIS_URL, or REDIS_HOST / REDIS_PORT / REDIS_PASSWORD (as in
+scripts/redis-init.sh); REDIS_SHARDS=<url>,<url>,... for session storage
+spread over several nodes (scripts/redis_shards.py). Needs the redis package
+(pip install redis).
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+from redis_keys import session_key
+from redis_shards import connect_shards
+from report_spill import SPILL_FILE_RE
+from session_codec import decode_session_value
+
+SESSION_TTL_SEC = 259200
+UI_TTL_SEC = 86400
+DATE_TAPS_TTL_MS = 86400 * 1000
+DEFAULT_BATCH = 200
+SPILL_GRACE_SEC = 600
+
+# (action, pattern, ttl): first match wins; 'expire' keys get ttl when they have none
+RULES = [
+    ('keep', re.compile(r'^ozon:acl:'), None),
+    ('keep', re.compile(r'^ozon:parse:(index|stats:)'), None),
+    ('expire', re.compile(r'^ozon:user:\{[^{}:]+\}$'), SESSION_TTL_SEC),
+    ('expire', re.compile(r'^ozon:user:\{[^{}:]+\}:upload$'), SESSION_TTL_SEC),
+    ('stale', re.compile(r'^ozon:user:\{[^{}:]+\}:taps$'), DATE_TAPS_TTL_MS),
+    ('expire', re.compile(r'^ozon:sess:\{[^{}:]+\}:(csv|agg|hist|meta)$'), SESSION_TTL_SEC),
+    ('expire', re.compile(r'^ozon:sess:\{[^{}:]+\}:dates$'), UI_TTL_SEC),
+    ('expire', re.compile(r'^ozon:parse:f:'), SESSION_TTL_SEC),
+    ('expire', re.compile(r'^ozon:ui:\{[^{}:]+\}:[^:]+:message_id$'), UI_TTL_SEC),
+    ('legacy', re.compile(r'^ozon:(user|sess|ui):[^{}:]+(:|$)'), None),
+    ('legacy', re.compile(r'^(files|selectedDates|message_id):[^:]+$'), None),
+    ('legacy', re.compile(r'^ozon:cache:'), None),
+]
+
+
+def classify(key):
+    """(action, ttl) of the first rule matching key; ('keep', None) when none does."""
+    for action, pattern, ttl in RULES:
+        if pattern.search(key):
+            return action, ttl
+    return 'keep', None
+
+
+def last_tap_ms(entry):
+    """Timestamp of a tap-log entry '<ms>|op|date|id'; 0 when unreadable."""
+    try:
+        return int(str(entry).split('|', 1)[0])
+    except (TypeError, ValueError):
+        return 0
+
+
+def plan_batch(client, keys, now_ms):
+    """Decide per key: [(key, action, ttl)] for keys that need an EXPIRE or a delete."""
+    inspect = [(k,) + classify(k) for k in keys]
+    inspect = [(k, action, ttl) for k, action, ttl in inspect if action != 'keep']
+    if not inspect:
+        return []
+    pipe = client.pipeline(transaction=False)
+    for key, action, _ in inspect:
+        if action == 'expire':
+            pipe.ttl(key)
+        elif action == 'stale':
+            pipe.lindex(key, -1)
+        else:
+            pipe.exists(key)
+    replies = pipe.execute()
+    planned = []
+    for (key, action, ttl), reply in zip(inspect, replies):
+        if action == 'expire' and reply == -1:
+            planned.append((key, 'expire', ttl))
+        elif action == 'stale' and reply is not None and now_ms - last_tap_ms(reply) > ttl:
+            planned.append((key, 'delete', None))
+        elif action == 'legacy' and reply:
+            planned.append((key, 'delete', None))
+    return planned
+
+
+def sweep(client, batch=DEFAULT_BATCH, pause_ms=0, dry_run=False, match=None, now_ms=None, sleep=time.sleep):
+    """
+    Walk the keyspace with SCAN and expire or delete what plan_batch selects.
+    Returns a report: keys scanned, and per action (expire / delete) the key
+    count and bytes (MEMORY USAGE before the change).
+    """
+    report = {'scanned': 0, 'batches': 0, 'dryRun': dry_run,
+              'expire': {'keys': 0, 'bytes': 0}, 'delete': {'keys': 0, 'bytes': 0}}
+    cursor = 0
+    while True:
+        cursor, keys = client.scan(cursor=cursor, match=match, count=batch)
+        cursor = int(cursor)
+        report['scanned'] += len(keys)
+        report['batches'] += 1
+        planned = plan_batch(client, keys, now_ms if now_ms is not None else int(time.time() * 1000))
+        if planned:
+            pipe = client.pipeline(transaction=False)
+            for key, _, _ in planned:
+                pipe.memory_usage(key)
+            sizes = pipe.execute()
+            pipe = client.pipeline(transaction=False)
+            for (key, action, ttl), size in zip(planned, sizes):
+                report[action]['keys'] += 1
+                report[action]['bytes'] += size or 0
+                if action == 'expire':
+                    pipe.expire(key, ttl)
+                else:
+                    pipe.unlink(key)
+            if not dry_run:
+                pipe.execute()
+        if cursor == 0:
+            return report
+        if pause_ms:
+            sleep(pause_ms / 1000)
+
+
+def sweep_spill(client, spill_dir, batch=DEFAULT_BATCH, dry_run=False, now=None):
+    """
+    Delete spill files in spill_dir whose session no longer points to them.
+    Returns {'files': n, 'delete': {'files', 'bytes'}}.
+    """
+    report = {'files': 0, 'delete': {'files': 0, 'bytes': 0}}
+    now = time.time() if now is None else now
+    names = sorted(n for n in os.listdir(spill_dir) if SPILL_FILE_RE.match(n))
+    for at in range(0, len(names), batch):
+        chunk = names[at:at + batch]
+        pipe = client.pipeline(transaction=False)
+        for name in chunk:
+            pipe.get(session_key(SPILL_FILE_RE.match(name).group(1), 'csv'))
+        for name, raw in zip(chunk, pipe.execute()):
+            report['files'] += 1
+            pointer = decode_session_value(raw)
+            if isinstance(pointer, dict) and pointer.get('enc') == 'spill' and pointer.get('file') == name:
+                continue
+            path = os.path.join(spill_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime < SPILL_GRACE_SEC:
+                continue
+            report['delete']['files'] += 1
+            report['delete']['bytes'] += st.st_size
+            if not dry_run:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+    return report
+
+
+def connect():
+    import redis  # optional: only the CLI talks to a real server
+
+    if os.environ.get('REDIS_SHARDS'):
+        return connect_shards(os.environ['REDIS_SHARDS'])
+    url = os.environ.get('REDIS_URL')
+    if url:
+        return redis.Redis.from_url(url, decode_responses=True)
+    return redis.Redis(host=os.environ.get('REDIS_HOST', 'localhost'), port=int(os.environ.get('REDIS_PORT', 6379)),
+                       password=os.environ.get('REDIS_PASSWORD') or None, decode_responses=True)
+
+
+def main(argv):
+    if any(a in ('-h', '--help') for a in argv[1:]):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    opt = lambda name, default: next((a.split('=', 1)[1] for a in argv[1:] if a.startswith(f'--{name}=')), default)
+    client = connect()
+    report = sweep(client, batch=int(opt('batch', DEFAULT_BATCH)), pause_ms=int(opt('pause-ms', 0)),
+                   dry_run='--dry-run' in argv[1:], match=opt('match', None))
+    if opt('spill-dir', None):
+        report['spill'] = sweep_spill(client, opt('spill-dir', None), batch=int(opt('batch', DEFAULT_BATCH)),
+                                      dry_run=report['dryRun'])
+    if '--json' in argv[1:]:
+        json.dump(report, sys.stdout, separators=(',', ':'))
+        print()
+        return 0
+    verb = 'would be' if report['dryRun'] else ''
+    print(f"{report['scanned']} keys scanned in {report['batches']} batches")
+    for action, label in (('expire', 'given a TTL'), ('delete', 'deleted')):
+        r = report[action]
+        print(f"{r['keys']} keys {verb + ' ' if verb else ''}{label} ({r['bytes'] / 1024:.1f} KB)")
+    if 'spill' in report:
+        s = report['spill']
+        print(f"{s['files']} spill files, {s['delete']['files']} {verb + ' ' if verb else ''}deleted "
+              f"({s['delete']['bytes'] / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Columnar, dictionary-encoded records of an Ozon report (value of ozon:sess:{<uid>}:csv).
+
+Python counterpart of src/record-columns.js — same format, same bytes:
+
+    {"v": 1, "enc": "columns", "reportType": "FBO", "totalRecords": n,
+     "dict":  {"order_id": [...], "sku": [...], "status": [...]},
+     "cols":  {"order_id": "u32:<b64>", "sku": "u8:<b64>", "status": "u8:<b64>",
+               "t": "u32:<b64>", "quantity": "u8:<b64>", "price": "u32:<b64>"},
+     "scale": {"price": 100}}
+
+t is MSK epoch minutes (-1 when the date cannot be parsed), price is in kopecks
+(scale 100) or rubles as f64 (scale 1). Each column is a little-endian array
+of the narrowest fitting type, base64-encoded.
+
+Usage:
+    python3 scripts/report_columns.py encode orders-2025-fbo-test.csv > fbo.columns.json
+    python3 scripts/report_columns.py decode fbo.columns.json
+"""
+
+import base64
+import csv
+import json
+import math
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+
+RECORD_COLUMNS_VERSION = 1
+T_NONE = -1
+MSK = timedelta(hours=3)
+
+# kind -> array typecode; 'I'/'i' are not guaranteed to be 4 bytes, pick by itemsize
+_U32 = next(tc for tc in ('I', 'L') if array(tc).itemsize == 4)
+_I32 = next(tc for tc in ('i', 'l') if array(tc).itemsize == 4)
+COLUMN_TYPES = {'u8': 'B', 'u16': 'H', 'u32': _U32, 'i32': _I32, 'f64': 'd'}
+
+
+def msk_minute(date_str):
+    """Parse an Ozon date (FBO 'DD.MM.YYYY H:MM[:SS]' or FBS 'YYYY-MM-DD HH:MM:SS', UTC) -> MSK epoch minute"""
+    s = str(date_str or '').strip()
+    if not s:
+        return T_NONE
+    for fmt in ('%d.%m.%Y %H:%M', '%d.%m.%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S'):
+        try:
+            dt = datetime.strptime(s, fmt).replace(tzinfo=timezone.utc)
+            break
+        except ValueError:
+            continue
+    else:
+        try:
+            dt = datetime.fromisoformat(s.replace('Z', '+00:00'))
+        except ValueError:
+            return T_NONE
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+    return math.floor((dt + MSK).timestamp() / 60)
+
+
+def _is_int(v):
+    return isinstance(v, int) or (isinstance(v, float) and v.is_integer())
+
+
+def _column_kind(values):
+    if not all(_is_int(v) for v in values):
+        return 'f64'
+    lo = min(values, default=0)
+    hi = max(values, default=0)
+    lo, hi = min(lo, 0), max(hi, 0)
+    if lo >= 0:
+        return 'u8' if hi < 0x100 else 'u16' if hi < 0x10000 else 'u32' if hi <= 0xFFFFFFFF else 'f64'
+    return 'i32' if lo >= -0x80000000 and hi <= 0x7FFFFFFF else 'f64'
+
+
+def pack_column(values):
+    kind = _column_kind(values)
+    arr = array(COLUMN_TYPES[kind], [float(v) if kind == 'f64' else int(v) for v in values])
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return f"{kind}:{base64.b64encode(arr.tobytes()).decode('ascii')}"
+
+
+def unpack_column(spec):
+    kind, _, data = spec.partition(':')
+    arr = array(COLUMN_TYPES[kind])
+    arr.frombytes(base64.b64decode(data))
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+
+def _dict_encode(values):
+    index = {}
+    codes = [index.setdefault(v, len(index)) for v in values]
+    return list(index), codes
+
+
+def _js_round(x):
+    """JS Math.round: halves round up (Python round() is banker's)"""
+    return math.floor(x + 0.5)
+
+
+def encode_records(records, report_type=None, msk_minutes=None):
+    """records: [{order_id, sku, quantity, price, created_at, status}] -> columnar dict"""
+    dictionaries = {}
+    cols = {}
+    for field in ('order_id', 'sku', 'status'):
+        values = ['' if r.get(field) is None else str(r.get(field)) for r in records]
+        dictionaries[field], codes = _dict_encode(values)
+        cols[field] = pack_column(codes)
+    if msk_minutes is None:
+        msk_minutes = [msk_minute(r.get('created_at')) for r in records]
+    cols['t'] = pack_column(msk_minutes)
+    cols['quantity'] = pack_column([r.get('quantity') or 0 for r in records])
+    prices = [float(r.get('price') or 0) for r in records]
+    kop = [_js_round(p * 100) for p in prices]
+    exact = all(k / 100 == p for k, p in zip(kop, prices))
+    cols['price'] = pack_column(kop if exact else prices)
+    return {
+        'v': RECORD_COLUMNS_VERSION, 'enc': 'columns', 'reportType': report_type,
+        'totalRecords': len(records), 'dict': dictionaries, 'cols': cols,
+        'scale': {'price': 100 if exact else 1},
+    }
+
+
+def is_columnar(value):
+    return isinstance(value, dict) and value.get('enc') == 'columns'
+
+
+def decode_columns(enc):
+    """Columns without materialising records: dictionary codes + typed arrays"""
+    out = {'n': enc['totalRecords'], 'dict': enc['dict'], 'scale': enc.get('scale', {})}
+    for field, spec in enc['cols'].items():
+        out[field] = unpack_column(spec)
+    return out
+
+
+def msk_minute_to_utc_string(t):
+    if t == T_NONE:
+        return ''
+    return (datetime.fromtimestamp(t * 60, timezone.utc) - MSK).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def decode_records(enc):
+    """Records in the previous shape; created_at is UTC 'YYYY-MM-DD HH:MM:SS' to the minute"""
+    c = decode_columns(enc)
+    orders, skus, statuses = enc['dict']['order_id'], enc['dict']['sku'], enc['dict']['status']
+    scale = (enc.get('scale') or {}).get('price', 1)
+    quantity_is_int = not enc['cols']['quantity'].startswith('f64:')
+    return [
+        {
+            'order_id': orders[o],
+            'sku': skus[s],
+            'quantity': int(q) if quantity_is_int else q,
+            'price': p / scale,
+            'created_at': msk_minute_to_utc_string(t),
+            'status': statuses[st],
+        }
+        for o, s, q, p, t, st in zip(c['order_id'], c['sku'], c['quantity'], c['price'], c['t'], c['status'])
+    ]
+
+
+def read_records(value):
+    """Records from a :csv value of either format (columnar or the previous {records})"""
+    if not value:
+        return []
+    if is_columnar(value):
+        return decode_records(value)
+    return value.get('records') or []
+
+
+def load_report_records(filepath):
+    """Minimal CSV -> records mapping for FBO/FBS exports (columns as in Parse Report File)"""
+    with open(filepath, 'r', encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f, delimiter=';'))
+    headers = set(rows[0]) if rows else set()
+    report_type = 'FBS' if 'Дата отгрузки без просрочки' in headers else 'FBO'
+
+    def num(v, fb=0):
+        try:
+            return float(str(v).replace(' ', '').replace(',', '.'))
+        except ValueError:
+            return fb
+
+    records = []
+    for row in rows:
+        order_id = (row.get('Номер заказа') or '').strip()
+        sku = (row.get('Артикул') or row.get('Артикул продавца') or '').strip()
+        if not order_id or not sku:
+            continue
+        q = num(row.get('Количество') or 1, 1)
+        records.append({
+            'order_id': order_id,
+            'sku': sku,
+            'quantity': int(q) if q.is_integer() else q,
+            'price': num(row.get('Ваша цена') or row.get('Сумма отправления') or 0),
+            'created_at': (row.get('Принят в обработку') or '').strip(),
+            'status': (row.get('Статус') or '').strip().lower(),
+        })
+    return report_type, records
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] not in ('encode', 'decode'):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    if argv[1] == 'encode':
+        report_type, records = load_report_records(argv[2])
+        json.dump(encode_records(records, report_type), sys.stdout, ensure_ascii=False, separators=(',', ':'))
+    else:
+        with open(argv[2], encoding='utf-8') as f:
+            records = read_records(json.load(f))
+        json.dump(records, sys.stdout, ensure_ascii=False, indent=1)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+"""
+Streaming ingestion of Ozon FBO/FBS order reports with bounded memory.
+
+Python counterpart of the streaming "Parse Report File" node
+(src/csv-stream.js + src/report-schema.js + src/report-index.js +
+src/session-meta.js). Every stage is a generator, nothing holds the whole
+file, its rows or its records:
+
+    raw bytes  -> iter_chunks()   fixed-size byte windows of a binary stream
+    text lines -> iter_lines()    incremental UTF-8 decoding (BOM dropped)
+    rows       -> iter_rows()     csv.reader, ';' delimiter, header first
+    records    -> iter_records()  header compiled once into a column plan
+    aggregates -> ReportAggregator  MSK day x SKU cells, half-hour histograms,
+                                    day totals -- O(days x SKUs), not O(rows)
+
+The aggregates are byte-for-byte what the bot stores in ozon:sess:{<uid>}:agg,
+:hist and :meta. For very large files ingest_parallel() splits the body into
+quote-aware byte ranges, aggregates them on a process pool and merges the
+partials in file order -- same result as ingest().
+
+Usage:
+    python3 scripts/report_ingest.py orders-2025-fbo-test.csv            # summary
+    python3 scripts/report_ingest.py orders-2025-fbo-test.csv --json     # agg/hist/meta
+    python3 scripts/report_ingest.py big.csv --workers=8                 # parallel, same output
+"""
+
+import codecs
+import csv
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import json
+import math
+import os
+import re
+import sys
+from datetime import date
+
+from report_columns import T_NONE, _js_round, msk_minute
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMAS_JS = os.path.join(ROOT, 'src', 'report-schemas.js')
+
+CHUNK_BYTES = 1 << 20
+REPORT_INDEX_VERSION = 1
+SESSION_META_VERSION = 1
+SLOTS = 48
+METRICS = 4
+_EMPTY_BLOCK = array('d', bytes(8 * SLOTS * METRICS))
+
+REVENUE_STATUSES = {'доставлен', 'доставляется', 'ожидает сборки', 'ожидает отгрузки'}
+CANCEL_STATUSES = {'отменен', 'возврат'}
+
+# Candidate columns per record field, the first non-empty one wins (src/report-schema.js)
+RECORD_FIELDS = {
+    'FBO': {
+        'order_id': ['Номер заказа'],
+        'sku': ['Артикул', 'OZON id', 'OZON ID'],
+        'quantity': ['Количество'],
+        'price': ['Ваша цена', 'Сумма отправления'],
+        'created_at': ['Принят в обработку', 'Дата отгрузки', 'Фактическая дата передачи в доставку'],
+        'status': ['Статус'],
+    },
+    'FBS': {
+        'order_id': ['Номер заказа', '№ заказа'],
+        'sku': ['Артикул продавца', 'Артикул', 'OZON id', 'OZON ID'],
+        'quantity': ['Количество', 'Кол-во'],
+        'price': ['Ваша цена', 'Сумма отправления'],
+        'created_at': ['Принят в обработку', 'Дата отгрузки', 'Дата отгрузки без просрочки'],
+        'status': ['Статус'],
+    },
+}
+
+_RE_SPACES = re.compile(r'\s+')
+_RE_ALL_SPACES = re.compile(r'\s')
+_RE_NUMBER = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+_RE_FBO_DATE = re.compile(r'^(\d{2})\.(\d{2})\.(\d{4}) (\d{1,2}):(\d{2})(?::(\d{2}))?$')
+_RE_FBS_DATE = re.compile(r'^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})$')
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+# ---------------------------------------------------------------------------
+# Schema registry and header plan
+# ---------------------------------------------------------------------------
+
+def load_report_schemas(path=SCHEMAS_JS):
+    """REPORT_SCHEMAS from src/report-schemas.js (one JSON object per line, see build-report-schemas.js)"""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line.strip().rstrip(',')) for line in f if line.startswith('  {')]
+
+
+def clean_header(name):
+    s = str(name or '').lstrip('\ufeff').replace('\u00a0', ' ').strip('"').strip()
+    return _RE_SPACES.sub(' ', s)
+
+
+def compile_header_plan(headers, schemas=None):
+    """Header -> {reportType, schemaId, version, exact, missing, extra, notice, fields: {field: [column indices]}}"""
+    schemas = schemas if schemas is not None else load_report_schemas()
+    cleaned = [clean_header(h) for h in headers]
+    by_name = {}
+    for i, h in enumerate(cleaned):
+        by_name.setdefault(h.lower(), i)
+
+    best, best_score = None, None
+    for schema in schemas:
+        matched = sum(1 for c in schema['columns'] if c.lower() in by_name)
+        score = matched / (len(schema['columns']) + len(cleaned) - matched)
+        if best is None or score > best_score:
+            best, best_score = schema, score
+    known = {c.lower() for c in best['columns']}
+    missing = [c for c in best['columns'] if c.lower() not in by_name]
+    extra = [h for h in cleaned if h and h.lower() not in known]
+    exact = not missing and not extra and all(
+        i < len(cleaned) and cleaned[i].lower() == c.lower() for i, c in enumerate(best['columns']))
+
+    fields = {}
+    for field, candidates in RECORD_FIELDS[best['type']].items():
+        indices = []
+        for c in candidates:
+            i = by_name.get(clean_header(c).lower())
+            if i is not None and i not in indices:
+                indices.append(i)
+        fields[field] = indices
+
+    notice = None
+    if not exact:
+        parts = []
+        if missing:
+            parts.append(f"нет колонок: {', '.join(missing)}")
+        if extra:
+            parts.append(f"новые колонки: {', '.join(extra)}")
+        if not parts:
+            parts.append('другой порядок колонок')
+        notice = f"Неизвестная раскладка заголовков отчёта (ближайшая схема {best['id']}): {'; '.join(parts)}"
+    return {
+        'reportType': best['type'], 'schemaId': best['id'], 'version': best['version'],
+        'exact': exact, 'missing': missing, 'extra': extra, 'notice': notice, 'fields': fields,
+    }
+
+
+# ---------------------------------------------------------------------------
+# bytes -> lines -> rows -> records
+# ---------------------------------------------------------------------------
+
+def iter_chunks(stream, chunk_bytes=CHUNK_BYTES):
+    """Fixed-size byte windows of a binary stream"""
+    while True:
+        chunk = stream.read(chunk_bytes)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_lines(chunks):
+    """Incrementally decoded text lines (with their '\\n'); a leading BOM is dropped"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    tail = ''
+    for chunk in chunks:
+        text = tail + decoder.decode(chunk)
+        start = 0
+        while True:
+            end = text.find('\n', start)
+            if end < 0:
+                break
+            yield text[start:end + 1]
+            start = end + 1
+        tail = text[start:]
+    tail += decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_rows(lines, delimiter=';'):
+    """CSV rows as lists of cells, header first; empty lines are skipped"""
+    for row in csv.reader(lines, delimiter=delimiter):
+        if row and (len(row) > 1 or row[0] != ''):
+            yield row
+
+
+def _val(row, indices):
+    n = len(row)
+    for i in indices:
+        if i < n:
+            v = row[i]
+            if v:
+                s = v.lstrip('\ufeff').strip()
+                if s:
+                    return s
+    return ''
+
+
+def to_num(value):
+    """JS toNum() of Parse Report File: spaces dropped, first ',' -> '.', non-numbers -> 0"""
+    s = _RE_ALL_SPACES.sub('', str(value)).replace(',', '.', 1)
+    if not s:
+        return 0
+    if not _RE_NUMBER.match(s):
+        return 0
+    n = float(s)
+    if not math.isfinite(n):
+        return 0
+    return int(n) if n.is_integer() else n
+
+
+def parse_msk_minute(date_str):
+    """Ozon date (UTC) -> MSK epoch minute, fast path for the FBO/FBS formats"""
+    m = _RE_FBO_DATE.match(date_str)
+    if m:
+        d, mo, y, h, mi = int(m[1]), int(m[2]), int(m[3]), int(m[4]), int(m[5])
+    else:
+        m = _RE_FBS_DATE.match(date_str)
+        if not m:
+            return msk_minute(date_str)
+        y, mo, d, h, mi = int(m[1]), int(m[2]), int(m[3]), int(m[4]), int(m[5])
+    if h > 23 or mi > 59 or (m[6] and int(m[6]) > 59):
+        return msk_minute(date_str)
+    try:
+        day = date(y, mo, d).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return T_NONE
+    return day * 1440 + h * 60 + mi + 180
+
+
+def iter_records(rows, plan):
+    """Normalized records {order_id, sku, quantity, price, created_at, status, t} from data rows"""
+    f = plan['fields']
+    k_order, k_sku, k_qty = f['order_id'], f['sku'], f['quantity']
+    k_price, k_date, k_status = f['price'], f['created_at'], f['status']
+    for row in rows:
+        order_id = _val(row, k_order)
+        sku = _val(row, k_sku)
+        if not order_id or not sku:
+            continue
+        q = _val(row, k_qty)
+        created_at = _val(row, k_date)
+        yield {
+            'order_id': order_id,
+            'sku': sku,
+            'quantity': to_num(q if q != '' else 1),
+            'price': to_num(_val(row, k_price)),
+            'created_at': created_at,
+            'status': _val(row, k_status).lower(),
+            't': parse_msk_minute(created_at) if created_at else T_NONE,
+        }
+
+
+# ---------------------------------------------------------------------------
+# records -> aggregates
+# ---------------------------------------------------------------------------
+
+def status_class(status):
+    s = str(status or '').lower().replace('ё', 'е').strip()
+    if s in REVENUE_STATUSES:
+        return 'revenue'
+    if s in CANCEL_STATUSES:
+        return 'cancel'
+    return None
+
+
+def _bump(cell, q, cls, price):
+    cell[1] += q
+    if cls == 'revenue':
+        cell[2] += q
+        cell[4] += _js_round(float(price or 0) * 100) * q
+    elif cls == 'cancel':
+        cell[3] += q
+
+
+def _num(v):
+    return int(v) if v == int(v) else v
+
+
+class ReportAggregator:
+    """Early aggregation of records: memory grows with days x SKUs, not with rows.
+
+    Histograms live in one float64 array: a block of 48 slots x 4 metrics per
+    (day, SKU) that occurs in the report.
+
+    keep_terms=True is for partial aggregates of a byte range (ingest_parallel):
+    the revenue addends of dayTotals are kept in row order, so merge() can
+    repeat the float summation exactly as a single pass over the file does,
+    and occupied histogram slots are listed so merge() touches only those.
+    """
+
+    def __init__(self, report_type=None, histograms=True, keep_terms=False):
+        self.report_type = report_type
+        self.histograms = histograms
+        self._terms = {} if keep_terms else None
+        self._float_days = set()
+        self._hist_slots = array('q')  # occupied slot offsets, tracked with keep_terms
+        self.total_records = 0
+        self.skus = []
+        self._sku_idx = {}
+        self._days = {}
+        self._hist_blocks = {}
+        self._hist_data = array('d')
+        self._day_names = {}
+        self.day_totals = {}
+
+    def _day(self, epoch_day):
+        name = self._day_names.get(epoch_day)
+        if name is None:
+            name = date.fromordinal(epoch_day + _EPOCH_ORDINAL).isoformat()
+            self._day_names[epoch_day] = name
+        return name
+
+    def add(self, record):
+        self.total_records += 1
+        t = record['t']
+        if t == T_NONE:
+            return
+        day = self._day(t // 1440)
+        q = record['quantity'] or 1
+        price, status = record['price'], record['status']
+
+        totals = self.day_totals.setdefault(day, [0, 0])
+        totals[0] += q
+        cls = status_class(status)
+        if cls == 'revenue':
+            term = (price or 0) * q
+            totals[1] += term
+            if self._terms is not None:
+                self._terms.setdefault(day, array('d')).append(term)
+                if type(term) is float:
+                    self._float_days.add(day)
+
+        sku = record['sku']
+        s = self._sku_idx.get(sku)
+        if s is None:
+            s = self._sku_idx[sku] = len(self.skus)
+            self.skus.append(sku)
+        cells = self._days.setdefault(day, {})
+        cell = cells.get(s)
+        if cell is None:
+            cell = cells[s] = [s, 0, 0, 0, 0]
+        _bump(cell, q, cls, price)
+        if self.histograms:
+            block = self._hist_blocks.get((day, s))
+            if block is None:
+                block = self._hist_blocks[(day, s)] = len(self._hist_data)
+                self._hist_data.extend(_EMPTY_BLOCK)
+            o = block + ((t % 1440) // 30) * METRICS
+            data = self._hist_data
+            if self._terms is not None and not data[o]:
+                self._hist_slots.append(o)
+            data[o] += q
+            if cls == 'revenue':
+                data[o + 1] += q
+                data[o + 3] += _js_round(float(price or 0) * 100) * q
+            elif cls == 'cancel':
+                data[o + 2] += q
+
+    def merge(self, other):
+        """Fold in the partial aggregate of the next byte range (keep_terms=True).
+
+        Merging ranges in file order gives exactly the single-pass result: SKU
+        indices follow first occurrence, dayTotals keep their day order, and a
+        float revenue total is re-summed term by term instead of adding the
+        partial sum (float addition is not associative).
+        """
+        remap = []
+        for sku in other.skus:
+            s = self._sku_idx.get(sku)
+            if s is None:
+                s = self._sku_idx[sku] = len(self.skus)
+                self.skus.append(sku)
+            remap.append(s)
+        self.total_records += other.total_records
+
+        for day, (qty, revenue) in other.day_totals.items():
+            totals = self.day_totals.setdefault(day, [0, 0])
+            totals[0] += qty
+            if type(totals[1]) is float or day in other._float_days:
+                for term in other._terms.get(day, ()):
+                    totals[1] += term
+            else:
+                totals[1] += revenue
+
+        for day, cells in other._days.items():
+            mine = self._days.setdefault(day, {})
+            for s, cell in cells.items():
+                t = remap[s]
+                dst = mine.get(t)
+                if dst is None:
+                    mine[t] = [t, cell[1], cell[2], cell[3], cell[4]]
+                else:
+                    for k in range(1, 5):
+                        dst[k] += cell[k]
+
+        if self.histograms:
+            size = SLOTS * METRICS
+            keys = {block: key for key, block in other._hist_blocks.items()}
+            src, data = other._hist_data, self._hist_data
+            for o in other._hist_slots:
+                slot = o % size
+                day, s = keys[o - slot]
+                key = (day, remap[s])
+                dst = self._hist_blocks.get(key)
+                if dst is None:
+                    dst = self._hist_blocks[key] = len(data)
+                    data.extend(_EMPTY_BLOCK)
+                for k in range(METRICS):
+                    data[dst + slot + k] += src[o + k]
+
+    def __getstate__(self):
+        # Partials travel between processes; most half-hour slots are empty, so
+        # only the occupied ones are pickled
+        state = self.__dict__.copy()
+        data = self._hist_data
+        values = array('d')
+        for o in self._hist_slots:
+            values.extend(data[o:o + METRICS])
+        state['_hist_data'] = (len(data), values)
+        return state
+
+    def __setstate__(self, state):
+        size, values = state['_hist_data']
+        data = array('d', bytes(8 * size))
+        for i, o in enumerate(state['_hist_slots']):
+            data[o:o + METRICS] = values[i * METRICS:(i + 1) * METRICS]
+        state['_hist_data'] = data
+        self.__dict__.update(state)
+
+    def index(self):
+        """ozon:sess:{<uid>}:agg -- {v, skus, days: {day: [[skuIdx, orders, revQty, cancel, revKop]]}}"""
+        days = {}
+        for day in sorted(self._days):
+            cells = sorted((c for c in self._days[day].values() if any(c[1:])), key=lambda c: c[0])
+            if cells:
+                days[day] = [list(c) for c in cells]
+        return {'v': REPORT_INDEX_VERSION, 'skus': list(self.skus), 'days': days}
+
+    def histogram(self):
+        """ozon:sess:{<uid>}:hist -- {v, skus, days: {day: [skuIdx, slot, orders, revQty, cancel, revKop, ...]}}"""
+        by_day = {}
+        for (day, s), block in self._hist_blocks.items():
+            by_day.setdefault(day, []).append((s, block))
+        data = self._hist_data
+        days = {}
+        for day in sorted(by_day):
+            flat = []
+            for s, block in sorted(by_day[day]):
+                for slot in range(SLOTS):
+                    o = block + slot * METRICS
+                    orders, rev_qty, cancel, rev_kop = data[o], data[o + 1], data[o + 2], data[o + 3]
+                    if orders or rev_qty or cancel or rev_kop:
+                        flat.extend((s, slot, _num(orders), _num(rev_qty), _num(cancel), _num(rev_kop)))
+            if flat:
+                days[day] = flat
+        return {'v': REPORT_INDEX_VERSION, 'skus': list(self.skus), 'days': days}
+
+    def meta(self):
+        """ozon:sess:{<uid>}:meta (src/session-meta.js buildSessionMeta)"""
+        dates = sorted(self.day_totals)
+        months = sorted({d[:7] for d in dates})
+        days_by_month = {}
+        for d in dates:
+            days_by_month.setdefault(d[:7], []).append(int(d[8:10]))
+        return {
+            'v': SESSION_META_VERSION,
+            'reportType': self.report_type,
+            'totalRecords': self.total_records,
+            'availableDates': dates,
+            'months': months,
+            'minMonth': months[0] if months else None,
+            'maxMonth': months[-1] if months else None,
+            'from': dates[0] if dates else None,
+            'to': dates[-1] if dates else None,
+            'daysByMonth': days_by_month,
+            'dayTotals': self.day_totals,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Pipelines
+# ---------------------------------------------------------------------------
+
+def open_report(source):
+    """Path or binary stream -> (binary stream, should_close)"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb'), True
+    return source, False
+
+
+def iter_report_rows(source, chunk_bytes=CHUNK_BYTES):
+    """Data rows as {header: value} dicts, like csv.DictReader but fed from byte windows"""
+    stream, close = open_report(source)
+    try:
+        rows = iter_rows(iter_lines(iter_chunks(stream, chunk_bytes)))
+        header = next(rows, [])
+        for row in rows:
+            yield dict(zip(header, row + [''] * (len(header) - len(row))))
+    finally:
+        if close:
+            stream.close()
+
+
+def iter_report_records(source, schemas=None, chunk_bytes=CHUNK_BYTES, on_plan=None):
+    """Normalized records of a report file; on_plan(plan) is called once with the header plan"""
+    stream, close = open_report(source)
+    try:
+        rows = iter_rows(iter_lines(iter_chunks(stream, chunk_bytes)))
+        plan = compile_header_plan(next(rows, []), schemas)
+        if on_plan:
+            on_plan(plan)
+        yield from iter_records(rows, plan)
+    finally:
+        if close:
+            stream.close()
+
+
+def ingest(source, schemas=None, histograms=True, chunk_bytes=CHUNK_BYTES):
+    """One streaming pass over a report -> {plan, reportType, totalRecords, availableDates, agg, hist, meta}"""
+    plans = []
+    records = iter_report_records(source, schemas, chunk_bytes, on_plan=plans.append)
+    first = next(records, None)
+    plan = plans[0]
+    if plan['notice']:
+        print(plan['notice'], file=sys.stderr)
+    agg = ReportAggregator(plan['reportType'], histograms)
+    if first is not None:
+        agg.add(first)
+        for record in records:
+            agg.add(record)
+    return _result(plan, agg, histograms)
+
+
+def _result(plan, agg, histograms):
+    meta = agg.meta()
+    return {
+        'plan': plan,
+        'reportType': plan['reportType'],
+        'totalRecords': agg.total_records,
+        'availableDates': meta['availableDates'],
+        'agg': agg.index(),
+        'hist': agg.histogram() if histograms else None,
+        'meta': meta,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Parallel ingestion: quote-aware byte ranges -> process pool -> ordered merge
+# ---------------------------------------------------------------------------
+
+def split_ranges(path, parts, chunk_bytes=CHUNK_BYTES):
+    """Cut a report file into up to `parts` byte ranges of whole CSV rows.
+
+    Returns (header_end, [(start, end), ...]). A row ends at a '\n' preceded
+    by an even number of '"' since the start of the file -- exact when quotes
+    only open and close quoted fields ("" escapes count twice), as in both
+    Ozon export formats. One pass of bytes.count()/find() over the file, no
+    CSV parsing. An odd total means a stray quote inside an unquoted field
+    (relaxed quoting): then the whole body is one range and the caller falls
+    back to a single pass.
+    """
+    size = os.path.getsize(path)
+    cuts = []
+    targets = []
+    want = 0          # next cut: first row end at or after this offset
+    base = 0          # file offset of the current block
+    odd = 0           # quote parity up to the scan cursor
+    with open(path, 'rb') as f:
+        for block in iter_chunks(f, chunk_bytes):
+            n = len(block)
+            i = 0
+            while want is not None:
+                j = max(i, want - base)
+                if j >= n:
+                    break
+                odd ^= block.count(b'"', i, j) & 1
+                nl = block.find(b'\n', j)
+                if nl < 0:
+                    i = j
+                    break
+                odd ^= block.count(b'"', j, nl) & 1
+                i = nl + 1
+                if odd:
+                    want = base + i
+                    continue
+                cuts.append(base + i)
+                if len(cuts) == 1:
+                    step = (size - cuts[0]) / parts
+                    targets = [cuts[0] + int(step * k) for k in range(parts - 1, 0, -1)]
+                want = max(targets.pop(), cuts[-1]) if targets else None
+            odd ^= block.count(b'"', i) & 1
+            base += n
+    header_end = cuts[0] if cuts else size
+    if odd:
+        cuts = cuts[:1]
+    bounds = [header_end] + cuts[1:] + [size]
+    return header_end, [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _iter_range(stream, start, end, chunk_bytes):
+    stream.seek(start)
+    left = end - start
+    while left > 0:
+        chunk = stream.read(min(chunk_bytes, left))
+        if not chunk:
+            return
+        left -= len(chunk)
+        yield chunk
+
+
+def _ingest_range(task):
+    """Worker: partial aggregate of one byte range (rows only, header already compiled)"""
+    path, start, end, plan, histograms, chunk_bytes = task
+    agg = ReportAggregator(plan['reportType'], histograms, keep_terms=True)
+    with open(path, 'rb') as f:
+        for record in iter_records(iter_rows(iter_lines(_iter_range(f, start, end, chunk_bytes))), plan):
+            agg.add(record)
+    return agg
+
+
+def ingest_parallel(path, workers=None, schemas=None, histograms=True, chunk_bytes=CHUNK_BYTES, parts=None):
+    """ingest() of a report file on a process pool; the result is identical to ingest(path).
+
+    The body is split into `parts` (default: `workers`) quote-aware byte
+    ranges, each worker parses and pre-aggregates its range into a partial
+    ReportAggregator, and the parent merges the partials in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    header_end, ranges = split_ranges(path, parts or workers, chunk_bytes)
+    if len(ranges) < 2:
+        return ingest(path, schemas, histograms, chunk_bytes)
+    with open(path, 'rb') as f:
+        header = next(iter_rows(iter_lines([f.read(header_end)])), [])
+    plan = compile_header_plan(header, schemas)
+    if plan['notice']:
+        print(plan['notice'], file=sys.stderr)
+
+    agg = ReportAggregator(plan['reportType'], histograms)
+    tasks = [(path, start, end, plan, histograms, chunk_bytes) for start, end in ranges]
+    if workers == 1:
+        for part in map(_ingest_range, tasks):
+            agg.merge(part)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            for part in pool.map(_ingest_range, tasks):
+                agg.merge(part)
+    return _result(plan, agg, histograms)
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] in ('-h', '--help'):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    workers = next((int(a.split('=', 1)[1]) for a in argv[2:] if a.startswith('--workers=')), 1)
+    result = ingest_parallel(argv[1], workers) if workers > 1 else ingest(argv[1])
+    if '--json' in argv[2:]:
+        out = {k: result[k] for k in ('reportType', 'totalRecords', 'agg', 'hist', 'meta')}
+        json.dump(out, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+        print()
+        return 0
+    meta = result['meta']
+    print(f"{result['reportType']} ({result['plan']['schemaId']}): {result['totalRecords']} records, "
+          f"{len(result['agg']['skus'])} SKUs, {len(meta['availableDates'])} days {meta['from']} → {meta['to']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Python counterpart of src/report-spill.js: local columnar files of reports
+too large to keep in Redis (<SPILL_DIR>/<uid>-<upload generation>.ocol).
+
+    'OCOL' | u32 header length | header JSON | dictionaries JSON | columns
+    (little-endian, every section 8-byte aligned)
+    header: {"v": 1, "columns": 1, "reportType": ..., "totalRecords": n, "scale": {...},
+             "dict": {"order_id": [offset, bytes], "sku": [...], "status": [...]},
+             "cols": {"row": ["u32", offset], "order_id": [kind, offset], ...},
+             "days": {"YYYY-MM-DD": [from, to]}}
+
+Rows are grouped by MSK day, so a day is one contiguous row range. The
+reader memory-maps the file: a column of a day range is a memoryview into
+the mapping, nothing is copied or parsed. Redis keeps only the pointer
+{"enc": "spill", "dir", "file", ...} in ozon:sess:{<uid>}:csv and :hist.
+
+Usage:
+    python3 scripts/report_spill.py info 42-3.ocol                 # header summary
+    python3 scripts/report_spill.py records 42-3.ocol [YYYY-MM-DD ...]
+    python3 scripts/report_spill.py write fbo.columns.json 42-3.ocol   # from report_columns.py encode
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from datetime import date, timedelta
+
+from report_columns import COLUMN_TYPES, T_NONE, msk_minute_to_utc_string, unpack_column
+
+REPORT_SPILL_VERSION = 1
+SPILL_MAGIC = b'OCOL'
+SPILL_FIELDS = ('order_id', 'sku', 'status', 't', 'quantity', 'price')
+SPILL_DICTS = ('order_id', 'sku', 'status')
+SPILL_FILE_RE = re.compile(r'^([^-/]+)-(\d+)\.ocol(\.tmp)?$')
+_BYTES = {'u8': 1, 'u16': 2, 'u32': 4, 'i32': 4, 'f64': 8}
+# memoryview.cast formats: native sizes match the file only on little-endian hosts
+_CAST = {'u8': 'B', 'u16': 'H', 'u32': 'I', 'i32': 'i', 'f64': 'd'}
+
+
+def _pad8(n):
+    return (n + 7) // 8 * 8
+
+
+def _json(value):
+    """JSON bytes exactly as JSON.stringify writes them."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _day_key(day):
+    return (date(1970, 1, 1) + timedelta(days=day)).isoformat()
+
+
+class SpillFile:
+    """A spill file mapped read-only; use as a context manager."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f'{path}: empty file')
+        if self._map[:4] != SPILL_MAGIC:
+            self.close()
+            raise ValueError(f'{path}: not a spill file')
+        (size,) = struct.unpack_from('<I', self._map, 4)
+        self.header = json.loads(bytes(self._map[8:8 + size]))
+        if self.header.get('v') != REPORT_SPILL_VERSION:
+            self.close()
+            raise ValueError(f'{path}: unknown version {self.header.get("v")}')
+        self._view = memoryview(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    @property
+    def days(self):
+        return sorted(self.header['days'])
+
+    def ranges(self, days=None):
+        """Row ranges of the given days (sorted, adjacent ranges merged); all rows without days."""
+        if days is None:
+            return [(0, self.header['totalRecords'])]
+        spans = sorted(tuple(self.header['days'][d]) for d in set(days) if d in self.header['days'])
+        out = []
+        for a, b in spans:
+            if out and out[-1][1] == a:
+                out[-1] = (out[-1][0], b)
+            else:
+                out.append((a, b))
+        return out
+
+    def dictionary(self, field):
+        """Dictionary of order_id, sku or status (parsed on each call)."""
+        offset, size = self.header['dict'][field]
+        return json.loads(bytes(self._view[offset:offset + size]))
+
+    def column(self, field, days=None):
+        """
+        Values of field for the given days: a memoryview into the mapping when
+        the rows are one range (no copy; release() it before closing the file),
+        an array when several ranges are joined.
+        """
+        kind, offset = self.header['cols'][field]
+        size = _BYTES[kind]
+        parts = [self._view[offset + a * size:offset + b * size] for a, b in self.ranges(days)]
+        if len(parts) == 1 and sys.byteorder == 'little':
+            return parts[0].cast(_CAST[kind])
+        arr = array(COLUMN_TYPES[kind])
+        for part in parts:
+            arr.frombytes(part)
+        if sys.byteorder == 'big':
+            arr.byteswap()
+        return arr
+
+    def records(self, days=None):
+        """Records in the :csv shape (see report_columns.decode_records), in file order."""
+        h = self.header
+        orders, skus, statuses = (self.dictionary(f) for f in SPILL_DICTS)
+        scale = (h.get('scale') or {}).get('price', 1)
+        cols = [self.column(f, days) for f in SPILL_FIELDS]
+        quantity_is_int = h['cols']['quantity'][0] != 'f64'
+        out = [
+            {
+                'order_id': orders[o],
+                'sku': skus[s],
+                'quantity': int(q) if quantity_is_int else q,
+                'price': p / scale,
+                'created_at': msk_minute_to_utc_string(t),
+                'status': statuses[st],
+            }
+            for o, s, st, t, q, p in zip(*cols)
+        ]
+        for c in cols:
+            if isinstance(c, memoryview):
+                c.release()
+        return out
+
+
+def build_spill(columns):
+    """File bytes for a columnar :csv value (report_columns.encode_records output)."""
+    n = columns['totalRecords']
+    decoded = {f: unpack_column(columns['cols'][f]) for f in SPILL_FIELDS}
+    day_of = [T_NONE if t < 0 else t // 1440 for t in decoded['t']]
+    ordered = sorted({d for d in day_of if d != T_NONE})
+    start, days, at = {}, {}, 0
+    counts = {}
+    for d in day_of:
+        counts[d] = counts.get(d, 0) + 1
+    for d in ordered + ([T_NONE] if T_NONE in counts else []):
+        start[d] = at
+        if d != T_NONE:
+            days[_day_key(d)] = [at, at + counts[d]]
+        at += counts[d]
+    row = [0] * n
+    for i, d in enumerate(day_of):
+        row[start[d]] = i
+        start[d] += 1
+
+    kinds = {'row': 'u32', **{f: columns['cols'][f].split(':', 1)[0] for f in SPILL_FIELDS}}
+    arrays = {'row': array(COLUMN_TYPES['u32'], row)}
+    for f in SPILL_FIELDS:
+        src = decoded[f]
+        arrays[f] = array(COLUMN_TYPES[kinds[f]], (src[i] for i in row))
+    dicts = {f: _json(columns['dict'][f]) for f in SPILL_DICTS}
+    header = {'v': REPORT_SPILL_VERSION, 'columns': columns.get('v'), 'reportType': columns.get('reportType'),
+              'totalRecords': n, 'scale': columns.get('scale'), 'dict': {}, 'cols': {}, 'days': days}
+    header_bytes = 0
+    while True:
+        offset = 8 + header_bytes
+        for f in SPILL_DICTS:
+            header['dict'][f] = [offset, len(dicts[f])]
+            offset += _pad8(len(dicts[f]))
+        for f in ('row',) + SPILL_FIELDS:
+            header['cols'][f] = [kinds[f], offset]
+            offset += _pad8(n * _BYTES[kinds[f]])
+        text = _json(header)
+        if _pad8(len(text)) <= header_bytes:
+            break
+        header_bytes = _pad8(len(text))
+    out = bytearray(b' ' * offset)
+    out[:4] = SPILL_MAGIC
+    struct.pack_into('<I', out, 4, header_bytes)
+    out[8:8 + len(text)] = text
+    for f in SPILL_DICTS:
+        at = header['dict'][f][0]
+        out[at:at + len(dicts[f])] = dicts[f]
+    for f in ('row',) + SPILL_FIELDS:
+        arr = arrays[f]
+        if sys.byteorder == 'big':
+            arr.byteswap()
+        data = arr.tobytes()
+        at = header['cols'][f][1]
+        out[at:at + _pad8(len(data))] = data.ljust(_pad8(len(data)), b'\0')
+    return bytes(out)
+
+
+def write_spill(path, columns):
+    """Write the file atomically (tmp + rename); returns its size."""
+    data = build_spill(columns)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+    return len(data)
+
+
+def main(argv):
+    if len(argv) < 3 or argv[1] not in ('info', 'records', 'write') or (argv[1] == 'write' and len(argv) != 4):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    if argv[1] == 'write':
+        with open(argv[2], encoding='utf-8') as f:
+            print(write_spill(argv[3], json.load(f)), 'bytes')
+        return 0
+    with SpillFile(argv[2]) as spill:
+        h = spill.header
+        if argv[1] == 'info':
+            info = {'reportType': h['reportType'], 'totalRecords': h['totalRecords'], 'bytes': os.path.getsize(argv[2]),
+                    'days': {d: b - a for d, (a, b) in sorted(h['days'].items())}}
+            json.dump(info, sys.stdout, ensure_ascii=False, indent=1)
+        else:
+            json.dump(spill.records(argv[3:] or None), sys.stdout, ensure_ascii=False, indent=1)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
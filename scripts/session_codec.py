@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Python counterpart of src/session-codec.js: the string format of session
+values in Redis (ozon:sess:{<uid>}:csv / :agg / :hist, ozon:parse:f:<id>).
+
+    {...} / [...]     plain JSON (small values, everything written before the codec)
+    ~d1:<base64>      UTF-8 JSON compressed with raw DEFLATE (zlib wbits=-15)
+
+Values written by either side read back on the other; the encoder makes the
+same JSON/compressed choice as the bot (SESSION_CODEC_MIN_BYTES, at least a
+10% gain); both sides compress with zlib at the default level.
+
+Usage:
+    python3 scripts/session_codec.py decode < value.txt      # value -> JSON
+    python3 scripts/session_codec.py encode < value.json     # JSON -> value
+"""
+
+import base64
+import json
+import sys
+import zlib
+
+SESSION_CODEC_DEFLATE = '~d1:'
+SESSION_CODEC_MIN_BYTES = 4096
+SESSION_CODEC_MIN_GAIN = 0.9
+
+
+def _json(value):
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_session_value(value, codec='json', min_bytes=SESSION_CODEC_MIN_BYTES):
+    """Redis string for value (an object or ready JSON text) in codec 'json' or 'deflate'."""
+    text = _json(value)
+    if codec != 'deflate' or len(text) < min_bytes:
+        return text
+    raw = text.encode('utf-8')
+    deflate = zlib.compressobj(6, zlib.DEFLATED, -15)
+    packed = base64.b64encode(deflate.compress(raw) + deflate.flush()).decode('ascii')
+    if len(SESSION_CODEC_DEFLATE) + len(packed) > len(raw) * SESSION_CODEC_MIN_GAIN:
+        return text
+    return SESSION_CODEC_DEFLATE + packed
+
+
+def decode_session_value(raw):
+    """Object from a Redis value; None for a missing, broken or unknown-codec value."""
+    if raw is None or raw == '' or raw == b'':
+        return None
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8', 'replace')
+    try:
+        if not raw.startswith('~'):
+            return json.loads(raw)
+        if not raw.startswith(SESSION_CODEC_DEFLATE):
+            return None
+        data = base64.b64decode(raw[len(SESSION_CODEC_DEFLATE):], validate=True)
+        return json.loads(zlib.decompress(data, -15).decode('utf-8'))
+    except (ValueError, zlib.error):
+        return None
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ('encode', 'decode'):
+        print(__doc__.strip().split('Usage:')[1])
+        return 1
+    data = sys.stdin.read().strip()
+    if argv[1] == 'encode':
+        print(encode_session_value(data, codec='deflate'))
+        return 0
+    value = decode_session_value(data)
+    if value is None:
+        print('unreadable value', file=sys.stderr)
+        return 1
+    json.dump(value, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
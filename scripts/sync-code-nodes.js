@@ -0,0 +1,77 @@
+#!/usr/bin/env node
+/**
+ * Встраивает модули из src/ в Code-ноды всех workflows.
+ *
+ * n8n Code node не умеет require() локальных файлов, поэтому общий код
+ * живёт в src/*.js, а в jsCode ноды вставляется между маркерами:
+ *
+ *   // #region src/session-meta.js
+ *   ...содержимое файла...
+ *   // #endregion src/session-meta.js
+ *
+ * Запуск: node scripts/sync-code-nodes.js [--check]
+ *   --check — ничего не пишет, падает с кодом 1, если какая-то нода устарела.
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const ROOT = path.join(__dirname, '..');
+const WORKFLOWS_DIR = path.join(ROOT, 'workflows');
+const REGION_RE = /\/\/ #region (src\/[\w.-]+\.js)\n[\s\S]*?\/\/ #endregion \1/g;
+
+function listWorkflowFiles(dir = WORKFLOWS_DIR) {
+  const out = [];
+  for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+    const full = path.join(dir, entry.name);
+    if (entry.isDirectory()) out.push(...listWorkflowFiles(full));
+    else if (entry.name.endsWith('.json')) out.push(full);
+  }
+  return out.sort();
+}
+
+function moduleSource(rel, cache) {
+  if (!cache.has(rel)) {
+    const src = fs.readFileSync(path.join(ROOT, rel), 'utf8').replace(/\s+$/, '');
+    cache.set(rel, src);
+  }
+  return cache.get(rel);
+}
+
+/** Возвращает jsCode с актуальным содержимым всех регионов. */
+function inlineModules(code, cache = new Map()) {
+  return code.replace(REGION_RE, (_, rel) => `// #region ${rel}\n${moduleSource(rel, cache)}\n// #endregion ${rel}`);
+}
+
+function syncAll({ check = false, quiet = false } = {}) {
+  const cache = new Map();
+  const stale = [];
+  for (const file of listWorkflowFiles()) {
+    const workflow = JSON.parse(fs.readFileSync(file, 'utf8'));
+    let changed = false;
+    for (const node of workflow.nodes || []) {
+      const code = node.parameters && node.parameters.jsCode;
+      if (typeof code !== 'string' || !code.includes('// #region src/')) continue;
+      const next = inlineModules(code, cache);
+      if (next !== code) {
+        changed = true;
+        stale.push(`${path.relative(ROOT, file)} → ${node.name}`);
+        node.parameters.jsCode = next;
+      }
+    }
+    if (changed && !check) fs.writeFileSync(file, JSON.stringify(workflow, null, 2));
+  }
+  if (!quiet) {
+    for (const s of stale) console.log(`${check ? '⚠️ ' : '✅'} ${s}`);
+    console.log(stale.length ? `📊 ${check ? 'Stale' : 'Synced'} nodes: ${stale.length}` : '✅ All code nodes are up to date');
+  }
+  return stale;
+}
+
+module.exports = { inlineModules, syncAll, listWorkflowFiles };
+
+if (require.main === module) {
+  const check = process.argv.includes('--check');
+  const stale = syncAll({ check });
+  if (check && stale.length) process.exit(1);
+}
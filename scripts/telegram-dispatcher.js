@@ -0,0 +1,104 @@
+#!/usr/bin/env node
+/**
+ * Диспетчер исходящих вызовов Bot API (src/telegram-dispatch.js) — отдельный
+ * процесс рядом с n8n. HTTP-ноды workflow шлют запросы на TELEGRAM_API_BASE
+ * (поле Config, в подпроцессах — переменная окружения n8n); если это адрес
+ * диспетчера, он ставит вызов в очередь и отправляет его в Telegram по пулу
+ * keep-alive соединений с учётом лимитов бота и чата.
+ *
+ *   POST /bot<token>/<method>  — вызов Bot API; ответ Telegram как есть
+ *                                (или 429 с retry_after, если очередь полна)
+ *   GET  /metrics              — очередь, задержки p50/p95/p99, счётчики (JSON)
+ *   GET  /healthz              — ok
+ *
+ * Переменные окружения:
+ *   DISPATCHER_PORT    порт (8081), DISPATCHER_HOST — адрес (127.0.0.1)
+ *   TELEGRAM_UPSTREAM  куда отправлять (https://api.telegram.org)
+ *   DISPATCH_*         лимиты: BOT_PER_SEC, CHAT_PER_SEC, CHAT_BURST,
+ *                      GROUP_PER_MIN, MAX_QUEUE, MAX_WAIT_MS, MAX_IN_FLIGHT,
+ *                      MAX_SOCKETS, MAX_RETRIES (docs/ENV_SETUP.md)
+ *
+ * Запуск:
+ *   node scripts/telegram-dispatcher.js
+ * По SIGTERM/SIGINT перестаёт принимать вызовы и дожидается очереди.
+ */
+
+const http = require('http');
+const { TELEGRAM_API, TelegramDispatcher, dispatcherMetrics, dispatchSettings, createTransport } = require('../src/telegram-dispatch');
+
+const BODY_LIMIT = 1 << 20;
+
+function reply(res, status, body) {
+  const text = JSON.stringify(body);
+  res.writeHead(status, { 'content-type': 'application/json', 'content-length': Buffer.byteLength(text) });
+  res.end(text);
+}
+
+/**
+ * HTTP-сервер диспетчера (ещё не слушает порт).
+ * @param {{ upstream?: string, limits?: object, transport?: Function }} opts
+ * @returns {{ server: http.Server, dispatcher: TelegramDispatcher, transport: Function }}
+ */
+function createDispatcherServer({ upstream = TELEGRAM_API, limits = dispatchSettings({}), transport } = {}) {
+  const upstreamTransport = transport || createTransport(upstream, limits);
+  const dispatcher = new TelegramDispatcher({ transport: upstreamTransport, limits });
+
+  const server = http.createServer((req, res) => {
+    if (req.method === 'GET' && req.url === '/metrics') return reply(res, 200, dispatcherMetrics(dispatcher));
+    if (req.method === 'GET' && req.url === '/healthz') return reply(res, 200, { ok: true });
+    const match = /^\/bot([^/]+)\/(\w+)$/.exec(req.url);
+    if (req.method !== 'POST' || !match) return reply(res, 404, { ok: false, error_code: 404, description: 'Not Found' });
+
+    const chunks = [];
+    let size = 0;
+    req.on('data', chunk => {
+      size += chunk.length;
+      if (size > BODY_LIMIT) req.destroy();
+      else chunks.push(chunk);
+    });
+    req.on('end', async () => {
+      const payload = Buffer.concat(chunks);
+      let body = {};
+      const contentType = req.headers['content-type'] || 'application/json';
+      if (contentType.startsWith('application/json') && payload.length) {
+        try {
+          body = JSON.parse(payload.toString('utf8'));
+        } catch (e) {
+          return reply(res, 400, { ok: false, error_code: 400, description: `Bad Request: ${e.message}` });
+        }
+      }
+      const result = await dispatcher.submit({ token: match[1], method: match[2], body, payload, contentType });
+      reply(res, result.status, result.body);
+    });
+  });
+  return { server, dispatcher, transport: upstreamTransport };
+}
+
+async function main() {
+  const env = process.env;
+  const limits = dispatchSettings(env);
+  const upstream = env.TELEGRAM_UPSTREAM || TELEGRAM_API;
+  const port = Number(env.DISPATCHER_PORT || 8081);
+  const host = env.DISPATCHER_HOST || '127.0.0.1';
+  const { server, dispatcher, transport } = createDispatcherServer({ upstream, limits });
+  await new Promise(resolve => server.listen(port, host, resolve));
+  console.log(`📮 Telegram dispatcher on http://${host}:${port} → ${upstream}`);
+  console.log(`   bot ${limits.botPerSec}/s, chat ${limits.chatPerSec}/s (burst ${limits.chatBurst}), group ${limits.groupPerMin}/min, queue ≤ ${limits.maxQueue}, wait ≤ ${limits.maxWaitMs} ms`);
+
+  const stop = async signal => {
+    console.log(`\n⏹  ${signal}: draining ${dispatcher.queued + dispatcher.inFlight} call(s)...`);
+    server.close();
+    const drained = await dispatcher.drain();
+    transport.close();
+    console.log(drained ? '✅ Queue drained' : '⚠️  Queue not drained in time');
+    process.exit(drained ? 0 : 1);
+  };
+  process.once('SIGTERM', () => stop('SIGTERM'));
+  process.once('SIGINT', () => stop('SIGINT'));
+}
+
+if (require.main === module) {
+  main().catch(e => { console.error('❌', e.message); process.exit(1); });
+}
+
+module.exports = { createDispatcherServer };
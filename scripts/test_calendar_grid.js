@@ -0,0 +1,57 @@
+#!/usr/bin/env node
+/**
+ * Проверка скелета сетки календаря (src/calendar-grid.js): скелет + отметки
+ * выбора совпадают с клавиатурой, собранной с нуля по availableDates, а сам
+ * скелет наложение не меняет.
+ */
+
+const assert = require('assert');
+const { buildSessionMeta } = require('../src/session-meta');
+const { buildCalendarGrid, overlayCalendarGrid } = require('../src/calendar-grid');
+
+// Клавиатура с нуля — как её собирал «Render Calendar (smart)» до скелетов
+function referenceKeyboard(month, { minMonth, maxMonth, availableDates }, selected) {
+  const total = new Date(...month.split('-').map(Number), 0).getDate();
+  const avail = new Set(availableDates.filter(d => d.startsWith(month)));
+  const sel = new Set(selected);
+  const rows = [[
+    { text: month > minMonth ? '◀' : '▪', callback_data: month > minMonth ? `cal:${month}:prev` : 'noop' },
+    { text: month, callback_data: 'noop' },
+    { text: month < maxMonth ? '▶' : '▪', callback_data: month < maxMonth ? `cal:${month}:next` : 'noop' },
+  ]];
+  for (let day = 1; day <= total;) {
+    const row = [];
+    for (let i = 0; i < 7 && day <= total; i++, day++) {
+      const full = `${month}-${String(day).padStart(2, '0')}`;
+      row.push(avail.has(full)
+        ? { text: (sel.has(full) ? '☑ ' : '▫ ') + day, callback_data: `date:${full}` }
+        : { text: '· ' + day, callback_data: 'noop' });
+    }
+    rows.push(row);
+  }
+  return rows;
+}
+
+function testOverlay() {
+  const dates = [];
+  for (let d = new Date(Date.UTC(2025, 5, 3)); d < new Date(Date.UTC(2025, 8, 20)); d.setUTCDate(d.getUTCDate() + (d.getUTCDate() % 3 ? 1 : 2))) {
+    dates.push(d.toISOString().slice(0, 10));
+  }
+  const meta = buildSessionMeta({ availableDates: dates });
+  for (const month of [...meta.months, '2025-10']) {
+    const grid = buildCalendarGrid(month, meta);
+    const frozen = JSON.stringify(grid);
+    const monthDays = dates.filter(d => d.startsWith(month));
+    for (const selected of [[], monthDays.slice(0, 1), monthDays.slice(-3), [monthDays[0], '2024-01-01', `${month}-31`].filter(Boolean)]) {
+      assert.deepStrictEqual(overlayCalendarGrid(grid, selected), referenceKeyboard(month, meta, selected), `${month}: ${selected}`);
+    }
+    assert.strictEqual(JSON.stringify(grid), frozen, 'overlay does not touch the skeleton');
+  }
+  const padded = buildCalendarGrid('2025-02', meta, 'grid');
+  assert.ok(padded.rows.slice(1).every(r => r.length === 7), 'grid style fills the last week');
+  assert.deepStrictEqual(padded.rows[1].slice(0, 2).map(b => b.text), ['• 01', '• 02']);
+  console.log(`✅ skeleton + overlay = keyboard built from scratch (${meta.months.length} months, smart and grid styles)`);
+}
+
+testOverlay();
+console.log('\n✅ All calendar grid tests passed');
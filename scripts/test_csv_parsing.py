@@ -4,12 +4,20 @@ Test CSV parsing logic against real FBO/FBS data files.
 Identifies issues with column mapping, date parsing, and statistics calculation.
 """
 
-import csv
 import json
+import os
 from datetime import datetime, timedelta
 from collections import defaultdict
+from itertools import islice
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_ingest import iter_report_rows  # noqa: E402
+
+# Сколько первых строк разбирается подробно; остальные только считаются потоком
+HEAD_ROWS = 20
+
 def parse_fbo_date(date_str):
     """Parse FBO date format: 01.10.2025 7:26 -> UTC datetime"""
     try:
@@ -44,92 +52,91 @@ def analyze_fbo_csv(filepath):
     print(f"📊 ANALYZING FBO CSV: {filepath}")
     print(f"{'='*80}\n")
     
-    with open(filepath, 'r', encoding='utf-8-sig') as f:
-        # Read with semicolon delimiter
-        reader = csv.DictReader(f, delimiter=';')
-        
-        # Print header analysis
-        print("📋 HEADER COLUMNS:")
-        headers = reader.fieldnames
-        for idx, col in enumerate(headers):
-            print(f"  [{chr(65+idx) if idx < 26 else 'A'+chr(65+idx-26)}] Column {idx}: {col[:50]}")
-        
-        # Process rows
-        rows = list(reader)
-        print(f"\n📦 Total rows: {len(rows)}")
-        
-        # Analyze first few rows
-        print("\n🔍 FIRST 3 ROWS ANALYSIS:")
-        for i, row in enumerate(rows[:3]):
-            print(f"\n  Row {i+1}:")
-            print(f"    Номер заказа (A): {row.get('Номер заказа', 'N/A')}")
-            print(f"    Артикул (L): {row.get('Артикул', 'N/A')}")
-            print(f"    Ваша цена (M): {row.get('Ваша цена', 'N/A')}")
-            print(f"    Количество (Q): {row.get('Количество', 'N/A')}")
-            print(f"    Статус (E): {row.get('Статус', 'N/A')}")
-            print(f"    Принят в обработку (C): {row.get('Принят в обработку', 'N/A')}")
-        
-        # Test date parsing
-        print("\n📅 DATE PARSING TEST:")
-        dates_parsed = []
-        dates_failed = []
-        for row in rows[:10]:
-            date_str = row.get('Принят в обработку', '')
-            dt_utc = parse_fbo_date(date_str)
-            if dt_utc:
-                dt_msk = utc_to_msk(dt_utc)
-                dates_parsed.append(dt_msk.strftime("%Y-%m-%d"))
-                print(f"  ✅ '{date_str}' -> UTC: {dt_utc} -> MSK: {dt_msk.strftime('%Y-%m-%d %H:%M')}")
-            else:
-                dates_failed.append(date_str)
-        
-        if dates_failed:
-            print(f"\n  ❌ Failed to parse {len(dates_failed)} dates")
+    # Streamed from byte windows (report_ingest): only the first rows are kept
+    rows = iter_report_rows(filepath)
+    head = list(islice(rows, HEAD_ROWS))
+    total = len(head) + sum(1 for _ in rows)
+
+    # Print header analysis
+    print("📋 HEADER COLUMNS:")
+    headers = list(head[0]) if head else []
+    for idx, col in enumerate(headers):
+        print(f"  [{chr(65+idx) if idx < 26 else 'A'+chr(65+idx-26)}] Column {idx}: {col[:50]}")
+    
+    print(f"\n📦 Total rows: {total}")
+    
+    # Analyze first few rows
+    print("\n🔍 FIRST 3 ROWS ANALYSIS:")
+    for i, row in enumerate(head[:3]):
+        print(f"\n  Row {i+1}:")
+        print(f"    Номер заказа (A): {row.get('Номер заказа', 'N/A')}")
+        print(f"    Артикул (L): {row.get('Артикул', 'N/A')}")
+        print(f"    Ваша цена (M): {row.get('Ваша цена', 'N/A')}")
+        print(f"    Количество (Q): {row.get('Количество', 'N/A')}")
+        print(f"    Статус (E): {row.get('Статус', 'N/A')}")
+        print(f"    Принят в обработку (C): {row.get('Принят в обработку', 'N/A')}")
+    
+    # Test date parsing
+    print("\n📅 DATE PARSING TEST:")
+    dates_parsed = []
+    dates_failed = []
+    for row in head[:10]:
+        date_str = row.get('Принят в обработку', '')
+        dt_utc = parse_fbo_date(date_str)
+        if dt_utc:
+            dt_msk = utc_to_msk(dt_utc)
+            dates_parsed.append(dt_msk.strftime("%Y-%m-%d"))
+            print(f"  ✅ '{date_str}' -> UTC: {dt_utc} -> MSK: {dt_msk.strftime('%Y-%m-%d %H:%M')}")
+        else:
+            dates_failed.append(date_str)
+    
+    if dates_failed:
+        print(f"\n  ❌ Failed to parse {len(dates_failed)} dates")
+    
+    # Extract unique dates
+    unique_dates = sorted(set(dates_parsed))
+    print(f"\n  📅 Unique dates found: {unique_dates}")
+    
+    # Test statistics calculation
+    print("\n📊 STATISTICS CALCULATION TEST:")
+    stats = defaultdict(lambda: {'orders': 0, 'cancellations': 0, 'revenue': 0, 'price_sum': 0, 'price_qty': 0})
+    
+    STATUS_REVENUE = {'доставлен', 'доставляется', 'ожидает сборки', 'ожидает отгрузки'}
+    STATUS_CANCEL = {'отменён', 'возврат'}
+    
+    for row in head[:20]:
+        sku = row.get('Артикул', '').strip()
+        if not sku:
+            continue
         
-        # Extract unique dates
-        unique_dates = sorted(set(dates_parsed))
-        print(f"\n  📅 Unique dates found: {unique_dates}")
+        try:
+            quantity = int(row.get('Количество', '1'))
+        except:
+            quantity = 1
         
-        # Test statistics calculation
-        print("\n📊 STATISTICS CALCULATION TEST:")
-        stats = defaultdict(lambda: {'orders': 0, 'cancellations': 0, 'revenue': 0, 'price_sum': 0, 'price_qty': 0})
+        try:
+            price_str = row.get('Ваша цена', '0').replace(',', '.')
+            price = float(price_str)
+        except:
+            price = 0
         
-        STATUS_REVENUE = {'доставлен', 'доставляется', 'ожидает сборки', 'ожидает отгрузки'}
-        STATUS_CANCEL = {'отменён', 'возврат'}
+        status = row.get('Статус', '').lower().strip()
         
-        for row in rows[:20]:
-            sku = row.get('Артикул', '').strip()
-            if not sku:
-                continue
-            
-            try:
-                quantity = int(row.get('Количество', '1'))
-            except:
-                quantity = 1
-            
-            try:
-                price_str = row.get('Ваша цена', '0').replace(',', '.')
-                price = float(price_str)
-            except:
-                price = 0
-            
-            status = row.get('Статус', '').lower().strip()
-            
-            if status in STATUS_REVENUE:
-                stats[sku]['orders'] += quantity
-                stats[sku]['price_sum'] += price * quantity
-                stats[sku]['price_qty'] += quantity
-                stats[sku]['revenue'] += price * quantity
-            
-            if status in STATUS_CANCEL:
-                stats[sku]['cancellations'] += quantity
+        if status in STATUS_REVENUE:
+            stats[sku]['orders'] += quantity
+            stats[sku]['price_sum'] += price * quantity
+            stats[sku]['price_qty'] += quantity
+            stats[sku]['revenue'] += price * quantity
         
-        print(f"\n  Found {len(stats)} unique SKUs in first 20 rows:")
-        for sku, data in list(stats.items())[:5]:
-            avg_price = data['price_sum'] / data['price_qty'] if data['price_qty'] > 0 else 0
-            print(f"    {sku}:")
-            print(f"      Orders: {data['orders']}, Cancellations: {data['cancellations']}")
-            print(f"      Avg Price: {avg_price:.2f}, Revenue: {data['revenue']:.2f}")
+        if status in STATUS_CANCEL:
+            stats[sku]['cancellations'] += quantity
+    
+    print(f"\n  Found {len(stats)} unique SKUs in first 20 rows:")
+    for sku, data in list(stats.items())[:5]:
+        avg_price = data['price_sum'] / data['price_qty'] if data['price_qty'] > 0 else 0
+        print(f"    {sku}:")
+        print(f"      Orders: {data['orders']}, Cancellations: {data['cancellations']}")
+        print(f"      Avg Price: {avg_price:.2f}, Revenue: {data['revenue']:.2f}")
 
 def analyze_fbs_csv(filepath):
     """Analyze FBS CSV structure and data"""
@@ -137,51 +144,50 @@ def analyze_fbs_csv(filepath):
     print(f"📊 ANALYZING FBS CSV: {filepath}")
     print(f"{'='*80}\n")
     
-    with open(filepath, 'r', encoding='utf-8-sig') as f:
-        # Read with semicolon delimiter and quoted fields
-        reader = csv.DictReader(f, delimiter=';', quotechar='"')
-        
-        # Print header analysis
-        print("📋 HEADER COLUMNS:")
-        headers = reader.fieldnames
-        for idx, col in enumerate(headers):
-            print(f"  [{chr(65+idx) if idx < 26 else 'A'+chr(65+idx-26)}] Column {idx}: {col[:50]}")
-        
-        # Process rows
-        rows = list(reader)
-        print(f"\n📦 Total rows: {len(rows)}")
-        
-        # Analyze first few rows
-        print("\n🔍 FIRST 3 ROWS ANALYSIS:")
-        for i, row in enumerate(rows[:3]):
-            print(f"\n  Row {i+1}:")
-            print(f"    Номер заказа: {row.get('Номер заказа', 'N/A')}")
-            print(f"    Артикул: {row.get('Артикул', 'N/A')}")
-            print(f"    Ваша цена: {row.get('Ваша цена', 'N/A')}")
-            print(f"    Количество: {row.get('Количество', 'N/A')}")
-            print(f"    Статус: {row.get('Статус', 'N/A')}")
-            print(f"    Принят в обработку: {row.get('Принят в обработку', 'N/A')}")
-        
-        # Test date parsing
-        print("\n📅 DATE PARSING TEST:")
-        dates_parsed = []
-        dates_failed = []
-        for row in rows[:10]:
-            date_str = row.get('Принят в обработку', '')
-            dt_utc = parse_fbs_date(date_str)
-            if dt_utc:
-                dt_msk = utc_to_msk(dt_utc)
-                dates_parsed.append(dt_msk.strftime("%Y-%m-%d"))
-                print(f"  ✅ '{date_str}' -> UTC: {dt_utc} -> MSK: {dt_msk.strftime('%Y-%m-%d %H:%M')}")
-            else:
-                dates_failed.append(date_str)
-        
-        if dates_failed:
-            print(f"\n  ❌ Failed to parse {len(dates_failed)} dates")
-        
-        # Extract unique dates
-        unique_dates = sorted(set(dates_parsed))
-        print(f"\n  📅 Unique dates found: {unique_dates}")
+    # Streamed from byte windows (report_ingest): only the first rows are kept
+    rows = iter_report_rows(filepath)
+    head = list(islice(rows, HEAD_ROWS))
+    total = len(head) + sum(1 for _ in rows)
+
+    # Print header analysis
+    print("📋 HEADER COLUMNS:")
+    headers = list(head[0]) if head else []
+    for idx, col in enumerate(headers):
+        print(f"  [{chr(65+idx) if idx < 26 else 'A'+chr(65+idx-26)}] Column {idx}: {col[:50]}")
+    
+    print(f"\n📦 Total rows: {total}")
+    
+    # Analyze first few rows
+    print("\n🔍 FIRST 3 ROWS ANALYSIS:")
+    for i, row in enumerate(head[:3]):
+        print(f"\n  Row {i+1}:")
+        print(f"    Номер заказа: {row.get('Номер заказа', 'N/A')}")
+        print(f"    Артикул: {row.get('Артикул', 'N/A')}")
+        print(f"    Ваша цена: {row.get('Ваша цена', 'N/A')}")
+        print(f"    Количество: {row.get('Количество', 'N/A')}")
+        print(f"    Статус: {row.get('Статус', 'N/A')}")
+        print(f"    Принят в обработку: {row.get('Принят в обработку', 'N/A')}")
+    
+    # Test date parsing
+    print("\n📅 DATE PARSING TEST:")
+    dates_parsed = []
+    dates_failed = []
+    for row in head[:10]:
+        date_str = row.get('Принят в обработку', '')
+        dt_utc = parse_fbs_date(date_str)
+        if dt_utc:
+            dt_msk = utc_to_msk(dt_utc)
+            dates_parsed.append(dt_msk.strftime("%Y-%m-%d"))
+            print(f"  ✅ '{date_str}' -> UTC: {dt_utc} -> MSK: {dt_msk.strftime('%Y-%m-%d %H:%M')}")
+        else:
+            dates_failed.append(date_str)
+    
+    if dates_failed:
+        print(f"\n  ❌ Failed to parse {len(dates_failed)} dates")
+    
+    # Extract unique dates
+    unique_dates = sorted(set(dates_parsed))
+    print(f"\n  📅 Unique dates found: {unique_dates}")
 
 def main():
     print("🚀 CSV PARSING TEST SUITE")
@@ -0,0 +1,206 @@
+#!/usr/bin/env node
+/**
+ * Проверка выбора дат через журнал нажатий (src/date-taps.js): свёртка
+ * с лимитом, версия и её монотонность, а также одновременные тапы по
+ * основному workflow — несколько апдейтов исполняются вперемешку на одном
+ * Redis, как у нескольких воркеров n8n в queue mode, — и окно слияния
+ * рендеров: ответы на тапы сразу, календарь — один раз за серию.
+ */
+
+const assert = require('assert');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { MemoryRedis, runWorkflow } = require('./lib/n8n-runner');
+const { generateReport, toCsv } = require('./lib/synthetic-report');
+const { userStateKey, readUserState } = require('../src/user-state');
+const { DATE_TAPS_TTL_MS, DATES_LIMIT, dateTapsKey, encodeDateTap, decodeDateTap, liveDateTapsStart, foldDateTaps, isLatestDateTap } = require('../src/date-taps');
+
+const WORKFLOWS = path.join(__dirname, '..', 'workflows');
+const MAIN = loadWorkflowFile(path.join(WORKFLOWS, 'ozon-telegram-bot.json'));
+const TOGGLE = loadWorkflowFile(path.join(WORKFLOWS, 'ozord_dates_toggle_and_limit.n8n.json'));
+const WINDOW_MS = 40;
+const CONFIG = { TELEGRAM_BOT_TOKEN: 'test-token', SUPERUSER_IDS: '1', CALENDAR_COALESCE_MS: WINDOW_MS };
+const USER = { id: 42 };
+const CHAT = { id: 42 };
+
+function testFold() {
+  const now = Date.now();
+  const t = (op, date, id, at = now) => encodeDateTap(op, date, id, { now: at });
+  assert.deepStrictEqual(decodeDateTap(t('t', '2025-08-01', 'a|b')), { at: now, op: 't', date: '2025-08-01', id: 'a|b' });
+
+  const log = [
+    t('t', '2025-08-01', 1), t('t', '2025-08-02', 2), t('t', '2025-08-03', 3),
+    t('t', '2025-08-04', 4), t('t', '2025-08-02', 5), t('t', '2025-08-04', 6),
+  ];
+  assert.deepStrictEqual(foldDateTaps(log, { id: 4, now }), {
+    selected: ['2025-08-01', '2025-08-03', '2025-08-04'], version: 5, outcome: 'blocked',
+  });
+  assert.strictEqual(foldDateTaps(log, { id: 5, now }).outcome, 'removed');
+  assert.strictEqual(foldDateTaps(log, { id: 6, now }).outcome, 'added');
+  for (let n = 0; n <= log.length; n++) {
+    const { selected, version } = foldDateTaps(log.slice(0, n), { now });
+    assert.ok(selected.length <= DATES_LIMIT, 'limit holds on every prefix');
+    if (n) assert.ok(version >= foldDateTaps(log.slice(0, n - 1), { now }).version, 'version never decreases');
+  }
+
+  // Свёртка идёт с последнего сброса: версия — изменения после него
+  const reset = log.concat(t('r', '', 7), t('r', '', 8), t('t', '2025-08-09', 9));
+  assert.strictEqual(liveDateTapsStart(reset), 7);
+  assert.deepStrictEqual(foldDateTaps(reset, { id: 8, now }), { selected: ['2025-08-09'], version: 1, outcome: 'reset' });
+  assert.strictEqual(foldDateTaps(reset, { id: 6, now }).outcome, null, 'a tap before the last reset has no outcome');
+  assert.deepStrictEqual(foldDateTaps(reset, { now }), foldDateTaps(reset.slice(7), { now }));
+
+  // Выбор живёт сутки с последнего нажатия
+  const stale = [t('t', '2025-08-01', 1, now - DATE_TAPS_TTL_MS - 2), t('t', '2025-08-02', 2)];
+  assert.deepStrictEqual(foldDateTaps(stale, { now }).selected, ['2025-08-02']);
+  assert.deepStrictEqual(foldDateTaps(stale.slice(0, 1), { now }).selected, []);
+  assert.deepStrictEqual(foldDateTaps(null), { selected: [], version: 0, outcome: null });
+  assert.ok(isLatestDateTap(log, 6) && !isLatestDateTap(log, 5) && !isLatestDateTap([], 6));
+
+  // Свёртка после окна продолжает снимок и проходит только дописанное за окно
+  const dayTotals = { '2025-08-01': [1, 10], '2025-08-03': [2, 20], '2025-08-04': [4, 40], '2025-08-09': [8, 80] };
+  const decoded = [];
+  const counting = reset.map(e => ({ toString: () => { decoded.push(e); return e; } }));
+  for (const at of [4, 6, 7]) {
+    const { checkpoint } = foldDateTaps(reset.slice(0, at), { now, dayTotals, checkpoint: true });
+    for (let n = at; n <= reset.length; n++) {
+      const entries = reset.slice(0, n);
+      const seen = counting.slice(0, at).concat(entries.slice(at));
+      decoded.length = 0;
+      const resumed = foldDateTaps(seen, { now, dayTotals, from: { ...checkpoint, last: seen[at - 1] } });
+      assert.deepStrictEqual(resumed, foldDateTaps(entries, { now, dayTotals }), `fold of ${n} taps resumed at ${at}`);
+      assert.deepStrictEqual(decoded, [], 'the checkpointed taps are not folded again');
+    }
+  }
+  const { checkpoint } = foldDateTaps(log.slice(0, 4), { now, dayTotals, checkpoint: true });
+  assert.deepStrictEqual(checkpoint.selected, ['2025-08-01', '2025-08-02', '2025-08-03']);
+  // Журнал пересоздан (сброс удалил ключ) — снимок не подходит, свёртка с начала
+  const recreated = [t('r', '', 10), t('t', '2025-08-09', 11), t('t', '2025-08-01', 12), t('t', '2025-08-03', 13)];
+  assert.deepStrictEqual(foldDateTaps(recreated, { now, dayTotals, from: checkpoint }), foldDateTaps(recreated, { now, dayTotals }));
+  assert.deepStrictEqual(foldDateTaps(log, { now, dayTotals, from: foldDateTaps(log.slice(0, 4), { now, checkpoint: true }).checkpoint }),
+    foldDateTaps(log, { now, dayTotals }), 'a checkpoint without the summary is not resumed with dayTotals');
+  console.log('✅ foldDateTaps: toggle, limit in log order, fold from the last reset, idle expiry, monotonic version, resume from a checkpoint');
+}
+
+async function session() {
+  const redis = new MemoryRedis();
+  redis.set('ozon:acl:42', '3');
+  let messageId = 500;
+  const calls = [];
+  const telegram = async (method, body) => {
+    calls.push({ method, body });
+    return { ok: true, result: method === 'sendMessage' ? { message_id: ++messageId } : true };
+  };
+  // Все дни отчёта — в одном месяце, чтобы все тапы были по видимому календарю
+  const files = { 'doc-fbo': Buffer.from(toCsv(generateReport({ rows: 2000, days: 20 }))) };
+  const send = async update => {
+    const run = await runWorkflow(MAIN, { update, redis, telegram, files, config: CONFIG });
+    if (run.error) throw run.error;
+    return run;
+  };
+  let taps = 0;
+  const tap = data => send({ callback_query: { id: `cb-${++taps}`, from: USER, message: { message_id: 1, chat: CHAT }, data } });
+  await send({ message: { from: USER, chat: CHAT, document: { file_id: 'doc-fbo', file_unique_id: 'u-fbo', file_name: 'orders.csv', mime_type: 'text/csv' } } });
+  const state = () => readUserState(redis.hgetall(userStateKey(42)));
+  return { redis, calls, tap, state };
+}
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+const methods = calls => calls.map(c => c.method);
+const shown = call => call.body.reply_markup.inline_keyboard.flat().filter(b => b.text.startsWith('☑')).map(b => b.callback_data.slice(5));
+
+async function testConcurrentTaps() {
+  const { redis, calls, tap, state } = await session();
+  const days = state().meta.availableDates.slice(0, 5);
+  assert.ok(days.every(d => d.startsWith(state().calMonth)));
+  calls.length = 0;
+
+  await Promise.all(days.map(d => tap(`date:${d}`)));
+  const { selected, version } = foldDateTaps(redis.lrange(dateTapsKey(42)));
+  assert.deepStrictEqual(selected, days.slice(0, DATES_LIMIT), 'taps are applied in log order, none is lost');
+  assert.strictEqual(version, DATES_LIMIT);
+  assert.strictEqual(calls.filter(c => c.method === 'answerCallbackQuery' && c.body.text).length, days.length - DATES_LIMIT, 'extra taps hit the limit');
+  assert.deepStrictEqual(methods(calls), [...days.map(() => 'answerCallbackQuery'), 'editMessageText'], 'every tap is answered, the burst is rendered once');
+  assert.deepStrictEqual(shown(calls[calls.length - 1]), selected, 'the render shows the final selection');
+  assert.deepStrictEqual(state().selectedDates, selected, 'ozon:user:<uid> holds the final selection');
+
+  // Тап сверх лимита рисует тот же календарь — правки нет (src/ui-message.js)
+  calls.length = 0;
+  await tap(`date:${days[4]}`);
+  assert.deepStrictEqual(methods(calls), ['answerCallbackQuery'], 'a blocked tap does not edit the unchanged calendar');
+
+  // Серия с паузами короче окна: ответы сразу, рендер — за последним тапом
+  calls.length = 0;
+  const burst = [];
+  for (const d of [days[0], days[1], days[3]]) {
+    burst.push(tap(`date:${d}`));
+    await sleep(WINDOW_MS / 4);
+  }
+  const runs = await Promise.all(burst);
+  assert.deepStrictEqual(methods(calls), ['answerCallbackQuery', 'answerCallbackQuery', 'answerCallbackQuery', 'editMessageText']);
+  assert.deepStrictEqual(runs.map(r => 'Save Calendar State' in r.executed), [false, false, true], 'superseded taps neither render nor write the state');
+  assert.deepStrictEqual(shown(calls[3]), [days[2], days[3]]);
+  assert.deepStrictEqual(state().selectedDates, [days[2], days[3]]);
+
+  // Сброс и тоггл вперемешку: порядок задаёт журнал, календарь и снимок — его свёртка
+  calls.length = 0;
+  await Promise.all([tap('dates:reset'), tap(`date:${days[4]}`)]);
+  const edits = calls.filter(c => c.method === 'editMessageText');
+  const mixed = foldDateTaps(redis.lrange(dateTapsKey(42))).selected;
+  assert.strictEqual(edits.length, 1);
+  assert.ok([0, 1].includes(mixed.length) && mixed.every(d => d === days[4]));
+  assert.deepStrictEqual(shown(edits[0]), mixed);
+  assert.deepStrictEqual(state().selectedDates, mixed);
+
+  // Сброс удаляет журнал перед своей записью
+  await tap('dates:reset');
+  await tap(`date:${days[4]}`);
+  assert.deepStrictEqual(redis.lrange(dateTapsKey(42)).map(e => decodeDateTap(e).op), ['r', 't'], 'a reset drops the taps before it');
+  assert.deepStrictEqual(state().selectedDates, [days[4]]);
+
+  // Сутки без рендера — группа ui истекла: тап начинает журнал заново
+  const raw = redis.hgetall(userStateKey(42));
+  redis.hset(userStateKey(42), ['ui_exp', String(Date.now() - 1)]);
+  await tap(`date:${days[1]}`);
+  assert.deepStrictEqual(redis.lrange(dateTapsKey(42)).map(e => decodeDateTap(e).date), [days[1]], 'a tap on an expired calendar starts a new log');
+  assert.deepStrictEqual(state().selectedDates, [days[1]]);
+  redis.hset(userStateKey(42), ['ui_exp', raw.ui_exp]);
+
+  const done = await tap('dates:done');
+  assert.deepStrictEqual(done.executed['Handle Done'][0].json.selectedDates, [days[1]], 'dates:done folds the log');
+  await tap('file:clear');
+  assert.strictEqual(redis.type(dateTapsKey(42)), 'none', 'file:clear deletes the tap log');
+  console.log(`✅ ${days.length} concurrent taps: ${DATES_LIMIT} selected, ${days.length - DATES_LIMIT} blocked, ${days.length} answers and one edit per burst`);
+}
+
+async function testSubWorkflowToggle() {
+  const now = Date.now();
+  const taps = ['2025-08-03', '2025-08-01', '2025-08-02', '2025-08-04'].map((d, i) => encodeDateTap('t', d, `cb-${i}`, { now }));
+  const run = async (id, entries = taps) => (await runCodeNode(TOGGLE, 'Toggle with Limit (max 3)', {
+    input: { taps: entries },
+    nodes: { 'Parse Callback (date:YYYY-MM-DD)': { callback_query_id: id } },
+  }))[0].json;
+  const { checkpoint, ...added } = await run('cb-2');
+  assert.deepStrictEqual(added, { changed: true, reason: 'added', selected: ['2025-08-01', '2025-08-02', '2025-08-03'], version: 3 });
+  assert.strictEqual(checkpoint.count, taps.length);
+  const { checkpoint: _, ...limited } = await run('cb-3');
+  assert.deepStrictEqual(limited, { changed: false, reason: 'limit', selected: ['2025-08-01', '2025-08-02', '2025-08-03'], version: 3 });
+  const take = async (id, entries) => (await runCodeNode(TOGGLE, 'Take Latest Tap', {
+    input: { taps: entries },
+    nodes: { 'Parse Callback (date:YYYY-MM-DD)': { callback_query_id: id }, 'Toggle with Limit (max 3)': await run(id, entries) },
+  }))[0];
+  assert.strictEqual(await take('cb-2', taps), undefined, 'a later tap renders instead');
+  const later = taps.concat(encodeDateTap('t', '2025-08-01', 'cb-9', { now }));
+  assert.deepStrictEqual((await take('cb-9', later)).json, { changed: true, reason: 'removed', selected: ['2025-08-02', '2025-08-03'], version: 4 });
+  console.log('✅ ozord_dates_toggle_and_limit: sorted fold result, limit reason, only the latest tap renders');
+}
+
+async function main() {
+  console.log('🎯 DATE TAPS TESTS\n');
+  testFold();
+  await testConcurrentTaps();
+  await testSubWorkflowToggle();
+  console.log('\n✅ All date taps tests passed');
+}
+
+main().catch(e => { console.error('❌', e.stack); process.exit(1); });
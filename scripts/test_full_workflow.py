@@ -4,11 +4,16 @@
 Эмулирует загрузку CSV, парсинг дат, выборку календаря и генерацию отчетов.
 """
 
-import json
-import csv
+import os
+import sys
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_columns import T_NONE  # noqa: E402
+from report_ingest import iter_report_records  # noqa: E402
+
 print("=" * 80)
 print("🧪 ПОЛНОЕ ТЕСТИРОВАНИЕ WORKFLOW С РЕАЛЬНЫМИ ДАННЫМИ")
 print("=" * 80)
@@ -20,83 +25,44 @@ print("\n" + "=" * 80)
 print("📂 ШАГ 1: ЗАГРУЗКА И ПАРСИНГ CSV ФАЙЛА (FBO)")
 print("=" * 80)
 
-def parse_fbo_date(date_str):
-    """Парсинг даты в формате FBO: DD.MM.YYYY H:MM"""
-    try:
-        trimmed = date_str.strip()
-        
-        # Формат FBO: DD.MM.YYYY H:MM
-        parts = trimmed.split(' ')
-        if len(parts) != 2:
-            return None
-            
-        date_part = parts[0]  # DD.MM.YYYY
-        time_part = parts[1]  # H:MM или HH:MM
-        
-        # Разбираем дату
-        d, m, y = date_part.split('.')
-        
-        # Добавляем ведущий ноль к часам если нужно
-        if len(time_part) < 5:
-            time_part = '0' + time_part
-        
-        # Создаем ISO строку и парсим как UTC
-        iso_str = f"{y}-{m}-{d}T{time_part}:00Z"
-        utc_date = datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
-        
-        # Конвертируем UTC в MSK (UTC+3)
-        msk_date = utc_date + timedelta(hours=3)
-        
-        return msk_date
-    except Exception as e:
-        print(f"❌ Ошибка парсинга даты '{date_str}': {e}")
-        return None
-
-# Загружаем FBO CSV
+# Загружаем FBO CSV потоком (report_ingest): записи сразу сворачиваются
+# в итоги по дням, в памяти только агрегаты и первые заказы каждого дня
 csv_file = 'orders-2025-fbo-test.csv'
-orders = []
-unique_dates = set()
+FIRST_ORDERS = 5
+days = defaultdict(lambda: {'orders': 0, 'items': 0, 'sum': 0.0, 'first': []})
+total_orders = 0
 
 print(f"\n📥 Загружаем файл: {csv_file}")
 
-with open(csv_file, 'r', encoding='utf-8-sig') as f:
-    reader = csv.DictReader(f, delimiter=';')
-    
-    for row in reader:
-        order_date_str = row.get('Принят в обработку', '')
-        if not order_date_str:
-            continue
-            
-        # Парсим дату
-        order_date = parse_fbo_date(order_date_str)
-        if not order_date:
-            continue
-        
-        # Извлекаем дату (без времени)
-        date_only = order_date.date().isoformat()
-        unique_dates.add(date_only)
-        
-        # Сохраняем заказ
-        orders.append({
-            'order_id': row.get('Номер заказа', ''),
-            'article': row.get('Артикул', ''),
-            'price': row.get('Ваша цена', ''),
-            'quantity': row.get('Количество', ''),
-            'status': row.get('Статус', ''),
-            'date_str': order_date_str,
-            'date_msk': order_date,
-            'date_only': date_only
-        })
-
-print(f"\n✅ Загружено заказов: {len(orders)}")
+for record in iter_report_records(csv_file):
+    if record['t'] == T_NONE:
+        continue
+    date_msk = datetime(1970, 1, 1) + timedelta(minutes=record['t'])
+    date_only = date_msk.date().isoformat()
+    day = days[date_only]
+    day['orders'] += 1
+    day['items'] += record['quantity']
+    day['sum'] += record['price'] * record['quantity']
+    if len(day['first']) < FIRST_ORDERS:
+        day['first'].append({**record, 'date_msk': date_msk})
+    total_orders += 1
+
+unique_dates = set(days)
+
+print(f"\n✅ Загружено заказов: {total_orders}")
 print(f"✅ Найдено уникальных дат: {len(unique_dates)}")
 
+
+def orders_on(dates):
+    return sum(days[d]['orders'] for d in dates if d in days)
+
+
 # Сортируем даты
 sorted_dates = sorted(list(unique_dates))
 print(f"\n📅 ДИАПАЗОН ДАТ: {sorted_dates[0]} → {sorted_dates[-1]}")
 print(f"📅 ВСЕ УНИКАЛЬНЫЕ ДАТЫ ({len(sorted_dates)}):")
 for date in sorted_dates:
-    count = sum(1 for o in orders if o['date_only'] == date)
+    count = days[date]['orders']
     print(f"   • {date}: {count} заказов")
 
 # ============================================================================
@@ -125,45 +91,25 @@ if len(sorted_dates) >= 2:
     selected_dates_2 = [sorted_dates[0], sorted_dates[-1]]
     print(f"\n🎯 ВЫБРАННЫЕ ДАТЫ: {selected_dates_2}")
     
-    # Фильтруем заказы по выбранным датам
-    filtered_orders_2 = [o for o in orders if o['date_only'] in selected_dates_2]
-    
-    print(f"\n📦 Найдено заказов: {len(filtered_orders_2)}")
-    
-    # Группируем по датам
-    by_date = defaultdict(list)
-    for order in filtered_orders_2:
-        by_date[order['date_only']].append(order)
+    print(f"\n📦 Найдено заказов: {orders_on(selected_dates_2)}")
     
-    # Статистика
+    # Статистика по дням — из итогов, собранных при загрузке
     total_sum = 0
     total_items = 0
     
     print(f"\n📈 СТАТИСТИКА ПО ДАТАМ:")
     for date in selected_dates_2:
-        date_orders = by_date[date]
-        date_sum = 0
-        date_items = 0
-        
-        for o in date_orders:
-            try:
-                price = float(o['price'].replace(',', '.').replace(' ', ''))
-                qty = int(o['quantity'])
-                date_sum += price * qty
-                date_items += qty
-            except:
-                pass
-        
-        total_sum += date_sum
-        total_items += date_items
+        day = days[date]
+        total_sum += day['sum']
+        total_items += day['items']
         
         print(f"\n   Дата: {date}")
-        print(f"   • Заказов: {len(date_orders)}")
-        print(f"   • Товаров: {date_items}")
-        print(f"   • Сумма: {date_sum:,.2f} ₽")
+        print(f"   • Заказов: {day['orders']}")
+        print(f"   • Товаров: {day['items']}")
+        print(f"   • Сумма: {day['sum']:,.2f} ₽")
     
     print(f"\n💰 ИТОГО ЗА 2 ДАТЫ:")
-    print(f"   • Всего заказов: {len(filtered_orders_2)}")
+    print(f"   • Всего заказов: {orders_on(selected_dates_2)}")
     print(f"   • Всего товаров: {total_items}")
     print(f"   • Общая сумма: {total_sum:,.2f} ₽")
     
@@ -184,45 +130,25 @@ if len(sorted_dates) >= 3:
     selected_dates_3 = [sorted_dates[0], sorted_dates[mid_idx], sorted_dates[-1]]
     print(f"\n🎯 ВЫБРАННЫЕ ДАТЫ: {selected_dates_3}")
     
-    # Фильтруем заказы
-    filtered_orders_3 = [o for o in orders if o['date_only'] in selected_dates_3]
-    
-    print(f"\n📦 Найдено заказов: {len(filtered_orders_3)}")
+    print(f"\n📦 Найдено заказов: {orders_on(selected_dates_3)}")
     
-    # Группируем по датам
-    by_date = defaultdict(list)
-    for order in filtered_orders_3:
-        by_date[order['date_only']].append(order)
-    
-    # Статистика
+    # Статистика по дням — из итогов, собранных при загрузке
     total_sum = 0
     total_items = 0
     
     print(f"\n📈 СТАТИСТИКА ПО ДАТАМ:")
     for date in selected_dates_3:
-        date_orders = by_date[date]
-        date_sum = 0
-        date_items = 0
-        
-        for o in date_orders:
-            try:
-                price = float(o['price'].replace(',', '.').replace(' ', ''))
-                qty = int(o['quantity'])
-                date_sum += price * qty
-                date_items += qty
-            except:
-                pass
-        
-        total_sum += date_sum
-        total_items += date_items
+        day = days[date]
+        total_sum += day['sum']
+        total_items += day['items']
         
         print(f"\n   Дата: {date}")
-        print(f"   • Заказов: {len(date_orders)}")
-        print(f"   • Товаров: {date_items}")
-        print(f"   • Сумма: {date_sum:,.2f} ₽")
+        print(f"   • Заказов: {day['orders']}")
+        print(f"   • Товаров: {day['items']}")
+        print(f"   • Сумма: {day['sum']:,.2f} ₽")
     
     print(f"\n💰 ИТОГО ЗА 3 ДАТЫ:")
-    print(f"   • Всего заказов: {len(filtered_orders_3)}")
+    print(f"   • Всего заказов: {orders_on(selected_dates_3)}")
     print(f"   • Всего товаров: {total_items}")
     print(f"   • Общая сумма: {total_sum:,.2f} ₽")
     
@@ -239,43 +165,33 @@ print("=" * 80)
 
 if len(sorted_dates) >= 1:
     # Выбираем дату с наибольшим количеством заказов
-    date_counts = {date: sum(1 for o in orders if o['date_only'] == date) for date in sorted_dates}
+    date_counts = {date: days[date]['orders'] for date in sorted_dates}
     selected_date_1 = max(date_counts, key=date_counts.get)
     selected_dates_1 = [selected_date_1]
     
     print(f"\n🎯 ВЫБРАНА ДАТА С МАКСИМАЛЬНЫМ КОЛИЧЕСТВОМ ЗАКАЗОВ: {selected_dates_1}")
     print(f"   (содержит {date_counts[selected_date_1]} заказов)")
     
-    # Фильтруем заказы
-    filtered_orders_1 = [o for o in orders if o['date_only'] in selected_dates_1]
+    day = days[selected_date_1]
     
-    print(f"\n📦 Найдено заказов: {len(filtered_orders_1)}")
+    print(f"\n📦 Найдено заказов: {day['orders']}")
     
     # Статистика
-    total_sum = 0
-    total_items = 0
-    
-    for o in filtered_orders_1:
-        try:
-            price = float(o['price'].replace(',', '.').replace(' ', ''))
-            qty = int(o['quantity'])
-            total_sum += price * qty
-            total_items += qty
-        except:
-            pass
+    total_sum = day['sum']
+    total_items = day['items']
     
     print(f"\n📈 СТАТИСТИКА:")
     print(f"   Дата: {selected_date_1}")
-    print(f"   • Заказов: {len(filtered_orders_1)}")
+    print(f"   • Заказов: {day['orders']}")
     print(f"   • Товаров: {total_items}")
     print(f"   • Сумма: {total_sum:,.2f} ₽")
     
     # Показываем первые 5 заказов
     print(f"\n📋 ПЕРВЫЕ 5 ЗАКАЗОВ:")
-    for i, order in enumerate(filtered_orders_1[:5], 1):
+    for i, order in enumerate(day['first'], 1):
         print(f"   {i}. Заказ {order['order_id']}")
-        print(f"      • Артикул: {order['article']}")
-        print(f"      • Цена: {order['price']} x {order['quantity']}")
+        print(f"      • Артикул: {order['sku']}")
+        print(f"      • Цена: {order['price']:.2f} x {order['quantity']}")
         print(f"      • Статус: {order['status']}")
         print(f"      • Время: {order['date_msk'].strftime('%Y-%m-%d %H:%M MSK')}")
     
@@ -295,7 +211,7 @@ print(f"""
 
 1. ✅ ПАРСИНГ CSV
    • Файл: {csv_file}
-   • Загружено заказов: {len(orders)}
+   • Загружено заказов: {total_orders}
    • Извлечено уникальных дат: {len(unique_dates)}
    • Диапазон: {sorted_dates[0]} → {sorted_dates[-1]}
 
@@ -306,17 +222,17 @@ print(f"""
 
 3. ✅ ВЫБОРКА 2 ДАТ
    • Выбраны: {selected_dates_2[0]}, {selected_dates_2[-1]}
-   • Заказов найдено: {len([o for o in orders if o['date_only'] in selected_dates_2])}
+   • Заказов найдено: {orders_on(selected_dates_2)}
    • Статистика рассчитана корректно
 
 4. ✅ ВЫБОРКА 3 ДАТ
    • Выбраны: {', '.join(selected_dates_3) if len(sorted_dates) >= 3 else 'N/A'}
-   • Заказов найдено: {len([o for o in orders if o['date_only'] in selected_dates_3]) if len(sorted_dates) >= 3 else 0}
+   • Заказов найдено: {orders_on(selected_dates_3) if len(sorted_dates) >= 3 else 0}
    • Статистика рассчитана корректно
 
 5. ✅ ВЫБОРКА 1 ДАТЫ
    • Выбрана: {selected_date_1}
-   • Заказов найдено: {len([o for o in orders if o['date_only'] == selected_date_1])}
+   • Заказов найдено: {days[selected_date_1]['orders']}
    • Детализация корректна
 
 🎉 ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!
@@ -0,0 +1,166 @@
+#!/usr/bin/env node
+/**
+ * Проверка общего кэша разбора (src/parse-cache.js и ноды загрузки CSV):
+ * LRU под бюджет, TTL записей, и то, что повторная загрузка того же файла
+ * другим пользователем получает из кэша ровно выход «Parse Report File».
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES } = require('./lib/synthetic-report');
+const { parseCacheKey } = require('../src/parse-cache-key');
+const {
+  PARSE_CACHE_INDEX_KEY, parseCacheSettings, utf8Length, touchParseCache, admitParseCache,
+  packParsedReport, unpackParsedReport,
+} = require('../src/parse-cache');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const MB = 1024 * 1024;
+const DOC = { file_id: 'BQACAgIAAxkBAAIB', file_unique_id: 'AgADqQ4AAo', file_name: 'orders.csv', mime_type: 'text/csv' };
+
+function testLruAndTtl() {
+  const opts = { ttlSec: 60, budgetBytes: 10 * MB };
+  let { index } = admitParseCache(null, 'a', 4 * MB, { ...opts, now: 1000 });
+  ({ index } = admitParseCache(index, 'b', 4 * MB, { ...opts, now: 2000 }));
+  index = touchParseCache(JSON.stringify(index), 'a', { now: 3000 });
+  const third = admitParseCache(index, 'c', 4 * MB, { ...opts, now: 4000 });
+  assert.deepStrictEqual(third.evict, ['b'], 'least recently used goes first');
+  assert.deepStrictEqual(Object.keys(third.index.entries).sort(), ['a', 'c']);
+  assert.strictEqual(third.index.bytes, 8 * MB);
+
+  const big = admitParseCache(third.index, 'd', 11 * MB, { ...opts, now: 5000 });
+  assert.strictEqual(big.admitted, false, 'larger than the whole budget');
+  assert.deepStrictEqual(big.evict, []);
+
+  const later = admitParseCache(third.index, 'e', 1 * MB, { ...opts, now: 1000 + 61000 });
+  assert.deepStrictEqual(Object.keys(later.index.entries).sort(), ['c', 'e'], 'expired entries leave the index');
+  assert.deepStrictEqual(later.evict, [], 'expired keys are already gone in Redis');
+
+  const readmit = admitParseCache(later.index, 'c', 2 * MB, { ...opts, now: 70000 });
+  assert.strictEqual(readmit.index.entries.c.bytes, 2 * MB);
+  assert.strictEqual(readmit.index.bytes, 3 * MB);
+  console.log('✅ LRU eviction under the budget, oversize entries rejected, TTL drops expired entries');
+}
+
+function testHelpers() {
+  for (const s of ['abc', 'Ёжик', '€', '😀 ok', JSON.stringify({ sku: 'ШАПКА-01' })]) {
+    assert.strictEqual(utf8Length(s), Buffer.byteLength(s, 'utf8'), s);
+  }
+  assert.strictEqual(parseCacheKey(DOC), 'ozon:parse:f:AgADqQ4AAo');
+  assert.strictEqual(parseCacheKey({ file_id: 'x' }), null);
+  assert.deepStrictEqual(parseCacheSettings({}), { ttlSec: 259200, budgetBytes: 256 * MB });
+  assert.deepStrictEqual(parseCacheSettings({ PARSE_CACHE_TTL_SEC: 600, PARSE_CACHE_BUDGET_MB: 0.5 }), { ttlSec: 600, budgetBytes: MB / 2 });
+  assert.strictEqual(unpackParsedReport('{"v":0,"meta":{},"columns":{}}'), null, 'other payload version');
+  assert.strictEqual(unpackParsedReport('not json'), null);
+  console.log('✅ utf8Length == Buffer.byteLength, key from file_unique_id, settings from Config');
+}
+
+function testWiring() {
+  const next = name => (MAIN.connections[name].main || []).map(branch => (branch || []).map(l => l.node));
+  assert.deepStrictEqual(next('Ensure CSV Document'), [['Get Parse Cache']]);
+  assert.deepStrictEqual(next('Ensure XLSX Document'), [['Get Parse Cache']]);
+  assert.deepStrictEqual(next('Get Parse Cache'), [['Begin Upload']]);
+  assert.deepStrictEqual(next('Begin Upload'), [['Check Parse Cache']]);
+  assert.deepStrictEqual(next('Parse Cache Hit?'), [['Merge Upload?', 'Count Parse Cache Hit'], ['Count Parse Cache Miss']]);
+  assert.deepStrictEqual(next('Count Parse Cache Miss'), [['Get File from Telegram']]);
+  assert.deepStrictEqual(next('Parse Report File'), [['Merge Upload?', 'Get Parse Cache Index']]);
+  const byName = Object.fromEntries(MAIN.nodes.map(n => [n.name, n.parameters]));
+  assert.strictEqual(byName['Count Parse Cache Hit'].operation, 'incr');
+  assert.strictEqual(byName['Count Parse Cache Miss'].operation, 'incr');
+  assert.strictEqual(byName['Get Parse Cache Index'].key, PARSE_CACHE_INDEX_KEY);
+  assert.strictEqual(byName['Save Parse Cache'].expire, true);
+  assert.strictEqual(byName['Save Parse Cache'].ttl, '={{ $json.ttl }}');
+  for (const name of ['Ensure CSV Document', 'Ensure XLSX Document']) {
+    const regions = [...byName[name].jsCode.matchAll(/\/\/ #region (\S+)/g)].map(m => m[1]);
+    assert.deepStrictEqual(regions, ['src/parse-cache-key.js'], `${name} inlines only the key helper`);
+  }
+  console.log('✅ Lookup before download, hit → session write, miss → download + store');
+}
+
+async function testRepeatUploadUsesCache() {
+  const buf = fs.readFileSync(SAMPLES.FBO);
+  const [ensured] = await runCodeNode(MAIN, 'Ensure CSV Document', {
+    input: { user_id: '42', chat_id: '42', document: DOC },
+    nodes: { 'Extract User Data': { user_id: '42', chat_id: '42', document: DOC } },
+  });
+  const key = ensured.json.parse_cache_key;
+  assert.strictEqual(key, parseCacheKey(DOC));
+
+  // Первая загрузка: промах, разбор, запись в кэш
+  // Check Parse Cache идёт после Begin Upload (INCR): ответ GET берёт у Get Parse Cache
+  const [miss] = await runCodeNode(MAIN, 'Check Parse Cache', {
+    input: { 'ozon:user:{42}:upload': 1 },
+    nodes: { 'Extract User Data': { user_id: '42', chat_id: '42' }, 'Get Parse Cache': { ...ensured.json, value: null } },
+  });
+  assert.strictEqual(miss.json.hit, false);
+  const [parsed] = await runCodeNode(MAIN, 'Parse Report File', {
+    input: [{ json: {}, binary: { data: { data: buf.toString('base64') } } }],
+    nodes: { 'Extract User Data': { user_id: '42', chat_id: '42' } },
+  });
+  const stored = await runCodeNode(MAIN, 'Plan Parse Cache', {
+    input: { ...parsed.json, value: null },
+    nodes: { 'Check Parse Cache': miss.json, Config: {}, 'Parse Report File': parsed.json },
+  });
+  assert.strictEqual(stored.length, 1);
+  const plan = stored[0].json;
+  assert.strictEqual(plan.key, key);
+  assert.strictEqual(plan.ttl, 259200);
+  assert.strictEqual(JSON.parse(plan.index).entries[key].bytes, Buffer.byteLength(plan.payload));
+  const evicted = await runCodeNode(MAIN, 'Evicted Parse Cache', { input: {}, nodes: { 'Plan Parse Cache': plan } });
+  assert.deepStrictEqual(evicted, []);
+
+  // Вторая загрузка другим менеджером: попадание, тот же результат без разбора
+  const other = { user_id: '77', chat_id: '77' };
+  const [hit] = await runCodeNode(MAIN, 'Check Parse Cache', {
+    input: { 'ozon:user:{77}:upload': 1 },
+    nodes: { 'Extract User Data': other, 'Get Parse Cache': { value: plan.payload, parse_cache_key: key } },
+  });
+  assert.strictEqual(hit.json.hit, true);
+  for (const field of ['reportType', 'availableDates', 'totalRecords', 'schema', 'meta', 'agg', 'hist', 'columns']) {
+    assert.deepStrictEqual(hit.json[field], parsed.json[field], field);
+  }
+  assert.strictEqual(hit.json.user_id, '77');
+  assert.strictEqual(hit.json.chat_id, '77');
+
+  const [month] = await runCodeNode(MAIN, 'Calc Initial Month', {
+    input: hit.json,
+    nodes: { 'Extract User Data': other, 'Check Parse Cache': hit.json },
+  });
+  assert.strictEqual(month.json.month, parsed.json.meta.maxMonth);
+
+  const [touched] = await runCodeNode(MAIN, 'Touch Parse Cache Index', {
+    input: { value: plan.index },
+    nodes: { 'Check Parse Cache': hit.json },
+  });
+  assert.ok(JSON.parse(touched.json.index).entries[key].at >= JSON.parse(plan.index).entries[key].at);
+  console.log(`✅ Repeat upload by another user: session from cache (${parsed.json.totalRecords} records, ${(plan.payload.length / 1024).toFixed(0)} KB payload)`);
+
+  // Бюджет меньше текущих записей: старая запись вытесняется
+  const index = JSON.stringify({ v: 1, bytes: 0, entries: { 'ozon:parse:f:old': { bytes: MB / 4, at: 1, exp: Date.now() + 60000 } } });
+  const [tight] = await runCodeNode(MAIN, 'Plan Parse Cache', {
+    input: { ...parsed.json, value: index },
+    nodes: { 'Check Parse Cache': miss.json, Config: { PARSE_CACHE_BUDGET_MB: (plan.payload.length + 1024) / MB }, 'Parse Report File': parsed.json },
+  });
+  assert.deepStrictEqual(tight.json.evict, ['ozon:parse:f:old']);
+  const dels = await runCodeNode(MAIN, 'Evicted Parse Cache', { input: {}, nodes: { 'Plan Parse Cache': tight.json } });
+  assert.deepStrictEqual(dels.map(i => i.json.key), ['ozon:parse:f:old']);
+  const none = await runCodeNode(MAIN, 'Plan Parse Cache', {
+    input: { ...parsed.json, value: null },
+    nodes: { 'Check Parse Cache': miss.json, Config: { PARSE_CACHE_BUDGET_MB: 0.001 }, 'Parse Report File': parsed.json },
+  });
+  assert.deepStrictEqual(none, [], 'report larger than the budget is not cached');
+  console.log('✅ Plan Parse Cache evicts LRU entries over PARSE_CACHE_BUDGET_MB and skips oversize reports');
+}
+
+async function main() {
+  console.log('🎯 PARSE CACHE TESTS\n');
+  testLruAndTtl();
+  testHelpers();
+  testWiring();
+  await testRepeatUploadUsesCache();
+  console.log('\n✅ All parse cache tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,70 @@
+#!/usr/bin/env node
+/**
+ * Проверка колоночного формата records (src/record-columns.js):
+ * колонки из «Parse Report File» после JSON → decode дают те же records,
+ * что эталонный маппинг строк (scripts/lib/reference-records.js).
+ */
+
+const assert = require('assert');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES, loadReportRows, generateReport } = require('./lib/synthetic-report');
+const { referenceRecords } = require('./lib/reference-records');
+const { mskMinute, encodeRecords, decodeColumns, decodeRecords, readRecords } = require('../src/record-columns');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+
+function parseAsMsk(s) {
+  const t = mskMinute(s);
+  return t === -1 ? null : new Date(t * 60000);
+}
+
+async function testRoundTrip(label, rows) {
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', { input: rows, nodes: USER });
+  const { columns, reportType } = out.json;
+  const records = referenceRecords(rows);
+  const stored = JSON.parse(JSON.stringify(columns));
+  assert.strictEqual(stored.reportType, reportType);
+  const decoded = decodeRecords(stored);
+  assert.strictEqual(decoded.length, records.length);
+  records.forEach((r, i) => {
+    const d = decoded[i];
+    for (const f of ['order_id', 'sku', 'quantity', 'price', 'status']) assert.strictEqual(d[f], r[f], `${label} #${i}.${f}`);
+    const a = parseAsMsk(r.created_at), b = parseAsMsk(d.created_at);
+    assert.strictEqual(b && b.toISOString().slice(0, 16), a && a.toISOString().slice(0, 16), `${label} #${i}.created_at`);
+  });
+  const json = Buffer.byteLength(JSON.stringify({ reportType, records, totalRecords: records.length }));
+  const col = Buffer.byteLength(JSON.stringify(columns));
+  console.log(`✅ ${label}: ${records.length} records round-trip (${(json / records.length).toFixed(0)} → ${(col / records.length).toFixed(1)} B/record)`);
+}
+
+function testEdgeCases() {
+  const records = [
+    { order_id: '1', sku: 'A', quantity: 1, price: 0.1 + 0.2, created_at: '01.10.2025 7:26', status: 'доставлен' },
+    { order_id: '1', sku: 'B', quantity: 1.5, price: 10, created_at: 'не дата', status: '' },
+    { order_id: '2', sku: 'A', quantity: 70000, price: -5, created_at: '2025-09-30 21:00:00', status: 'возврат' },
+  ];
+  const enc = encodeRecords(records, { reportType: 'FBO' });
+  assert.strictEqual(enc.scale.price, 1, '0.1+0.2 is not representable in kopecks → rubles f64');
+  const c = decodeColumns(enc);
+  assert.ok(c.quantity instanceof Float64Array);
+  assert.deepStrictEqual(Array.from(c.t), [mskMinute('01.10.2025 7:26'), -1, mskMinute('2025-09-30 21:00:00')]);
+  const back = decodeRecords(enc);
+  assert.deepStrictEqual(back.map(r => [r.quantity, r.price, r.created_at]), [[1, 0.1 + 0.2, '2025-10-01 07:26:00'], [1.5, 10, ''], [70000, -5, '2025-09-30 21:00:00']]);
+  assert.deepStrictEqual(readRecords({ records }), records, 'legacy {records} value');
+  assert.deepStrictEqual(readRecords(null), []);
+  console.log('✅ Edge cases: f64 fallback, unparsable dates, legacy values');
+}
+
+async function main() {
+  console.log('🎯 RECORD COLUMNS TESTS\n');
+  testEdgeCases();
+  await testRoundTrip('FBO sample', loadReportRows(SAMPLES.FBO));
+  await testRoundTrip('FBS sample', loadReportRows(SAMPLES.FBS));
+  await testRoundTrip('FBO synthetic', generateReport({ rows: 5000, type: 'FBO' }).rows);
+  await testRoundTrip('FBS synthetic', generateReport({ rows: 5000, type: 'FBS' }).rows);
+  console.log('\n✅ All record columns tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/redis_audit.py against an in-memory client: bytes per
+pattern add up to the keyspace, the biggest sessions and keys without TTL
+are ranked, orphaned UI message ids are found, round trips stay bounded per
+batch and nothing is written.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import redis_audit  # noqa: E402
+from redis_audit import OTHER, audit, classify  # noqa: E402
+from redis_standin import RedisStandin  # noqa: E402
+
+
+def populated():
+    """Two live sessions (7, 42), legacy and untagged keys of 42, UI ids of users 98/99 without state."""
+    r = RedisStandin()
+    keys = {
+        'ozon:acl:42': ('3', -1),
+        'ozon:parse:index': ('[]', -1),
+        'ozon:parse:stats:hit': ('5', -1),
+        'ozon:user:{42}': ({'acl': '3'}, -1),
+        'ozon:user:{7}': ({'acl': '1'}, 1000),
+        'ozon:user:{42}:upload': ('2', -1),
+        'ozon:user:{7}:taps': (['1760000000000|t|2025-09-01|a'], -1),
+        'ozon:sess:{42}:csv': ('x' * 5000, -1),
+        'ozon:sess:{42}:agg': ('a' * 900, 3600),
+        'ozon:sess:{7}:csv': ('c' * 20000, 3600),
+        'ozon:sess:{7}:hist': ('h' * 9000, -1),
+        'ozon:parse:f:AgADabc': ('{}', 3600),
+        'ozon:ui:{42}:calendar:message_id': ('11', 3600),
+        'ozon:ui:{7}:menu:message_id': ('12:0a0b0c0d.01020304', 3600),
+        'ozon:ui:{99}:calendar:message_id': ('13', 3600),
+        'ozon:ui:{98}:menu:message_id': ('14', -1),
+        'files:42': ('[]', -1),
+        'ozon:sess:42:agg': ('{}', -1),
+        'unrelated:key': ('v', -1),
+    }
+    for key, (value, ttl) in keys.items():
+        if isinstance(value, list):
+            r.rpush(key, *value)
+        elif isinstance(value, dict):
+            r.hset(key, mapping=value)
+        else:
+            r.set(key, value)
+        if ttl != -1:
+            r.expire(key, ttl)
+    r.round_trips = r.ops = 0
+    return r
+
+
+def snapshot(r):
+    return {k: (v, r.ttl(k)) for k, v in r.data.items()}
+
+
+def test_classify():
+    assert classify('ozon:sess:{42}:csv') == ('ozon:sess:{<uid>}:csv', '42', True)
+    assert classify('ozon:acl:42') == ('ozon:acl:<uid>', '42', False)
+    assert classify('ozon:acl:whitelist:42')[0] == 'ozon:acl:<legacy>'
+    for legacy in ('ozon:acl:admins', 'ozon:acl:superadmins', 'ozon:acl:admin', 'ozon:acl:superuser'):
+        assert classify(legacy) == ('ozon:acl:<legacy>', None, False), legacy
+    assert classify('ozon:acl:nobody')[0] == 'ozon:*'
+    assert classify('ozon:ui:{42}:calendar:message_id') == ('ozon:ui:{<uid>}:<key>:message_id', '42', True)
+    assert classify('ozon:ui:42:calendar_msg_id')[0] == 'ozon:ui:<uid>:calendar_msg_id'
+    assert classify('ozon:sess:42:csv') == ('ozon:user|sess|ui:<uid>:* (untagged)', '42', False)
+    assert classify('selectedDates:42') == ('selectedDates:<uid>', '42', False)
+    assert classify('ozon:parse:f:AgADabc') == ('ozon:parse:f:<file_unique_id>', None, True)
+    assert classify('ozon:something:new')[0] == 'ozon:*'
+    assert classify('unrelated:key') == (OTHER, None, False)
+
+
+def test_audit_report():
+    r = populated()
+    before = snapshot(r)
+    report = audit(r, batch=4, top=2, now=1760000000)
+    assert snapshot(r) == before, 'the audit only reads'
+    sizes = {k: r.memory_usage(k) for k in r.data}
+    assert report['at'] == 1760000000
+    assert report['scanned'] == len(sizes)
+    assert report['bytes'] == sum(sizes.values())
+    assert sum(p['keys'] for p in report['patterns'].values()) == len(sizes)
+    assert sum(p['bytes'] for p in report['patterns'].values()) == report['bytes']
+
+    csv = report['patterns']['ozon:sess:{<uid>}:csv']
+    assert csv['keys'] == 2 and csv['maxKey'] == 'ozon:sess:{7}:csv' and csv['maxBytes'] == sizes['ozon:sess:{7}:csv']
+    assert csv['noTtl'] == {'keys': 1, 'bytes': sizes['ozon:sess:{42}:csv']}
+    assert list(report['patterns'])[0] == 'ozon:sess:{<uid>}:csv', 'patterns are ordered by bytes'
+    assert report['patterns'][OTHER]['keys'] == 1
+
+    assert report['users'] == 4  # 42, 7, 99, 98; ACL alone does not make a session
+    top = report['sessions']
+    assert [s['uid'] for s in top] == ['7', '42']
+    seven = [k for k in sizes if '{7}' in k and not k.startswith('ozon:acl:')]
+    assert top[0]['bytes'] == sum(sizes[k] for k in seven) and top[0]['keys'] == len(seven)
+    assert top[0]['parts']['sess:csv'] == sizes['ozon:sess:{7}:csv']
+    assert top[1]['parts']['files'] == sizes['files:42']
+    assert top[1]['parts']['user|sess|ui:* (untagged)'] == sizes['ozon:sess:42:agg']
+
+    assert [k['key'] for k in report['noTtl']] == ['ozon:sess:{7}:hist', 'ozon:sess:{42}:csv']
+    assert 'ozon:acl:42' not in [k['key'] for k in audit(r, top=100)['noTtl']], 'ACL never expires'
+
+    assert report['orphans'] == {
+        'keys': 2,
+        'bytes': sizes['ozon:ui:{99}:calendar:message_id'] + sizes['ozon:ui:{98}:menu:message_id'],
+        'sample': ['ozon:ui:{98}:menu:message_id', 'ozon:ui:{99}:calendar:message_id'],
+    }
+
+
+def test_round_trips_bounded_per_batch():
+    r = populated()
+    report = audit(r, batch=4)
+    assert r.round_trips <= 3 * report['batches']
+    assert r.ops <= report['batches'] + 2 * report['scanned'] + report['scanned']
+
+
+def test_match_and_samples_passed_through():
+    r = populated()
+    seen = []
+    memory_usage = r.memory_usage
+    r.memory_usage = lambda key, samples=None: seen.append(samples) or memory_usage(key)
+    report = audit(r, batch=100, samples=0, match='ozon:sess:*')
+    assert set(report['patterns']) == {'ozon:sess:{<uid>}:csv', 'ozon:sess:{<uid>}:agg', 'ozon:sess:{<uid>}:hist',
+                                       'ozon:user|sess|ui:<uid>:* (untagged)'}
+    assert seen and set(seen) == {0}
+
+
+def test_json_output(monkeypatch, capsys):
+    r = populated()
+    monkeypatch.setattr(redis_audit, 'connect', lambda: r)
+    assert redis_audit.main(['redis_audit.py', '--json', '--top=1']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert [s['uid'] for s in report['sessions']] == ['7']
+    assert report['orphans']['keys'] == 2
+    assert redis_audit.main(['redis_audit.py']) == 0
+    assert 'Orphaned UI message ids: 2' in capsys.readouterr().out
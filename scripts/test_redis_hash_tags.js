@@ -0,0 +1,111 @@
+#!/usr/bin/env node
+/**
+ * Проверка ключей пользователя с hash tag (scripts/redis_keys.py): слот
+ * считается так же, как в Redis Cluster и в Python, каждая Redis-нода всех
+ * workflow пишет ключ пользователя с тегом (и тот, что считает Code-нода
+ * подпроцесса), а ключи каждого маршрута
+ * основного workflow (кроме ozon:acl:* и общего ozon:parse:*) лежат в одном
+ * слоте — на одном шарде.
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { MemoryRedis, runWorkflow } = require('./lib/n8n-runner');
+const { SAMPLES } = require('./lib/synthetic-report');
+const { crc16, keySlot, slotNode } = require('./lib/redis-cluster');
+const { userStateKey, readUserState } = require('../src/user-state');
+const { aclKey, ACL_WHITELIST, ACL_ADMIN } = require('../src/acl-bits');
+const { dateTapsKey } = require('../src/date-taps');
+
+const DIR = path.join(__dirname, '..', 'workflows');
+const MAIN = loadWorkflowFile(path.join(DIR, 'ozon-telegram-bot.json'));
+const CONFIG = { TELEGRAM_BOT_TOKEN: 'test-token', SUPERUSER_IDS: '1', CALENDAR_COALESCE_MS: 0 };
+const USER = { id: 42 };
+const CHAT = { id: 42 };
+// Ключи не одного пользователя: права пишет админ, кэш разбора общий
+const SHARED = /^ozon:(acl|parse):/;
+
+function testSlots() {
+  // Значения из redis-cli CLUSTER KEYSLOT и scripts/redis_keys.py
+  assert.strictEqual(crc16(Buffer.from('123456789')), 0x31c3);
+  assert.deepStrictEqual(['foo', 'bar', 'hello'].map(keySlot), [12182, 5061, 866]);
+  assert.strictEqual(keySlot('ozon:sess:{42}:csv'), keySlot('42'));
+  assert.strictEqual(keySlot('{}x'), crc16(Buffer.from('{}x')) % 16384, 'an empty tag hashes the whole key');
+  assert.notStrictEqual(keySlot('a{}{b}'), keySlot('b'), 'only the first {…} counts');
+  assert.strictEqual(keySlot(userStateKey(42)), keySlot(dateTapsKey(42)));
+  assert.deepStrictEqual([0, 8191, 8192, 16383].map(s => slotNode(s, 2)), [0, 0, 1, 1]);
+  console.log('✅ keySlot: CRC16 of the hash tag, same slots as Redis Cluster and redis_keys.py');
+}
+
+// Ключ, который Code-нода считает сама: как получить его для пользователя 42
+const COMPUTED_KEYS = {
+  'ozord_ui_orchestrator.n8n.json': async wf => (await runCodeNode(wf, 'Compute Redis Keys', {
+    input: { chat_id: 42, user_id: 42, key: 'calendar', text: 'calendar' },
+  }))[0].json.uiKey,
+};
+
+async function testWorkflowKeys() {
+  let checked = 0;
+  let computed = 0;
+  for (const file of fs.readdirSync(DIR).filter(f => f.endsWith('.json'))) {
+    const wf = loadWorkflowFile(path.join(DIR, file));
+    for (const node of wf.nodes.filter(n => n.type === 'n8n-nodes-base.redis')) {
+      const key = node.parameters.operation === 'push' ? node.parameters.list : node.parameters.key;
+      const where = `${file} → ${node.name}: ${key}`;
+      if (/^=?ozon:/.test(key)) {
+        if (SHARED.test(key.replace(/^=/, ''))) continue;
+        assert.match(key, /^=ozon:(user|sess|ui):\{\{ '\{' \+ .+ \+ '\}' \}\}(:|$)/, where);
+        checked++;
+        continue;
+      }
+      // Ключ из выражения — только общий кэш разбора основного workflow или ключ из COMPUTED_KEYS
+      if (file === 'ozon-telegram-bot.json' && /parse_cache_key|\$json\.key\b/.test(key)) continue;
+      assert.ok(COMPUTED_KEYS[file], `${where}: a computed key needs a COMPUTED_KEYS entry`);
+      const resolved = await COMPUTED_KEYS[file](wf);
+      assert.match(resolved, /^ozon:(user|sess|ui):\{42\}:/, where);
+      assert.strictEqual(keySlot(resolved), keySlot('42'), where);
+      computed++;
+    }
+  }
+  assert.ok(checked > 40, `${checked} per-user Redis keys`);
+  console.log(`✅ ${checked} per-user keys in Redis nodes and ${computed} computed in Code nodes carry the {<uid>} hash tag`);
+}
+
+async function testRouteSlots() {
+  const redis = new MemoryRedis();
+  redis.set(aclKey(42), String(ACL_WHITELIST | ACL_ADMIN));
+  let messageId = 500;
+  const telegram = async method => ({ ok: true, result: method === 'sendMessage' ? { message_id: ++messageId } : true });
+  const files = { 'doc-fbo': fs.readFileSync(SAMPLES.FBO) };
+  const send = async (label, update) => {
+    const run = await runWorkflow(MAIN, { update, redis, telegram, files, config: CONFIG });
+    if (run.error) throw run.error;
+    const keys = [...new Set(run.trace.flatMap(t => t.keys || []))];
+    const own = keys.filter(k => !SHARED.test(k));
+    assert.ok(own.length, `${label}: touches per-user keys`);
+    for (const key of own) assert.strictEqual(keySlot(key), keySlot('42'), `${label}: ${key} is in the user's slot`);
+    return own.length;
+  };
+  const tap = (label, data) => send(label, { callback_query: { id: 'cb', from: USER, message: { message_id: 1, chat: CHAT }, data } });
+
+  const routes = [];
+  routes.push(['/start', await send('/start', { message: { from: USER, chat: CHAT, text: '/start' } })]);
+  routes.push(['upload', await send('upload', { message: { from: USER, chat: CHAT, document: { file_id: 'doc-fbo', file_unique_id: 'u-fbo', file_name: 'orders.csv', mime_type: 'text/csv' } } })]);
+  const [day] = readUserState(redis.hgetall(userStateKey(42))).meta.availableDates;
+  for (const [label, data] of [['date tap', `date:${day}`], ['cal:open', 'cal:open'], ['menu', 'menu:orders'], ['dates:done', 'dates:done'], ['file:clear', 'file:clear']]) {
+    routes.push([label, await tap(label, data)]);
+  }
+  console.log(`✅ Every route stays in one slot: ${routes.map(([r, n]) => `${r} ${n} keys`).join(', ')}`);
+}
+
+async function main() {
+  console.log('🎯 REDIS HASH TAG TESTS\n');
+  testSlots();
+  await testWorkflowKeys();
+  await testRouteSlots();
+  console.log('\n✅ All hash tag tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
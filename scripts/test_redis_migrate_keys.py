@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/redis_migrate_keys.py against the in-memory stand-in
+(scripts/redis_standin.py): what each legacy value turns into, that the
+result reads back through src/user-state.js and src/date-taps.js (skipped
+without node), that an interrupted run resumes to the same end state, dry-run,
+throttling, a million synthetic keys, and the rename of untagged per-user
+keys to the hash-tagged layout.
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from redis_migrate_keys import migrate, plan_user  # noqa: E402
+from redis_keys import key_slot  # noqa: E402
+from redis_standin import RedisStandin  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOW_MS = 1760000000000
+NOW_SEC = NOW_MS // 1000
+DAY_SEC = 86400
+
+
+def fill(r, users, seed=7):
+    """
+    Legacy keys for users 0..users-1 (selectedDates/message_id/files in every
+    form the migrator reads) plus the current keys a live bot has next to
+    them. Returns the expected per-user outcome counts.
+    """
+    rnd = random.Random(seed)
+    expected = {'migrated': 0, 'superseded': 0, 'stale': 0, 'invalid': 0, 'files': 0}
+    for uid in range(users):
+        kind = uid % 10
+        dates = [f'2025-09-{d:02d}' for d in sorted(rnd.sample(range(1, 31), rnd.randint(0, 3)))]
+        if kind < 4:
+            r.set(f'selectedDates:{uid}', json.dumps(dates))
+            r.set(f'message_id:{uid}', str(1000 + uid))
+            expected['migrated'] += 1
+        elif kind < 6:
+            r.set(f'selectedDates:{uid}', json.dumps({'dates': dates, 'createdAt': NOW_SEC - 3600}))
+            expected['migrated'] += 1
+        elif kind == 6:
+            r.set(f'message_id:{uid}', json.dumps({'message_id': 1000 + uid, 'createdAt': NOW_SEC - 2 * DAY_SEC}))
+            expected['stale'] += 1
+        elif kind == 7:
+            r.set(f'selectedDates:{uid}', json.dumps(dates))
+            # live state written before the hash tags: renamed first, then it supersedes the legacy keys
+            r.hset(f'ozon:user:{uid}', mapping={'dates': '["2025-10-01"]', 'ui_exp': str(NOW_MS + 60000)})
+            expected['superseded'] += 1
+        elif kind == 8:
+            r.set(f'selectedDates:{uid}', 'not json')
+            r.set(f'message_id:{uid}', '77')
+            expected['invalid'] += 1
+        r.set(f'files:{uid}', json.dumps({'file_id': f'f{uid}', 'createdAt': NOW_SEC}))
+        expected['files'] += 1
+        r.set(f'ozon:acl:{uid}', '1')
+    r.round_trips = r.ops = 0
+    return expected
+
+
+def snapshot(r):
+    return {k: (v, r.ttl(k)) for k, v in r.data.items()}
+
+
+def test_plan_user():
+    outcome, writes = plan_user('5', '["2025-09-02","2025-09-01","2025-09-02"]', '{"message_id": 44}', None, NOW_MS)
+    assert outcome == 'migrated'
+    by_method = {(m, a[0]): (a, k) for m, a, k in writes}
+    assert by_method[('rpush', 'ozon:user:{5}:taps')][0][1:] == (f'{NOW_MS}|t|2025-09-02|migrated', f'{NOW_MS}|t|2025-09-01|migrated')
+    fields = by_method[('hset', 'ozon:user:{5}')][1]['mapping']
+    assert fields == {'ui_exp': str(NOW_MS + 86400000), 'dates': '["2025-09-02", "2025-09-01"]', 'calendar_msg_id': '44'}
+    assert by_method[('set', 'ozon:ui:{5}:calendar:message_id')][1] == {'ex': 86400, 'nx': True}
+    assert plan_user('5', '[]', None, str(NOW_MS + 1), NOW_MS) == ('superseded', [])
+    assert plan_user('5', None, json.dumps({'message_id': 1, 'createdAt': NOW_SEC - DAY_SEC - 1}), None, NOW_MS) == ('stale', [])
+    assert plan_user('5', '["09/01/2025"]', None, None, NOW_MS) == ('invalid', [])
+    assert plan_user('5', None, 'abc', None, NOW_MS) == ('invalid', [])
+
+
+def test_migrate_end_state():
+    r = RedisStandin()
+    expected = fill(r, 200)
+    report = migrate(r, batch=16, ops_per_sec=0, now_ms=NOW_MS)
+    assert report['done'] and report['users'] == expected
+    left = {k.split(':')[0] for k in r.data if not k.startswith(('ozon:', 'files:'))}
+    assert left == {'selectedDates', 'message_id'}  # only the unreadable users (kept)
+    assert all(int(k.split(':')[1]) % 10 == 8 for k in r.data if k.startswith(('selectedDates:', 'message_id:')))
+    assert r.hget('ozon:user:{0}', 'calendar_msg_id') == '1000'
+    assert r.get('ozon:ui:{0}:calendar:message_id') == '1000' and r.ttl('ozon:ui:{0}:calendar:message_id') == 86400
+    assert r.ttl('ozon:user:{0}') == 259200
+    assert r.hgetall('ozon:user:{7}') == {'dates': '["2025-10-01"]', 'ui_exp': str(NOW_MS + 60000)}
+    assert 'ozon:user:7' not in r.data and report['retag']['renamed'] == 20
+    assert 'ozon:user:{6}' not in r.data and 'message_id:6' not in r.data
+    assert sum(1 for k in r.data if k.startswith('files:')) == 200
+
+    again = migrate(r, batch=16, ops_per_sec=0, now_ms=NOW_MS)
+    assert again['users']['migrated'] == 0 and again['users']['invalid'] == expected['invalid']
+
+
+@pytest.mark.skipif(not shutil.which('node'), reason='node is not installed')
+def test_bot_reads_migrated_state():
+    r = RedisStandin()
+    fill(r, 40)
+    migrate(r, batch=8, ops_per_sec=0, now_ms=NOW_MS)
+    users = {uid: {'hash': r.hgetall(f'ozon:user:{{{uid}}}'), 'taps': r.lrange(f'ozon:user:{{{uid}}}:taps', 0, -1),
+                   'sess': r.get(f'ozon:sess:{{{uid}}}:dates')} for uid in range(40) if uid % 10 < 6}
+    script = (
+        "const { readUserState } = require('./src/user-state');"
+        "const { foldDateTaps } = require('./src/date-taps');"
+        "const users = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "const out = {};"
+        "for (const [uid, u] of Object.entries(users)) {"
+        f"  const ctx = readUserState(u.hash, {{ now: {NOW_MS} }});"
+        f"  out[uid] = {{ ctx: ctx.selectedDates, msg: ctx.calendarMsgId, fold: foldDateTaps(u.taps, {{ now: {NOW_MS} }}).selected }};"
+        "}"
+        "console.log(JSON.stringify(out));"
+    )
+    out = json.loads(subprocess.run(['node', '-e', script], cwd=ROOT, input=json.dumps(users), capture_output=True,
+                                    text=True, check=True).stdout)
+    for uid, u in users.items():
+        got = out[str(uid)]
+        assert got['ctx'] == got['fold'] == json.loads(u['sess'])
+        assert got['msg'] == (1000 + uid if uid % 10 < 4 else None)
+
+
+def test_interrupted_run_resumes(tmp_path):
+    state = str(tmp_path / 'state.json')
+    whole, parts = RedisStandin(), RedisStandin()
+    fill(whole, 300)
+    expected = fill(parts, 300)
+    migrate(whole, batch=32, ops_per_sec=0, now_ms=NOW_MS)
+
+    runs = 0
+    while True:
+        runs += 1
+        report = migrate(parts, batch=32, ops_per_sec=0, now_ms=NOW_MS, state_path=state, max_batches=5)
+        if report['done']:
+            break
+        assert os.path.exists(state)
+        parts.set(f'ozon:user:{{{9000 + runs}}}', 'written between runs')  # the bot keeps writing
+        parts.unlink(f'ozon:user:{{{9000 + runs}}}')
+    assert runs > 3 and not os.path.exists(state)
+    assert snapshot(parts) == snapshot(whole)
+    assert report['users'] == expected  # the report is carried over in the state file
+
+
+def test_dry_run_reports_without_writing(tmp_path):
+    r = RedisStandin()
+    expected = fill(r, 120)
+    before = snapshot(r)
+    report = migrate(r, batch=16, ops_per_sec=0, dry_run=True, now_ms=NOW_MS, state_path=str(tmp_path / 's.json'))
+    assert snapshot(r) == before and not os.listdir(tmp_path)
+    assert report['users'] == expected
+    assert report['deletedKeys'] == migrate(r, batch=16, ops_per_sec=0, now_ms=NOW_MS)['deletedKeys']
+
+
+def test_throttle_to_target_ops():
+    r = RedisStandin()
+    fill(r, 500)
+    t = [0.0]
+    sleeps = []
+
+    def sleep(sec):
+        sleeps.append(sec)
+        t[0] += sec
+
+    report = migrate(r, batch=50, ops_per_sec=1000, now_ms=NOW_MS, clock=lambda: t[0], sleep=sleep)
+    assert report['ops'] == r.ops
+    assert report['elapsedSec'] == pytest.approx(r.ops / 1000, abs=0.01)
+    assert len(sleeps) == report['batches']
+
+
+def test_million_keys():
+    r = RedisStandin()
+    expected = fill(r, 290000)
+    assert r.dbsize() >= 1000000
+    report = migrate(r, batch=1000, ops_per_sec=0, now_ms=NOW_MS)
+    assert report['done'] and report['users'] == expected
+    assert r.round_trips <= report['batches'] * 3  # SCAN + one read and one write pipeline
+    assert not any(k.startswith(('selectedDates:', 'message_id:')) and int(k.split(':')[1]) % 10 != 8 for k in r.data)
+    keys_s = report['scanned'] / max(report['elapsedSec'], 1e-9)
+    print(f"\n{report['scanned']} legacy keys of {r.dbsize()} in {report['elapsedSec']:.1f}s ({keys_s:,.0f} keys/s)")
+
+
+def test_retag_to_hash_tags():
+    r = RedisStandin()
+    r.set('ozon:sess:42:csv', 'old csv', ex=3600)
+    r.set('ozon:sess:42:agg', 'old agg')
+    r.rpush('ozon:user:42:taps', '1|t|2025-09-01|a')
+    r.set('ozon:ui:42:menu:message_id', '9:print', ex=600)
+    r.set('ozon:ui:42:calendar_msg_id', '8')
+    r.set('ozon:sess:{42}:agg', 'newer agg')
+    r.set('ozon:acl:42', '1')
+    r.set('ozon:parse:index', '[]')
+    report = migrate(r, batch=2, ops_per_sec=0, now_ms=NOW_MS)
+    assert report['retag'] == {'renamed': 3, 'superseded': 1}
+    assert r.get('ozon:sess:{42}:csv') == 'old csv' and r.ttl('ozon:sess:{42}:csv') == 3600
+    assert r.get('ozon:sess:{42}:agg') == 'newer agg'
+    assert r.lrange('ozon:user:{42}:taps', 0, -1) == ['1|t|2025-09-01|a']
+    assert r.ttl('ozon:ui:{42}:menu:message_id') == 600
+    assert sorted(r.data) == ['ozon:acl:42', 'ozon:parse:index', 'ozon:sess:{42}:agg', 'ozon:sess:{42}:csv',
+                              'ozon:ui:42:calendar_msg_id', 'ozon:ui:{42}:menu:message_id', 'ozon:user:{42}:taps']
+    assert len({key_slot(k) for k in r.data if '{42}' in k}) == 1, "a user's keys share one slot"
+
+    dry = RedisStandin()
+    dry.set('ozon:user:7', 'x')
+    assert migrate(dry, ops_per_sec=0, dry_run=True)['retag']['renamed'] == 1 and 'ozon:user:7' in dry.data
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for the hash-tagged key names (scripts/redis_keys.py) and the sharded
+client (scripts/redis_shards.py) over in-memory nodes: Redis Cluster slots,
+a user's keys on one node, pipelines in one round trip per node with replies
+in queue order, SCAN over every node, CROSSSLOT for renames between nodes,
+the sweeper and the audit giving the same result sharded as on one server,
+and a short run of the multi-node harness (scripts/bench_redis_shards.py).
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_redis_shards import measure  # noqa: E402
+from redis_audit import audit  # noqa: E402
+from redis_keys import CLUSTER_SLOTS, crc16, key_slot, session_key, slot_node, tagged_key, ui_message_key, user_key  # noqa: E402
+from redis_migrate_keys import migrate  # noqa: E402
+from redis_shards import CrossSlotError, ShardedRedis  # noqa: E402
+from redis_standin import RedisStandin  # noqa: E402
+from redis_sweeper import sweep  # noqa: E402
+from test_redis_sweeper import NOW_MS, keyspace, standin  # noqa: E402
+
+UIDS = [str(uid) for uid in range(100, 400)]
+
+
+def user_keys(uid):
+    return [user_key(uid), user_key(uid, 'upload'), user_key(uid, 'taps'), session_key(uid, 'csv'),
+            session_key(uid, 'agg'), ui_message_key(uid, 'calendar')]
+
+
+def shards(n=3):
+    return ShardedRedis([RedisStandin() for _ in range(n)])
+
+
+def populate(client, spec):
+    for key, (value, ttl) in spec.items():
+        if isinstance(value, list):
+            client.rpush(key, *value)
+        elif isinstance(value, dict):
+            client.hset(key, mapping=value)
+        else:
+            client.set(key, value)
+        if ttl != -1:
+            client.expire(key, ttl)
+    for node in getattr(client, 'nodes', [client]):
+        node.round_trips = node.ops = 0
+
+
+def test_key_slots_and_names():
+    assert crc16(b'123456789') == 0x31C3
+    assert [key_slot(k) for k in ('foo', 'bar', 'hello')] == [12182, 5061, 866]  # redis-cli CLUSTER KEYSLOT
+    assert key_slot('{}x') == crc16(b'{}x') % CLUSTER_SLOTS, 'an empty tag hashes the whole key'
+    assert key_slot('a{}{b}') != key_slot('b'), 'only the first {...} counts'
+    for uid in UIDS[:20]:
+        assert {key_slot(k) for k in user_keys(uid)} == {key_slot(uid)}
+    assert user_key(42) == 'ozon:user:{42}' and session_key(42, 'csv') == 'ozon:sess:{42}:csv'
+    assert tagged_key('ozon:sess:42:csv') == 'ozon:sess:{42}:csv'
+    assert tagged_key('ozon:user:42') == 'ozon:user:{42}'
+    assert tagged_key('ozon:ui:42:menu:message_id') == 'ozon:ui:{42}:menu:message_id'
+    assert tagged_key('ozon:user:{42}') is None and tagged_key('ozon:acl:42') is None
+    assert tagged_key('ozon:ui:42:calendar_msg_id') is None, 'nothing reads it; the sweeper deletes it'
+    assert [slot_node(s, 4) for s in (0, 4095, 4096, 16383)] == [0, 0, 1, 3]
+
+
+def test_users_stay_on_one_node():
+    r = shards()
+    for uid in UIDS:
+        for key in user_keys(uid):
+            r.set(key, uid)
+    for uid in UIDS:
+        owner = r.node_for(user_key(uid))
+        assert all(owner.get(k) == uid for k in user_keys(uid))
+        assert r.get(session_key(uid, 'csv')) == uid
+    sizes = [node.dbsize() for node in r.nodes]
+    assert sum(sizes) == r.dbsize() == len(UIDS) * 6
+    assert min(sizes) > len(UIDS) * 6 / 3 * 0.7, f'users spread over the nodes: {sizes}'
+
+    keys = [user_key(uid) for uid in UIDS[:10]] + ['missing:key']
+    assert r.exists(*keys) == 10
+    assert r.unlink(*keys) == 10 and r.exists(*keys) == 0
+
+
+def test_pipeline_one_round_trip_per_node_in_queue_order():
+    r = shards()
+    pipe = r.pipeline(transaction=False)
+    for uid in UIDS[:30]:
+        pipe.set(session_key(uid, 'agg'), f'agg-{uid}')
+    assert pipe.execute() == [True] * 30
+    assert sum(node.round_trips for node in r.nodes) == 3
+
+    for node in r.nodes:
+        node.round_trips = 0
+    uid = UIDS[0]
+    route = r.pipeline(transaction=False)
+    route.hset(user_key(uid), mapping={'dates': '[]'}).rpush(user_key(uid, 'taps'), 'a', 'b').lrange(user_key(uid, 'taps'), 0, -1)
+    route.get(session_key(uid, 'agg')).expire(user_key(uid), 60)
+    assert route.execute() == [1, 2, ['a', 'b'], f'agg-{uid}', True]
+    assert [node.round_trips for node in r.nodes].count(1) == 1, "a user's route goes to one node"
+
+    mixed = r.pipeline(transaction=False)
+    mixed.get(session_key(UIDS[1], 'agg'))
+    mixed.exists(*[session_key(u, 'agg') for u in UIDS[:30]], 'missing:key')
+    mixed.get(session_key(UIDS[2], 'agg'))
+    assert mixed.execute() == [f'agg-{UIDS[1]}', 30, f'agg-{UIDS[2]}']
+    assert len(mixed) == 0
+
+
+def test_scan_walks_every_node_once():
+    r = shards(4)
+    for uid in UIDS:
+        r.set(user_key(uid), '1')
+        r.set(f'ozon:acl:{uid}', '3')
+    seen, cursor, pages = [], 0, 0
+    while True:
+        cursor, keys = r.scan(cursor=cursor, count=25)
+        seen += keys
+        pages += 1
+        if cursor == 0:
+            break
+    assert sorted(seen) == sorted(k for node in r.nodes for k in node.data)
+    assert len(seen) == len(set(seen)) == 2 * len(UIDS)
+    assert pages >= 2 * len(UIDS) // 25
+    cursor, acl = 0, []
+    while True:
+        cursor, keys = r.scan(cursor=cursor, match='ozon:acl:*', count=50)
+        acl += keys
+        if cursor == 0:
+            break
+    assert len(acl) == len(UIDS)
+
+
+def test_rename_across_nodes_is_crossslot():
+    r = shards(2)
+    uid = UIDS[0]
+    r.set(session_key(uid, 'csv'), 'x')
+    assert r.rename(session_key(uid, 'csv'), session_key(uid, 'agg'))
+    other = next(u for u in UIDS if r.node_index(user_key(u)) != r.node_index(user_key(uid)))
+    with pytest.raises(CrossSlotError):
+        r.rename(session_key(uid, 'agg'), session_key(other, 'agg'))
+    with pytest.raises(CrossSlotError):
+        r.pipeline().renamenx(session_key(uid, 'agg'), session_key(other, 'agg'))
+
+
+def test_migrate_refuses_to_retag_across_nodes():
+    # Keys are retagged on the single server before sharding (docs/REDIS_SETUP.md)
+    r = shards(4)
+    for uid in UIDS[:40]:
+        r.set(f'ozon:sess:{uid}:csv', 'x')
+    with pytest.raises(CrossSlotError):
+        migrate(r, batch=100, ops_per_sec=0)
+
+
+def test_sweeper_and_audit_match_a_single_server():
+    single, sharded = standin(keyspace()), shards(3)
+    populate(sharded, keyspace())
+    assert audit(sharded, batch=4, now=1760000000)['patterns'] == audit(single, batch=4, now=1760000000)['patterns']
+
+    expected, got = sweep(single, batch=4, now_ms=NOW_MS), sweep(sharded, batch=4, now_ms=NOW_MS)
+    assert {k: got[k] for k in ('scanned', 'expire', 'delete')} == {k: expected[k] for k in ('scanned', 'expire', 'delete')}
+    merged = {k: (v, n.ttl(k)) for n in sharded.nodes for k, v in n.data.items()}
+    assert merged == {k: (v, single.ttl(k)) for k, v in single.data.items()}
+
+
+def test_harness_one_node_per_route():
+    r = measure('standin', 2, workers=2, routes=25, users=40, service_us=0)
+    assert r['routes'] == 50 and r['rate'] > 0
+    assert r['nodesPerRoute'] == 1
+    assert sum(r['keys']) == 80 and min(r['keys']) > 0
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/redis_sweeper.py against an in-memory client: which keys
+get a TTL or are deleted, that ACL and shared parse-cache keys are never
+touched, dry-run changes nothing, and round trips stay bounded per batch.
+Also that every Redis node sets its TTL the way n8n reads it.
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from redis_standin import RedisStandin  # noqa: E402
+from redis_sweeper import SESSION_TTL_SEC, SPILL_GRACE_SEC, UI_TTL_SEC, classify, sweep, sweep_spill  # noqa: E402
+
+WORKFLOWS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'workflows')
+NOW_MS = 1760000000000
+DAY_MS = 86400 * 1000
+
+
+def standin(keys):
+    """Stand-in Redis from {key: (value, ttl)}: str, list or dict values, ttl -1 for none."""
+    r = RedisStandin()
+    for key, (value, ttl) in keys.items():
+        if isinstance(value, list):
+            r.rpush(key, *value)
+        elif isinstance(value, dict):
+            r.hset(key, mapping=value)
+        else:
+            r.set(key, value)
+        if ttl != -1:
+            r.expire(key, ttl)
+    r.round_trips = r.ops = 0
+    return r
+
+
+def snapshot(r):
+    return {k: (v, r.ttl(k)) for k, v in r.data.items()}
+
+
+def keyspace():
+    return {
+        'ozon:acl:42': ('3', -1),
+        'ozon:parse:index': ('[]', -1),
+        'ozon:parse:stats:hit': ('5', -1),
+        'ozon:user:{42}': ({'acl': '3'}, -1),
+        'ozon:user:{7}': ({'acl': '1'}, 1000),
+        'ozon:user:{42}:upload': ('2', -1),
+        'ozon:user:{42}:taps': ([f'{NOW_MS - 2 * DAY_MS}|t|2025-09-01|a'], -1),
+        'ozon:user:{7}:taps': ([f'{NOW_MS - DAY_MS}|t|2025-09-01|a', f'{NOW_MS - 60000}|t|2025-09-02|b'], -1),
+        'ozon:sess:{42}:csv': ('x' * 5000, -1),
+        'ozon:sess:{42}:dates': ('[]', -1),
+        'ozon:sess:{7}:meta': ('{}', 3600),
+        'ozon:parse:f:AgADabc': ('{}', -1),
+        'ozon:ui:{42}:calendar:message_id': ('11', -1),
+        'ozon:ui:42:calendar_msg_id': ('11', -1),
+        'files:42': ('[]', -1),
+        'selectedDates:42': ('[]', 500),
+        'message_id:42': ('11', -1),
+        'ozon:cache:42': ('{}', -1),
+        'ozon:sess:9:csv': ('{}', 3600),
+        'unrelated:key': ('v', -1),
+    }
+
+
+def test_classify():
+    assert classify('ozon:acl:42') == ('keep', None)
+    assert classify('ozon:parse:index') == ('keep', None)
+    assert classify('ozon:user:{42}') == ('expire', SESSION_TTL_SEC)
+    assert classify('ozon:sess:{42}:dates') == ('expire', UI_TTL_SEC)
+    assert classify('ozon:ui:{42}:calendar:message_id') == ('expire', UI_TTL_SEC)
+    assert classify('ozon:ui:42:calendar_msg_id')[0] == 'legacy'
+    assert classify('selectedDates:42')[0] == 'legacy'
+    assert classify('ozon:user:{42}:taps')[0] == 'stale'
+    assert classify('ozon:sess:42:csv')[0] == 'legacy', 'written before the hash tags'
+    assert classify('something:else') == ('keep', None)
+
+
+def test_sweep_expires_and_deletes():
+    r = standin(keyspace())
+    before = snapshot(r)
+    report = sweep(r, batch=4, now_ms=NOW_MS)
+    after = snapshot(r)
+    deleted = set(before) - set(after)
+    assert deleted == {'ozon:user:{42}:taps', 'ozon:ui:42:calendar_msg_id', 'files:42', 'selectedDates:42',
+                       'message_id:42', 'ozon:cache:42', 'ozon:sess:9:csv'}
+    expired = {k for k in after if after[k][1] != before[k][1]}
+    assert expired == {'ozon:user:{42}', 'ozon:user:{42}:upload', 'ozon:sess:{42}:csv', 'ozon:sess:{42}:dates',
+                       'ozon:parse:f:AgADabc', 'ozon:ui:{42}:calendar:message_id'}
+    assert r.ttl('ozon:sess:{42}:csv') == SESSION_TTL_SEC
+    assert r.ttl('ozon:sess:{42}:dates') == UI_TTL_SEC
+    for untouched in ('ozon:acl:42', 'ozon:parse:index', 'ozon:parse:stats:hit', 'ozon:user:{7}', 'ozon:user:{7}:taps',
+                      'ozon:sess:{7}:meta', 'unrelated:key'):
+        assert after[untouched] == before[untouched]
+    assert report['scanned'] == len(before)
+    assert report['expire']['keys'] == 6 and report['delete']['keys'] == 7
+    assert report['expire']['bytes'] > 5000
+
+    again = sweep(r, batch=4, now_ms=NOW_MS)
+    assert again['expire']['keys'] == 0 and again['delete']['keys'] == 0
+
+
+def test_dry_run_changes_nothing():
+    r = standin(keyspace())
+    before = snapshot(r)
+    report = sweep(r, batch=100, dry_run=True, now_ms=NOW_MS)
+    assert snapshot(r) == before
+    assert report['dryRun'] and report['delete']['keys'] == 7
+
+
+def test_round_trips_bounded_per_batch():
+    r = standin({f'ozon:user:{{{i}}}': ({'acl': '1'}, -1) for i in range(1000)})
+    pauses = []
+    report = sweep(r, batch=100, pause_ms=20, now_ms=NOW_MS, sleep=pauses.append)
+    assert report['batches'] == 10 and report['expire']['keys'] == 1000
+    assert r.round_trips == 10 * 4  # SCAN + TTL + MEMORY USAGE + EXPIRE per batch
+    assert pauses == [0.02] * 9
+
+
+def test_match_limits_the_walk():
+    r = standin(keyspace())
+    report = sweep(r, batch=100, match='ozon:user:*', now_ms=NOW_MS)
+    assert report['delete']['keys'] == 1
+    assert 'files:42' in r.data
+
+
+def test_spill_files_follow_the_session(tmp_path):
+    now = 1760000000
+    pointer = lambda name: json.dumps({'v': 1, 'enc': 'spill', 'dir': str(tmp_path), 'file': name})
+    r = standin({
+        'ozon:sess:{42}:csv': (pointer('42-3.ocol'), SESSION_TTL_SEC),
+        'ozon:sess:{7}:csv': ('{"v":1,"enc":"columns"}', SESSION_TTL_SEC),
+    })
+    files = {'42-3.ocol': 0, '42-2.ocol': 0, '7-1.ocol': 0, '9-4.ocol': 0, '9-5.ocol.tmp': 0,
+             '11-1.ocol': now - 60, 'notes.txt': 0}
+    for name, mtime in files.items():
+        (tmp_path / name).write_bytes(b'x' * 100)
+        os.utime(tmp_path / name, (mtime, mtime))
+    dry = sweep_spill(r, str(tmp_path), batch=2, dry_run=True, now=now)
+    assert dry == {'files': 6, 'delete': {'files': 4, 'bytes': 400}}
+    assert len(os.listdir(tmp_path)) == len(files)
+    r.round_trips = 0
+    assert sweep_spill(r, str(tmp_path), batch=2, now=now)['delete']['files'] == 4
+    assert r.round_trips == 3, 'one pipelined GET per batch'
+    # 42-3 is the session's current file; 11-1 is younger than the grace period (upload in flight)
+    assert sorted(os.listdir(tmp_path)) == ['11-1.ocol', '42-3.ocol', 'notes.txt']
+    assert sweep_spill(r, str(tmp_path), now=now + SPILL_GRACE_SEC)['delete']['files'] == 1
+
+
+def test_workflows_set_native_ttls():
+    """n8n's Redis node reads expire/ttl; options.ttl is silently ignored."""
+    session_sets = 0
+    for path in glob.glob(os.path.join(WORKFLOWS, '*.json')):
+        with open(path, encoding='utf-8') as f:
+            nodes = json.load(f)['nodes']
+        for node in nodes:
+            if node['type'] != 'n8n-nodes-base.redis':
+                continue
+            p = node['parameters']
+            where = f"{os.path.basename(path)} -> {node['name']}"
+            assert 'ttl' not in p.get('options', {}), where
+            if p.get('expire'):
+                assert p.get('ttl'), where
+            if p['operation'] == 'set' and re.search(r'ozon:(sess|ui|user):', p.get('key', '')):
+                assert p.get('expire') is True and p.get('ttl'), where
+                session_sets += 1
+    assert session_sets >= 8
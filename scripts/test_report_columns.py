@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/report_columns.py: round-trip on the sample exports and
+byte-for-byte compatibility with src/record-columns.js (skipped without node).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_columns import (  # noqa: E402
+    decode_columns, decode_records, encode_records, load_report_records, msk_minute, read_records,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = [os.path.join(ROOT, 'orders-2025-fbo-test.csv'), os.path.join(ROOT, 'orders-2025-fbs-test.csv')]
+
+
+def test_msk_minute_formats():
+    # 01.10.2025 7:26 UTC == 01.10.2025 10:26 MSK
+    assert msk_minute('01.10.2025 7:26') == msk_minute('2025-10-01 07:26:00')
+    assert msk_minute('01.10.2025 7:26:00') == msk_minute('2025-10-01 07:26:00')
+    assert msk_minute('2025-09-30 21:00:00') * 60 % 86400 == 0  # MSK midnight
+    assert msk_minute('') == -1
+    assert msk_minute('не дата') == -1
+
+
+@pytest.mark.parametrize('path', SAMPLES)
+def test_round_trip(path):
+    report_type, records = load_report_records(path)
+    enc = json.loads(json.dumps(encode_records(records, report_type), ensure_ascii=False))
+    decoded = decode_records(enc)
+    assert len(decoded) == len(records)
+    for r, d in zip(records, decoded):
+        for field in ('order_id', 'sku', 'quantity', 'price', 'status'):
+            assert d[field] == r[field]
+        assert msk_minute(d['created_at']) == msk_minute(r['created_at'])
+    assert read_records(enc) == decoded
+
+
+def test_f64_fallback_and_legacy():
+    records = [
+        {'order_id': '1', 'sku': 'A', 'quantity': 1.5, 'price': 0.1 + 0.2, 'created_at': '', 'status': ''},
+        {'order_id': '2', 'sku': 'A', 'quantity': 70000, 'price': -5, 'created_at': '2025-09-30 21:00:00', 'status': 'возврат'},
+    ]
+    enc = encode_records(records, 'FBO')
+    assert enc['scale'] == {'price': 1}
+    assert enc['cols']['quantity'].startswith('f64:')
+    cols = decode_columns(enc)
+    assert list(cols['t']) == [-1, msk_minute('2025-09-30 21:00:00')]
+    assert [(r['quantity'], r['price']) for r in decode_records(enc)] == [(1.5, 0.1 + 0.2), (70000, -5)]
+    assert read_records({'records': records}) == records
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+@pytest.mark.parametrize('path', SAMPLES)
+def test_same_bytes_as_js(path):
+    report_type, records = load_report_records(path)
+    script = (
+        "const { encodeRecords } = require('./src/record-columns');"
+        "const { reportType, records } = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "process.stdout.write(JSON.stringify(encodeRecords(records, { reportType })));"
+    )
+    out = subprocess.run(
+        ['node', '-e', script], cwd=ROOT, check=True, capture_output=True,
+        input=json.dumps({'reportType': report_type, 'records': records}, ensure_ascii=False).encode('utf-8'),
+    )
+    assert json.loads(out.stdout) == encode_records(records, report_type)
@@ -0,0 +1,249 @@
+#!/usr/bin/env node
+/**
+ * Проверка агрегатного индекса ozon:sess:<uid>:agg и получасовых гистограмм
+ * ozon:sess:<uid>:hist: статистика из индекса должна совпадать с прежним
+ * расчётом по records (эталон ниже — код нод до перехода на индекс) на
+ * тестовых выгрузках и синтетическом отчёте, в том числе в окнах времени.
+ */
+
+const assert = require('assert');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES, loadReportRows, generateReport } = require('./lib/synthetic-report');
+const { referenceRecords } = require('./lib/reference-records');
+const { TIME_PRESETS, createIndexBuilder, aggregateBySku, timeWindowSlots, windowBySku } = require('../src/report-index');
+const { addDayTotal } = require('../src/session-meta');
+
+const WORKFLOWS = path.join(__dirname, '..', 'workflows');
+const MAIN = loadWorkflowFile(path.join(WORKFLOWS, 'ozon-telegram-bot.json'));
+const ENGINE = loadWorkflowFile(path.join(WORKFLOWS, 'ozord_orders_stats_engine.n8n.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+const EPS = 1e-6;
+
+// ---------------------------------------------------------------------------
+// Эталон: расчёт по records, как он был в «Calculate Stats» до индекса
+// ---------------------------------------------------------------------------
+function parseUtcToMsk(dateStr) {
+  if (!dateStr) return null;
+  let utcDate;
+  const trimmed = dateStr.trim();
+  if (/^\d{2}\.\d{2}\.\d{4} \d{1,2}:\d{2}(:\d{2})?$/.test(trimmed)) {
+    const parts = trimmed.split(' ');
+    const [d, m, y] = parts[0].split('.');
+    let time = parts[1];
+    if (time.length < 5) time = '0' + time;
+    utcDate = new Date(`${y}-${m}-${d}T${time.length === 5 ? time + ':00' : time}Z`);
+  } else if (/^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$/.test(trimmed)) {
+    utcDate = new Date(trimmed.replace(' ', 'T') + 'Z');
+  } else {
+    const t = Date.parse(dateStr);
+    if (Number.isFinite(t)) utcDate = new Date(t);
+  }
+  if (!utcDate || isNaN(utcDate)) return null;
+  return new Date(utcDate.getTime() + 3 * 60 * 60 * 1000);
+}
+
+const STATUS_REVENUE = new Set(['доставлен', 'доставляется', 'ожидает сборки', 'ожидает отгрузки']);
+const STATUS_CANCELS = new Set(['отменен', 'возврат']);
+const norm = s => String(s || '').toLowerCase().replace(/ё/g, 'е');
+
+function inWindow(d, [from, to]) {
+  const slot = Math.floor((d.getUTCHours() * 60 + d.getUTCMinutes()) / 30);
+  return from < to ? slot >= from && slot < to : slot >= from || slot < to;
+}
+
+function referenceStats(records, selected, window = [0, 48]) {
+  const selectedSet = new Set(selected);
+  const bySku = new Map();
+  for (const r of records) {
+    const d = parseUtcToMsk(r.created_at);
+    if (!d || !selectedSet.has(d.toISOString().slice(0, 10)) || !inWindow(d, window)) continue;
+    const sku = String(r.sku || '').trim();
+    if (!sku) continue;
+    const q = Number(r.quantity || 1);
+    const p = Number(r.price || 0);
+    const status = norm(r.status);
+    if (!bySku.has(sku)) bySku.set(sku, { orders: 0, revenueQty: 0, cancellations: 0, revenue: 0 });
+    const a = bySku.get(sku);
+    a.orders += q;
+    if (STATUS_REVENUE.has(status)) { a.revenueQty += q; a.revenue += p * q; }
+    if (STATUS_CANCELS.has(status)) a.cancellations += q;
+  }
+  return bySku;
+}
+
+function assertClose(actual, expected, what) {
+  assert.ok(Math.abs(actual - expected) < EPS, `${what}: ${actual} != ${expected}`);
+}
+
+// ---------------------------------------------------------------------------
+
+async function parse(rows) {
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', { input: rows, nodes: USER });
+  return { ...out.json, records: referenceRecords(rows) };
+}
+
+function selections(days) {
+  const out = days.map(d => [d]);
+  for (let i = 0; i + 1 < days.length; i++) out.push([days[i], days[i + 1]]);
+  out.push(days.slice(0, Math.ceil(days.length / 2)), days, [days[0], '1999-01-01']);
+  return out;
+}
+
+async function testIndexMatchesRecords(label, rows) {
+  const { records, availableDates, agg } = await parse(rows);
+  const value = JSON.stringify(agg);
+  let checked = 0;
+  for (const selected of selections(availableDates)) {
+    const expected = referenceStats(records, selected);
+
+    // src/report-index.js
+    const actual = aggregateBySku(agg, selected);
+    assert.deepStrictEqual([...actual.keys()].sort(), [...expected.keys()].sort(), `${label} ${selected}: SKU set`);
+    for (const [sku, e] of expected) {
+      const a = actual.get(sku);
+      for (const f of ['orders', 'revenueQty', 'cancellations', 'revenue']) assertClose(a[f], e[f], `${label} ${sku}.${f}`);
+    }
+
+    // ozord_orders_stats_engine → Calculate Stats
+    const [eng] = await runCodeNode(ENGINE, 'Calculate Stats', {
+      input: { user_id: '42', chat_id: '42', selectedDates: selected },
+      nodes: { 'Get CSV Session (aggregates)': { value } },
+    });
+    const s = eng.json.stats;
+    let tOrders = 0, tRev = 0;
+    for (const [sku, e] of expected) {
+      const x = s.skuStats[sku];
+      assert.strictEqual(x.totalOrders, e.revenueQty, `${label} engine ${sku}.totalOrders`);
+      assert.strictEqual(x.cancellations, e.cancellations, `${label} engine ${sku}.cancellations`);
+      assertClose(x.totalRevenue, e.revenue, `${label} engine ${sku}.totalRevenue`);
+      assertClose(x.avgPrice, e.revenueQty ? e.revenue / e.revenueQty : 0, `${label} engine ${sku}.avgPrice`);
+      tOrders += e.revenueQty; tRev += e.revenue;
+    }
+    assert.strictEqual(s.totalOrders, tOrders);
+    assertClose(s.totalRevenue, tRev, `${label} engine totalRevenue`);
+
+    // ozon-telegram-bot → Calculate Statistics
+    const [m] = await runCodeNode(MAIN, 'Calculate Statistics', {
+      nodes: {
+        'Get Cached Data (for stats)': { value },
+        'Handle Done': { selectedDates: selected, chat_id: '42', user_id: '42', startTime: '00:00', endTime: '23:59' },
+      },
+    });
+    const text = m.json.text;
+    if (!expected.size) {
+      assert.ok(text.includes('Нет данных за указанный период'), `${label} main: empty selection message`);
+    }
+    for (const [sku, e] of expected) {
+      const avg = e.revenueQty ? e.revenue / e.revenueQty : 0;
+      const block = `<b>${sku}</b>\n  • Заказов: ${e.orders}\n  • Отмен: ${e.cancellations}\n  • Средняя цена: ${avg.toFixed(2)} ₽\n  • Сумма: ${e.revenue.toFixed(2)} ₽\n`;
+      assert.ok(text.includes(block), `${label} main: block for ${sku} differs`);
+    }
+    checked++;
+  }
+  console.log(`✅ ${label}: index == per-record stats on ${checked} selections (${records.length} records, ${agg.skus.length} SKUs)`);
+}
+
+const WINDOWS = [
+  ...Object.entries(TIME_PRESETS).map(([name, [st, et]]) => [name, st, et]),
+  ['custom', '10:30', '14:00'],
+  ['через полночь', '22:00', '02:30'],
+  ['полный день (23:59)', '00:00', '23:59'],
+];
+
+async function testTimeWindows(label, rows) {
+  const { records, availableDates, agg, hist } = await parse(rows);
+  const value = JSON.stringify(agg);
+  const histValue = JSON.stringify(hist);
+  const selected = availableDates.slice(0, 3);
+  for (const [name, st, et] of WINDOWS) {
+    const expected = referenceStats(records, selected, timeWindowSlots(st, et));
+    const actual = windowBySku(agg, hist, selected, st, et);
+    assert.deepStrictEqual([...actual.keys()].sort(), [...expected.keys()].sort(), `${label} ${name}: SKU set`);
+    for (const [sku, e] of expected) {
+      for (const f of ['orders', 'revenueQty', 'cancellations', 'revenue']) assertClose(actual.get(sku)[f], e[f], `${label} ${name} ${sku}.${f}`);
+    }
+
+    const [eng] = await runCodeNode(ENGINE, 'Calculate Stats', {
+      input: { user_id: '42', chat_id: '42', selectedDates: selected, startTime: st, endTime: et },
+      nodes: { 'Get CSV Session (aggregates)': { value }, 'Get CSV Session (hist)': { value: histValue } },
+    });
+    const s = eng.json.stats;
+    assert.strictEqual(s.totalOrders, [...expected.values()].reduce((t, e) => t + e.revenueQty, 0), `${label} ${name}: engine totalOrders`);
+    assert.strictEqual(s.totalCancellations, [...expected.values()].reduce((t, e) => t + e.cancellations, 0), `${label} ${name}: engine cancellations`);
+    assert.strictEqual(s.startTime, st);
+
+    const [m] = await runCodeNode(MAIN, 'Calculate Statistics', {
+      nodes: {
+        'Get Cached Data (for stats)': { value },
+        'Get Cached Hist (for stats)': { value: histValue },
+        'Handle Done': { selectedDates: selected, chat_id: '42', user_id: '42', startTime: st, endTime: et },
+      },
+    });
+    const total = [...expected.values()].reduce((t, e) => t + e.orders, 0);
+    assert.ok(m.json.text.includes(total ? `Всего заказов: ${total}\n` : 'Нет данных за указанный период'), `${label} ${name}: main totals`);
+  }
+  console.log(`✅ ${label}: ${WINDOWS.length} time windows == per-record filter (${Object.values(hist.days).reduce((n, f) => n + f.length / 6, 0)} buckets)`);
+}
+
+function testTimeWindowSlots() {
+  assert.deepStrictEqual(timeWindowSlots('00:00', '23:59'), [0, 48]);
+  assert.deepStrictEqual(timeWindowSlots('00:00', '24:00'), [0, 48]);
+  assert.deepStrictEqual(timeWindowSlots('00:00', '13:00'), [0, 26]);
+  assert.deepStrictEqual(timeWindowSlots('06:00', '11:59'), [12, 24]);
+  assert.deepStrictEqual(timeWindowSlots('22:00', '02:00'), [44, 4]);
+  assert.deepStrictEqual(timeWindowSlots(undefined, 'x'), [0, 48]);
+  console.log('✅ startTime/endTime → half-hour slots');
+}
+
+function testCellsAreAdditive() {
+  const b = createIndexBuilder();
+  b.add('2025-09-01', 'A', 2, 100.1, 'Доставлен');
+  b.add('2025-09-01', 'A', 1, 50, 'Отменён');
+  b.add('2025-09-01', 'A', 1, 50, 'Отменён', { sign: -1 });
+  const built = b.build();
+  assert.deepStrictEqual(built.days['2025-09-01'], [[0, 2, 2, 0, 20020]]);
+  const again = createIndexBuilder(built);
+  again.add('2025-09-01', 'A', 2, 100.1, 'Доставлен', { sign: -1 });
+  assert.deepStrictEqual(again.build().days, {});
+
+  const h = createIndexBuilder();
+  h.add('2025-09-01', 'A', 1, 10, 'Доставлен', { slot: 20 });
+  h.add('2025-09-01', 'A', 3, 10, 'Доставлен', { slot: 21 });
+  const more = createIndexBuilder(h.build(), h.buildHistogram());
+  more.add('2025-09-01', 'A', 3, 10, 'Доставлен', { slot: 21, sign: -1 });
+  more.add('2025-09-01', 'B', 1, 5, 'Возврат', { slot: 47 });
+  assert.deepStrictEqual(more.buildHistogram().days['2025-09-01'], [0, 20, 1, 1, 0, 1000, 1, 47, 1, 0, 1, 0]);
+  console.log('✅ Index cells and histogram buckets are additive (add / subtract)');
+}
+
+function testDayTotalsMatchIndex() {
+  // «Итого» календаря (dayTotals) и отчёт по «Готово» (:agg) считают выручку по одним статусам
+  const rows = [['Доставлён', 100], ['не доставлен', 200], ['Отмена доставки', 300], ['ожидает отгрузки', 400], ['доставляется ', 500]];
+  const b = createIndexBuilder();
+  const totals = {};
+  for (const [status, price] of rows) {
+    b.add('2025-09-01', 'A', 1, price, status);
+    addDayTotal(totals, '2025-09-01', 1, price, status);
+  }
+  const [[, orders, , , revenueKop]] = b.build().days['2025-09-01'];
+  assert.deepStrictEqual(totals['2025-09-01'], [orders, revenueKop / 100]);
+  assert.deepStrictEqual(totals['2025-09-01'], [5, 1000]);
+  console.log('✅ Calendar day totals and the :agg index classify statuses the same way');
+}
+
+async function main() {
+  console.log('🎯 REPORT INDEX TESTS\n');
+  testCellsAreAdditive();
+  testDayTotalsMatchIndex();
+  testTimeWindowSlots();
+  await testIndexMatchesRecords('FBO sample', loadReportRows(SAMPLES.FBO));
+  await testIndexMatchesRecords('FBS sample', loadReportRows(SAMPLES.FBS));
+  await testIndexMatchesRecords('FBO synthetic', generateReport({ rows: 3000, type: 'FBO', days: 10, skus: 15 }).rows);
+  await testTimeWindows('FBO sample', loadReportRows(SAMPLES.FBO));
+  await testTimeWindows('FBS sample', loadReportRows(SAMPLES.FBS));
+  await testTimeWindows('FBO synthetic', generateReport({ rows: 3000, type: 'FBO', days: 10, skus: 15 }).rows);
+  console.log('\n✅ All report index tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
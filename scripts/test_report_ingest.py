@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/report_ingest.py: chunking does not change rows, the
+streamed aggregates equal what "Parse Report File" builds from the same bytes
+(skipped without node), and the parallel path equals the single pass.
+"""
+
+import csv
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_ingest import (  # noqa: E402
+    ReportAggregator, compile_header_plan, ingest, ingest_parallel, iter_chunks, iter_lines, iter_report_records,
+    iter_rows, split_ranges, to_num,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = [os.path.join(ROOT, 'orders-2025-fbo-test.csv'), os.path.join(ROOT, 'orders-2025-fbs-test.csv')]
+
+
+@pytest.mark.parametrize('path', SAMPLES)
+def test_rows_independent_of_chunk_size(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        expected = [r for r in csv.reader(f, delimiter=';') if r]
+    with open(path, 'rb') as f:
+        data = f.read()
+    for size in (1, 2, 7, 4096):
+        assert list(iter_rows(iter_lines(iter_chunks(io.BytesIO(data), size)))) == expected
+
+
+def test_quoting_and_line_endings():
+    data = '\ufeffa;"b;c";"d ""q"" e"\r\n\r\n"multi\nline";x"y;\n"";"last"'.encode('utf-8')
+    expected = [['a', 'b;c', 'd "q" e'], ['multi\nline', 'x"y', ''], ['', 'last']]
+    for size in (1, 3, len(data)):
+        assert list(iter_rows(iter_lines(iter_chunks(io.BytesIO(data), size)))) == expected
+
+
+def test_header_plan_and_numbers():
+    with open(SAMPLES[1], encoding='utf-8-sig') as f:
+        header = next(csv.reader(f, delimiter=';'))
+    plan = compile_header_plan(header)
+    assert (plan['reportType'], plan['schemaId'], plan['exact'], plan['notice']) == ('FBS', 'fbs-v1', True, None)
+    plan = compile_header_plan(header[:-1] + ['Новая колонка'])
+    assert not plan['exact'] and 'Новая колонка' in plan['notice']
+    assert [to_num(v) for v in ('1 234,50', '', 'abc', '2', 'Infinity', '-0.5')] == [1234.5, 0, 0, 2, 0, -0.5]
+
+
+def test_records_are_streamed():
+    records = iter_report_records(SAMPLES[0])
+    first = next(records)
+    assert set(first) == {'order_id', 'sku', 'quantity', 'price', 'created_at', 'status', 't'}
+    assert sum(1 for _ in records) + 1 == ingest(SAMPLES[0])['totalRecords']
+
+
+def _parse_node(path, tmp_path):
+    # A script file, not `node -e`: there `module` and `require` are globals the Code node does not have
+    script = tmp_path / 'parse_node.js'
+    script.write_text(
+        f"const {{ loadWorkflowFile, runCodeNode }} = require({json.dumps(os.path.join(ROOT, 'scripts', 'lib', 'n8n-sandbox'))});"
+        f"const wf = loadWorkflowFile({json.dumps(os.path.join(ROOT, 'workflows', 'ozon-telegram-bot.json'))});"
+        "const data = require('fs').readFileSync(process.argv[2]).toString('base64');"
+        "runCodeNode(wf, 'Parse Report File', { input: [{ json: {}, binary: { data: { data } } }],"
+        " nodes: { 'Extract User Data': { user_id: '1', chat_id: '1' } } })"
+        ".then(([o]) => process.stdout.write(JSON.stringify(o.json)));"
+    )
+    out = subprocess.run(['node', str(script), path], cwd=ROOT, check=True, capture_output=True)
+    return json.loads(out.stdout)
+
+
+def _synthetic(tmp_path, report_type):
+    path = tmp_path / f'{report_type}.csv'
+    script = (
+        "const { generateReport, toCsv } = require('./scripts/lib/synthetic-report');"
+        f"process.stdout.write(toCsv(generateReport({{ rows: 3000, type: '{report_type}' }}), '{report_type}'));"
+    )
+    path.write_bytes(subprocess.run(['node', '-e', script], cwd=ROOT, check=True, capture_output=True).stdout)
+    return str(path)
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+@pytest.mark.parametrize('source', SAMPLES + ['FBO', 'FBS'])
+def test_same_aggregates_as_parse_node(source, tmp_path):
+    path = source if os.path.exists(source) else _synthetic(tmp_path, source)
+    node = _parse_node(path, tmp_path)
+    result = ingest(path)
+    for key in ('reportType', 'totalRecords', 'availableDates', 'agg', 'hist', 'meta'):
+        assert result[key] == node[key], key
+    assert result['plan']['schemaId'] == node['schema']['id']
+
+
+def test_split_ranges_are_quote_aware(tmp_path):
+    path = tmp_path / 'quoted.csv'
+    body = ''.join(f'"{i}";"line\n{i} ""x"""\n' for i in range(50))
+    path.write_bytes(('\ufeff"a";"b"\n' + body).encode('utf-8'))
+    expected = list(iter_rows(iter_lines([path.read_bytes()])))[1:]
+    data = path.read_bytes()
+    for parts in (2, 3, 7, 40, 500):
+        header_end, ranges = split_ranges(str(path), parts, chunk_bytes=5)
+        assert ranges[0][0] == header_end and ranges[-1][1] == len(data)
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        rows = [r for a, b in ranges for r in iter_rows(iter_lines([data[a:b]]))]
+        assert rows == expected, parts
+    # A stray quote in an unquoted field breaks the parity rule -> one range
+    path.write_bytes(b'a;b\n1;x"y\n2;z\n3;w\n')
+    assert len(split_ranges(str(path), 3)[1]) == 1
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+@pytest.mark.parametrize('source', SAMPLES + ['FBO', 'FBS'])
+def test_parallel_equals_single_pass(source, tmp_path):
+    path = source if os.path.exists(source) else _synthetic(tmp_path, source)
+    expected = json.dumps(ingest(path), ensure_ascii=False)
+    for workers, parts in ((1, 5), (2, 2), (3, 11)):
+        result = ingest_parallel(path, workers, parts=parts, chunk_bytes=4096)
+        assert json.dumps(result, ensure_ascii=False) == expected, (workers, parts)
+
+
+def test_parallel_float_revenue_is_summed_in_row_order(tmp_path):
+    with open(SAMPLES[0], encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=';')
+        header, template = next(reader), next(reader)
+    col = {h: i for i, h in enumerate(header)}
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=';', lineterminator='\n')
+    writer.writerow(header)
+    for i in range(3000):
+        row = list(template)
+        row[col['Статус']] = 'Доставлен'
+        row[col['Принят в обработку']] = f'0{1 + i % 3}.10.2025 {i % 24}:{i % 60:02d}'
+        row[col['Ваша цена']] = f'{(i * 7919) % 100000 / 100:.2f}'
+        writer.writerow(row)
+    path = tmp_path / 'kopecks.csv'
+    path.write_text(out.getvalue(), encoding='utf-8')
+    expected = ingest(str(path))
+    assert any(isinstance(v[1], float) for v in expected['meta']['dayTotals'].values())
+    for parts in (2, 7):
+        result = ingest_parallel(str(path), 1, parts=parts)
+        assert json.dumps(result, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+
+def test_day_totals_use_the_index_status_classes():
+    """dayTotals revenue and the :agg index agree on statuses (src/session-meta.js addDayTotal)"""
+    agg = ReportAggregator(histograms=False)
+    rows = [('доставлён', 100), ('не доставлен', 200), ('отмена доставки', 300), ('ожидает отгрузки', 400)]
+    for status, price in rows:
+        agg.add({'sku': 'A', 'quantity': 1, 'price': price, 'status': status, 't': 20000 * 1440})
+    [[_, orders, _, _, revenue_kop]] = agg.index()['days']['2024-10-04']
+    assert agg.day_totals['2024-10-04'] == [orders, revenue_kop / 100] == [4, 500]
@@ -0,0 +1,104 @@
+#!/usr/bin/env node
+/**
+ * Проверка реестра схем (src/report-schemas.js) и плана колонок
+ * (src/report-schema.js): «Parse Report File» даёт те же колонки :csv, что
+ * прежний разбор через pick(), и один раз сообщает о незнакомом заголовке.
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES, loadReportRows, loadTemplate, generateReport } = require('./lib/synthetic-report');
+const { compileHeaderPlan } = require('../src/report-schema');
+const { REPORT_SCHEMAS } = require('../src/report-schemas');
+const { encodeRecords } = require('../src/record-columns');
+const { render } = require('./build-report-schemas');
+const { referenceRecords } = require('./lib/reference-records');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+
+function expectedColumns(rows, reportType) {
+  return encodeRecords(referenceRecords(rows), { reportType });
+}
+
+async function parse(rows) {
+  const warnings = [];
+  const warn = console.warn;
+  console.warn = msg => warnings.push(msg);
+  try {
+    const [out] = await runCodeNode(MAIN, 'Parse Report File', { input: rows, nodes: USER });
+    return { ...out.json, warnings };
+  } finally {
+    console.warn = warn;
+  }
+}
+
+function testRegistry() {
+  assert.strictEqual(fs.readFileSync(path.join(__dirname, '..', 'src', 'report-schemas.js'), 'utf8'), render(), 'src/report-schemas.js is stale');
+  for (const type of ['FBO', 'FBS']) {
+    const plan = compileHeaderPlan(loadTemplate(type).headers, REPORT_SCHEMAS);
+    assert.strictEqual(plan.reportType, type);
+    assert.strictEqual(plan.exact, true);
+    assert.strictEqual(plan.notice, null);
+    for (const [field, { keys, indices }] of Object.entries(plan.fields)) {
+      assert.ok(indices.length, `${type}: ${field} has no column`);
+      assert.deepStrictEqual(keys, indices.map(i => loadTemplate(type).headers[i]));
+    }
+  }
+  console.log(`✅ Registry is up to date (${REPORT_SCHEMAS.map(s => s.id).join(', ')}), sample headers match exactly`);
+}
+
+async function testSameRecords(label, rows, type) {
+  const out = await parse(rows);
+  assert.strictEqual(out.reportType, type, `${label}: report type`);
+  assert.deepStrictEqual(out.columns, expectedColumns(rows, type), `${label}: records differ from pick()`);
+  assert.deepStrictEqual(out.warnings, [], `${label}: unexpected schema notice`);
+  console.log(`✅ ${label}: ${out.totalRecords} records identical to pick(), schema ${out.schema.id}`);
+}
+
+async function testMessyHeaders() {
+  // BOM, кавычки и NBSP в заголовках; пустой «Принят в обработку» → «Дата отгрузки»
+  const rows = loadReportRows(SAMPLES.FBO).slice(0, 20).map((r, i) => {
+    const o = {};
+    for (const [k, v] of Object.entries(r)) {
+      const key = k === 'Номер заказа' ? '\uFEFFНомер заказа' : k === 'Артикул' ? '"Артикул"' : k.replace(' ', '\u00A0');
+      o[key] = k === 'Принят в обработку' && i % 2 ? '' : v;
+    }
+    return o;
+  });
+  const out = await parse(rows);
+  assert.deepStrictEqual(out.columns, expectedColumns(rows, 'FBO'));
+  assert.strictEqual(out.schema.exact, true);
+  console.log('✅ BOM/quotes/NBSP in headers and empty first candidates resolve like pick()');
+}
+
+async function testUnknownLayoutReportedOnce() {
+  const rows = loadReportRows(SAMPLES.FBO).map(r => {
+    const o = { ...r, 'Новая колонка': 'x' };
+    delete o['Объемный вес товаров, кг'];
+    return o;
+  });
+  const out = await parse(rows);
+  assert.strictEqual(out.reportType, 'FBO');
+  assert.strictEqual(out.warnings.length, 1, 'notice must be reported once per file');
+  assert.ok(out.warnings[0].includes('Объемный вес товаров, кг') && out.warnings[0].includes('Новая колонка'));
+  assert.strictEqual(out.schema.notice, out.warnings[0]);
+  assert.deepStrictEqual(out.columns, expectedColumns(rows, 'FBO'));
+  console.log('✅ Unknown header layout is reported once per file, parsing still works');
+}
+
+async function main() {
+  console.log('🎯 REPORT SCHEMA TESTS\n');
+  testRegistry();
+  await testSameRecords('FBO sample', loadReportRows(SAMPLES.FBO), 'FBO');
+  await testSameRecords('FBS sample', loadReportRows(SAMPLES.FBS), 'FBS');
+  await testSameRecords('FBO synthetic', generateReport({ rows: 2000, type: 'FBO' }).rows, 'FBO');
+  await testSameRecords('FBS synthetic', generateReport({ rows: 2000, type: 'FBS' }).rows, 'FBS');
+  await testMessyHeaders();
+  await testUnknownLayoutReportedOnce();
+  console.log('\n✅ All report schema tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
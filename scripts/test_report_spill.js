@@ -0,0 +1,203 @@
+#!/usr/bin/env node
+/**
+ * Проверка выноса больших отчётов в файл (src/report-spill.js): файл
+ * возвращает те же колонки и получасы, чтение дня берёт только его строки,
+ * статистика и слияние по указателю совпадают с прежними значениями в
+ * Redis, а файлы живут не дольше сессии (новая загрузка, file:clear).
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { MemoryRedis, runWorkflow } = require('./lib/n8n-runner');
+const { SAMPLES, generateReport, toCsv } = require('./lib/synthetic-report');
+const { encodeRecords, decodeColumns, decodeRecords } = require('../src/record-columns');
+const {
+  SPILL_DIR, spillSettings, isSpillPointer, spillWanted, spillReport, removeSpillFiles, readSpill, spillColumns, spillHistogram,
+} = require('../src/report-spill');
+const { aclKey, ACL_WHITELIST, ACL_ADMIN } = require('../src/acl-bits');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const ENGINE = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozord_orders_stats_engine.n8n.json'));
+const FILES = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozord_files_session_and_clear.n8n.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+
+const dirs = [];
+const tmpDir = () => dirs[dirs.push(fs.mkdtempSync(path.join(os.tmpdir(), 'ozon-spill-'))) - 1];
+process.on('exit', () => dirs.forEach(d => fs.rmSync(d, { recursive: true, force: true })));
+const pick = (obj, keys) => Object.fromEntries(keys.filter(k => k in obj).map(k => [k, obj[k]]));
+
+async function parse(buf) {
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', {
+    input: [{ json: {}, binary: { data: { data: buf.toString('base64') } } }],
+    nodes: USER,
+  });
+  return out.json;
+}
+
+function testFile(parsed) {
+  const dir = tmpDir();
+  const settings = { dir, minBytes: 0 };
+  const pointer = spillReport(settings, '42', 3, parsed.columns);
+  assert.ok(isSpillPointer(pointer) && pointer.file === '42-3.ocol' && pointer.dir === dir);
+  assert.strictEqual(pointer.bytes, fs.statSync(path.join(dir, pointer.file)).size);
+
+  const a = decodeColumns(parsed.columns), b = decodeColumns(spillColumns(pointer));
+  for (const f of ['order_id', 'sku', 'status', 't', 'quantity', 'price']) assert.deepStrictEqual(Array.from(b[f]), Array.from(a[f]), f);
+  assert.deepStrictEqual(spillHistogram(pointer, parsed.agg), parsed.hist, 'hist rebuilt from the file');
+
+  const days = [parsed.availableDates[4], parsed.availableDates[1], parsed.availableDates[2]];
+  const part = readSpill(pointer, { fields: ['t'], days });
+  const inDays = Array.from(a.t).filter(t => days.includes(new Date(Math.floor(t / 1440) * 86400000).toISOString().slice(0, 10)));
+  assert.strictEqual(part.n, inDays.length, 'only the rows of the selected days are read');
+  assert.deepStrictEqual(Object.keys(part.cols), ['t']);
+  assert.deepStrictEqual(spillHistogram(pointer, parsed.agg, days).days, pick(parsed.hist.days, [...days].sort()));
+
+  // Строка без даты: в конце файла, в days не входит, полное чтение её сохраняет
+  const records = decodeRecords(parsed.columns).slice(0, 50);
+  records[7] = { ...records[7], created_at: 'не дата' };
+  const odd = encodeRecords(records, { reportType: 'FBO' });
+  const oddPointer = spillReport(settings, '7', 1, odd);
+  assert.deepStrictEqual(decodeRecords(spillColumns(oddPointer)), decodeRecords(odd));
+  assert.strictEqual(Object.values(readSpill(oddPointer, { fields: [] }).header.days).reduce((s, [x, y]) => s + y - x, 0), 49);
+
+  for (const bad of [null, { enc: 'spill', dir, file: 'missing.ocol' }, { ...pointer, file: '../42-3.ocol' }]) {
+    assert.strictEqual(spillColumns(bad), null);
+  }
+  fs.writeFileSync(path.join(dir, 'junk.ocol'), 'not a spill file');
+  assert.strictEqual(spillHistogram({ ...pointer, file: 'junk.ocol' }, parsed.agg, days), null);
+  console.log(`✅ Spill file: same columns and hist, a day read takes ${part.n} of ${a.n} rows`);
+}
+
+function testSettingsAndLifecycle(parsed) {
+  assert.deepStrictEqual(spillSettings({}), { dir: SPILL_DIR, minBytes: 8 * 1024 * 1024 });
+  assert.deepStrictEqual(spillSettings({ SPILL_DIR: '/data/spill/', SPILL_MIN_MB: 2 }), { dir: '/data/spill', minBytes: 2 * 1024 * 1024 });
+  assert.strictEqual(spillSettings({ SPILL_DIR: '' }).dir, '');
+  const dir = tmpDir();
+  assert.strictEqual(spillWanted({ dir: '', minBytes: 0 }, parsed.columns), false, 'no directory — off');
+  assert.strictEqual(spillWanted({ dir, minBytes: 64 * 1024 * 1024 }, parsed.columns), false, 'below the threshold');
+  assert.strictEqual(spillReport({ dir, minBytes: 64 * 1024 * 1024 }, '42', 1, parsed.columns), null);
+
+  const settings = { dir, minBytes: 0 };
+  for (const name of ['42-1.ocol', '420-1.ocol', '7-2.ocol', '42-notes.txt']) fs.writeFileSync(path.join(dir, name), 'x');
+  spillReport(settings, '42', 2, parsed.columns);
+  assert.deepStrictEqual(fs.readdirSync(dir).sort(), ['42-2.ocol', '42-notes.txt', '420-1.ocol', '7-2.ocol'], 'a new upload removes the previous file');
+  assert.strictEqual(removeSpillFiles(settings, '42'), 1);
+  assert.deepStrictEqual(fs.readdirSync(dir).sort(), ['42-notes.txt', '420-1.ocol', '7-2.ocol'], 'other users are not touched');
+  console.log('✅ Spill settings, threshold, and per-user file removal');
+}
+
+async function testWorkflowNodes(parsed) {
+  const dir = tmpDir();
+  const config = { SPILL_DIR: dir, SPILL_MIN_MB: 0.01 };
+  const encode = async (builtins, cfg = config) => (await runCodeNode(MAIN, 'Encode Session Values', {
+    input: { ...parsed, user_id: '42', chat_id: '42', upload_gen: 5 }, nodes: { Config: cfg }, builtins,
+  }))[0].json;
+
+  const values = await encode(['fs']);
+  const pointer = JSON.parse(values.csv_value);
+  assert.ok(isSpillPointer(pointer) && pointer.file === '42-5.ocol');
+  assert.strictEqual(values.hist_value, values.csv_value, ':hist points to the same file');
+  assert.ok(!values.agg_value.includes('"spill"'), ':agg stays in Redis');
+  const plain = await encode([]);
+  assert.ok(!plain.csv_value.includes('"spill"'), 'without fs the report stays in Redis');
+  assert.ok(fs.existsSync(path.join(dir, '42-5.ocol')), 'kept: no write happened');
+  const small = await encode(['fs'], { ...config, SPILL_MIN_MB: 64 });
+  assert.ok(!small.csv_value.includes('"spill"'));
+  assert.deepStrictEqual(fs.readdirSync(dir), [], 'an upload below the threshold removes the old file');
+  await encode(['fs']);
+
+  // Статистика: по указателю и по значениям в Redis — одинаково
+  const days = parsed.availableDates.slice(1, 4);
+  const run = async (hist, startTime, endTime) => {
+    const done = { chat_id: '42', selectedDates: days, startTime, endTime };
+    const [m] = await runCodeNode(MAIN, 'Calculate Statistics', {
+      input: {},
+      nodes: { 'Handle Done': done, 'Get Cached Data (for stats)': { value: values.agg_value }, 'Get Cached Hist (for stats)': { value: hist } },
+      builtins: ['fs', 'zlib'],
+    });
+    const [e] = await runCodeNode(ENGINE, 'Calculate Stats', {
+      input: { user_id: '42', ...done },
+      nodes: { 'Get CSV Session (aggregates)': { value: values.agg_value }, 'Get CSV Session (hist)': { value: hist } },
+      builtins: ['fs', 'zlib'],
+    });
+    return [m.json, e.json];
+  };
+  const inRedis = JSON.stringify(parsed.hist);
+  for (const [st, et] of [['09:00', '18:00'], ['22:00', '02:00'], ['00:00', '23:59']]) {
+    const fromFile = await run(values.hist_value, st, et);
+    assert.deepStrictEqual(fromFile, await run(inRedis, st, et), `${st}–${et}`);
+    assert.ok(fromFile[1].stats.totalOrders > 0);
+  }
+
+  // Слияние поверх вынесенной сессии — как поверх значений в Redis
+  const merge = async (csv, hist, incoming = parsed) => (await runCodeNode(MAIN, 'Merge Session Report', {
+    input: { ...incoming, session_csv: csv, session_agg: values.agg_value, session_hist: hist },
+    nodes: { 'Merge Upload?': incoming, 'User Context': { ctx: { meta: parsed.meta } } },
+    builtins: ['fs', 'zlib'],
+  }))[0].json;
+  const fbs = await parse(fs.readFileSync(SAMPLES.FBS));
+  const merged = await merge(values.csv_value, values.hist_value, fbs);
+  assert.deepStrictEqual(merged.merge, { added: fbs.totalRecords, updated: 0, unchanged: 0 });
+  assert.deepStrictEqual(merged, await merge(JSON.stringify(parsed.columns), inRedis, fbs));
+  // Та же выгрузка ещё раз: указатель на файл пишется обратно как был
+  const same = await merge(values.csv_value, values.hist_value);
+  assert.deepStrictEqual(same.merge, { added: 0, updated: 0, unchanged: parsed.totalRecords });
+  assert.deepStrictEqual(same.session_values, { csv_value: values.csv_value, agg_value: values.agg_value, hist_value: values.hist_value });
+
+  // Файла больше нет (другой инстанс, ручная очистка): окно времени просит загрузить отчёт заново
+  const [cleared] = await runCodeNode(FILES, 'Remove Spill Files', { input: { ok: 1 }, nodes: { Config: config, ...USER }, builtins: ['fs', 'zlib'] });
+  assert.deepStrictEqual(cleared.json, { ok: 1 });
+  assert.deepStrictEqual(fs.readdirSync(dir), []);
+  const [lost] = await run(values.hist_value, '09:00', '18:00');
+  assert.ok(lost.text.includes('загрузите отчёт заново'), lost.text);
+  const [fullDay] = await run(values.hist_value, '00:00', '24:00');
+  assert.ok(fullDay.text.includes('ИТОГО'), 'full days come from :agg');
+  console.log('✅ Encode Session Values → pointer; stats and merge read the file; a lost file is reported');
+}
+
+async function testUploadAndClear() {
+  const dir = tmpDir();
+  const redis = new MemoryRedis();
+  redis.set(aclKey(42), String(ACL_WHITELIST | ACL_ADMIN));
+  const files = { 'doc-fbo': fs.readFileSync(SAMPLES.FBO), 'doc-fbo-2': fs.readFileSync(SAMPLES.FBO) };
+  const config = { TELEGRAM_BOT_TOKEN: 'test-token', SUPERUSER_IDS: '1', CALENDAR_COALESCE_MS: 0, SPILL_DIR: dir, SPILL_MIN_MB: 0.001 };
+  const send = async update => {
+    const run = await runWorkflow(MAIN, { update, redis, files, config, builtins: ['fs', 'zlib'] });
+    if (run.error) throw run.error;
+    return run;
+  };
+  const from = { id: 42 }, chat = { id: 42 };
+  const upload = id => send({ message: { from, chat, document: { file_id: id, file_unique_id: `u-${id}`, file_name: 'orders.csv', mime_type: 'text/csv' } } });
+
+  await upload('doc-fbo');
+  const first = JSON.parse(redis.get('ozon:sess:{42}:csv'));
+  assert.ok(isSpillPointer(first), ':csv holds the pointer');
+  assert.deepStrictEqual(JSON.parse(redis.get('ozon:sess:{42}:hist')), first);
+  assert.strictEqual(redis.get('ozon:parse:f:u-doc-fbo'), null, 'the spilled report is not copied into the parse cache');
+  assert.deepStrictEqual(fs.readdirSync(dir), [first.file]);
+
+  await upload('doc-fbo-2');
+  const second = JSON.parse(redis.get('ozon:sess:{42}:csv'));
+  assert.notStrictEqual(second.file, first.file);
+  assert.deepStrictEqual(fs.readdirSync(dir), [second.file], 'a new upload replaces the file');
+
+  const clear = await send({ callback_query: { id: 'cb', from, message: { message_id: 1, chat }, data: 'file:clear' } });
+  assert.ok('Remove Spill Files' in clear.executed);
+  assert.deepStrictEqual(fs.readdirSync(dir), [], 'file:clear removes the file');
+  console.log('✅ Upload → file + pointer, re-upload replaces it, file:clear removes it');
+}
+
+async function main() {
+  console.log('🎯 REPORT SPILL TESTS\n');
+  const parsed = await parse(Buffer.from(toCsv(generateReport({ rows: 20000, type: 'FBO' }), 'FBO')));
+  testFile(parsed);
+  testSettingsAndLifecycle(parsed);
+  await testWorkflowNodes(parsed);
+  await testUploadAndClear();
+  console.log('\n✅ All report spill tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
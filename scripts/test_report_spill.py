@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/report_spill.py: day ranges read straight from the memory
+mapping, records match report_columns.py, and the file is byte-for-byte the
+one src/report-spill.js writes (skipped without node).
+"""
+
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_columns import decode_records, encode_records, load_report_records  # noqa: E402
+from report_spill import SPILL_FILE_RE, SpillFile, build_spill, write_spill  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_columns():
+    report_type, records = load_report_records(os.path.join(ROOT, 'orders-2025-fbo-test.csv'))
+    records[3] = {**records[3], 'created_at': 'не дата'}
+    return encode_records(records, report_type)
+
+
+def test_read_days_from_the_mapping(tmp_path):
+    columns = sample_columns()
+    path = str(tmp_path / '42-3.ocol')
+    assert write_spill(path, columns) == os.path.getsize(path)
+    assert not os.path.exists(path + '.tmp')
+    expected = decode_records(columns)
+    with SpillFile(path) as spill:
+        assert spill.header['totalRecords'] == len(expected)
+        day = spill.days[1]
+        t = spill.column('t', [day])
+        assert isinstance(t, memoryview) and t.obj is not None, 'one day is a view into the mapping'
+        assert len(t) == spill.header['days'][day][1] - spill.header['days'][day][0]
+        t.release()
+        rows = spill.column('row')
+        in_file_order = [expected[i] for i in rows]
+        rows.release()
+        assert spill.records() == in_file_order
+        assert [r for r in in_file_order if r['created_at'] == ''] == in_file_order[-1:], 'undated row is last'
+        (a0, b0), (a3, b3) = spill.header['days'][spill.days[0]], spill.header['days'][spill.days[3]]
+        assert spill.records([spill.days[3], spill.days[0]]) == in_file_order[a0:b0] + in_file_order[a3:b3]
+        assert len(spill.column('price', [spill.days[0], spill.days[3]])) == b0 - a0 + b3 - a3
+        assert spill.records(['2001-01-01']) == []
+    assert SPILL_FILE_RE.match('42-3.ocol') and SPILL_FILE_RE.match('42-3.ocol.tmp')
+    assert not SPILL_FILE_RE.match('42-notes.txt')
+
+
+def test_rejects_foreign_files(tmp_path):
+    for name, data in (('empty.ocol', b''), ('junk.ocol', b'not a spill file'), ('v9.ocol', b'OCOL\x08\x00\x00\x00{"v":9} ')):
+        (tmp_path / name).write_bytes(data)
+        with pytest.raises(ValueError):
+            SpillFile(str(tmp_path / name))
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_same_bytes_as_the_bot(tmp_path):
+    columns = sample_columns()
+    script = (
+        "const { buildSpillFile } = require('./src/report-spill');"
+        "const columns = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "process.stdout.write(buildSpillFile(columns).toString('base64'));"
+    )
+    out = subprocess.run(['node', '-e', script], cwd=ROOT, input=json.dumps(columns, ensure_ascii=False),
+                         capture_output=True, text=True, check=True)
+    assert base64.b64decode(out.stdout) == build_spill(columns)
@@ -0,0 +1,124 @@
+#!/usr/bin/env node
+/**
+ * Проверка кодека значений сессии (src/session-codec.js): ~d1: — raw
+ * DEFLATE zlib, значения с заголовком и без него читаются одинаково, ноды
+ * записи/чтения сессии в workflow сходятся с прежним JSON, а без zlib
+ * (NODE_FUNCTION_ALLOW_BUILTIN без zlib) ноды пишут JSON.
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES, generateReport, toCsv } = require('./lib/synthetic-report');
+const {
+  SESSION_CODEC_DEFLATE, SESSION_CODEC_MIN_BYTES, SESSION_CODECS, sessionCodecs, encodeSessionValue, decodeSessionValue,
+} = require('../src/session-codec');
+const { packParsedReport, unpackParsedReport } = require('../src/parse-cache');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const ENGINE = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozord_orders_stats_engine.n8n.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+
+function testCodec() {
+  const small = { v: 1, skus: ['A'], days: {} };
+  assert.strictEqual(encodeSessionValue(small, { codec: 'deflate' }), JSON.stringify(small), 'small values stay JSON');
+  const big = { v: 1, rows: Array.from({ length: 2000 }, (_, i) => ({ status: 'Доставлен покупателю', sku: `SKU-${i % 40}` })) };
+  const json = JSON.stringify(big);
+  const packed = encodeSessionValue(big, { codec: 'deflate' });
+  assert.ok(packed.startsWith(SESSION_CODEC_DEFLATE));
+  assert.ok(packed.length * 10 < Buffer.byteLength(json), `compressed ${packed.length} of ${Buffer.byteLength(json)}`);
+  assert.deepStrictEqual(decodeSessionValue(packed), big);
+  assert.strictEqual(zlib.inflateRawSync(Buffer.from(packed.slice(SESSION_CODEC_DEFLATE.length), 'base64')).toString('utf8'), json, 'raw DEFLATE');
+  assert.ok(encodeSessionValue(json, { codec: 'deflate' }) === packed, 'JSON text is encoded as is');
+  assert.ok(encodeSessionValue(big, { codec: 'json' }) === json);
+  assert.deepStrictEqual(decodeSessionValue(json), big, 'values written before the codec');
+
+  const noise = require('crypto').randomBytes(2 * SESSION_CODEC_MIN_BYTES).toString('base64');
+  assert.ok(encodeSessionValue([noise], { codec: 'deflate' }) === JSON.stringify([noise]), 'no gain → JSON');
+
+  const foreign = SESSION_CODEC_DEFLATE + zlib.deflateRawSync(json, { level: 9 }).toString('base64');
+  assert.deepStrictEqual(decodeSessionValue(foreign), big, 'any DEFLATE encoder');
+  for (const bad of [null, undefined, '', 'not json', '~d2:AAAA', `${SESSION_CODEC_DEFLATE}!!!`, packed.slice(0, 200)]) {
+    assert.strictEqual(decodeSessionValue(bad), null, String(bad).slice(0, 20));
+  }
+
+  assert.deepStrictEqual(sessionCodecs({}), SESSION_CODECS);
+  assert.deepStrictEqual(sessionCodecs({ SESSION_CODECS: 'csv=json, hist = json,meta=zstd,tmp=deflate' }),
+    { ...SESSION_CODECS, csv: 'json', hist: 'json' }, 'unknown codecs and key types are ignored');
+
+  const report = { reportType: 'FBO', availableDates: [], totalRecords: 0, schema: {}, meta: {}, agg: big, hist: null, columns: {} };
+  for (const codec of ['json', 'deflate']) {
+    const { v, ...back } = JSON.parse(JSON.stringify({ v: 0, ...report }));
+    assert.deepStrictEqual(unpackParsedReport(packParsedReport(report, { codec })), back, codec);
+  }
+  assert.ok(packParsedReport(report, { codec: 'deflate' }).startsWith(SESSION_CODEC_DEFLATE));
+  console.log('✅ ~d1: header (zlib raw DEFLATE) for large values, JSON for small ones and for values written before the codec');
+}
+
+async function testWorkflowNodes() {
+  const next = name => MAIN.connections[name].main.map(b => (b || []).map(l => l.node));
+  assert.deepStrictEqual(next('Upload Current?')[0], ['Encode Session Values']);
+  const byName = Object.fromEntries(MAIN.nodes.map(n => [n.name, n.parameters]));
+  assert.strictEqual(byName['Cache CSV Records'].value, '={{ $json.csv_value }}');
+  assert.strictEqual(byName['Cache CSV Aggregates'].value, '={{ $json.agg_value }}');
+  assert.strictEqual(byName['Cache CSV Histogram'].value, '={{ $json.hist_value }}');
+
+  const parse = async buf => (await runCodeNode(MAIN, 'Parse Report File', {
+    input: [{ json: {}, binary: { data: { data: buf.toString('base64') } } }],
+    nodes: USER,
+  }))[0];
+  const encode = async (json, config = {}, builtins = ['zlib']) => (await runCodeNode(MAIN, 'Encode Session Values', { input: json, nodes: { Config: config }, builtins }))[0].json;
+  const sample = await parse(fs.readFileSync(SAMPLES.FBS));
+  const small = await encode(sample.json);
+  assert.ok(small.csv_value === JSON.stringify(sample.json.columns), 'sample-sized session stays JSON');
+
+  const parsed = await parse(Buffer.from(toCsv(generateReport({ rows: 5000, type: 'FBS' }), 'FBS')));
+  const values = await encode(parsed.json);
+  for (const field of ['csv_value', 'agg_value', 'hist_value']) assert.ok(values[field].startsWith(SESSION_CODEC_DEFLATE), `${field} is compressed`);
+  assert.deepStrictEqual(decodeSessionValue(values.csv_value), parsed.json.columns);
+  assert.deepStrictEqual(decodeSessionValue(values.agg_value), parsed.json.agg);
+  assert.deepStrictEqual(decodeSessionValue(values.hist_value), parsed.json.hist);
+  const plain = await encode(parsed.json, { SESSION_CODECS: 'csv=json,agg=json,hist=json' });
+  assert.ok(plain.csv_value === JSON.stringify(parsed.json.columns), 'csv=json in Config');
+  const noZlib = await encode(parsed.json, {}, []);
+  assert.ok(noZlib.csv_value === JSON.stringify(parsed.json.columns), 'no zlib in the Code node → JSON');
+
+  // Статистика по сжатым значениям и по JSON прежней записи — одинаковая
+  const done = { chat_id: '42', selectedDates: parsed.json.availableDates.slice(0, 3), startTime: '09:00', endTime: '18:00' };
+  const run = async (agg, hist) => {
+    const [m] = await runCodeNode(MAIN, 'Calculate Statistics', {
+      input: {},
+      nodes: { 'Handle Done': done, 'Get Cached Data (for stats)': { value: agg }, 'Get Cached Hist (for stats)': { value: hist } },
+      builtins: ['zlib'],
+    });
+    const [e] = await runCodeNode(ENGINE, 'Calculate Stats', {
+      input: { user_id: '42', ...done },
+      nodes: { 'Get CSV Session (aggregates)': { value: agg }, 'Get CSV Session (hist)': { value: hist } },
+      builtins: ['zlib'],
+    });
+    return [m.json, e.json];
+  };
+  const fromCodec = await run(values.agg_value, values.hist_value);
+  assert.deepStrictEqual(fromCodec, await run(JSON.stringify(parsed.json.agg), JSON.stringify(parsed.json.hist)));
+  assert.ok(fromCodec[1].stats.totalOrders > 0);
+
+  const [merged] = await runCodeNode(MAIN, 'Merge Session Report', {
+    input: { ...parsed.json, session_csv: values.csv_value, session_agg: values.agg_value, session_hist: values.hist_value },
+    nodes: { 'Merge Upload?': parsed.json, 'User Context': { ctx: { meta: parsed.json.meta } } },
+    builtins: ['zlib'],
+  });
+  assert.deepStrictEqual(merged.json.merge, { added: 0, updated: 0, unchanged: parsed.json.totalRecords });
+  const kb = b => `${(Buffer.byteLength(b) / 1024).toFixed(0)} KB`;
+  console.log(`✅ Encode Session Values → readers: same stats and merge, JSON without zlib (:csv ${kb(JSON.stringify(parsed.json.columns))} → ${kb(values.csv_value)})`);
+}
+
+async function main() {
+  console.log('🎯 SESSION CODEC TESTS\n');
+  testCodec();
+  await testWorkflowNodes();
+  console.log('\n✅ All session codec tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/session_codec.py: round trips, the JSON/compressed choice,
+and that values written by src/session-codec.js decode here and the other way
+round (skipped without node).
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from session_codec import SESSION_CODEC_DEFLATE, decode_session_value, encode_session_value  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def report_like(rows=3000, seed=3):
+    rnd = random.Random(seed)
+    statuses = ['Доставлен покупателю', 'Отменён', 'Ожидает отгрузки', 'Возврат']
+    return {'v': 1, 'rows': [{'status': rnd.choice(statuses), 'sku': f'SKU-{rnd.randint(1, 60)}',
+                              'price': rnd.randint(100, 90000) / 100} for _ in range(rows)]}
+
+
+def test_round_trip_and_choice():
+    value = report_like()
+    packed = encode_session_value(value, codec='deflate')
+    assert packed.startswith(SESSION_CODEC_DEFLATE)
+    assert len(packed) * 4 < len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+    assert decode_session_value(packed) == value
+    assert decode_session_value(packed.encode('ascii')) == value
+    assert encode_session_value(value) == json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    assert encode_session_value({'v': 1}, codec='deflate') == '{"v":1}'
+    noise = [''.join(random.Random(1).choices('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/', k=20000))]
+    assert not encode_session_value(noise, codec='deflate').startswith(SESSION_CODEC_DEFLATE)
+    for bad in (None, '', 'not json', '~d2:AAAA', SESSION_CODEC_DEFLATE + '!!!', packed[:100]):
+        assert decode_session_value(bad) is None
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_same_format_as_the_bot():
+    value = report_like(seed=9)
+    script = (
+        "const { encodeSessionValue, decodeSessionValue } = require('./src/session-codec');"
+        "const [fromPy, value] = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "console.log(JSON.stringify([encodeSessionValue(value, { codec: 'deflate' }), decodeSessionValue(fromPy)]));"
+    )
+    payload = json.dumps([encode_session_value(value, codec='deflate'), value], ensure_ascii=False)
+    out = subprocess.run(['node', '-e', script], cwd=ROOT, input=payload, capture_output=True, text=True, check=True)
+    from_js, decoded_by_js = json.loads(out.stdout)
+    assert from_js.startswith(SESSION_CODEC_DEFLATE)
+    assert decode_session_value(from_js) == value
+    assert decoded_by_js == value
@@ -0,0 +1,148 @@
+#!/usr/bin/env node
+/**
+ * Проверка раскладки сессии: ozon:sess:<uid>:meta (лёгкие метаданные),
+ * ozon:sess:<uid>:agg (индекс для статистики) и ozon:sess:<uid>:csv (records).
+ */
+
+const assert = require('assert');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES, loadReportRows } = require('./lib/synthetic-report');
+const { referenceRecords } = require('./lib/reference-records');
+const { readUserState } = require('../src/user-state');
+const { encodeDateTap, foldDateTaps, summarizeSelection } = require('../src/date-taps');
+const { listWorkflowFiles, syncAll } = require('./sync-code-nodes');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+
+async function parseSample(type) {
+  const rows = loadReportRows(SAMPLES[type]);
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', { input: rows, nodes: USER });
+  return { ...out.json, records: referenceRecords(rows) };
+}
+
+async function testMetaMatchesRecords(type) {
+  const { meta, availableDates, records, reportType } = await parseSample(type);
+  assert.strictEqual(meta.reportType, reportType);
+  assert.strictEqual(meta.totalRecords, records.length);
+  assert.deepStrictEqual(meta.availableDates, availableDates);
+  assert.deepStrictEqual(meta.months, [...new Set(availableDates.map(d => d.slice(0, 7)))].sort());
+  assert.strictEqual(meta.from, availableDates[0]);
+  assert.strictEqual(meta.to, availableDates[availableDates.length - 1]);
+  const days = Object.entries(meta.daysByMonth).flatMap(([ym, ds]) => ds.map(d => `${ym}-${String(d).padStart(2, '0')}`));
+  assert.deepStrictEqual(days, availableDates);
+  const orders = Object.values(meta.dayTotals).reduce((s, t) => s + t[0], 0);
+  assert.strictEqual(orders, records.reduce((s, r) => s + Number(r.quantity || 1), 0));
+  console.log(`✅ ${type}: meta (${availableDates.length} days) is consistent with ${records.length} records`);
+  return { meta, records };
+}
+
+// parseAsMsk из «Parse Report File»
+function parseAsMsk(s) {
+  if (!s) return null;
+  let utcDate;
+  const trimmed = s.trim();
+  if (/^\d{2}\.\d{2}\.\d{4} \d{1,2}:\d{2}(:\d{2})?$/.test(trimmed)) {
+    const [date, time] = trimmed.split(' ');
+    const [d, m, y] = date.split('.');
+    const hm = time.length < 5 ? '0' + time : time;
+    utcDate = new Date(`${y}-${m}-${d}T${hm.length === 5 ? hm + ':00' : hm}Z`);
+  } else if (/^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$/.test(trimmed)) {
+    utcDate = new Date(trimmed.replace(' ', 'T') + 'Z');
+  } else {
+    utcDate = new Date(s);
+  }
+  if (isNaN(utcDate)) return null;
+  return new Date(utcDate.getTime() + 3 * 3600 * 1000);
+}
+
+// «Итого» полным проходом по records — как считал «Compute Selection Summary» до dayTotals
+function scanSelectionSummary(records, selected) {
+  const setSel = new Set(selected);
+  const revenueStatuses = ['доставлен', 'доставляется', 'ожидает сборки', 'ожидает отгрузки'];
+  let totalOrders = 0;
+  let totalRevenue = 0;
+  for (const r of records) {
+    const msk = parseAsMsk(r.created_at);
+    if (!msk || !setSel.has(msk.toISOString().split('T')[0])) continue;
+    const q = Number(r.quantity || 1);
+    totalOrders += q;
+    if (revenueStatuses.some(s => (r.status || '').includes(s))) totalRevenue += Number(r.price || 0) * q;
+  }
+  return { totalOrders, totalRevenue };
+}
+
+function assertSameSummary(actual, expected, label) {
+  assert.strictEqual(actual.totalOrders, expected.totalOrders, `${label}: orders`);
+  assert.ok(Math.abs(actual.totalRevenue - expected.totalRevenue) < 0.005 * 3, `${label}: revenue ${actual.totalRevenue} vs ${expected.totalRevenue}`);
+}
+
+function testFoldedSummaryMatchesScan({ meta, records }) {
+  // Детерминированная серия тапов: добавления, снятия, упоры в лимит, сбросы
+  let seed = 7;
+  const rnd = n => { seed = (seed * 1103515245 + 12345) % 2147483648; return seed % n; };
+  const days = meta.availableDates.concat('2020-01-01');
+  const taps = [];
+  for (let i = 0; i < 400; i++) {
+    taps.push(rnd(25) ? encodeDateTap('t', days[rnd(Math.min(days.length, 6))], `q${i}`, { now: 1000 + i }) : encodeDateTap('r', '', `q${i}`, { now: 1000 + i }));
+    const { selected, summary } = foldDateTaps(taps, { now: 1000 + i, dayTotals: meta.dayTotals });
+    assertSameSummary(summary, scanSelectionSummary(records, selected), `tap ${i}`);
+    assert.deepStrictEqual(summary, summarizeSelection(meta.dayTotals, selected), `tap ${i}: fold = sum over the selection`);
+  }
+  assert.ok(!('summary' in foldDateTaps(taps, { now: 1000 })), 'no dayTotals — no summary');
+  console.log('✅ Folded selection summary (±day per tap) matches a full parseAsMsk scan of records over 400 taps');
+}
+
+async function testSelectionSummary({ meta, records }) {
+  const selected = meta.availableDates.slice(0, 3);
+  const ctx = readUserState({ meta: JSON.stringify(meta), sess_exp: String(Date.now() + 60000) });
+  const [month] = await runCodeNode(MAIN, 'Ensure Month (smart)', {
+    input: { selectedDates: selected, datesVersion: selected.length },
+    nodes: { ...USER, 'User Context': { ...USER['Extract User Data'], ctx } },
+  });
+  const [out] = await runCodeNode(MAIN, 'Compute Selection Summary', { input: month.json });
+  assertSameSummary(out.json.selectionSummary, scanSelectionSummary(records, selected), 'open');
+
+  // Тоггл: итог приходит из свёртки в «Take Latest Tap» и не пересчитывается
+  const taps = selected.map((d, i) => encodeDateTap('t', d, `q${i}`));
+  const nodes = { ...USER, 'Extract User Data': { ...USER['Extract User Data'], callback_query_id: 'q2' }, 'User Context': { ...USER['Extract User Data'], ctx } };
+  const [fold] = await runCodeNode(MAIN, 'Fold Date Taps', { input: { taps }, nodes });
+  const [take] = await runCodeNode(MAIN, 'Take Latest Tap', { input: { taps }, nodes: { ...nodes, 'Fold Date Taps': fold.json } });
+  assert.deepStrictEqual(take.json.selectionSummary, fold.json.checkpoint.summary, 'the render resumes the fold of its tap');
+  const [toggled] = await runCodeNode(MAIN, 'Ensure Month (smart)', { input: take.json, nodes });
+  const folded = { ...toggled.json, dayTotals: {} };
+  const [out2] = await runCodeNode(MAIN, 'Compute Selection Summary', { input: folded });
+  assert.deepStrictEqual(out2.json.selectionSummary, take.json.selectionSummary, 'summary comes from the fold');
+  assertSameSummary(out2.json.selectionSummary, scanSelectionSummary(records, selected), 'toggle');
+  console.log('✅ Compute Selection Summary: folded on toggles, summed from dayTotals otherwise');
+}
+
+function testNoHotPathReadsRecords() {
+  for (const file of listWorkflowFiles()) {
+    const wf = loadWorkflowFile(file);
+    for (const n of wf.nodes) {
+      if (n.type !== 'n8n-nodes-base.redis' || n.parameters.operation !== 'get') continue;
+      // Слияние загрузки («+») переупаковывает records — это не путь статистики
+      if (/\(merge\)$/.test(n.name)) continue;
+      if (/:csv$/.test(n.parameters.key || '')) {
+        assert.fail(`${path.basename(file)} → ${n.name} still GETs ozon:sess:<uid>:csv`);
+      }
+    }
+  }
+  console.log('✅ No route except the upload merge GETs ozon:sess:<uid>:csv (statistics read :agg)');
+}
+
+async function main() {
+  console.log('🎯 SESSION LAYOUT TESTS\n');
+  const fbo = await testMetaMatchesRecords('FBO');
+  await testMetaMatchesRecords('FBS');
+  testFoldedSummaryMatchesScan(fbo);
+  await testSelectionSummary(fbo);
+  testNoHotPathReadsRecords();
+  assert.deepStrictEqual(syncAll({ check: true, quiet: true }), [], 'src/ modules are out of sync with code nodes');
+  console.log('✅ Code nodes are in sync with src/');
+  console.log('\n✅ All session layout tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
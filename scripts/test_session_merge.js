@@ -0,0 +1,163 @@
+#!/usr/bin/env node
+/**
+ * Проверка слияния загрузок (src/session-merge.js, «Merge Session Report»):
+ * сессия после слияния перекрывающихся выгрузок равна разбору их
+ * объединения (по строкам заказа, новая версия строки побеждает), а
+ * счётчики added / updated / unchanged показывают, что пересчитана только
+ * дельта, а повтор той же выгрузки пишет значения сессии в Redis как были.
+ */
+
+const assert = require('assert');
+const path = require('path');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { SAMPLES, generateReport, loadReportRows } = require('./lib/synthetic-report');
+const { decodeRecords } = require('../src/record-columns');
+const { readUserState } = require('../src/user-state');
+const { MERGE_CAPTION_RE, mergeReportType, mergeSessionReport } = require('../src/session-merge');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+
+async function parse(rows) {
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', { input: rows, nodes: USER });
+  return out.json;
+}
+
+const session = p => ({ columns: p.columns, agg: p.agg, hist: p.hist, meta: p.meta });
+
+/** :agg/:hist без зависимости от порядка skus: { day: { sku: [...] } } */
+function byDaySku(index, width) {
+  const out = {};
+  for (const [day, cells] of Object.entries(index.days)) {
+    const rows = width ? Array.from({ length: cells.length / width }, (_, i) => cells.slice(i * width, (i + 1) * width)) : cells;
+    for (const c of rows) {
+      const key = index.skus[c[0]] + (width ? `@${c[1]}` : '');
+      (out[day] || (out[day] = {}))[key] = c.slice(width ? 2 : 1);
+    }
+  }
+  return out;
+}
+
+function assertSameSession(merged, fresh, label) {
+  assert.deepStrictEqual(byDaySku(merged.agg), byDaySku(fresh.agg), `${label}: agg`);
+  assert.deepStrictEqual(byDaySku(merged.hist, 6), byDaySku(fresh.hist, 6), `${label}: hist`);
+  assert.deepStrictEqual(merged.availableDates, fresh.availableDates, `${label}: availableDates`);
+  assert.strictEqual(merged.totalRecords, fresh.totalRecords, `${label}: totalRecords`);
+  assert.deepStrictEqual(Object.keys(merged.meta.dayTotals).sort(), Object.keys(fresh.meta.dayTotals).sort());
+  for (const [day, [orders, revenue]] of Object.entries(fresh.meta.dayTotals)) {
+    assert.strictEqual(merged.meta.dayTotals[day][0], orders, `${label}: ${day} orders`);
+    assert.ok(Math.abs(merged.meta.dayTotals[day][1] - revenue) < 0.005, `${label}: ${day} revenue`);
+  }
+  const sortRecords = c => decodeRecords(c).map(r => JSON.stringify(r)).sort();
+  assert.deepStrictEqual(sortRecords(merged.columns), sortRecords(fresh.columns), `${label}: records`);
+}
+
+const utcDay = r => Number(r['Принят в обработку'].slice(0, 2));
+
+async function testOverlappingWeeks() {
+  const { rows } = generateReport({ rows: 6000, days: 28, type: 'FBO', seed: 7 });
+  const older = rows.filter(r => utcDay(r) <= 21);
+  const newer = rows.filter(r => utcDay(r) >= 8).map((r, i) =>
+    (utcDay(r) <= 21 && r['Статус'] === 'Ожидает сборки' && i % 2 ? { ...r, 'Статус': 'Доставлен' } : r));
+  const changed = newer.filter((r, i) => r !== rows.filter(x => utcDay(x) >= 8)[i]).length;
+  const overlap = newer.filter(r => utcDay(r) <= 21).length;
+
+  const base = await parse(older);
+  const incoming = await parse(newer);
+  const merged = mergeSessionReport(session(base), incoming);
+  const union = [...older.filter(r => utcDay(r) < 8), ...newer];
+  assertSameSession(merged, await parse(union), 'overlap');
+  assert.deepStrictEqual(merged.merge, { added: newer.length - overlap, updated: changed, unchanged: overlap - changed });
+  console.log(`✅ Week-overlapping re-upload: ${merged.merge.added} added, ${merged.merge.updated} status changes, ${merged.merge.unchanged} skipped; session == parse of the union`);
+
+  const again = mergeSessionReport(session(merged), incoming);
+  assert.deepStrictEqual(again.merge, { added: 0, updated: 0, unchanged: newer.length });
+  assertSameSession(again, merged, 'repeat');
+  for (const f of ['columns', 'agg', 'hist', 'meta']) assert.strictEqual(again[f], merged[f], `repeat: same ${f} object`);
+  console.log('✅ Uploading the same export again changes nothing');
+
+  // Заказ ушёл в другой день: старый день пустеет и пропадает из дат
+  const single = [older[0]];
+  const moved = [{ ...older[0], 'Принят в обработку': '28.08.2025 10:00' }];
+  const m2 = mergeSessionReport(session(await parse(single)), await parse(moved));
+  assert.deepStrictEqual(m2.availableDates, ['2025-08-28']);
+  assert.deepStrictEqual(Object.keys(m2.meta.dayTotals), ['2025-08-28']);
+  assert.deepStrictEqual(m2.merge, { added: 0, updated: 1, unchanged: 0 });
+  console.log('✅ A line moved to another day leaves its old day');
+}
+
+async function testFboPlusFbs() {
+  const fbo = await parse(loadReportRows(SAMPLES.FBO));
+  const fbs = await parse(loadReportRows(SAMPLES.FBS));
+  const merged = mergeSessionReport(session(fbo), fbs);
+  assert.strictEqual(merged.reportType, 'FBO+FBS');
+  assert.strictEqual(merged.meta.reportType, 'FBO+FBS');
+  assert.strictEqual(merged.totalRecords, fbo.totalRecords + fbs.totalRecords);
+  assert.deepStrictEqual(merged.availableDates, Array.from(new Set([...fbo.availableDates, ...fbs.availableDates])).sort());
+  for (const day of merged.availableDates) {
+    const sum = (fbo.meta.dayTotals[day] || [0])[0] + (fbs.meta.dayTotals[day] || [0])[0];
+    assert.strictEqual(merged.meta.dayTotals[day][0], sum, day);
+  }
+  assert.strictEqual(mergeReportType('FBO+FBS', 'FBO'), 'FBO+FBS');
+  console.log(`✅ FBO + FBS in one session: ${merged.totalRecords} records, ${merged.availableDates.length} days`);
+}
+
+async function testWorkflowNodes() {
+  for (const caption of ['+', ' + неделя', 'merge', 'Добавить']) assert.ok(MERGE_CAPTION_RE.test(caption), caption);
+  for (const caption of ['', 'отчёт за неделю', 'FBO']) assert.ok(!MERGE_CAPTION_RE.test(caption), caption);
+  const next = name => MAIN.connections[name].main.map(b => (b || []).map(l => l.node));
+  assert.deepStrictEqual(next('Parse Report File')[0], ['Merge Upload?', 'Get Parse Cache Index']);
+  assert.deepStrictEqual(next('Parse Cache Hit?')[0], ['Merge Upload?', 'Count Parse Cache Hit']);
+  assert.deepStrictEqual(next('Merge Upload?'), [['Get Session CSV (merge)'], ['Get Upload Generation']]);
+  assert.deepStrictEqual(next('Get Session Hist (merge)'), [['Merge Session Report']]);
+  assert.deepStrictEqual(next('Merge Session Report'), [['Get Upload Generation']]);
+  assert.deepStrictEqual(next('Upload Current?'), [['Encode Session Values']]);
+  assert.deepStrictEqual(next('Encode Session Values'), [['Cache CSV Records']]);
+
+  const fbo = await parse(loadReportRows(SAMPLES.FBO));
+  const fbs = await parse(loadReportRows(SAMPLES.FBS));
+  const stored = { session_csv: JSON.stringify(fbo.columns), session_agg: JSON.stringify(fbo.agg), session_hist: JSON.stringify(fbo.hist) };
+  const ctx = readUserState({ meta: JSON.stringify(fbo.meta), sess_exp: String(Date.now() + 60000) });
+  const [out] = await runCodeNode(MAIN, 'Merge Session Report', {
+    input: { ...fbs, ...stored },
+    nodes: { 'Merge Upload?': fbs, 'User Context': { ctx } },
+  });
+  assert.deepStrictEqual(out.json, { ...mergeSessionReport(session(fbo), fbs), chat_id: '42', user_id: '42' });
+
+  assert.ok(!('session_values' in out.json), 'changed merge is encoded again');
+
+  // Повтор той же выгрузки: строки из Redis проходят в SET без кодека
+  const [same] = await runCodeNode(MAIN, 'Merge Session Report', {
+    input: { ...fbo, ...stored },
+    nodes: { 'Merge Upload?': fbo, 'User Context': { ctx } },
+  });
+  assert.deepStrictEqual(same.json.merge, { added: 0, updated: 0, unchanged: fbo.totalRecords });
+  const values = { csv_value: stored.session_csv, agg_value: stored.session_agg, hist_value: stored.session_hist };
+  assert.deepStrictEqual(same.json.session_values, values);
+  const [encoded] = await runCodeNode(MAIN, 'Encode Session Values', { input: { ...same.json, upload_gen: 2 }, nodes: { Config: {} }, builtins: ['fs', 'zlib'] });
+  assert.deepStrictEqual(encoded.json, { user_id: '42', chat_id: '42', ...values });
+
+  // Пустая сессия: слияние = обычная загрузка
+  const [first] = await runCodeNode(MAIN, 'Merge Session Report', { input: { ...fbs }, nodes: { 'Merge Upload?': fbs, 'User Context': { ctx: readUserState({}) } } });
+  assert.deepStrictEqual(first.json.agg, fbs.agg);
+  assert.deepStrictEqual(first.json.merge, { added: fbs.totalRecords, updated: 0, unchanged: 0 });
+
+  const [month] = await runCodeNode(MAIN, 'Calc Initial Month', {
+    input: out.json,
+    nodes: { ...USER, 'Merge Session Report': out.json, 'Parse Report File': fbs, 'User Context': { ctx } },
+  });
+  assert.strictEqual(month.json.maxMonth, out.json.meta.maxMonth);
+  assert.deepStrictEqual(month.json.months, out.json.meta.months);
+  console.log('✅ Merge Upload? → Get Session CSV/Agg/Hist (merge) → Merge Session Report (meta from User Context); calendar opens on the merged meta');
+  console.log('✅ Same export again: Encode Session Values writes the stored strings back as they were');
+}
+
+async function main() {
+  console.log('🎯 SESSION MERGE TESTS\n');
+  await testOverlappingWeeks();
+  await testFboPlusFbs();
+  await testWorkflowNodes();
+  console.log('\n✅ All session merge tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,303 @@
+#!/usr/bin/env node
+/**
+ * Проверка диспетчера исходящих вызовов Bot API (src/telegram-dispatch.js,
+ * scripts/telegram-dispatcher.js) на локальной заглушке Telegram
+ * (scripts/lib/telegram-stub.js): вёдра токенов, приоритет
+ * answerCallbackQuery, порядок и лимит чата без 429, повтор по retry_after,
+ * повтор после обрыва соединения только без риска дубля (тело не ушло или
+ * метод идемпотентен), keep-alive, ограниченная очередь, метрики,
+ * адрес TELEGRAM_API_BASE во всех HTTP-нодах Bot API.
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const http = require('http');
+const path = require('path');
+const { loadWorkflowFile } = require('./lib/n8n-sandbox');
+const { startTelegramStub } = require('./lib/telegram-stub');
+const { createDispatcherServer } = require('./telegram-dispatcher');
+const {
+  TELEGRAM_API, DISPATCH_LIMITS, TokenBucket, TelegramDispatcher, dispatcherMetrics, dispatchSettings, methodClass, isChatMethod, isIdempotentMethod,
+  createTransport,
+} = require('../src/telegram-dispatch');
+
+const TOKEN = 'test-token';
+const FAST = { ...DISPATCH_LIMITS, chatPerSec: 20, chatBurst: 1, maxSockets: 4 };
+
+function dispatcherFor(stub, limits = FAST) {
+  const transport = createTransport(stub.url, limits);
+  return new TelegramDispatcher({ transport, limits });
+}
+
+function testBuckets() {
+  const bucket = new TokenBucket(1, 3, 0);
+  for (let i = 0; i < 3; i++) {
+    assert.strictEqual(bucket.wait(0), 0);
+    bucket.take(0);
+  }
+  assert.strictEqual(bucket.wait(0), 1000);
+  assert.strictEqual(bucket.wait(400), 600);
+  assert.strictEqual(bucket.wait(1000), 0);
+  bucket.take(1000);
+  assert.strictEqual(bucket.wait(60000), 0, 'refills');
+  assert.strictEqual(bucket.tokens, 3, 'up to the burst');
+
+  assert.deepStrictEqual(['answerCallbackQuery', 'sendMessage', 'deleteMessage', 'editMessageText', 'editMessageReplyMarkup'].map(methodClass),
+    ['answer', 'send', 'send', 'edit', 'edit']);
+  assert.ok(isChatMethod('sendMessage') && isChatMethod('editMessageText') && isChatMethod('deleteMessage'));
+  assert.ok(!isChatMethod('answerCallbackQuery') && !isChatMethod('sendChatAction') && !isChatMethod('getFile'));
+  assert.deepStrictEqual(['getFile', 'editMessageText', 'editMessageReplyMarkup', 'sendMessage', 'deleteMessage', 'answerCallbackQuery', 'getaway'].map(isIdempotentMethod),
+    [true, true, true, false, false, false, false]);
+
+  const limits = dispatchSettings({ DISPATCH_CHAT_PER_SEC: '0.5', DISPATCH_MAX_QUEUE: '50', DISPATCH_BOT_PER_SEC: 'x', DISPATCH_MAX_RETRIES: '0' });
+  assert.strictEqual(limits.chatPerSec, 0.5);
+  assert.strictEqual(limits.maxQueue, 50);
+  assert.strictEqual(limits.botPerSec, DISPATCH_LIMITS.botPerSec);
+  assert.strictEqual(limits.maxRetries, 0);
+  console.log('✅ Token buckets, method classes and DISPATCH_* settings');
+}
+
+async function testPriority() {
+  const order = [];
+  const transport = async job => {
+    order.push(job.method);
+    await new Promise(resolve => setTimeout(resolve, 5));
+    return { status: 200, body: { ok: true, result: true } };
+  };
+  const d = new TelegramDispatcher({ transport, limits: { ...FAST, maxInFlight: 1 } });
+  const calls = [];
+  for (let chat = 1; chat <= 3; chat++) calls.push(d.submit({ token: TOKEN, method: 'editMessageText', body: { chat_id: chat, message_id: 1, text: 'x' } }));
+  calls.push(d.submit({ token: TOKEN, method: 'sendMessage', body: { chat_id: 4, text: 'x' } }));
+  calls.push(d.submit({ token: TOKEN, method: 'answerCallbackQuery', body: { callback_query_id: 'cb' } }));
+  await Promise.all(calls);
+  assert.deepStrictEqual(order, ['editMessageText', 'answerCallbackQuery', 'sendMessage', 'editMessageText', 'editMessageText']);
+  const m = dispatcherMetrics(d);
+  assert.strictEqual(m.latencyMs.answer.total.n, 1);
+  assert.ok(m.latencyMs.answer.queue.p50 <= m.latencyMs.edit.queue.max, 'the answer waited less than the edits');
+  console.log(`✅ answerCallbackQuery jumps the queued edits: ${order.join(' → ')}`);
+}
+
+async function testChatOrderAndRate() {
+  const stub = await startTelegramStub({ chatPerSec: 20, chatBurst: 1 });
+  const d = dispatcherFor(stub);
+  try {
+    const calls = [];
+    for (let i = 0; i < 6; i++) {
+      for (let chat = 1; chat <= 3; chat++) {
+        calls.push(d.submit({ token: TOKEN, method: 'editMessageText', body: { chat_id: chat, message_id: 1, text: `tap ${i}` } }));
+      }
+      calls.push(d.submit({ token: TOKEN, method: 'answerCallbackQuery', body: { callback_query_id: `cb${i}` } }));
+    }
+    const results = await Promise.all(calls);
+    assert.ok(results.every(r => r.status === 200 && r.body.ok), 'every call succeeds');
+    assert.strictEqual(stub.stats.limited, 0, 'no 429 from Telegram');
+    for (let chat = 1; chat <= 3; chat++) {
+      const texts = stub.calls.filter(c => c.body.chat_id === chat).map(c => c.body.text);
+      assert.deepStrictEqual(texts, [0, 1, 2, 3, 4, 5].map(i => `tap ${i}`), `chat ${chat} in order`);
+    }
+    assert.ok(stub.stats.connections <= FAST.maxSockets, `${stub.stats.connections} connections`);
+    const m = dispatcherMetrics(d);
+    assert.strictEqual(m.connections.requests, 24);
+    assert.strictEqual(m.connections.connections + m.connections.reused, 24);
+    assert.ok(m.connections.reused >= 20, `${m.connections.reused} reused`);
+    assert.strictEqual(m.queued.total, 0);
+    assert.strictEqual(m.ok, 24);
+    console.log(`✅ 24 calls, 3 chats: in order per chat, 0 × 429, ${stub.stats.connections} keep-alive connections`);
+  } finally {
+    d.transport.close();
+    await stub.close();
+  }
+}
+
+async function testRetryAfter() {
+  // Диспетчер думает, что у чата запас 3, Telegram пускает одно сообщение в секунду
+  const stub = await startTelegramStub({ chatPerSec: 1, chatBurst: 1 });
+  const d = dispatcherFor(stub, { ...FAST, chatPerSec: 1, chatBurst: 3 });
+  try {
+    const t0 = Date.now();
+    const [first, second] = await Promise.all([1, 2].map(i => d.submit({ token: TOKEN, method: 'sendMessage', body: { chat_id: 7, text: `m${i}` } })));
+    const elapsed = Date.now() - t0;
+    assert.ok(first.body.ok && second.body.ok, 'the limited call is retried');
+    assert.deepStrictEqual(stub.calls.map(c => c.body.text), ['m1', 'm2']);
+    assert.ok(elapsed >= 900, `waited retry_after: ${elapsed} ms`);
+    const m = dispatcherMetrics(d);
+    assert.strictEqual(m.limited, 1);
+    assert.strictEqual(m.retried, 1);
+    assert.strictEqual(stub.stats.limited, 1, 'one 429, then the chat waits');
+    console.log(`✅ 429 retry_after=1: the chat waits and the call goes through (${elapsed} ms)`);
+  } finally {
+    d.transport.close();
+    await stub.close();
+  }
+}
+
+async function testNetworkRetry() {
+  const stub = await startTelegramStub();
+  const d = dispatcherFor(stub, { ...FAST, retryBaseMs: 20 });
+  try {
+    // Правка идемпотентна: обрыв после записи — повтор
+    stub.failNext(1);
+    const res = await d.submit({ token: TOKEN, method: 'editMessageText', body: { chat_id: 1, message_id: 1, text: 'x' } });
+    assert.ok(res.body.ok);
+    assert.strictEqual(d.counters.errors, 1);
+    assert.strictEqual(d.counters.retried, 1);
+
+    stub.failNext(10);
+    const failed = await d.submit({ token: TOKEN, method: 'getFile', body: { file_id: 'f' } });
+    assert.strictEqual(failed.status, 502);
+    assert.strictEqual(d.counters.upstream, 2 + FAST.maxRetries + 1, 'gives up after maxRetries');
+
+    // sendMessage и answerCallbackQuery мог выполнить Telegram — без повтора
+    stub.failNext(10);
+    const upstream = d.counters.upstream;
+    for (const [method, body] of [['sendMessage', { chat_id: 2, text: 'x' }], ['answerCallbackQuery', { callback_query_id: 'cb' }]]) {
+      const once = await d.submit({ token: TOKEN, method, body });
+      assert.strictEqual(once.status, 502, method);
+    }
+    assert.strictEqual(d.counters.upstream, upstream + 2, 'non-idempotent calls are not retried after the write');
+    console.log(`✅ Dropped connection: edit*/get* retried with backoff, 502 after ${FAST.maxRetries} retries; send/answer not retried`);
+  } finally {
+    d.transport.close();
+    await stub.close();
+  }
+}
+
+async function testTimeoutSentOnce() {
+  const stub = await startTelegramStub({ chatPerSec: 20, chatBurst: 1 });
+  const d = dispatcherFor(stub, { ...FAST, retryBaseMs: 20, timeoutMs: 150 });
+  try {
+    stub.stallNext(1);
+    const res = await d.submit({ token: TOKEN, method: 'sendMessage', body: { chat_id: 3, text: 'report' } });
+    assert.strictEqual(res.status, 502);
+    assert.match(res.body.description, /timeout/);
+    await new Promise(resolve => setTimeout(resolve, 200));
+    const sent = stub.calls.filter(c => c.method === 'sendMessage');
+    assert.strictEqual(sent.length, 1, 'sendMessage that timed out is sent exactly once');
+    assert.strictEqual(d.counters.retried, 0);
+    assert.strictEqual(d.counters.upstream, 1);
+    console.log('✅ sendMessage times out once: one message in the chat, 502 to the caller, no retry');
+  } finally {
+    d.transport.close();
+    await stub.close();
+  }
+}
+
+async function testUnsentRetry() {
+  // Отказ соединения: запрос не записан — транспорт помечает sent: false
+  const closed = await startTelegramStub();
+  const url = closed.url;
+  await closed.close();
+  const transport = createTransport(url, FAST);
+  const error = await transport({ token: TOKEN, method: 'sendMessage', payload: Buffer.from('{}'), contentType: 'application/json' }).catch(e => e);
+  transport.close();
+  assert.strictEqual(error.sent, false, error.message);
+
+  // Такой вызов повторяется и для sendMessage
+  const attempts = [];
+  const flaky = async job => {
+    attempts.push(job.method);
+    if (attempts.length === 1) throw Object.assign(new Error('connect ECONNREFUSED'), { sent: false });
+    return { status: 200, body: { ok: true, result: { message_id: 1 } } };
+  };
+  const d = new TelegramDispatcher({ transport: flaky, limits: { ...FAST, retryBaseMs: 10 } });
+  const res = await d.submit({ token: TOKEN, method: 'sendMessage', body: { chat_id: 4, text: 'x' } });
+  assert.ok(res.body.ok);
+  assert.deepStrictEqual(attempts, ['sendMessage', 'sendMessage']);
+  assert.strictEqual(d.counters.retried, 1);
+  console.log('✅ Connection refused before the write: sendMessage is retried');
+}
+
+async function testBoundedQueue() {
+  const pending = [];
+  const transport = () => new Promise(resolve => pending.push(resolve));
+  const d = new TelegramDispatcher({ transport, limits: { ...FAST, maxQueue: 2, maxWaitMs: 150 } });
+  const calls = [1, 2, 3, 4].map(i => d.submit({ token: TOKEN, method: 'sendMessage', body: { chat_id: 1, text: `m${i}` } }));
+  const rejected = await calls[3];
+  assert.strictEqual(rejected.status, 429);
+  assert.strictEqual(rejected.body.parameters.retry_after, 1);
+  // Первый вызов висит — следующие два в очереди чата истекают через maxWaitMs
+  const [second, third] = await Promise.all([calls[1], calls[2]]);
+  assert.strictEqual(second.status, 429);
+  assert.strictEqual(third.status, 429);
+  pending[0]({ status: 200, body: { ok: true, result: true } });
+  assert.ok((await calls[0]).body.ok);
+  const m = dispatcherMetrics(d);
+  assert.strictEqual(m.rejected, 1);
+  assert.strictEqual(m.expired, 2);
+  assert.strictEqual(m.maxQueued, 2);
+  assert.strictEqual(m.queued.total, 0);
+  console.log('✅ Bounded queue: over maxQueue → 429 at once, over maxWaitMs → 429');
+}
+
+function post(url, body) {
+  return new Promise((resolve, reject) => {
+    const req = http.request(url, { method: body ? 'POST' : 'GET', headers: { 'content-type': 'application/json' } }, res => {
+      const chunks = [];
+      res.on('data', c => chunks.push(c));
+      res.on('end', () => resolve({ status: res.statusCode, body: JSON.parse(Buffer.concat(chunks).toString('utf8')) }));
+    });
+    req.on('error', reject);
+    req.end(body ? JSON.stringify(body) : undefined);
+  });
+}
+
+async function testServer() {
+  const stub = await startTelegramStub({ chatPerSec: 20, chatBurst: 1 });
+  const { server, transport } = createDispatcherServer({ upstream: stub.url, limits: FAST });
+  await new Promise(resolve => server.listen(0, '127.0.0.1', resolve));
+  const base = `http://127.0.0.1:${server.address().port}`;
+  try {
+    const sent = await post(`${base}/bot${TOKEN}/sendMessage`, { chat_id: 5, text: 'hi' });
+    assert.strictEqual(sent.status, 200);
+    assert.ok(sent.body.result.message_id > 0);
+    const answered = await post(`${base}/bot${TOKEN}/answerCallbackQuery`, { callback_query_id: 'cb' });
+    assert.strictEqual(answered.body.result, true);
+    assert.strictEqual((await post(`${base}/nope`)).status, 404);
+    assert.deepStrictEqual((await post(`${base}/healthz`)).body, { ok: true });
+    const metrics = (await post(`${base}/metrics`)).body;
+    assert.strictEqual(metrics.ok, 2);
+    assert.strictEqual(metrics.connections.connections, 1, 'one upstream connection for both calls');
+    assert.ok('p95' in metrics.latencyMs.answer.total);
+    console.log('✅ Dispatcher service: POST /bot<token>/<method> proxied, /metrics, /healthz');
+  } finally {
+    server.close();
+    transport.close();
+    await stub.close();
+  }
+}
+
+function testWorkflowUrls() {
+  const dir = path.join(__dirname, '..', 'workflows');
+  let checked = 0;
+  for (const file of fs.readdirSync(dir).filter(f => f.endsWith('.json'))) {
+    const wf = loadWorkflowFile(path.join(dir, file));
+    for (const node of wf.nodes.filter(n => n.type === 'n8n-nodes-base.httpRequest')) {
+      const url = node.parameters.url || '';
+      if (!url.includes('TELEGRAM_BOT_TOKEN')) continue;
+      assert.match(url, /^=\{\{ (\$\('Config'\)\.first\(\)\.json|\$env)\.TELEGRAM_API_BASE \|\| 'https:\/\/api\.telegram\.org' \}\}\/bot\{\{ /, `${file} → ${node.name}`);
+      checked++;
+    }
+  }
+  assert.ok(checked >= 27, `${checked} Bot API nodes`);
+  const main = loadWorkflowFile(path.join(dir, 'ozon-telegram-bot.json'));
+  const config = main.nodes.find(n => n.name === 'Config').parameters.assignments.assignments;
+  assert.strictEqual(config.find(a => a.name === 'TELEGRAM_API_BASE').value, TELEGRAM_API);
+  console.log(`✅ ${checked} Bot API HTTP nodes call TELEGRAM_API_BASE (Config default ${TELEGRAM_API})`);
+}
+
+async function main() {
+  console.log('🎯 TELEGRAM DISPATCHER TESTS\n');
+  testBuckets();
+  await testPriority();
+  await testChatOrderAndRate();
+  await testRetryAfter();
+  await testNetworkRetry();
+  await testTimeoutSentOnce();
+  await testUnsentRetry();
+  await testBoundedQueue();
+  await testServer();
+  testWorkflowUrls();
+  console.log('\n✅ All Telegram dispatcher tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
@@ -0,0 +1,99 @@
+#!/usr/bin/env node
+/**
+ * Проверка правки «живого» сообщения (src/ui-message.js) и саб-workflow
+ * ozord_ui_orchestrator (send-or-edit) целиком: та же отрисовка — без
+ * вызова, только клавиатура — editMessageReplyMarkup, «message is not
+ * modified» и пропавшее сообщение — без дубля и с тем же текстом.
+ */
+
+const assert = require('assert');
+const path = require('path');
+const { loadWorkflowFile } = require('./lib/n8n-sandbox');
+const { MemoryRedis, runWorkflow } = require('./lib/n8n-runner');
+const { uiRenderPrint, planUiEdit, packUiMessage, readUiMessage, isMessageNotModified } = require('../src/ui-message');
+
+const ORCHESTRATOR = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozord_ui_orchestrator.n8n.json'));
+const KEY = 'ozon:ui:{42}:calendar:message_id';
+const kb = label => ({ inline_keyboard: [[{ text: label, callback_data: 'noop' }]] });
+
+function testPlan() {
+  const a = uiRenderPrint({ text: 'Выбрано: 1', parse_mode: 'HTML', reply_markup: kb('2025-08') });
+  assert.strictEqual(a, uiRenderPrint({ text: 'Выбрано: 1', parse_mode: 'HTML', reply_markup: kb('2025-08') }));
+  assert.match(a, /^[0-9a-f]{8}\.[0-9a-f]{8}$/);
+  const markup = uiRenderPrint({ text: 'Выбрано: 1', parse_mode: 'HTML', reply_markup: kb('2025-07') });
+  const text = uiRenderPrint({ text: 'Выбрано: 2', parse_mode: 'HTML', reply_markup: kb('2025-08') });
+  const mode = uiRenderPrint({ text: 'Выбрано: 1', reply_markup: kb('2025-08') });
+  assert.strictEqual(planUiEdit(null, a, a), 'send');
+  assert.strictEqual(planUiEdit(7, a, a), 'skip');
+  assert.strictEqual(planUiEdit(7, a, markup), 'markup');
+  assert.strictEqual(planUiEdit(7, a, text), 'text');
+  assert.strictEqual(planUiEdit(7, a, mode), 'text', 'parse_mode is part of the text');
+  assert.strictEqual(planUiEdit(7, null, a), 'text', 'no print yet — edit the text');
+
+  assert.deepStrictEqual(readUiMessage(packUiMessage(7, a)), { messageId: 7, print: a });
+  assert.deepStrictEqual(readUiMessage('123'), { messageId: 123, print: null }, 'legacy value is a bare message_id');
+  assert.deepStrictEqual(readUiMessage(null), { messageId: null, print: null });
+  assert.ok(isMessageNotModified({ ok: false, description: 'Bad Request: message is not modified: specified new message content and reply markup are exactly the same' }));
+  assert.ok(isMessageNotModified({ error: { message: '400 - "Bad Request: message is not modified"' } }));
+  assert.ok(!isMessageNotModified({ ok: false, description: 'Bad Request: message to edit not found' }));
+  console.log('✅ uiRenderPrint / planUiEdit: send, skip, markup-only, text; legacy message_id values');
+}
+
+async function testOrchestrator() {
+  const redis = new MemoryRedis();
+  let messageId = 700;
+  // fail — ответы с ошибкой по методу Bot API
+  let fail = {};
+  const calls = [];
+  const telegram = async (method, body) => {
+    calls.push({ method, body });
+    if (fail[method]) return { ok: false, error_code: 400, description: fail[method] };
+    return { ok: true, result: method === 'sendMessage' ? { message_id: ++messageId } : true };
+  };
+  const show = async (text, markup) => {
+    calls.length = 0;
+    const run = await runWorkflow(ORCHESTRATOR, {
+      update: { chat_id: 42, user_id: 42, key: 'calendar', text, reply_markup: markup },
+      redis,
+      telegram,
+      env: { TELEGRAM_BOT_TOKEN: 'test-token' },
+    });
+    if (run.error) throw run.error;
+    return calls.map(c => c.method);
+  };
+
+  assert.deepStrictEqual(await show('Выбрано: 1', kb('2025-08')), ['sendMessage']);
+  assert.strictEqual(readUiMessage(redis.get(KEY)).messageId, 701);
+  assert.deepStrictEqual(await show('Выбрано: 1', kb('2025-08')), [], 'the same render is not sent again');
+  assert.deepStrictEqual(await show('Выбрано: 1', kb('2025-07')), ['editMessageReplyMarkup']);
+  assert.deepStrictEqual(Object.keys(calls[0].body).sort(), ['chat_id', 'message_id', 'reply_markup']);
+  assert.deepStrictEqual(await show('Выбрано: 2', kb('2025-07')), ['editMessageText']);
+  assert.strictEqual(calls[0].body.message_id, 701);
+  assert.deepStrictEqual(readUiMessage(redis.get(KEY)), { messageId: 701, print: uiRenderPrint({ text: 'Выбрано: 2', parse_mode: 'HTML', reply_markup: kb('2025-07') }) });
+
+  // Значение до отпечатков: правка «not modified» — не повод слать дубль
+  redis.set(KEY, '701');
+  fail = { editMessageText: 'Bad Request: message is not modified' };
+  assert.deepStrictEqual(await show('Выбрано: 2', kb('2025-07')), ['editMessageText'], 'no duplicate sendMessage');
+  assert.strictEqual(readUiMessage(redis.get(KEY)).messageId, 701);
+  assert.deepStrictEqual(await show('Выбрано: 2', kb('2025-07')), [], 'the print is stored after the not-modified edit');
+
+  // Сообщение удалено: правка не прошла — новое сообщение с тем же текстом
+  fail = { editMessageText: 'Bad Request: message to edit not found' };
+  assert.deepStrictEqual(await show('Выбрано: 3', kb('2025-07')), ['editMessageText', 'sendMessage']);
+  assert.strictEqual(calls[1].body.text, 'Выбрано: 3');
+  assert.deepStrictEqual(calls[1].body.reply_markup, kb('2025-07'));
+  fail = {};
+  assert.strictEqual(readUiMessage(redis.get(KEY)).messageId, 702);
+  assert.deepStrictEqual(await show('Выбрано: 3', kb('2025-07')), []);
+  console.log('✅ ozord_ui_orchestrator: one send, no-op skipped, markup-only edit, no duplicate on "not modified", fallback keeps the text');
+}
+
+async function main() {
+  console.log('🎯 UI MESSAGE TESTS\n');
+  testPlan();
+  await testOrchestrator();
+  console.log('\n✅ All UI message tests passed');
+}
+
+main().catch(e => { console.error('❌', e.stack); process.exit(1); });
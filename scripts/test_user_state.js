@@ -0,0 +1,285 @@
+#!/usr/bin/env node
+/**
+ * Проверка состояния пользователя одним hash (src/user-state.js) и
+ * маршрутов основного workflow поверх него: каждый апдейт читает Redis
+ * один раз («Load User State»), календарь пишет один HSET, ACL берётся из
+ * кэша в hash и перечитывается из ozon:acl:<uid> по истечении или после
+ * сброса при правке прав.
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const path = require('path');
+const { loadWorkflowFile } = require('./lib/n8n-sandbox');
+const { MemoryRedis, runWorkflow, summarizeTrace } = require('./lib/n8n-runner');
+const { SAMPLES } = require('./lib/synthetic-report');
+const { userStateKey, readUserState, packUserState } = require('../src/user-state');
+const { ACL_WHITELIST, ACL_ADMIN, ACL_SUPERUSER, aclKey, aclBits } = require('../src/acl-bits');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const ACCESS = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozord_telegram_core_access.n8n.json'));
+// Без окна слияния рендеров: тапы здесь последовательные (окно — scripts/test_date_taps.js)
+const CONFIG = { TELEGRAM_BOT_TOKEN: 'test-token', SUPERUSER_IDS: '1', CALENDAR_COALESCE_MS: 0 };
+const USER = { id: 42 };
+const CHAT = { id: 42 };
+const KEY = userStateKey(42);
+const READS = ['TYPE', 'GET', 'HGETALL'];
+
+/** HSET в форме n8n: строка «поле значение …», разбитая по пробелу. */
+function hset(raw, value) {
+  const parts = value.split(' ');
+  assert.strictEqual(parts.length % 2, 0, `odd HSET arguments: ${value}`);
+  for (let i = 0; i < parts.length; i += 2) raw[parts[i]] = parts[i + 1];
+  return raw;
+}
+
+function testPackAndRead() {
+  const now = Date.now();
+  const meta = { reportType: 'FBO + FBS', availableDates: ['2025-08-01'], dayTotals: { '2025-08-01': [2, 10.5] } };
+  const raw = hset({}, packUserState({ meta, dates: ['2025-08-01'], cal_month: '2025-08', acl: ACL_WHITELIST | ACL_ADMIN }, { now }));
+  assert.deepStrictEqual(readUserState(raw, { now }), {
+    acl: 3, meta, selectedDates: ['2025-08-01'], calMonth: '2025-08', calendarMsgId: null, calendarRender: null,
+  });
+  hset(raw, packUserState({ calendar_msg_id: 77, calendar_render: '0badf00d.00c0ffee' }, { now }));
+  assert.strictEqual(readUserState(raw, { now }).calendarMsgId, 77);
+  assert.strictEqual(readUserState(raw, { now }).calendarRender, '0badf00d.00c0ffee');
+
+  // У групп свой срок: выбор дат истёк (24 ч), meta (72 ч) жива, ACL (5 мин) перечитывается
+  const later = readUserState(raw, { now: now + 86400 * 1000 + 1 });
+  assert.deepStrictEqual([later.acl, later.selectedDates, later.calMonth, later.meta], [null, [], null, meta]);
+  hset(raw, 'meta null dates null cal_month null calendar_msg_id null calendar_render null');
+  assert.deepStrictEqual(readUserState(raw, { now }), { acl: 3, meta: null, selectedDates: [], calMonth: null, calendarMsgId: null, calendarRender: null });
+  assert.deepStrictEqual(readUserState({}), readUserState(null));
+  assert.strictEqual(aclKey(42), 'ozon:acl:42');
+  assert.strictEqual(aclBits('1'), ACL_WHITELIST);
+  assert.strictEqual(aclBits('3'), ACL_WHITELIST | ACL_ADMIN);
+  assert.strictEqual(aclBits('7'), ACL_WHITELIST | ACL_ADMIN | ACL_SUPERUSER);
+  for (const junk of [null, '', '0', '-1', 'yes', '1.5']) assert.strictEqual(aclBits(junk), 0, String(junk));
+  assert.strictEqual(aclBits('15'), 7, 'unknown bits are dropped');
+  console.log('✅ packUserState → HSET → readUserState round trip (spaces, per-group expiry, cleared fields)');
+}
+
+function session() {
+  const redis = new MemoryRedis();
+  redis.set(aclKey(42), String(ACL_WHITELIST | ACL_ADMIN));
+  let messageId = 500;
+  const calls = [];
+  // hold[method] — async-функция, которую дожидается следующий такой вызов (загрузка «в пути»)
+  const hold = {};
+  const telegram = async (method, body) => {
+    calls.push({ method, body });
+    const wait = hold[method];
+    delete hold[method];
+    if (wait) await wait();
+    return { ok: true, result: method === 'sendMessage' ? { message_id: ++messageId } : true };
+  };
+  const files = { 'doc-fbo': fs.readFileSync(SAMPLES.FBO), 'doc-fbs': fs.readFileSync(SAMPLES.FBS) };
+  const send = async update => {
+    calls.length = 0;
+    const run = await runWorkflow(MAIN, { update, redis, telegram, files, config: CONFIG });
+    if (run.error) throw run.error;
+    const summary = summarizeTrace(run.trace);
+    const reads = summary.commands.filter(c => READS.includes(c));
+    return { ...run, ...summary, reads, calls: calls.slice(), ctx: readUserState(redis.hgetall(KEY)) };
+  };
+  const tap = data => send({ callback_query: { id: 'cb', from: USER, message: { message_id: 1, chat: CHAT }, data } });
+  return { redis, send, tap, hold };
+}
+
+const ran = (run, name) => name in run.executed;
+const keyboard = run => {
+  const call = run.calls.find(c => c.method.startsWith('editMessage') || (c.method === 'sendMessage' && c.body.reply_markup));
+  return call ? call.body.reply_markup.inline_keyboard.flat() : [];
+};
+
+async function testAclCache() {
+  const { redis, send } = session();
+  const start = { message: { from: USER, chat: CHAT, text: '/start' } };
+  const first = await send(start);
+  assert.ok(ran(first, 'Get ACL') && ran(first, 'Save ACL'), 'cold cache reads ozon:acl:<uid>');
+  assert.deepStrictEqual(first.reads, ['HGETALL', 'GET'], 'one GET for all roles');
+  assert.strictEqual(first.ctx.acl, ACL_WHITELIST | ACL_ADMIN);
+  assert.ok(first.calls[0].body.reply_markup.inline_keyboard.flat().some(b => b.callback_data === 'menu:admin'));
+
+  const warm = await send(start);
+  assert.ok(!ran(warm, 'Get ACL'), 'warm cache skips ozon:acl:<uid>');
+  assert.deepStrictEqual(warm.reads, ['HGETALL']);
+  assert.ok(warm.calls[0].body.reply_markup.inline_keyboard.flat().some(b => b.callback_data === 'menu:admin'));
+
+  // Права отозваны: действуют до истечения кэша, затем перечитываются
+  redis.set(aclKey(42), String(ACL_WHITELIST));
+  redis.hset(KEY, ['acl_exp', String(Date.now() - 1)]);
+  const expired = await send(start);
+  assert.ok(ran(expired, 'Get ACL'));
+  assert.strictEqual(expired.ctx.acl, ACL_WHITELIST);
+  assert.ok(!ran(expired, 'Send Menu'), 'whitelist without admin is not let through Is Authorized?');
+
+  // Правка прав сбрасывает кэш этого пользователя (HDEL acl acl_exp) — действует сразу
+  redis.set(aclKey(42), String(ACL_WHITELIST | ACL_ADMIN));
+  redis.hdel(KEY, ['acl', 'acl_exp']);
+  const edited = await send(start);
+  assert.ok(ran(edited, 'Get ACL'));
+  assert.strictEqual(edited.ctx.acl, ACL_WHITELIST | ACL_ADMIN);
+  console.log(`✅ ACL: cold ${first.roundTrips} round trips → warm ${warm.roundTrips}; expired or reset cache re-reads ozon:acl:<uid>`);
+}
+
+async function testCoreAccess() {
+  const redis = new MemoryRedis();
+  const check = async (userId, requireWhitelist = true) => {
+    const run = await runWorkflow(ACCESS, {
+      update: { update: { message: { from: { id: userId }, chat: { id: userId }, text: '/start' } }, requireWhitelist },
+      redis,
+    });
+    if (run.error) throw run.error;
+    const out = run.executed['Return (allowed)'] || run.executed['Return (denied)'];
+    return { ...out[0].json, commands: summarizeTrace(run.trace).commands.filter(c => READS.includes(c)) };
+  };
+  redis.set(aclKey(1), String(ACL_SUPERUSER));
+  redis.set(aclKey(2), String(ACL_ADMIN));
+  redis.set(aclKey(3), String(ACL_WHITELIST));
+  const flags = r => [r.context.is_superuser, r.context.is_admin, r.context.in_whitelist];
+  assert.deepStrictEqual(flags(await check(1)), [true, true, true]);
+  assert.deepStrictEqual(flags(await check(2)), [false, true, true]);
+  const seller = await check(3);
+  assert.deepStrictEqual(flags(seller), [false, false, true]);
+  assert.strictEqual(seller.ok, true);
+  const stranger = await check(4);
+  assert.strictEqual(stranger.ok, false);
+  assert.deepStrictEqual(stranger.commands, ['GET'], 'one GET per check');
+  assert.strictEqual((await check(4, false)).ok, true);
+  const regions = wf => name => [...wf.nodes.find(n => n.name === name).parameters.jsCode.matchAll(/\/\/ #region (\S+)/g)].map(m => m[1]);
+  assert.deepStrictEqual(regions(ACCESS)('Compute ACL Flags'), ['src/acl-bits.js'], 'ACL nodes inline only the bit helpers');
+  for (const name of ['Validate Whitelist', 'Generate Main Menu']) assert.deepStrictEqual(regions(MAIN)(name), ['src/acl-bits.js'], name);
+  console.log('✅ ozord_telegram_core_access: roles from the bits of ozon:acl:<uid>, one GET');
+}
+
+async function testCalendarRoutes() {
+  const { redis, send, tap } = session();
+  await send({ message: { from: USER, chat: CHAT, text: '/start' } });
+
+  const upload = await send({ message: { from: USER, chat: CHAT, document: { file_id: 'doc-fbo', file_unique_id: 'u-fbo', file_name: 'orders.csv', mime_type: 'text/csv' } } });
+  const meta = upload.ctx.meta;
+  assert.ok(meta && meta.availableDates.length > 1, 'upload saves meta in ozon:user:<uid>');
+  assert.strictEqual(upload.ctx.calMonth, meta.maxMonth);
+  const calendarMsgId = upload.ctx.calendarMsgId;
+  assert.deepStrictEqual(upload.calls.map(c => c.method), ['getFile', 'sendMessage']);
+  assert.ok(calendarMsgId > 0, 'calendar message id is saved after sendMessage');
+  assert.strictEqual(redis.type('ozon:sess:{42}:meta'), 'none');
+  assert.strictEqual(redis.type('ozon:sess:{42}:agg'), 'string');
+
+  const [day1, day2] = meta.availableDates;
+  // Тоггл и сброс ещё дописывают журнал нажатий и сверяют версию (src/date-taps.js)
+  const TAP = ['HGETALL', 'RPUSH', 'LRANGE', 'LRANGE', 'HSET', 'EXPIRE'];
+  // Сброс удаляет журнал перед своей записью
+  const RESET = ['HGETALL', 'DEL', ...TAP.slice(1)];
+  const VIEW = ['HGETALL', 'HSET', 'EXPIRE'];
+  // Текст календаря — выбор и итоги; месяц — только в клавиатуре (src/ui-message.js)
+  const TEXT = 'editMessageText';
+  const MARKUP = 'editMessageReplyMarkup';
+  const calendar = [
+    ['toggle', `date:${day1}`, TAP, TEXT, ctx => assert.deepStrictEqual(ctx.selectedDates, [day1])],
+    ['toggle', `date:${day2}`, TAP, TEXT, ctx => assert.deepStrictEqual(ctx.selectedDates, [day1, day2])],
+    ['nav', `cal:${meta.maxMonth}:prev`, VIEW, MARKUP, ctx => assert.ok(ctx.calMonth < meta.maxMonth)],
+    ['open', 'cal:open', VIEW, MARKUP, ctx => assert.strictEqual(ctx.calMonth, meta.maxMonth)],
+    ['reopen', 'cal:open', VIEW, null, ctx => assert.strictEqual(ctx.calMonth, meta.maxMonth)],
+    ['reset', 'dates:reset', RESET, TEXT, ctx => assert.deepStrictEqual(ctx.selectedDates, [])],
+    ['toggle', `date:${day1}`, TAP, TEXT, ctx => assert.deepStrictEqual(ctx.selectedDates, [day1])],
+  ];
+  for (const [label, data, commands, method, check] of calendar) {
+    const run = await tap(data);
+    check(run.ctx);
+    assert.deepStrictEqual(run.commands, commands, `${label}: one state read, one state write`);
+    const edits = run.calls.filter(c => c.method.startsWith('editMessage') || c.method === 'sendMessage');
+    if (!method) {
+      assert.deepStrictEqual(edits, [], `${label}: the same calendar is not edited`);
+      continue;
+    }
+    assert.deepStrictEqual(edits.map(c => c.method), [method], `${label}: ${method}`);
+    assert.strictEqual(edits[0].body.message_id, calendarMsgId);
+    const selected = keyboard(run).filter(b => b.text.startsWith('☑')).map(b => b.callback_data.slice(5));
+    assert.deepStrictEqual(selected, run.ctx.selectedDates.filter(d => d.startsWith(run.ctx.calMonth)), `${label}: rendered selection`);
+  }
+
+  const menu = await tap('menu:orders');
+  assert.deepStrictEqual(menu.reads, ['HGETALL']);
+  assert.ok(menu.calls[0].body.text.includes(`Всего записей: <b>${meta.totalRecords}</b>`));
+
+  const done = await tap('dates:done');
+  assert.deepStrictEqual(done.reads.slice(0, 1), ['HGETALL'], 'dates:done reads dates from the user state');
+
+  const clear = await tap('file:clear');
+  assert.deepStrictEqual(clear.reads, ['HGETALL']);
+  assert.deepStrictEqual(clear.calls.map(c => c.method), ['deleteMessage', 'answerCallbackQuery', 'sendMessage']);
+  assert.strictEqual(clear.calls[0].body.message_id, calendarMsgId);
+  assert.deepStrictEqual(clear.ctx, { acl: ACL_WHITELIST | ACL_ADMIN, meta: null, selectedDates: [], calMonth: null, calendarMsgId: null, calendarRender: null });
+  for (const part of ['csv', 'agg', 'hist']) assert.strictEqual(redis.type(`ozon:sess:{42}:${part}`), 'none', part);
+
+  const reopen = await tap('cal:open');
+  assert.deepStrictEqual(reopen.calls.map(c => c.method), ['answerCallbackQuery']);
+  assert.ok(reopen.calls[0].body.text.includes('Сначала загрузите файл'));
+  console.log(`✅ Upload, toggle, nav, cal:open, reset, menu, file:clear: one HGETALL per update, calendar writes one HSET (${upload.roundTrips} round trips for the upload)`);
+}
+
+const FBO_DOC = { file_id: 'doc-fbo', file_unique_id: 'u-fbo', file_name: 'orders.csv', mime_type: 'text/csv' };
+const FBS_DOC = { file_id: 'doc-fbs', file_unique_id: 'u-fbs', file_name: 'orders-fbs.csv', mime_type: 'text/csv' };
+
+/** Загрузка, задержанная на getFile; release() отпускает разбор. */
+async function uploadInFlight({ send, hold }, document) {
+  let release;
+  let reached;
+  const gate = new Promise(r => { release = r; });
+  const arrived = new Promise(r => { reached = r; });
+  hold.getFile = async () => { reached(); await gate; };
+  const done = send({ message: { from: USER, chat: CHAT, document } });
+  await arrived;
+  return { release, done };
+}
+
+async function testStaleUploads() {
+  const s = session();
+  await s.send({ message: { from: USER, chat: CHAT, text: '/start' } });
+
+  // file:clear, пока файл разбирается: разбор не воскрешает сессию
+  const cleared = await uploadInFlight(s, FBO_DOC);
+  await s.tap('file:clear');
+  cleared.release();
+  const stale = await cleared.done;
+  assert.ok(ran(stale, 'Upload Current?') && !ran(stale, 'Cache CSV Records'), 'a cancelled upload does not write the session');
+  assert.strictEqual(stale.ctx.meta, null);
+  for (const part of ['csv', 'agg', 'hist']) assert.strictEqual(s.redis.type(`ozon:sess:{42}:${part}`), 'none', part);
+
+  // Новая загрузка обгоняет старую: остаётся новая
+  const older = await uploadInFlight(s, FBS_DOC);
+  const newer = await s.send({ message: { from: USER, chat: CHAT, document: FBO_DOC } });
+  assert.ok(ran(newer, 'Cache CSV Records'));
+  const agg = s.redis.get('ozon:sess:{42}:agg');
+  older.release();
+  const late = await older.done;
+  assert.ok(!ran(late, 'Cache CSV Records'), 'an older upload finishing late is dropped');
+  assert.deepStrictEqual(late.ctx.meta, newer.ctx.meta);
+  assert.strictEqual(s.redis.get('ozon:sess:{42}:agg'), agg);
+  console.log('✅ Upload generation: file:clear and a newer upload cancel a parse in flight');
+}
+
+function testNoStateGets() {
+  const gone = /ozon:(sess:[^:]+:(meta|dates)|ui:)/;
+  for (const n of MAIN.nodes) {
+    if (n.type !== 'n8n-nodes-base.redis') continue;
+    assert.ok(!gone.test(n.parameters.key), `${n.name} still uses ${n.parameters.key}`);
+    if (n.parameters.operation === 'get') assert.ok(n.parameters.keyType, `${n.name}: keyType automatic costs a TYPE round trip`);
+  }
+  console.log('✅ No node reads or writes ozon:sess:<uid>:meta|dates or ozon:ui:*; every GET has a keyType');
+}
+
+async function main() {
+  console.log('🎯 USER STATE TESTS\n');
+  testPackAndRead();
+  await testAclCache();
+  await testCoreAccess();
+  await testCalendarRoutes();
+  await testStaleUploads();
+  testNoStateGets();
+  console.log('\n✅ All user state tests passed');
+}
+
+main().catch(e => { console.error('❌', e.stack); process.exit(1); });
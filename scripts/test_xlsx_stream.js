@@ -0,0 +1,120 @@
+#!/usr/bin/env node
+/**
+ * Проверка потокового чтения XLSX (src/xlsx-stream.js) и «Parse Report File»
+ * на байтах XLSX: распаковка совпадает с zlib, ячейки листа — с ячейками
+ * того же отчёта в CSV, а выход ноды — с разбором CSV (индексы, :csv, meta).
+ */
+
+const assert = require('assert');
+const path = require('path');
+const zlib = require('zlib');
+const { loadWorkflowFile, runCodeNode } = require('./lib/n8n-sandbox');
+const { generateReport, toCsv, toXlsx } = require('./lib/synthetic-report');
+const { parseCsvBuffer } = require('../src/csv-stream');
+const { XLSX_OUT_BYTES, inflateRaw, isXlsxBuffer, parseXlsxBuffer, excelSerialDate } = require('../src/xlsx-stream');
+
+const MAIN = loadWorkflowFile(path.join(__dirname, '..', 'workflows', 'ozon-telegram-bot.json'));
+const USER = { 'Extract User Data': { user_id: '42', chat_id: '42' } };
+
+function inflate(buf) {
+  const parts = [];
+  inflateRaw(buf, 0, buf.length, chunk => parts.push(Buffer.from(chunk)));
+  return { data: Buffer.concat(parts), chunks: parts.length };
+}
+
+function testInflateMatchesZlib() {
+  let seed = 1;
+  const rand = () => ((seed = (seed * 1103515245 + 12345) >>> 0) >>> 16) & 0xFF;
+  const noise = Buffer.from(Array.from({ length: 200000 }, rand));
+  const text = Buffer.from(toCsv(generateReport({ rows: 8000, type: 'FBS' }), 'FBS'));
+  const cases = [
+    ['empty', Buffer.alloc(0), {}],
+    ['stored', noise, { level: 0 }],
+    ['random, level 1', noise, { level: 1 }],
+    ['fixed Huffman', Buffer.from('abcabcabc hello hello hello'), { strategy: zlib.constants.Z_FIXED }],
+    ['report text, level 9', text, { level: 9 }],
+    ['runs', Buffer.alloc(3 * XLSX_OUT_BYTES, 'x'), {}],
+  ];
+  for (const [label, raw, opts] of cases) {
+    const { data, chunks } = inflate(zlib.deflateRawSync(raw, opts));
+    assert.ok(data.equals(raw), label);
+    if (raw.length > XLSX_OUT_BYTES) assert.ok(chunks > 1, `${label}: output is windowed`);
+  }
+  assert.throws(() => inflate(zlib.deflateRawSync(text).subarray(0, 1000)), /XLSX: /);
+  console.log(`✅ inflateRaw == zlib (stored, fixed, dynamic blocks; ${(text.length / 1024).toFixed(0)} KB text in ${inflate(zlib.deflateRawSync(text)).chunks} windows)`);
+}
+
+function cells(buf, parser) {
+  const rows = [];
+  parser(buf, r => rows.push(r));
+  return rows;
+}
+
+/** Ячейки CSV, как их отдаёт XLSX: числа без хвостовых нулей, пустые ячейки в конце не пишутся. */
+const normalize = rows => rows.map(r => {
+  const out = r.map(v => (/^-?\d+(\.\d+)?$/.test(v) && v.length < 15 ? String(Number(v)) : v));
+  while (out.length && out[out.length - 1] === '') out.pop();
+  return out;
+});
+
+function testCellsMatchCsv() {
+  for (const type of ['FBO', 'FBS']) {
+    const report = generateReport({ rows: 3000, type, seed: 5 });
+    report.rows[0] = { ...report.rows[0], 'Артикул': 'A&B <"спец"> \'кавычки\'' };
+    const csv = normalize(cells(Buffer.from(toCsv(report, type)), parseCsvBuffer));
+    for (const strings of ['shared', 'inline']) {
+      const xlsx = toXlsx(report, { strings, dates: 'text' });
+      assert.ok(isXlsxBuffer(xlsx));
+      assert.deepStrictEqual(normalize(cells(xlsx, parseXlsxBuffer)), csv, `${type}, ${strings} strings`);
+    }
+  }
+  assert.ok(!isXlsxBuffer(Buffer.from('\uFEFFНомер заказа;Статус\n')));
+  assert.strictEqual(excelSerialDate('45870.4375', false), '2025-08-01 10:30:00');
+  assert.strictEqual(excelSerialDate('44408.4375', true), '2025-08-01 10:30:00');
+  console.log('✅ XLSX cells == CSV cells (shared and inline strings, XML entities, sparse rows)');
+}
+
+async function parse(buf) {
+  const [out] = await runCodeNode(MAIN, 'Parse Report File', {
+    input: [{ json: {}, binary: { data: { data: buf.toString('base64') } } }],
+    nodes: USER,
+  });
+  return out.json;
+}
+
+async function testParseReportFile() {
+  for (const type of ['FBO', 'FBS']) {
+    const report = generateReport({ rows: 5000, type, seed: 11 });
+    const fromCsv = await parse(Buffer.from(toCsv(report, type)));
+    const fromXlsx = await parse(toXlsx(report, { dates: 'serial' }));
+    assert.deepStrictEqual(fromXlsx, fromCsv, type);
+    assert.strictEqual(fromXlsx.totalRecords, 5000);
+  }
+  console.log('✅ Parse Report File on XLSX bytes (date cells as Excel serials) == on the same report as CSV');
+}
+
+async function testWiring() {
+  const next = name => (MAIN.connections[name].main || []).map(b => (b || []).map(l => l.node));
+  assert.deepStrictEqual(next('Ensure XLSX Document'), [['Get Parse Cache']]);
+  for (const gone of ['Get XLSX from Telegram', 'Extract from File (XLSX)']) {
+    assert.ok(!MAIN.nodes.some(n => n.name === gone), `${gone} removed`);
+  }
+  const doc = { file_id: 'BQACAgIAAxkBAAIC', file_unique_id: 'AgADxlsx', file_name: 'orders.xlsx', mime_type: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' };
+  const [ensured] = await runCodeNode(MAIN, 'Ensure XLSX Document', {
+    input: { user_id: '42', chat_id: '42', document: doc },
+    nodes: { 'Extract User Data': { user_id: '42', chat_id: '42', document: doc } },
+  });
+  assert.strictEqual(ensured.json.parse_cache_key, 'ozon:parse:f:AgADxlsx');
+  console.log('✅ Ensure XLSX Document → Get Parse Cache → … → Get File from Telegram → Parse Report File');
+}
+
+async function main() {
+  console.log('🎯 XLSX STREAM TESTS\n');
+  testInflateMatchesZlib();
+  testCellsMatchCsv();
+  await testParseReportFile();
+  await testWiring();
+  console.log('\n✅ All XLSX stream tests passed');
+}
+
+main().catch(e => { console.error('❌', e.message); process.exit(1); });
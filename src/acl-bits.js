@@ -0,0 +1,26 @@
+/**
+ * Права пользователя — ozon:acl:<uid>, одна строка с битами ACL_* (число).
+ *
+ * Проверка — один GET и побитовое И, сколько бы продавцов ни было в
+ * списках. Отдельный модуль: ноды прав встраивают только его, без
+ * src/user-state.js. Кэш битов в поле acl хеша ozon:user:{<uid>} — там.
+ */
+
+const ACL_WHITELIST = 1;
+const ACL_ADMIN = 2;
+const ACL_SUPERUSER = 4;
+const ACL_PREFIX = 'ozon:acl:';
+
+function aclKey(userId) {
+  return ACL_PREFIX + userId;
+}
+
+/** Биты ACL из значения ozon:acl:<uid>; ключа нет или мусор — 0. */
+function aclBits(value) {
+  const bits = Number(value);
+  return Number.isInteger(bits) && bits > 0 ? bits & (ACL_WHITELIST | ACL_ADMIN | ACL_SUPERUSER) : 0;
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { ACL_WHITELIST, ACL_ADMIN, ACL_SUPERUSER, ACL_PREFIX, aclKey, aclBits };
+}
@@ -0,0 +1,85 @@
+/**
+ * Сетка календаря — скелет месяца и наложение выбора.
+ *
+ * Клавиатура месяца зависит только от месяца, границ отчёта и доступных
+ * дней, но не от выбора. Доступные дни по месяцам считаются один раз при
+ * загрузке (meta.daysByMonth, src/session-meta.js) и меняются вместе с
+ * сессией, поэтому скелет — клавиатура без отметок ☑ — строится прямо из
+ * них, без прохода по всем availableDates. Рендер на клик накладывает на
+ * скелет отметки выбранных дней (их ≤ 3): копируются только их строки.
+ *
+ * Скелет между апдейтами не хранится: разбор сохранённого скелета из JSON
+ * дороже, чем его сборка (scripts/bench_calendar_render.js).
+ *
+ * Стили: smart — основной workflow («▫ 5», «· 6»), grid — саб-workflow
+ * ozord_calendar_* («▫ 05», «• 06», неполная неделя добита «▫»).
+ */
+
+const CALENDAR_GRID_STYLES = {
+  smart: { pad: false, off: '·', fill: false },
+  grid: { pad: true, off: '•', fill: true },
+};
+
+function daysInMonth(month) {
+  const [y, m] = month.split('-').map(Number);
+  return new Date(y, m, 0).getDate();
+}
+
+/**
+ * Скелет месяца: { rows, at } — rows это inline_keyboard без отметок
+ * выбора (навигация + недели), at — { 'YYYY-MM-DD': [строка, столбец] }
+ * доступных дней.
+ */
+function buildCalendarGrid(month, meta = {}, style = 'smart') {
+  const s = CALENDAR_GRID_STYLES[style];
+  const { minMonth, maxMonth } = meta;
+  const avail = new Set((meta.daysByMonth && meta.daysByMonth[month]) || []);
+  const hasPrev = month > minMonth;
+  const hasNext = month < maxMonth;
+  const rows = [[
+    { text: hasPrev ? '◀' : '▪', callback_data: hasPrev ? `cal:${month}:prev` : 'noop' },
+    { text: month, callback_data: 'noop' },
+    { text: hasNext ? '▶' : '▪', callback_data: hasNext ? `cal:${month}:next` : 'noop' },
+  ]];
+  const at = {};
+  const total = daysInMonth(month);
+  for (let day = 1; day <= total;) {
+    const row = [];
+    for (let i = 0; i < 7; i++, day++) {
+      if (day > total) {
+        if (s.fill) row.push({ text: '▫', callback_data: 'noop' });
+        continue;
+      }
+      const label = s.pad ? String(day).padStart(2, '0') : String(day);
+      const full = `${month}-${String(day).padStart(2, '0')}`;
+      if (avail.has(day)) {
+        at[full] = [rows.length, row.length];
+        row.push({ text: '▫ ' + label, callback_data: `date:${full}` });
+      } else {
+        row.push({ text: s.off + ' ' + label, callback_data: 'noop' });
+      }
+    }
+    rows.push(row);
+  }
+  return { rows, at };
+}
+
+/** Строки клавиатуры с отметками ☑: копируются только строки выбранных дней. */
+function overlayCalendarGrid(grid, selectedDates) {
+  const rows = grid.rows.slice();
+  const copied = new Set();
+  for (const date of selectedDates || []) {
+    const pos = grid.at[date];
+    if (!pos) continue;
+    const [r, c] = pos;
+    if (!copied.has(r)) { rows[r] = rows[r].slice(); copied.add(r); }
+    rows[r][c] = { ...rows[r][c], text: '☑' + rows[r][c].text.slice(1) };
+  }
+  return rows;
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    CALENDAR_GRID_STYLES, buildCalendarGrid, overlayCalendarGrid,
+  };
+}
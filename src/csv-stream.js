@@ -0,0 +1,113 @@
+/**
+ * Потоковый разбор CSV выгрузки Ozon прямо из байтов файла.
+ *
+ * Вместо «Extract from File (CSV)», который превращает каждую строку
+ * в отдельный item n8n, файл читается окнами по CSV_CHUNK_BYTES, строки
+ * отдаются по одной в onRow(cells) и сразу сворачиваются вызывающим кодом —
+ * ни массива строк, ни полного декодированного текста в памяти нет.
+ *
+ * Разбор как у Extract from File с relaxQuotes: «;» — разделитель, поле
+ * в кавычках может содержать «;», перевод строки и "" (кавычка); кавычка
+ * внутри поля без кавычек — обычный символ. \r\n и \n равноправны,
+ * пустые строки пропускаются.
+ */
+
+const CSV_CHUNK_BYTES = 1 << 20;
+
+const CH_QUOTE = 34, CH_LF = 10, CH_CR = 13;
+
+/** Не режем многобайтовый символ UTF-8: сдвигаем конец окна на начало символа. */
+function utf8Boundary(buf, end) {
+  if (end >= buf.length) return buf.length;
+  let i = end;
+  while (i > 0 && (buf[i] & 0xC0) === 0x80) i--;
+  return i;
+}
+
+/**
+ * @param {(cells: string[]) => void} onRow
+ * @returns {{ write(text: string): void, end(): void }}
+ */
+function createCsvParser(onRow, { delimiter = ';' } = {}) {
+  const DELIM = delimiter.charCodeAt(0);
+  let cells = [];
+  let field = '';
+  let fresh = true;       // в текущем поле ещё нет ни одного символа
+  let inQuotes = false;
+  let afterQuote = false; // предыдущий символ закрыл кавычки: "" = экранированная кавычка
+
+  function endRow() {
+    cells.push(field);
+    if (cells.length > 1 || cells[0] !== '') onRow(cells);
+    cells = [];
+    field = '';
+    fresh = true;
+  }
+
+  function write(text) {
+    let start = 0;
+    for (let i = 0; i < text.length; i++) {
+      const c = text.charCodeAt(i);
+      if (inQuotes) {
+        if (c === CH_QUOTE) {
+          field += text.slice(start, i);
+          inQuotes = false;
+          afterQuote = true;
+          start = i + 1;
+        }
+        continue;
+      }
+      if (afterQuote) {
+        afterQuote = false;
+        if (c === CH_QUOTE) {
+          field += '"';
+          inQuotes = true;
+          start = i + 1;
+          continue;
+        }
+      }
+      if (c === CH_QUOTE && fresh && i === start) {
+        inQuotes = true;
+        fresh = false;
+        start = i + 1;
+      } else if (c === DELIM) {
+        cells.push(field + text.slice(start, i));
+        field = '';
+        fresh = true;
+        start = i + 1;
+      } else if (c === CH_LF) {
+        field += text.slice(start, i);
+        if (field.charCodeAt(field.length - 1) === CH_CR) field = field.slice(0, -1);
+        endRow();
+        start = i + 1;
+      } else {
+        fresh = false;
+      }
+    }
+    field += text.slice(start);
+  }
+
+  function end() {
+    if (field.charCodeAt(field.length - 1) === CH_CR) field = field.slice(0, -1);
+    if (field !== '' || cells.length) endRow();
+  }
+
+  return { write, end };
+}
+
+/** Разбирает CSV из Buffer окнами по chunkBytes; BOM в начале пропускается. */
+function parseCsvBuffer(buf, onRow, { delimiter = ';', chunkBytes = CSV_CHUNK_BYTES } = {}) {
+  const parser = createCsvParser(onRow, { delimiter });
+  let off = buf.length >= 3 && buf[0] === 0xEF && buf[1] === 0xBB && buf[2] === 0xBF ? 3 : 0;
+  while (off < buf.length) {
+    let end = utf8Boundary(buf, off + chunkBytes);
+    if (end <= off) { end = off + 1; while (end < buf.length && (buf[end] & 0xC0) === 0x80) end++; }
+    parser.write(buf.toString('utf8', off, end));
+    off = end;
+  }
+  parser.end();
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { CSV_CHUNK_BYTES, createCsvParser, parseCsvBuffer };
+}
@@ -0,0 +1,161 @@
+/**
+ * Выбор дат — журнал нажатий ozon:user:<uid>:taps (Redis list).
+ *
+ * Redis-нода n8n не умеет EVAL и операций с множествами, поэтому тоггл с
+ * лимитом нельзя сделать одной командой на сервере. Вместо GET → правка в
+ * JS → SET каждое нажатие дописывается в журнал (RPUSH — атомарен, порядок
+ * задаёт Redis), затем журнал читается целиком (LRANGE) и сворачивается
+ * foldDateTaps. Свёртка детерминирована, поэтому любой воркер, прочитавший
+ * журнал не раньше своего RPUSH, получает один и тот же выбор: нажатия не
+ * теряются, а лимит проверяется в порядке журнала и не превышается.
+ *
+ *   <ms>|t|YYYY-MM-DD|<id>    тоггл дня
+ *   <ms>|r||<id>              сброс выбора
+ *
+ * id — callback_query_id: по нему воркер находит в свёртке исход своего
+ * нажатия. version — число нажатий, изменивших выбор после последнего
+ * сброса; между сбросами журнал только растёт, и version монотонна.
+ *
+ * Журнал не копится: записи до сброса выбор уже не меняют, поэтому сброс
+ * удаляет ключ перед своим RPUSH, а тап по календарю, чья группа ui
+ * истекла (суточная пауза), — перед своим. Свёртка тоже начинается с
+ * последнего сброса (liveDateTapsStart).
+ *
+ * Календарь перерисовывается после окна слияния RENDER_COALESCE_MS: ответ
+ * на нажатие уходит сразу, а рендерит только нажатие, оставшееся последним
+ * в журнале (isLatestDateTap, O(1)), — по свежей свёртке. Её не нужно
+ * считать заново: она продолжает снимок свёртки этого же нажатия (from) и
+ * проходит только записи, дописанные за окно. Серия быстрых тапов даёт
+ * один editMessageText вместо одного на тап.
+ *
+ * Строка «Итого» под календарём ведётся той же свёрткой: с dayTotals
+ * (meta, src/session-meta.js) каждый тоггл прибавляет или вычитает вклад
+ * своего дня — O(1) на нажатие, без прохода по выбору и тем более по
+ * records. Выручка округляется до копеек на каждом шаге, поэтому
+ * прибавить и снять день — ровно исходная сумма, без дрейфа float.
+ *
+ * Выбор живёт DATE_TAPS_TTL_MS с последнего нажатия (как группа ui в
+ * src/user-state.js): пауза дольше — неявный сброс. file:clear удаляет ключ.
+ */
+
+const DATE_TAPS_SUFFIX = ':taps';
+const DATE_TAPS_TTL_MS = 86400 * 1000;
+const DATES_LIMIT = 3;
+const RENDER_COALESCE_MS = 800;
+
+function dateTapsKey(userId) {
+  return 'ozon:user:{' + userId + '}' + DATE_TAPS_SUFFIX;
+}
+
+/** Запись журнала для Redis push. op: 't' — тоггл дня date, 'r' — сброс. */
+function encodeDateTap(op, date, id, { now = Date.now() } = {}) {
+  return [now, op, date || '', id].join('|');
+}
+
+function decodeDateTap(entry) {
+  const parts = String(entry).split('|');
+  return { at: Number(parts[0]) || 0, op: parts[1], date: parts[2], id: parts.slice(3).join('|') };
+}
+
+const EMPTY_SELECTION_SUMMARY = Object.freeze({ totalOrders: 0, totalRevenue: 0 });
+
+/** Вклад дня в «Итого»: sign = 1 — день выбран, -1 — снят. Дней без итогов нет в dayTotals. */
+function stepSelectionSummary(summary, dayTotals, date, sign) {
+  const t = dayTotals && dayTotals[date];
+  if (!t) return summary;
+  return {
+    totalOrders: summary.totalOrders + sign * t[0],
+    totalRevenue: Math.round((summary.totalRevenue + sign * t[1]) * 100) / 100,
+  };
+}
+
+/** «Итого» по готовому выбору — когда свёртки не было (открытие, навигация). */
+function summarizeSelection(dayTotals, selected) {
+  let summary = EMPTY_SELECTION_SUMMARY;
+  for (const date of new Set(selected || [])) summary = stepSelectionSummary(summary, dayTotals, date, 1);
+  return summary;
+}
+
+/**
+ * Индекс последнего сброса не раньше from — записи до него выбор уже не
+ * меняют; from, если сброса после него нет.
+ */
+function liveDateTapsStart(entries, from = 0) {
+  for (let i = entries.length - 1; i >= from; i--) {
+    if (decodeDateTap(entries[i]).op === 'r') return i;
+  }
+  return from;
+}
+
+/**
+ * Свёртка журнала (результат LRANGE 0 -1, в порядке RPUSH) с последнего сброса.
+ * @param {object} [options]
+ * @param {boolean} [options.checkpoint] вернуть и снимок свёртки — для from
+ * @param {object} [options.from] снимок прошлой свёртки того же журнала:
+ *   если журнал с тех пор только дописывался, свёртка продолжается с него,
+ *   а не с последнего сброса
+ * @returns {{ selected: string[], version: number, outcome: string|null, summary?: object, checkpoint?: object }}
+ *   outcome — исход нажатия с данным id: added | removed | blocked | reset
+ *   (null — нажатия нет в журнале или его перекрыл более поздний сброс);
+ *   summary — «Итого» выбора, только если передан dayTotals
+ */
+function foldDateTaps(entries, { id = null, now = Date.now(), limit = DATES_LIMIT, dayTotals = null, checkpoint = false, from = null } = {}) {
+  const list = Array.isArray(entries) ? entries : [];
+  // Снимок годится, пока его последняя запись на месте: DEL (сброс) журнал пересоздаёт
+  let resume = !!from && from.count > 0 && from.count <= list.length && list[from.count - 1] === from.last &&
+    (!dayTotals || !!from.summary);
+  const start = liveDateTapsStart(list, resume ? from.count : 0);
+  // Сброс после снимка — снимок больше не нужен
+  if (resume && start < list.length && decodeDateTap(list[start]).op === 'r') resume = false;
+  let selected = resume ? from.selected.slice() : [];
+  let summary = resume && dayTotals ? from.summary : EMPTY_SELECTION_SUMMARY;
+  let version = resume ? from.version : 0;
+  let outcome = null;
+  let lastAt = resume ? from.lastAt : 0;
+  for (let i = start; i < list.length; i++) {
+    const tap = decodeDateTap(list[i]);
+    if (lastAt && tap.at - lastAt > DATE_TAPS_TTL_MS) { selected = []; summary = EMPTY_SELECTION_SUMMARY; }
+    lastAt = Math.max(lastAt, tap.at);
+    let result;
+    if (tap.op === 'r') {
+      result = 'reset';
+      if (selected.length) { selected = []; summary = EMPTY_SELECTION_SUMMARY; version++; }
+    } else if (tap.op === 't' && tap.date) {
+      if (selected.includes(tap.date)) {
+        selected = selected.filter(d => d !== tap.date);
+        summary = stepSelectionSummary(summary, dayTotals, tap.date, -1);
+        result = 'removed';
+        version++;
+      } else if (selected.length >= limit) {
+        result = 'blocked';
+      } else {
+        selected = selected.concat(tap.date);
+        summary = stepSelectionSummary(summary, dayTotals, tap.date, 1);
+        result = 'added';
+        version++;
+      }
+    }
+    if (id !== null && tap.id === String(id)) outcome = result || null;
+  }
+  const saved = checkpoint
+    ? { count: list.length, last: list.length ? list[list.length - 1] : null, selected, version, lastAt, summary: dayTotals ? summary : null }
+    : null;
+  if (lastAt && now - lastAt > DATE_TAPS_TTL_MS) { selected = []; summary = EMPTY_SELECTION_SUMMARY; }
+  const out = dayTotals ? { selected, version, outcome, summary } : { selected, version, outcome };
+  if (saved) out.checkpoint = saved;
+  return out;
+}
+
+/** Нажатие id — последнее в журнале: более поздних нет, рендер за ним. */
+function isLatestDateTap(entries, id) {
+  const list = Array.isArray(entries) ? entries : [];
+  return list.length > 0 && decodeDateTap(list[list.length - 1]).id === String(id);
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    DATE_TAPS_SUFFIX, DATE_TAPS_TTL_MS, DATES_LIMIT, RENDER_COALESCE_MS,
+    dateTapsKey, encodeDateTap, decodeDateTap, liveDateTapsStart, foldDateTaps, isLatestDateTap,
+    stepSelectionSummary, summarizeSelection,
+  };
+}
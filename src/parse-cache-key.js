@@ -0,0 +1,18 @@
+/**
+ * Ключ общего кэша разбора для документа Telegram — ozon:parse:f:<file_unique_id>.
+ *
+ * Отдельный модуль: «Ensure CSV/XLSX Document» встраивают только его, без
+ * src/parse-cache.js (индекс, LRU, кодек).
+ */
+
+const PARSE_CACHE_PREFIX = 'ozon:parse:';
+
+/** Ключ записи кэша для документа Telegram; null — у документа нет идентификатора. */
+function parseCacheKey(document) {
+  const id = document && (document.file_unique_id || '');
+  return id ? PARSE_CACHE_PREFIX + 'f:' + id : null;
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { PARSE_CACHE_PREFIX, parseCacheKey };
+}
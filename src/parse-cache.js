@@ -0,0 +1,132 @@
+/**
+ * Общий кэш разобранных отчётов — ozon:parse:f:<file_unique_id> (ключ — src/parse-cache-key.js).
+ *
+ * Один и тот же дневной отчёт загружают несколько менеджеров. Telegram
+ * отдаёт одинаковый file_unique_id для одного файла у всех пользователей
+ * и ботов, поэтому результат «Parse Report File» (meta, :agg, :hist,
+ * колонки :csv) кладётся в общий ключ. Повторная загрузка связывает сессию
+ * пользователя с готовым результатом — без скачивания и разбора файла.
+ *
+ * Свой TTL (записи живут не дольше сессий) и LRU под бюджет памяти:
+ * индекс ozon:parse:index хранит размер, время последнего обращения и срок
+ * каждой записи; при добавлении вытесняются давно не читанные. Счётчики
+ * ozon:parse:stats:hit / :miss — Redis INCR. Значение записи — в кодеке
+ * src/session-codec.js (по умолчанию сжатое), бюджет считается по нему.
+ */
+
+const PARSE_CACHE_VERSION = 1;
+const PARSE_CACHE_INDEX_KEY = 'ozon:parse:index';
+const PARSE_CACHE_TTL_SEC = 259200;
+const PARSE_CACHE_BUDGET_MB = 256;
+
+/** В Code-ноде src/session-codec.js встроен регионом выше; в Node — соседний файл. */
+function parseCacheDeps() {
+  if (typeof encodeSessionValue === 'function') return { encodeSessionValue, decodeSessionValue };
+  return require('./session-codec');
+}
+
+/** TTL (сек) и бюджет (байты) из Config: PARSE_CACHE_TTL_SEC, PARSE_CACHE_BUDGET_MB. */
+function parseCacheSettings(config) {
+  const c = config || {};
+  const ttl = Number(c.PARSE_CACHE_TTL_SEC);
+  const mb = Number(c.PARSE_CACHE_BUDGET_MB);
+  return {
+    ttlSec: ttl > 0 ? Math.floor(ttl) : PARSE_CACHE_TTL_SEC,
+    budgetBytes: Math.floor((mb > 0 ? mb : PARSE_CACHE_BUDGET_MB) * 1024 * 1024),
+  };
+}
+
+/** Длина строки в байтах UTF-8 (столько же займёт значение в Redis). */
+function utf8Length(str) {
+  let n = 0;
+  for (let i = 0; i < str.length; i++) {
+    const c = str.charCodeAt(i);
+    if (c < 0x80) n += 1;
+    else if (c < 0x800) n += 2;
+    else if (c >= 0xD800 && c <= 0xDBFF) { n += 4; i++; }
+    else n += 3;
+  }
+  return n;
+}
+
+function readParseCacheIndex(raw) {
+  let index = null;
+  try { index = typeof raw === 'string' ? JSON.parse(raw) : raw; } catch (e) { index = null; }
+  if (!index || index.v !== PARSE_CACHE_VERSION || typeof index.entries !== 'object' || !index.entries) {
+    return { v: PARSE_CACHE_VERSION, bytes: 0, entries: {} };
+  }
+  return index;
+}
+
+function dropExpired(index, now) {
+  for (const [key, e] of Object.entries(index.entries)) {
+    if (e.exp <= now) delete index.entries[key];
+  }
+}
+
+function recount(index) {
+  index.bytes = Object.values(index.entries).reduce((s, e) => s + e.bytes, 0);
+  return index;
+}
+
+/** Попадание: запись становится самой свежей для LRU. */
+function touchParseCache(rawIndex, key, { now = Date.now() } = {}) {
+  const index = readParseCacheIndex(rawIndex);
+  dropExpired(index, now);
+  if (index.entries[key]) index.entries[key].at = now;
+  return recount(index);
+}
+
+/**
+ * Допуск новой записи размером bytes. Истёкшие записи выбрасываются из
+ * индекса (сами ключи уже сняты TTL Redis), затем вытесняются наименее
+ * недавно использованные, пока запись не поместится в бюджет.
+ * @returns {{ admitted: boolean, index: object, evict: string[] }}
+ */
+function admitParseCache(rawIndex, key, bytes, { now = Date.now(), ttlSec = PARSE_CACHE_TTL_SEC, budgetBytes = PARSE_CACHE_BUDGET_MB * 1024 * 1024 } = {}) {
+  const index = readParseCacheIndex(rawIndex);
+  dropExpired(index, now);
+  delete index.entries[key];
+  if (bytes > budgetBytes) return { admitted: false, index: recount(index), evict: [] };
+  const evict = [];
+  let used = recount(index).bytes;
+  const lru = Object.entries(index.entries).sort((a, b) => a[1].at - b[1].at);
+  for (const [old, e] of lru) {
+    if (used + bytes <= budgetBytes) break;
+    delete index.entries[old];
+    used -= e.bytes;
+    evict.push(old);
+  }
+  index.entries[key] = { bytes, at: now, exp: now + ttlSec * 1000 };
+  return { admitted: true, index: recount(index), evict };
+}
+
+/** Значение записи: выход «Parse Report File» без chat_id/user_id загрузившего. */
+function packParsedReport(json, { codec = 'json' } = {}) {
+  const { reportType, availableDates, totalRecords, schema, meta, agg, hist, columns } = json;
+  const report = { v: PARSE_CACHE_VERSION, reportType, availableDates, totalRecords, schema, meta, agg, hist, columns };
+  return parseCacheDeps().encodeSessionValue(report, { codec });
+}
+
+function unpackParsedReport(raw) {
+  const report = parseCacheDeps().decodeSessionValue(raw);
+  if (!report || report.v !== PARSE_CACHE_VERSION || !report.meta || !report.columns) return null;
+  delete report.v;
+  return report;
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    PARSE_CACHE_VERSION,
+    PARSE_CACHE_INDEX_KEY,
+    PARSE_CACHE_TTL_SEC,
+    PARSE_CACHE_BUDGET_MB,
+    parseCacheSettings,
+    utf8Length,
+    readParseCacheIndex,
+    touchParseCache,
+    admitParseCache,
+    packParsedReport,
+    unpackParsedReport,
+  };
+}
@@ -0,0 +1,189 @@
+/**
+ * Колоночный формат records отчёта — значение ozon:sess:<uid>:csv.
+ *
+ * Вместо массива объектов, где на каждой строке повторяются order_id, sku,
+ * status и строка created_at, хранится:
+ *   { v, enc: 'columns', reportType, totalRecords,
+ *     dict:  { order_id: [...], sku: [...], status: [...] },
+ *     cols:  { order_id, sku, status, t, quantity, price },   // '<kind>:<base64>'
+ *     scale: { price: 100 | 1 } }
+ * t — MSK epoch-минуты (-1, если дату не разобрать), price — в копейках
+ * (scale 100) или в рублях как f64 (scale 1), если цены не укладываются в копейки.
+ * Колонка — little-endian типизированный массив наименьшего подходящего
+ * типа (u8/u16/u32/i32/f64) в base64.
+ *
+ * Python-двойник: scripts/report_columns.py.
+ */
+
+const RECORD_COLUMNS_VERSION = 1;
+const T_NONE = -1;
+const MSK_OFFSET_MS = 3 * 3600 * 1000;
+const COLUMN_TYPES = { u8: Uint8Array, u16: Uint16Array, u32: Uint32Array, i32: Int32Array, f64: Float64Array };
+
+/** Тот же разбор дат Ozon, что в «Parse Report File»: UTC → MSK epoch-минута. */
+function mskMinute(s) {
+  if (!s) return T_NONE;
+  const trimmed = String(s).trim();
+  let utc;
+  let m = /^(\d{2})\.(\d{2})\.(\d{4}) (\d{1,2}):(\d{2})(?::(\d{2}))?$/.exec(trimmed);
+  if (m) utc = Date.UTC(+m[3], +m[2] - 1, +m[1], +m[4], +m[5], +(m[6] || 0));
+  else if ((m = /^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})$/.exec(trimmed))) utc = Date.UTC(+m[1], +m[2] - 1, +m[3], +m[4], +m[5], +m[6]);
+  else utc = new Date(trimmed).getTime();
+  if (!Number.isFinite(utc)) return T_NONE;
+  return Math.floor((utc + MSK_OFFSET_MS) / 60000);
+}
+
+function columnKind(values) {
+  let min = 0, max = 0;
+  for (const v of values) {
+    if (!Number.isInteger(v)) return 'f64';
+    if (v < min) min = v;
+    if (v > max) max = v;
+  }
+  if (min >= 0) return max < 0x100 ? 'u8' : max < 0x10000 ? 'u16' : max <= 0xFFFFFFFF ? 'u32' : 'f64';
+  return min >= -0x80000000 && max <= 0x7FFFFFFF ? 'i32' : 'f64';
+}
+
+function packColumn(values) {
+  const kind = columnKind(values);
+  const arr = COLUMN_TYPES[kind].from(values);
+  return `${kind}:${Buffer.from(arr.buffer, arr.byteOffset, arr.byteLength).toString('base64')}`;
+}
+
+function unpackColumn(spec) {
+  const i = spec.indexOf(':');
+  const T = COLUMN_TYPES[spec.slice(0, i)];
+  const buf = Buffer.from(spec.slice(i + 1), 'base64');
+  // Маленькие Buffer живут в общем пуле и могут быть не выровнены под тип
+  const ab = buf.byteOffset % T.BYTES_PER_ELEMENT
+    ? buf.buffer.slice(buf.byteOffset, buf.byteOffset + buf.byteLength)
+    : buf.buffer;
+  return new T(ab, ab === buf.buffer ? buf.byteOffset : 0, buf.byteLength / T.BYTES_PER_ELEMENT);
+}
+
+/**
+ * Накопитель колонок: записи добавляются по одной (push), объекты records
+ * не хранятся — в памяти только коды словарей и числа.
+ */
+function createColumnsBuilder({ reportType } = {}) {
+  const dicts = { order_id: new Map(), sku: new Map(), status: new Map() };
+  const codes = { order_id: [], sku: [], status: [] };
+  const t = [], quantity = [], prices = [];
+
+  function code(dict, out, value) {
+    let c = dict.get(value);
+    if (c === undefined) { c = dict.size; dict.set(value, c); }
+    out.push(c);
+  }
+
+  /** rec — { order_id, sku, quantity, price, status }; minute — MSK epoch-минута или T_NONE. */
+  function push(rec, minute) {
+    code(dicts.order_id, codes.order_id, String(rec.order_id ?? ''));
+    code(dicts.sku, codes.sku, String(rec.sku ?? ''));
+    code(dicts.status, codes.status, String(rec.status ?? ''));
+    t.push(minute === undefined ? mskMinute(rec.created_at) : minute);
+    quantity.push(Number(rec.quantity || 0));
+    prices.push(Number(rec.price || 0));
+  }
+
+  function build() {
+    const dict = {};
+    for (const f of ['order_id', 'sku', 'status']) dict[f] = Array.from(dicts[f].keys());
+    return encodeColumnArrays({ reportType, dict, codes, t, quantity, price: prices });
+  }
+
+  return { push, build, get size() { return t.length; } };
+}
+
+/**
+ * Упаковка готовых колонок: dict — словари order_id/sku/status, codes — их
+ * коды по строкам, t/quantity/price — числа по строкам (price в рублях).
+ */
+function encodeColumnArrays({ reportType, dict, codes, t, quantity, price }) {
+  const cols = {};
+  for (const f of ['order_id', 'sku', 'status']) cols[f] = packColumn(codes[f]);
+  cols.t = packColumn(t);
+  cols.quantity = packColumn(quantity);
+  const kop = Array.from(price, p => Math.round(p * 100));
+  const exact = kop.every((k, i) => k / 100 === price[i]);
+  cols.price = packColumn(exact ? kop : price);
+  return { v: RECORD_COLUMNS_VERSION, enc: 'columns', reportType, totalRecords: t.length, dict, cols, scale: { price: exact ? 100 : 1 } };
+}
+
+/**
+ * @param {Array<{order_id, sku, quantity, price, created_at, status}>} records
+ * @param {object} opts { reportType, mskMinutes } — mskMinutes[i] уже разобранные
+ *   даты (MSK epoch-минуты или -1); без них даты разбираются mskMinute()
+ */
+function encodeRecords(records, { reportType, mskMinutes } = {}) {
+  const builder = createColumnsBuilder({ reportType });
+  records.forEach((r, i) => builder.push(r, mskMinutes ? mskMinutes[i] : undefined));
+  return builder.build();
+}
+
+function isColumnar(value) {
+  return !!value && value.enc === 'columns';
+}
+
+/**
+ * Колонки без материализации объектов: коды словарей + типизированные массивы.
+ * Колонка может быть уже массивом (прочитана из файла, src/report-spill.js).
+ */
+function decodeColumns(enc) {
+  const out = { n: enc.totalRecords, dict: enc.dict, scale: enc.scale };
+  for (const [f, spec] of Object.entries(enc.cols)) out[f] = typeof spec === 'string' ? unpackColumn(spec) : spec;
+  return out;
+}
+
+const pad2 = n => (n < 10 ? '0' : '') + n;
+
+/** MSK epoch-минута → UTC 'YYYY-MM-DD HH:MM:00'; дни кешируются в dayCache. */
+function mskMinuteToUtcString(t, dayCache) {
+  if (t === T_NONE) return '';
+  const utc = t - 180;
+  const day = Math.floor(utc / 1440);
+  let prefix = dayCache && dayCache.get(day);
+  if (prefix === undefined) {
+    prefix = new Date(day * 86400000).toISOString().slice(0, 10);
+    if (dayCache) dayCache.set(day, prefix);
+  }
+  const m = utc - day * 1440;
+  return `${prefix} ${pad2(Math.floor(m / 60))}:${pad2(m % 60)}:00`;
+}
+
+/**
+ * Восстанавливает records в прежней форме. created_at — UTC 'YYYY-MM-DD HH:MM:SS'
+ * с точностью до минуты: день и время по MSK совпадают с исходными.
+ */
+function decodeRecords(enc) {
+  const c = decodeColumns(enc);
+  const { order_id: orderDict, sku: skuDict, status: statusDict } = enc.dict;
+  const scale = (enc.scale && enc.scale.price) || 1;
+  const dayCache = new Map();
+  const records = new Array(c.n);
+  for (let i = 0; i < c.n; i++) {
+    records[i] = {
+      order_id: orderDict[c.order_id[i]],
+      sku: skuDict[c.sku[i]],
+      quantity: c.quantity[i],
+      price: c.price[i] / scale,
+      created_at: mskMinuteToUtcString(c.t[i], dayCache),
+      status: statusDict[c.status[i]],
+    };
+  }
+  return records;
+}
+
+/** records из значения :csv любого формата (колоночного или прежнего {records}). */
+function readRecords(value) {
+  if (!value) return [];
+  if (isColumnar(value)) return decodeRecords(value);
+  return Array.isArray(value.records) ? value.records : [];
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    RECORD_COLUMNS_VERSION, T_NONE, mskMinute, createColumnsBuilder, encodeColumnArrays, encodeRecords, isColumnar,
+    decodeColumns, decodeRecords, readRecords,
+  };
+}
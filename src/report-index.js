@@ -0,0 +1,238 @@
+/**
+ * Агрегатный индекс «MSK-день × SKU» — ozon:sess:<uid>:agg.
+ *
+ * Строится один раз в «Parse Report File». Статистика по «Готово» читает
+ * только ячейки выбранных дней: O(дни × SKU) вместо O(records).
+ *
+ * Формат (компактный JSON):
+ *   { v, skus: ['SKU-1', ...], days: { 'YYYY-MM-DD': [[skuIdx, orders, revenueQty, cancellations, revenueKop], ...] } }
+ * orders — все штуки; revenueQty/revenueKop — штуки и сумма (в копейках)
+ * по выручечным статусам; cancellations — отмены и возвраты.
+ * Ячейки аддитивны: вклад строки можно и добавить, и вычесть.
+ *
+ * Гистограммы по получасам — ozon:sess:<uid>:hist (отдельно: по размеру
+ * они сравнимы с records и нужны только для неполного дня):
+ *   { v, skus, days: { 'YYYY-MM-DD': [skuIdx, slot, orders, revenueQty, cancellations, revenueKop, ...] } }
+ * slot — номер получаса MSK (0..47). Окно startTime–endTime считается
+ * разностью префиксных сумм по слотам: O(выбранные дни × SKU × 48).
+ */
+
+const REPORT_INDEX_VERSION = 1;
+const INDEX_REVENUE_STATUSES = new Set(['доставлен', 'доставляется', 'ожидает сборки', 'ожидает отгрузки']);
+const INDEX_CANCEL_STATUSES = new Set(['отменен', 'возврат']);
+
+// Колонки ячейки
+const C_SKU = 0, C_ORDERS = 1, C_REV_QTY = 2, C_CANCEL = 3, C_REV_KOP = 4;
+const SLOTS = 48;
+const SLOT_MINUTES = 30;
+const HIST_WIDTH = 6;
+const METRICS = 4;
+
+// Предустановки интервала (README: весь день, утро, день, вечер, ночь)
+const TIME_PRESETS = {
+  'весь день': ['00:00', '24:00'],
+  'утро': ['06:00', '12:00'],
+  'день': ['12:00', '18:00'],
+  'вечер': ['18:00', '24:00'],
+  'ночь': ['00:00', '06:00'],
+};
+
+/** 'revenue' | 'cancel' | null по правилам спецификации (ё == е). */
+function statusClass(status) {
+  const s = String(status || '').toLowerCase().replace(/ё/g, 'е').trim();
+  if (INDEX_REVENUE_STATUSES.has(s)) return 'revenue';
+  if (INDEX_CANCEL_STATUSES.has(s)) return 'cancel';
+  return null;
+}
+
+/** base/baseHist — ранее построенные индекс и гистограммы (те же skus), чтобы дописывать в них. */
+function createIndexBuilder(base, baseHist) {
+  const skus = base ? base.skus.slice() : [];
+  const skuIdx = new Map(skus.map((s, i) => [s, i]));
+  const days = new Map();
+  const hist = new Map();
+  if (base) {
+    for (const [day, cells] of Object.entries(base.days)) {
+      days.set(day, new Map(cells.map(c => [c[C_SKU], c.slice()])));
+    }
+  }
+  if (baseHist) {
+    for (const [day, flat] of Object.entries(baseHist.days)) {
+      const slots = new Map();
+      for (let i = 0; i < flat.length; i += HIST_WIDTH) {
+        slots.set(flat[i] * SLOTS + flat[i + 1], [flat[i], flat[i + 2], flat[i + 3], flat[i + 4], flat[i + 5]]);
+      }
+      hist.set(day, slots);
+    }
+  }
+
+  function bump(c, q, cls, price) {
+    c[C_ORDERS] += q;
+    if (cls === 'revenue') {
+      c[C_REV_QTY] += q;
+      c[C_REV_KOP] += Math.round(Number(price || 0) * 100) * q;
+    } else if (cls === 'cancel') {
+      c[C_CANCEL] += q;
+    }
+  }
+
+  /** opts: { sign = 1, slot } — slot (0..47) пополняет гистограмму дня. */
+  function add(day, sku, quantity, price, status, { sign = 1, slot } = {}) {
+    let s = skuIdx.get(sku);
+    if (s === undefined) { s = skus.length; skus.push(sku); skuIdx.set(sku, s); }
+    let cells = days.get(day);
+    if (!cells) { cells = new Map(); days.set(day, cells); }
+    let c = cells.get(s);
+    if (!c) { c = [s, 0, 0, 0, 0]; cells.set(s, c); }
+    const q = sign * Number(quantity || 1);
+    const cls = statusClass(status);
+    bump(c, q, cls, price);
+    if (slot === undefined) return;
+    let slots = hist.get(day);
+    if (!slots) { slots = new Map(); hist.set(day, slots); }
+    const key = s * SLOTS + slot;
+    let h = slots.get(key);
+    if (!h) { h = [s, 0, 0, 0, 0]; slots.set(key, h); }
+    bump(h, q, cls, price);
+  }
+
+  function build() {
+    const out = {};
+    for (const day of Array.from(days.keys()).sort()) {
+      const cells = Array.from(days.get(day).values()).filter(c => c[C_ORDERS] || c[C_REV_QTY] || c[C_CANCEL] || c[C_REV_KOP]);
+      if (cells.length) out[day] = cells.sort((a, b) => a[C_SKU] - b[C_SKU]);
+    }
+    return { v: REPORT_INDEX_VERSION, skus, days: out };
+  }
+
+  /** Гистограммы дня одним плоским массивом, по (skuIdx, slot). */
+  function buildHistogram() {
+    const out = {};
+    for (const day of Array.from(hist.keys()).sort()) {
+      const flat = [];
+      for (const key of Array.from(hist.get(day).keys()).sort((a, b) => a - b)) {
+        const h = hist.get(day).get(key);
+        if (!(h[C_ORDERS] || h[C_REV_QTY] || h[C_CANCEL] || h[C_REV_KOP])) continue;
+        flat.push(h[C_SKU], key % SLOTS, h[C_ORDERS], h[C_REV_QTY], h[C_CANCEL], h[C_REV_KOP]);
+      }
+      if (flat.length) out[day] = flat;
+    }
+    return { v: REPORT_INDEX_VERSION, skus, days: out };
+  }
+
+  return { add, build, buildHistogram };
+}
+
+/**
+ * Суммирует ячейки выбранных дней по SKU.
+ * @returns {Map<string, {orders:number, revenueQty:number, cancellations:number, revenue:number}>}
+ */
+function aggregateBySku(index, dates) {
+  const bySku = new Map();
+  if (!index || !index.days) return bySku;
+  for (const day of new Set(dates || [])) {
+    for (const c of index.days[day] || []) {
+      const sku = index.skus[c[C_SKU]];
+      let a = bySku.get(sku);
+      if (!a) { a = { orders: 0, revenueQty: 0, cancellations: 0, revenueKop: 0 }; bySku.set(sku, a); }
+      a.orders += c[C_ORDERS];
+      a.revenueQty += c[C_REV_QTY];
+      a.cancellations += c[C_CANCEL];
+      a.revenueKop += c[C_REV_KOP];
+    }
+  }
+  return finishSkuTotals(bySku);
+}
+
+function finishSkuTotals(bySku) {
+  for (const a of bySku.values()) {
+    a.revenue = a.revenueKop / 100;
+    delete a.revenueKop;
+  }
+  return bySku;
+}
+
+function toMinutes(hhmm) {
+  const m = /^(\d{1,2}):(\d{2})$/.exec(String(hhmm || '').trim());
+  if (!m) return null;
+  const v = Number(m[1]) * 60 + Number(m[2]);
+  return v >= 0 && v <= 1440 ? v : null;
+}
+
+/**
+ * 'HH:MM'–'HH:MM' → полуоткрытый интервал слотов [from, to).
+ * Конец вида HH:29/HH:59 считается включительным (00:00–23:59 — весь день);
+ * from > to — окно через полночь (22:00–02:00).
+ */
+function timeWindowSlots(startTime, endTime) {
+  const st = toMinutes(startTime);
+  const et = toMinutes(endTime);
+  if (st === null || et === null) return [0, SLOTS];
+  const from = Math.floor(st / SLOT_MINUTES);
+  const to = Math.min(SLOTS, Math.ceil((et % SLOT_MINUTES === SLOT_MINUTES - 1 ? et + 1 : et) / SLOT_MINUTES));
+  return from === to ? [0, SLOTS] : [from, to];
+}
+
+function isFullDay(startTime, endTime) {
+  const [from, to] = timeWindowSlots(startTime, endTime);
+  return from === 0 && to === SLOTS;
+}
+
+const prefixCache = new WeakMap();
+
+/** Префиксные суммы дня: Map skuIdx → Float64Array((SLOTS + 1) × METRICS). */
+function dayPrefixSums(hist, day) {
+  let byDay = prefixCache.get(hist);
+  if (!byDay) { byDay = new Map(); prefixCache.set(hist, byDay); }
+  let bySku = byDay.get(day);
+  if (bySku) return bySku;
+  bySku = new Map();
+  const flat = (hist.days && hist.days[day]) || [];
+  for (let i = 0; i < flat.length; i += HIST_WIDTH) {
+    let p = bySku.get(flat[i]);
+    if (!p) { p = new Float64Array((SLOTS + 1) * METRICS); bySku.set(flat[i], p); }
+    const at = (flat[i + 1] + 1) * METRICS;
+    for (let k = 0; k < METRICS; k++) p[at + k] += flat[i + 2 + k];
+  }
+  for (const p of bySku.values()) {
+    for (let j = METRICS; j < p.length; j++) p[j] += p[j - METRICS];
+  }
+  byDay.set(day, bySku);
+  return bySku;
+}
+
+/**
+ * Как aggregateBySku, но в окне startTime–endTime. Полный день берётся из
+ * дневных ячеек индекса; иначе — разность префиксных сумм гистограмм.
+ */
+function windowBySku(index, hist, dates, startTime, endTime) {
+  const [from, to] = timeWindowSlots(startTime, endTime);
+  if (from === 0 && to === SLOTS) return aggregateBySku(index, dates);
+  const bySku = new Map();
+  if (!hist || !hist.days) return bySku;
+  const spans = from < to ? [[from, to]] : [[from, SLOTS], [0, to]];
+  for (const day of new Set(dates || [])) {
+    for (const [s, p] of dayPrefixSums(hist, day)) {
+      const v = [0, 0, 0, 0];
+      for (const [a, b] of spans) {
+        for (let k = 0; k < METRICS; k++) v[k] += p[b * METRICS + k] - p[a * METRICS + k];
+      }
+      if (!(v[0] || v[1] || v[2] || v[3])) continue;
+      const sku = hist.skus[s];
+      let a = bySku.get(sku);
+      if (!a) { a = { orders: 0, revenueQty: 0, cancellations: 0, revenueKop: 0 }; bySku.set(sku, a); }
+      a.orders += v[0];
+      a.revenueQty += v[1];
+      a.cancellations += v[2];
+      a.revenueKop += v[3];
+    }
+  }
+  return finishSkuTotals(bySku);
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    REPORT_INDEX_VERSION, TIME_PRESETS, statusClass, createIndexBuilder, aggregateBySku,
+    timeWindowSlots, isFullDay, windowBySku,
+  };
+}
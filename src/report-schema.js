@@ -0,0 +1,79 @@
+/**
+ * Компиляция заголовка отчёта в план колонок (реестр — src/report-schemas.js).
+ *
+ * Заголовок разбирается один раз на файл: определяется схема (тип и версия),
+ * для каждого поля record — упорядоченный список колонок-кандидатов.
+ * В цикле по строкам остаётся только доступ по готовым ключам/индексам,
+ * без очистки имён и поиска колонок на каждой строке.
+ */
+
+// Колонки-кандидаты полей record по типу отчёта: берётся первая непустая
+const RECORD_FIELDS = {
+  FBO: {
+    order_id: ['Номер заказа'],
+    sku: ['Артикул', 'OZON id', 'OZON ID'],
+    quantity: ['Количество'],
+    price: ['Ваша цена', 'Сумма отправления'],
+    created_at: ['Принят в обработку', 'Дата отгрузки', 'Фактическая дата передачи в доставку'],
+    status: ['Статус'],
+  },
+  FBS: {
+    order_id: ['Номер заказа', '№ заказа'],
+    sku: ['Артикул продавца', 'Артикул', 'OZON id', 'OZON ID'],
+    quantity: ['Количество', 'Кол-во'],
+    price: ['Ваша цена', 'Сумма отправления'],
+    created_at: ['Принят в обработку', 'Дата отгрузки', 'Дата отгрузки без просрочки'],
+    status: ['Статус'],
+  },
+};
+
+const cleanHeader = k => String(k ?? '').replace(/^\uFEFF/, '').replace(/\u00A0/g, ' ').replace(/^"+|"+$/g, '').trim().replace(/\s+/g, ' ');
+
+/**
+ * @param {string[]} headers  заголовки как пришли (ключи строк Extract from File)
+ * @param {object[]} schemas  реестр REPORT_SCHEMAS (src/report-schemas.js)
+ * @returns {{ reportType, schemaId, version, exact, missing, extra, notice,
+ *             fields: { [field]: { keys: string[], indices: number[] } } }}
+ */
+function compileHeaderPlan(headers, schemas) {
+  const cleaned = headers.map(cleanHeader);
+  const byName = new Map();
+  cleaned.forEach((h, i) => { const k = h.toLowerCase(); if (!byName.has(k)) byName.set(k, i); });
+
+  let best = null;
+  for (const schema of schemas) {
+    const matched = schema.columns.filter(c => byName.has(c.toLowerCase())).length;
+    const score = matched / (schema.columns.length + cleaned.length - matched);
+    if (!best || score > best.score) best = { schema, score };
+  }
+  const schema = best.schema;
+  const known = new Set(schema.columns.map(c => c.toLowerCase()));
+  const missing = schema.columns.filter(c => !byName.has(c.toLowerCase()));
+  const extra = cleaned.filter(h => h && !known.has(h.toLowerCase()));
+  const exact = missing.length === 0 && extra.length === 0 &&
+    schema.columns.every((c, i) => (cleaned[i] || '').toLowerCase() === c.toLowerCase());
+
+  const fields = {};
+  for (const [field, candidates] of Object.entries(RECORD_FIELDS[schema.type])) {
+    const indices = [];
+    for (const c of candidates) {
+      const i = byName.get(cleanHeader(c).toLowerCase());
+      if (i !== undefined && !indices.includes(i)) indices.push(i);
+    }
+    fields[field] = { keys: indices.map(i => headers[i]), indices };
+  }
+
+  let notice = null;
+  if (!exact) {
+    const parts = [];
+    if (missing.length) parts.push(`нет колонок: ${missing.join(', ')}`);
+    if (extra.length) parts.push(`новые колонки: ${extra.join(', ')}`);
+    if (!parts.length) parts.push('другой порядок колонок');
+    notice = `Неизвестная раскладка заголовков отчёта (ближайшая схема ${schema.id}): ${parts.join('; ')}`;
+  }
+  return { reportType: schema.type, schemaId: schema.id, version: schema.version, exact, missing, extra, notice, fields };
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { RECORD_FIELDS, cleanHeader, compileHeaderPlan };
+}
@@ -0,0 +1,15 @@
+/**
+ * Реестр схем отчётов Ozon «Заказы» (FBO/FBS) по версиям.
+ *
+ * Сгенерировано scripts/build-report-schemas.js из Ozon_*_report_Заказы_structure.txt —
+ * не править руками.
+ */
+
+const REPORT_SCHEMAS = [
+  {"id":"fbo-v1","type":"FBO","version":1,"source":"Ozon_FBO_report_Заказы_structure.txt","columns":["Номер заказа","Номер отправления","Принят в обработку","Дата отгрузки","Статус","Дата доставки","Фактическая дата передачи в доставку","Сумма отправления","Код валюты отправления","Наименование товара","OZON id","Артикул","Ваша цена","Код валюты товара","Оплачено покупателем","Код валюты покупателя","Количество","Стоимость доставки","Связанные отправления","Выкуп товара","Цена товара до скидок","Скидка %","Скидка руб","Акции","Объемный вес товаров, кг","Кластер отгрузки","Кластер доставки","Норм. время доставки до покупателя","Оценка отгрузки","Склад отгрузки","Регион доставки","Город доставки","Способ доставки","Сегмент клиента","Юридическое лицо","Способ оплаты","Адрес покупателя"],"dtypes":["object","object","object","object","object","object","object","float64","object","object","int64","object","float64","object","float64","object","int64","float64","float64","object","float64","object","float64","object","float64","object","object","float64","object","object","float64","float64","object","object","object","object","float64"]},
+  {"id":"fbs-v1","type":"FBS","version":1,"source":"Ozon_FBS_report_Заказы_structure.txt","columns":["Номер заказа","Номер отправления","Принят в обработку","Дата отгрузки","Дата отгрузки без просрочки","Статус","Дата доставки","Фактическая дата передачи в доставку","Дата отмены","Сумма отправления","Код валюты отправления","Наименование товара","OZON id","Артикул","Ваша цена","Код валюты товара","Оплачено покупателем","Код валюты покупателя","Количество","Стоимость доставки","Связанные отправления","Выкуп товара","Цена товара до скидок","Скидка %","Скидка руб","Акции","Кластер отгрузки","Кластер доставки","Норм. время доставки до покупателя","Оценка отгрузки","Регион доставки","Город доставки","Способ доставки","Сегмент клиента","Способ оплаты","Склад отгрузки","Способ отгрузки","Перевозчик","Название метода"],"dtypes":["object","object","object","object","object","object","float64","float64","float64","float64","object","object","int64","object","float64","object","float64","object","int64","float64","float64","float64","float64","object","float64","object","object","object","float64","float64","float64","float64","object","object","object","object","object","object","object"]},
+];
+
+if (typeof module !== 'undefined') {
+  module.exports = { REPORT_SCHEMAS };
+}
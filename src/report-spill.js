@@ -0,0 +1,319 @@
+/**
+ * Вынос больших отчётов из Redis в локальные колоночные файлы.
+ *
+ * Колонки :csv отчёта на сотни тысяч строк занимают в Redis десятки МБ, а
+ * нужны только слиянию (целиком) и окну времени в статистике (несколько
+ * дней). Если колонки больше SPILL_MIN_MB, «Encode Session Values» пишет их
+ * в файл <SPILL_DIR>/<uid>-<поколение загрузки>.ocol, а в :csv и :hist
+ * кладёт указатель:
+ *   { v, enc: 'spill', dir, file: '<uid>-<gen>.ocol', bytes, reportType, totalRecords }
+ * :agg и :meta остаются в Redis — полные дни и календарь файл не читают.
+ * Каталог записан в указателе: читателям (в том числе ozord_orders_stats_engine
+ * без Config) он не нужен из настроек.
+ *
+ * Файл (little-endian, секции выровнены по 8 байтам):
+ *   'OCOL' | u32 длина заголовка | заголовок JSON | словари JSON | колонки
+ *   заголовок: { v, columns, reportType, totalRecords, scale,
+ *                dict: { поле: [смещение, байты] }, cols: { поле: [kind, смещение] },
+ *                days: { 'YYYY-MM-DD': [from, to] } }
+ *   columns — версия колоночного формата :csv (src/record-columns.js).
+ * Строки сгруппированы по MSK-дню (внутри дня — в исходном порядке), день —
+ * непрерывный диапазон строк, поэтому чтение дня — одно позиционное чтение
+ * на колонку прямо в память типизированного массива. Колонка row хранит
+ * исходный номер строки: полное чтение для слияния возвращает прежний
+ * порядок. Строки без даты лежат в конце и в days не входят.
+ *
+ * Жизненный цикл: новая загрузка удаляет прежние файлы пользователя,
+ * file:clear — все; файлы, на которые не указывает ни один :csv (сессия
+ * истекла по TTL), удаляет scripts/redis_sweeper.py --spill-dir.
+ * Code-ноде нужен доступ к fs (NODE_FUNCTION_ALLOW_BUILTIN=fs); без него
+ * вынос выключается сам и отчёт, как раньше, целиком лежит в Redis.
+ *
+ * Python-двойник (чтение через mmap): scripts/report_spill.py.
+ */
+
+const REPORT_SPILL_VERSION = 1;
+const SPILL_MAGIC = 'OCOL';
+const SPILL_EXT = '.ocol';
+const SPILL_DIR = '/home/node/.n8n/ozon-spill';
+const SPILL_MIN_MB = 8;
+const SPILL_FIELDS = ['order_id', 'sku', 'status', 't', 'quantity', 'price'];
+const SPILL_DICTS = ['order_id', 'sku', 'status'];
+const SPILL_BYTES = { u8: 1, u16: 2, u32: 4, i32: 4, f64: 8 };
+const SPILL_TYPES = { u8: Uint8Array, u16: Uint16Array, u32: Uint32Array, i32: Int32Array, f64: Float64Array };
+
+/** В Code-ноде модули встроены регионами выше; в Node — соседние файлы src/. */
+function spillDeps() {
+  if (typeof decodeColumns === 'function' && typeof createIndexBuilder === 'function') return { decodeColumns, createIndexBuilder };
+  return { ...require('./record-columns'), ...require('./report-index') };
+}
+
+/** fs или null, если Code-ноде не разрешены встроенные модули. */
+function spillFs() {
+  try {
+    return require('fs');
+  } catch (e) {
+    return null;
+  }
+}
+
+/** Каталог и порог из Config: SPILL_DIR (пусто — выключено), SPILL_MIN_MB. */
+function spillSettings(config) {
+  const c = config || {};
+  const mb = Number(c.SPILL_MIN_MB);
+  return {
+    dir: String(c.SPILL_DIR === undefined ? SPILL_DIR : c.SPILL_DIR || '').replace(/\/+$/, ''),
+    minBytes: Math.floor((mb > 0 ? mb : SPILL_MIN_MB) * 1024 * 1024),
+  };
+}
+
+function isSpillPointer(value) {
+  return !!value && value.enc === 'spill' && typeof value.file === 'string';
+}
+
+/** Примерный размер колонок в JSON без JSON.stringify: base64 колонок и строки словарей. */
+function columnsBytes(columns) {
+  if (!columns || !columns.cols) return 0;
+  let n = 0;
+  for (const spec of Object.values(columns.cols)) n += typeof spec === 'string' ? spec.length : 0;
+  for (const values of Object.values(columns.dict || {})) {
+    for (const v of values) n += String(v).length + 3;
+  }
+  return n;
+}
+
+/** Пойдёт ли отчёт в файл: fs доступен, каталог задан, колонки не меньше порога. */
+function spillWanted(settings, columns) {
+  return !!settings.dir && columnsBytes(columns) >= settings.minBytes && !!spillFs();
+}
+
+function dayKey(day, cache) {
+  let key = cache.get(day);
+  if (key === undefined) { key = new Date(day * 86400000).toISOString().slice(0, 10); cache.set(day, key); }
+  return key;
+}
+
+/** Байты файла: строки сгруппированы по дню подсчётом (O(n), порядок внутри дня сохранён). */
+function buildSpillFile(columns) {
+  const { decodeColumns } = spillDeps();
+  const c = decodeColumns(columns);
+  const n = c.n;
+  const dayOf = new Float64Array(n);
+  const counts = new Map();
+  for (let i = 0; i < n; i++) {
+    const d = c.t[i] < 0 ? Infinity : Math.floor(c.t[i] / 1440);
+    dayOf[i] = d;
+    counts.set(d, (counts.get(d) || 0) + 1);
+  }
+  const cache = new Map();
+  const days = {};
+  const start = new Map();
+  let at = 0;
+  for (const d of Array.from(counts.keys()).sort((a, b) => a - b)) {
+    start.set(d, at);
+    if (d !== Infinity) days[dayKey(d, cache)] = [at, at + counts.get(d)];
+    at += counts.get(d);
+  }
+  const row = new Uint32Array(n);
+  for (let i = 0; i < n; i++) {
+    const j = start.get(dayOf[i]);
+    start.set(dayOf[i], j + 1);
+    row[j] = i;
+  }
+
+  const kinds = { row: 'u32' };
+  for (const f of SPILL_FIELDS) kinds[f] = columns.cols[f].slice(0, columns.cols[f].indexOf(':'));
+  const arrays = { row };
+  for (const f of SPILL_FIELDS) {
+    const out = new SPILL_TYPES[kinds[f]](n);
+    const src = c[f];
+    for (let j = 0; j < n; j++) out[j] = src[row[j]];
+    arrays[f] = out;
+  }
+
+  const pad8 = x => Math.ceil(x / 8) * 8;
+  const dicts = {};
+  for (const f of SPILL_DICTS) dicts[f] = Buffer.from(JSON.stringify(columns.dict[f]));
+  const header = { v: REPORT_SPILL_VERSION, columns: columns.v, reportType: columns.reportType, totalRecords: n, scale: columns.scale, dict: {}, cols: {}, days };
+  // Смещения секций зависят от длины заголовка, а она — от смещений
+  let headerBytes = 0, offset;
+  for (;;) {
+    offset = 8 + headerBytes;
+    for (const f of SPILL_DICTS) {
+      header.dict[f] = [offset, dicts[f].length];
+      offset += pad8(dicts[f].length);
+    }
+    for (const f of ['row', ...SPILL_FIELDS]) {
+      header.cols[f] = [kinds[f], offset];
+      offset += pad8(n * SPILL_BYTES[kinds[f]]);
+    }
+    const need = pad8(Buffer.byteLength(JSON.stringify(header)));
+    if (need <= headerBytes) break;
+    headerBytes = need;
+  }
+  const json = Buffer.from(JSON.stringify(header));
+  const out = Buffer.alloc(offset, 0x20);
+  out.write(SPILL_MAGIC, 0, 'latin1');
+  out.writeUInt32LE(headerBytes, 4);
+  json.copy(out, 8);
+  for (const f of SPILL_DICTS) dicts[f].copy(out, header.dict[f][0]);
+  for (const f of ['row', ...SPILL_FIELDS]) {
+    const a = arrays[f];
+    const at = header.cols[f][1];
+    out.fill(0, at, at + pad8(a.byteLength));
+    Buffer.from(a.buffer, a.byteOffset, a.byteLength).copy(out, at);
+  }
+  return out;
+}
+
+/** Удаляет файлы пользователя в каталоге, кроме keep; возвращает число удалённых. */
+function removeSpillFiles(settings, userId, keep) {
+  const fs = spillFs();
+  if (!fs || !settings.dir) return 0;
+  let names;
+  try {
+    names = fs.readdirSync(settings.dir);
+  } catch (e) {
+    return 0;
+  }
+  let removed = 0;
+  const prefix = `${userId}-`;
+  for (const name of names) {
+    if (name === keep || !name.startsWith(prefix) || !(name.endsWith(SPILL_EXT) || name.endsWith('.tmp'))) continue;
+    if (!/^\d+$/.test(name.slice(prefix.length).split('.')[0])) continue;
+    try {
+      fs.unlinkSync(`${settings.dir}/${name}`);
+      removed++;
+    } catch (e) { /* уже удалён */ }
+  }
+  return removed;
+}
+
+/**
+ * Пишет колонки в файл (tmp + rename) и удаляет прежние файлы пользователя.
+ * @returns указатель для :csv/:hist или null — отчёт остаётся в Redis
+ */
+function spillReport(settings, userId, uploadGen, columns) {
+  if (!spillWanted(settings, columns)) return null;
+  const fs = spillFs();
+  const file = `${userId}-${Number(uploadGen) || 0}${SPILL_EXT}`;
+  const path = `${settings.dir}/${file}`;
+  try {
+    const bytes = buildSpillFile(columns);
+    fs.mkdirSync(settings.dir, { recursive: true });
+    fs.writeFileSync(`${path}.tmp`, bytes);
+    fs.renameSync(`${path}.tmp`, path);
+    removeSpillFiles(settings, userId, file);
+    return { v: REPORT_SPILL_VERSION, enc: 'spill', dir: settings.dir, file, bytes: bytes.length, reportType: columns.reportType, totalRecords: columns.totalRecords };
+  } catch (e) {
+    return null;
+  }
+}
+
+/** Диапазоны строк выбранных дней, по возрастанию и со склеенными соседями. */
+function dayRanges(header, days) {
+  if (!days) return [[0, header.totalRecords]];
+  const ranges = Array.from(new Set(days), d => header.days[d]).filter(Boolean).sort((a, b) => a[0] - b[0]);
+  const out = [];
+  for (const [a, b] of ranges) {
+    const last = out[out.length - 1];
+    if (last && last[1] === a) last[1] = b;
+    else out.push([a, b]);
+  }
+  return out;
+}
+
+/**
+ * Читает из файла только нужные колонки и дни.
+ * @param {object} opts { fields = все, days — список 'YYYY-MM-DD' (нет — весь файл) }
+ * Словарь поля (order_id, sku, status) разбирается, только если поле запрошено:
+ * словарь order_id — по строке на заказ, на миллионе строк это десятки МБ JSON.
+ * @returns {{ header, n, dict, cols: { поле: TypedArray } } | null} null — файла нет или он битый
+ */
+function readSpill(pointer, { fields = SPILL_FIELDS, days } = {}) {
+  const fs = spillFs();
+  if (!fs || !isSpillPointer(pointer) || !pointer.dir || pointer.file.includes('/')) return null;
+  let fd;
+  try {
+    fd = fs.openSync(`${pointer.dir}/${pointer.file}`, 'r');
+    const head = Buffer.alloc(8);
+    fs.readSync(fd, head, 0, 8, 0);
+    if (head.toString('latin1', 0, 4) !== SPILL_MAGIC) return null;
+    const hb = Buffer.alloc(head.readUInt32LE(4));
+    fs.readSync(fd, hb, 0, hb.length, 8);
+    const header = JSON.parse(hb.toString('utf8'));
+    if (header.v !== REPORT_SPILL_VERSION) return null;
+    const ranges = dayRanges(header, days);
+    const n = ranges.reduce((s, [a, b]) => s + b - a, 0);
+    const dict = {};
+    for (const f of fields.filter(f => SPILL_DICTS.includes(f))) {
+      const [offset, size] = header.dict[f];
+      const buf = Buffer.alloc(size);
+      if (fs.readSync(fd, buf, 0, size, offset) !== size) return null;
+      dict[f] = JSON.parse(buf.toString('utf8'));
+    }
+    const cols = {};
+    for (const f of fields) {
+      const [kind, offset] = header.cols[f];
+      const size = SPILL_BYTES[kind];
+      const arr = new SPILL_TYPES[kind](n);
+      const bytes = new Uint8Array(arr.buffer);
+      let at = 0;
+      for (const [a, b] of ranges) {
+        const len = (b - a) * size;
+        if (fs.readSync(fd, bytes, at, len, offset + a * size) !== len) return null;
+        at += len;
+      }
+      cols[f] = arr;
+    }
+    return { header, n, dict, cols };
+  } catch (e) {
+    return null;
+  } finally {
+    if (fd !== undefined) fs.closeSync(fd);
+  }
+}
+
+/** Колонки :csv из файла в исходном порядке строк — для слияния; null — файла нет. */
+function spillColumns(pointer) {
+  const s = readSpill(pointer, { fields: ['row', ...SPILL_FIELDS] });
+  if (!s) return null;
+  const cols = {};
+  for (const f of SPILL_FIELDS) {
+    const src = s.cols[f];
+    const out = new src.constructor(s.n);
+    for (let j = 0; j < s.n; j++) out[s.cols.row[j]] = src[j];
+    cols[f] = out;
+  }
+  const h = s.header;
+  return { v: h.columns, enc: 'columns', reportType: h.reportType, totalRecords: h.totalRecords, dict: s.dict, cols, scale: h.scale };
+}
+
+/**
+ * Гистограммы получасов (формат :hist) по строкам файла за выбранные дни,
+ * с нумерацией SKU индекса :agg; без days — за все дни (для слияния).
+ * @returns {object|null} null — файла нет
+ */
+function spillHistogram(pointer, index, days) {
+  const s = readSpill(pointer, { fields: ['sku', 'status', 't', 'quantity', 'price'], days });
+  if (!s) return null;
+  const { createIndexBuilder } = spillDeps();
+  const builder = createIndexBuilder({ skus: (index && index.skus) || [], days: {} });
+  const { sku, status, t, quantity, price } = s.cols;
+  const dict = s.dict;
+  const scale = (s.header.scale && s.header.scale.price) || 1;
+  const cache = new Map();
+  for (let i = 0; i < s.n; i++) {
+    if (t[i] < 0) continue;
+    builder.add(dayKey(Math.floor(t[i] / 1440), cache), dict.sku[sku[i]], quantity[i], price[i] / scale, dict.status[status[i]],
+      { slot: Math.floor((t[i] % 1440) / 30) });
+  }
+  return builder.buildHistogram();
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    REPORT_SPILL_VERSION, SPILL_DIR, SPILL_MIN_MB, SPILL_FIELDS, spillSettings, isSpillPointer, columnsBytes, spillWanted,
+    buildSpillFile, spillReport, removeSpillFiles, readSpill, spillColumns, spillHistogram,
+  };
+}
@@ -0,0 +1,84 @@
+/**
+ * Кодек значений сессии в Redis (ozon:sess:<uid>:csv / :agg / :hist и
+ * общий кэш разбора ozon:parse:f:<id>).
+ *
+ * Значение — строка (n8n Redis node пишет только строки):
+ *   {...} / [...]        JSON как есть — маленькие ключи и всё, что записано
+ *                        до кодека; читается без изменений
+ *   ~d1:<base64>         UTF-8 JSON, сжатый raw DEFLATE (zlib.deflateRawSync)
+ *
+ * JSON не начинается с «~», поэтому заголовок однозначен, а читатели
+ * понимают оба вида, пока в Redis лежат старые значения. Неизвестный
+ * заголовок (~d2: от будущей версии) читается как отсутствие значения —
+ * как битый JSON: сессию загрузят заново.
+ *
+ * Кодек выбирается по типу ключа (SESSION_CODECS, правится в Config
+ * строкой SESSION_CODECS="csv=deflate,hist=json"). Значение короче
+ * SESSION_CODEC_MIN_BYTES или сжатое меньше чем на 10% пишется JSON:
+ * распаковка на каждом чтении должна окупаться.
+ *
+ * zlib Code-ноде разрешается так же, как fs для src/report-spill.js:
+ * NODE_FUNCTION_ALLOW_BUILTIN=fs,zlib. Без него кодек deflate пишет JSON, а
+ * ~d1: прочитать нечем — такое значение читается как отсутствующее.
+ */
+
+const SESSION_CODEC_DEFLATE = '~d1:';
+const SESSION_CODEC_MIN_BYTES = 4096;
+const SESSION_CODEC_MIN_GAIN = 0.9;
+const SESSION_CODECS = { csv: 'deflate', agg: 'deflate', hist: 'deflate', parse: 'deflate', meta: 'json', dates: 'json' };
+
+/** zlib или null, если Code-ноде не разрешены встроенные модули. */
+function sessionZlib() {
+  try {
+    return require('zlib');
+  } catch (e) {
+    return null;
+  }
+}
+
+/** Кодеки по типу ключа: SESSION_CODECS поверх строки Config «тип=кодек,…». */
+function sessionCodecs(config) {
+  const codecs = { ...SESSION_CODECS };
+  const raw = config && config.SESSION_CODECS;
+  for (const pair of String(raw || '').split(',')) {
+    const [part, codec] = pair.split('=').map(s => s.trim());
+    if (part in codecs && (codec === 'json' || codec === 'deflate')) codecs[part] = codec;
+  }
+  return codecs;
+}
+
+/** Строка для Redis: объект (или готовый JSON-текст) в заданном кодеке. */
+function encodeSessionValue(value, { codec = 'json', minBytes = SESSION_CODEC_MIN_BYTES } = {}) {
+  const json = typeof value === 'string' ? value : JSON.stringify(value);
+  const zlib = codec === 'deflate' && json.length >= minBytes ? sessionZlib() : null;
+  if (!zlib) return json;
+  const bytes = Buffer.from(json, 'utf8');
+  const packed = zlib.deflateRawSync(bytes);
+  if (SESSION_CODEC_DEFLATE.length + Math.ceil(packed.length / 3) * 4 > bytes.length * SESSION_CODEC_MIN_GAIN) return json;
+  return SESSION_CODEC_DEFLATE + packed.toString('base64');
+}
+
+/** Значение из Redis → объект; null — ключа нет, значение битое или кодек неизвестен. */
+function decodeSessionValue(raw) {
+  if (raw === null || raw === undefined || raw === '') return null;
+  if (typeof raw !== 'string') return raw;
+  try {
+    if (raw.charCodeAt(0) !== 126) return JSON.parse(raw);
+    const zlib = raw.startsWith(SESSION_CODEC_DEFLATE) ? sessionZlib() : null;
+    if (!zlib) return null;
+    return JSON.parse(zlib.inflateRawSync(Buffer.from(raw.slice(SESSION_CODEC_DEFLATE.length), 'base64')).toString('utf8'));
+  } catch (e) {
+    return null;
+  }
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    SESSION_CODEC_DEFLATE,
+    SESSION_CODEC_MIN_BYTES,
+    SESSION_CODECS,
+    sessionCodecs,
+    encodeSessionValue,
+    decodeSessionValue,
+  };
+}
@@ -0,0 +1,213 @@
+/**
+ * Слияние загруженного отчёта с текущей сессией (загрузка с подписью «+»).
+ *
+ * Без слияния новый отчёт заменяет ozon:sess:<uid>:* целиком — FBO и FBS
+ * вместе не посмотреть, период не продлить. Здесь строка отчёта — это
+ * строка заказа (order_id + SKU; повтор той же пары в одном файле —
+ * следующее вхождение), её отпечаток — статус, минута, штуки и цена:
+ *   - пары нет в сессии → строка добавляется;
+ *   - отпечаток тот же → строка пропускается (перекрытие выгрузок);
+ *   - отпечаток другой (сменился статус) → старый вклад вычитается из
+ *     :agg/:hist/dayTotals, новый добавляется.
+ * Индексы и даты правятся только на изменившихся строках (createIndexBuilder
+ * с base и sign = -1), а не пересчитываются по всей сессии.
+ *
+ * Сравнение идёт по распакованным колонкам сессии без копий: словари
+ * отчёта сопоставляются проходом по словарям сессии, строки заказа
+ * собираются только для заказов из отчёта. Если ничего не изменилось,
+ * возвращаются те же объекты сессии (columns, agg, hist) — их не нужно
+ * ни кодировать, ни писать заново. Иначе колонки :csv переупаковываются
+ * целиком: :csv — одна строка Redis, и частично её не перезаписать.
+ */
+
+const MERGE_CAPTION_RE = /^\s*(\+|merge|добавить|объединить)/i;
+
+/**
+ * В Code-ноде модули встроены регионами выше; в Node — соседние файлы src/.
+ * Проверяется сама функция, а не module: n8n передаёт Code-ноде module, но
+ * require('./…') там падает.
+ */
+function mergeDeps() {
+  if (typeof decodeColumns === 'function' && typeof createIndexBuilder === 'function' && typeof buildSessionMeta === 'function') {
+    return { T_NONE, isColumnar, decodeColumns, encodeColumnArrays, createIndexBuilder, addDayTotal, buildSessionMeta };
+  }
+  return { ...require('./record-columns'), ...require('./report-index'), ...require('./session-meta') };
+}
+
+function mergeReportType(a, b) {
+  if (!a) return b || null;
+  if (!b || a === b) return a;
+  return Array.from(new Set(`${a}+${b}`.split('+'))).sort().join('+');
+}
+
+/**
+ * Код каждого значения словаря from в словаре to; -1 — значения там нет.
+ * Один проход по to без Map на весь словарь сессии.
+ */
+function dictRemap(from, to) {
+  const pos = new Map(from.map((v, k) => [v, k]));
+  const out = new Int32Array(from.length).fill(-1);
+  for (let c = 0; c < to.length && pos.size; c++) {
+    const k = pos.get(to[c]);
+    if (k !== undefined) { out[k] = c; pos.delete(to[c]); }
+  }
+  return out;
+}
+
+/** Дневной ключ и получас MSK из epoch-минуты; дни кешируются. */
+function minuteDay(t, cache) {
+  const d = Math.floor(t / 1440);
+  let day = cache.get(d);
+  if (day === undefined) { day = new Date(d * 86400000).toISOString().slice(0, 10); cache.set(d, day); }
+  return day;
+}
+
+/**
+ * @param {object} base      текущая сессия { columns, agg, hist, meta } (любое поле может быть null)
+ * @param {object} incoming  выход «Parse Report File» для нового файла
+ * @returns {{ reportType, availableDates, totalRecords, meta, agg, hist, columns, merge: {added, updated, unchanged} }}
+ */
+function mergeSessionReport(base, incoming) {
+  const { T_NONE, isColumnar, decodeColumns, encodeColumnArrays, createIndexBuilder, addDayTotal, buildSessionMeta } = mergeDeps();
+  const ib = isColumnar(base && base.columns) && base.agg && base.meta ? base : null;
+  if (!ib) {
+    const n = incoming.columns ? incoming.columns.totalRecords : 0;
+    return { ...incoming, merge: { added: n, updated: 0, unchanged: 0 } };
+  }
+  const reportType = mergeReportType(ib.meta.reportType, incoming.reportType);
+
+  const bc = decodeColumns(ib.columns);
+  const bScale = (ib.columns.scale && ib.columns.scale.price) || 1;
+  const bDict = ib.columns.dict;
+  const ic = decodeColumns(incoming.columns);
+  const iScale = (incoming.columns.scale && incoming.columns.scale.price) || 1;
+  const iDict = incoming.columns.dict;
+  const remap = {};
+  for (const f of ['order_id', 'sku', 'status']) remap[f] = dictRemap(iDict[f], bDict[f]);
+
+  // Строка заказа → номер строки сессии, только для заказов из отчёта;
+  // вхождение n > 0 — повтор пары в том же файле
+  const SKU_SPAN = 0x200000;
+  const lineKey = (o, s, n) => (n ? `${o}:${s}:${n}` : o * SKU_SPAN + s);
+  const nth = (o, s, counter) => {
+    const k = o * SKU_SPAN + s;
+    const n = counter.get(k) || 0;
+    counter.set(k, n + 1);
+    return n;
+  };
+  const wanted = new Uint8Array(bDict.order_id.length);
+  for (let j = 0; j < ic.n; j++) {
+    const o = remap.order_id[ic.order_id[j]];
+    if (o >= 0) wanted[o] = 1;
+  }
+  const rows = new Map();
+  const seen = new Map();
+  for (let i = 0; i < bc.n; i++) {
+    const o = bc.order_id[i];
+    if (wanted[o]) rows.set(lineKey(o, bc.sku[i], nth(o, bc.sku[i], seen)), i);
+  }
+
+  // Дельта: пары [строка сессии или -1 для новой, строка отчёта]
+  const changes = [];
+  const counter = new Map();
+  const stats = { added: 0, updated: 0, unchanged: 0 };
+  for (let j = 0; j < ic.n; j++) {
+    const o = remap.order_id[ic.order_id[j]], s = remap.sku[ic.sku[j]];
+    const i = o >= 0 && s >= 0 ? rows.get(lineKey(o, s, nth(o, s, counter))) : undefined;
+    if (i === undefined) {
+      stats.added++;
+      changes.push(-1, j);
+    } else if (remap.status[ic.status[j]] === bc.status[i] && bc.t[i] === ic.t[j] && bc.quantity[i] === ic.quantity[j] && bc.price[i] / bScale === ic.price[j] / iScale) {
+      stats.unchanged++;
+    } else {
+      stats.updated++;
+      changes.push(i, j);
+    }
+  }
+  if (!changes.length) {
+    const same = reportType === ib.meta.reportType;
+    return {
+      reportType,
+      availableDates: ib.meta.availableDates,
+      totalRecords: bc.n,
+      schema: incoming.schema,
+      meta: same ? ib.meta : { ...ib.meta, reportType },
+      agg: ib.agg,
+      hist: ib.hist,
+      columns: same ? ib.columns : { ...ib.columns, reportType },
+      merge: stats,
+    };
+  }
+
+  // Есть изменения: колонки сессии — изменяемые массивы, новые значения дописываются в словари
+  const dict = {}, codes = {};
+  for (const f of ['order_id', 'sku', 'status']) {
+    dict[f] = bDict[f].slice();
+    codes[f] = Array.from(bc[f]);
+  }
+  const t = Array.from(bc.t), quantity = Array.from(bc.quantity), price = Array.from(bc.price, p => p / bScale);
+  const code = (f, k) => {
+    let c = remap[f][k];
+    if (c < 0) { c = remap[f][k] = dict[f].length; dict[f].push(iDict[f][k]); }
+    return c;
+  };
+
+  const index = createIndexBuilder(ib.agg, ib.hist);
+  const dayTotals = {};
+  for (const [day, v] of Object.entries(ib.meta.dayTotals || {})) dayTotals[day] = v.slice();
+  const dates = new Set(ib.meta.availableDates || []);
+  const touched = new Set();
+  const dayCache = new Map();
+  function apply(i, sign) {
+    if (t[i] === T_NONE) return;
+    const day = minuteDay(t[i], dayCache);
+    const sku = dict.sku[codes.sku[i]], status = dict.status[codes.status[i]];
+    const q = Number(quantity[i] || 1);
+    index.add(day, sku, q, price[i], status, { sign, slot: Math.floor((t[i] % 1440) / 30) });
+    addDayTotal(dayTotals, day, sign * q, price[i], status);
+    dates.add(day);
+    touched.add(day);
+  }
+
+  for (let k = 0; k < changes.length; k += 2) {
+    let i = changes[k];
+    const j = changes[k + 1];
+    if (i >= 0) apply(i, -1);
+    else {
+      i = t.length;
+      codes.order_id.push(code('order_id', ic.order_id[j]));
+      codes.sku.push(code('sku', ic.sku[j]));
+      t.push(0); quantity.push(0); price.push(0); codes.status.push(0);
+    }
+    codes.status[i] = code('status', ic.status[j]);
+    t[i] = ic.t[j];
+    quantity[i] = ic.quantity[j];
+    price[i] = ic.price[j] / iScale;
+    apply(i, 1);
+  }
+
+  // Дни, где после вычитания не осталось заказов, уходят из дат
+  for (const day of touched) {
+    const v = dayTotals[day];
+    if (!v || v[0] <= 0) { delete dayTotals[day]; dates.delete(day); continue; }
+    v[1] = Math.round(v[1] * 100) / 100;
+  }
+
+  const columns = encodeColumnArrays({ reportType, dict, codes, t, quantity, price });
+  const meta = buildSessionMeta({ reportType, availableDates: Array.from(dates), totalRecords: columns.totalRecords, dayTotals });
+  return {
+    reportType,
+    availableDates: meta.availableDates,
+    totalRecords: columns.totalRecords,
+    schema: incoming.schema,
+    meta,
+    agg: index.build(),
+    hist: index.buildHistogram(),
+    columns,
+    merge: stats,
+  };
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { MERGE_CAPTION_RE, mergeReportType, mergeSessionReport };
+}
@@ -0,0 +1,75 @@
+/**
+ * Лёгкие метаданные сессии отчёта — ozon:sess:<uid>:meta.
+ *
+ * Календарь, тоггл дат, навигация и меню читают только этот ключ.
+ * Тяжёлые records лежат отдельно в ozon:sess:<uid>:csv и нужны
+ * лишь движку статистики.
+ */
+
+const SESSION_META_VERSION = 1;
+
+/**
+ * В Code-ноде src/report-index.js встроен регионом выше; в Node — соседний
+ * файл. Проверяется сама функция: module в Code-ноде n8n тоже есть, а
+ * require('./report-index') там падает.
+ */
+function sessionMetaDeps() {
+  if (typeof statusClass === 'function') return { statusClass };
+  return require('./report-index');
+}
+
+/**
+ * Копит по MSK-дню [заказы(шт), выручка] — для строки «Итого» в календаре.
+ * Выручечный статус — тот же statusClass, что у индекса :agg, иначе «Итого»
+ * в календаре разойдётся с отчётом по «Готово».
+ */
+function addDayTotal(dayTotals, day, quantity, price, status) {
+  const t = dayTotals[day] || (dayTotals[day] = [0, 0]);
+  const q = Number(quantity || 1);
+  t[0] += q;
+  if (sessionMetaDeps().statusClass(status) === 'revenue') t[1] += Number(price || 0) * q;
+  return dayTotals;
+}
+
+function buildSessionMeta({ reportType, availableDates, totalRecords, dayTotals } = {}) {
+  const sorted = Array.from(new Set(availableDates || [])).sort();
+  const months = Array.from(new Set(sorted.map(d => d.slice(0, 7)))).sort();
+  const daysByMonth = {};
+  for (const d of sorted) {
+    const ym = d.slice(0, 7);
+    (daysByMonth[ym] || (daysByMonth[ym] = [])).push(Number(d.slice(8, 10)));
+  }
+  return {
+    v: SESSION_META_VERSION,
+    reportType: reportType || null,
+    totalRecords: totalRecords || 0,
+    availableDates: sorted,
+    months,
+    minMonth: months[0] || null,
+    maxMonth: months.length ? months[months.length - 1] : null,
+    from: sorted[0] || null,
+    to: sorted.length ? sorted[sorted.length - 1] : null,
+    daysByMonth,
+    dayTotals: dayTotals || {},
+  };
+}
+
+/**
+ * Берёт meta из первой исполненной ноды списка: Redis GET (json.value)
+ * или Parse Report File (json.meta). Неисполненные ноды пропускаются.
+ */
+function readSessionMeta($, nodeNames) {
+  for (const name of nodeNames) {
+    let json;
+    try { json = $(name).first()?.json; } catch (e) { continue; }
+    if (!json) continue;
+    if (json.meta && typeof json.meta === 'object') return json.meta;
+    if (!json.value) continue;
+    try { return JSON.parse(json.value); } catch (e) { continue; }
+  }
+  return null;
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { SESSION_META_VERSION, addDayTotal, buildSessionMeta, readSessionMeta };
+}
@@ -0,0 +1,477 @@
+/**
+ * Исходящие вызовы Bot API через один диспетчер (scripts/telegram-dispatcher.js).
+ *
+ * Каждая HTTP-нода n8n открывала свой запрос к api.telegram.org: новое
+ * соединение TCP + TLS на вызов и никакого учёта лимитов. Серия тапов
+ * упиралась в 429, повторы копились. Диспетчер принимает те же запросы
+ * (POST /bot<token>/<method>, адрес — TELEGRAM_API_BASE в Config) и
+ * отправляет их сам:
+ *
+ *   - соединения keep-alive из пула (maxSockets на адрес);
+ *   - ведра токенов на сообщения (send*, edit*, delete*): бота — 30 в секунду
+ *     с запасом botBurst, чата — 1 в секунду с запасом chatBurst, группы —
+ *     20 в минуту. Запас бота меньше, чем терпит Telegram, — на разброс
+ *     задержки сети. answerCallbackQuery этими лимитами не ограничен;
+ *   - приоритет: answerCallbackQuery → send/delete → edit*. Вызовы одного
+ *     чата уходят по одному и в порядке поступления;
+ *   - 429 с retry_after: чат (или бот, если вызов не из чата) ждёт столько,
+ *     сколько сказал Telegram, вызов повторяется. Сетевая ошибка и 5xx —
+ *     повтор с экспоненциальной паузой, только если он не задвоит вызов:
+ *     тело запроса не ушло в сокет (обрыв до записи) или метод
+ *     идемпотентен (isIdempotentMethod: get*, edit*). sendMessage после
+ *     таймаута не повторяется — Telegram мог его уже выполнить. Не больше
+ *     maxRetries повторов;
+ *   - очередь ограничена: сверх maxQueue вызов сразу получает 429 с
+ *     retry_after, дольше maxWaitMs в очереди — тоже.
+ *
+ * Метрики (dispatcherMetrics) — глубина очереди по приоритетам, ожидание в
+ * очереди и полное время вызова (p50/p95/p99) по классам, повторы, отказы,
+ * новые и переиспользованные соединения.
+ */
+
+const TELEGRAM_API = 'https://api.telegram.org';
+
+const DISPATCH_LIMITS = {
+  botPerSec: 30,
+  botBurst: 10,
+  chatPerSec: 1,
+  chatBurst: 3,
+  groupPerMin: 20,
+  groupBurst: 3,
+  maxQueue: 1000,
+  maxWaitMs: 30000,
+  maxInFlight: 16,
+  maxSockets: 16,
+  maxRetries: 3,
+  retryBaseMs: 250,
+  timeoutMs: 30000,
+};
+
+// Поле лимита → переменная окружения диспетчера
+const DISPATCH_ENV = {
+  botPerSec: 'DISPATCH_BOT_PER_SEC',
+  chatPerSec: 'DISPATCH_CHAT_PER_SEC',
+  chatBurst: 'DISPATCH_CHAT_BURST',
+  groupPerMin: 'DISPATCH_GROUP_PER_MIN',
+  maxQueue: 'DISPATCH_MAX_QUEUE',
+  maxWaitMs: 'DISPATCH_MAX_WAIT_MS',
+  maxInFlight: 'DISPATCH_MAX_IN_FLIGHT',
+  maxSockets: 'DISPATCH_MAX_SOCKETS',
+  maxRetries: 'DISPATCH_MAX_RETRIES',
+};
+
+const DISPATCH_CLASSES = ['answer', 'send', 'edit'];
+const LATENCY_WINDOW = 1024;
+
+/** Лимиты из переменных окружения (DISPATCH_*); неположительные и нечисловые — по умолчанию. */
+function dispatchSettings(env) {
+  const e = env || {};
+  const limits = { ...DISPATCH_LIMITS };
+  for (const [field, name] of Object.entries(DISPATCH_ENV)) {
+    const v = Number(e[name]);
+    if (v > 0) limits[field] = v;
+  }
+  if (e.DISPATCH_MAX_RETRIES === '0') limits.maxRetries = 0;
+  return limits;
+}
+
+/** answer — ответ на нажатие, edit — правка сообщения, send — остальное. */
+function methodClass(method) {
+  if (method === 'answerCallbackQuery' || method === 'answerInlineQuery') return 'answer';
+  return method.startsWith('edit') ? 'edit' : 'send';
+}
+
+/** Вызов расходует лимит сообщений чата: отправка, правка, удаление. */
+function isChatMethod(method) {
+  return /^(send|edit|delete|forward|copy)/.test(method) && method !== 'sendChatAction';
+}
+
+/**
+ * Повтор после ошибки ничего не меняет: чтение и правка сообщения (та же
+ * правка второй раз — «message is not modified», src/ui-message.js).
+ * Отправка, удаление, ответ на нажатие при повторе задваиваются или падают.
+ */
+function isIdempotentMethod(method) {
+  return /^(get|edit)[A-Z]/.test(method);
+}
+
+/** Ведро токенов: rate в секунду, не больше burst про запас. */
+class TokenBucket {
+  constructor(ratePerSec, burst, now) {
+    this.rate = ratePerSec;
+    this.burst = burst;
+    this.tokens = burst;
+    this.at = now;
+  }
+
+  refill(now) {
+    this.tokens = Math.min(this.burst, this.tokens + ((now - this.at) / 1000) * this.rate);
+    this.at = now;
+  }
+
+  /** Через сколько мс будет токен; 0 — есть сейчас. */
+  wait(now) {
+    this.refill(now);
+    return this.tokens >= 1 ? 0 : Math.ceil(((1 - this.tokens) / this.rate) * 1000);
+  }
+
+  take(now) {
+    this.refill(now);
+    this.tokens -= 1;
+  }
+}
+
+/** Последние LATENCY_WINDOW замеров и перцентили по ним. */
+class LatencyWindow {
+  constructor(size = LATENCY_WINDOW) {
+    this.values = new Float64Array(size);
+    this.count = 0;
+  }
+
+  add(ms) {
+    this.values[this.count++ % this.values.length] = ms;
+  }
+
+  summary() {
+    const n = Math.min(this.count, this.values.length);
+    if (!n) return { n: 0, p50: 0, p95: 0, p99: 0, max: 0 };
+    const s = Array.from(this.values.subarray(0, n)).sort((a, b) => a - b);
+    const p = q => Math.round(s[Math.min(n - 1, Math.floor(q * n))]);
+    return { n: this.count, p50: p(0.5), p95: p(0.95), p99: p(0.99), max: Math.round(s[n - 1]) };
+  }
+}
+
+/** Ответ диспетчера без вызова Telegram: очередь полна или ожидание истекло. */
+function dispatchRefusal(description, retryAfterSec) {
+  return { status: 429, body: { ok: false, error_code: 429, description: `Too Many Requests: ${description}`, parameters: { retry_after: retryAfterSec } } };
+}
+
+/** Ответ диспетчера на сетевую ошибку вызова, который не повторяется. */
+function upstreamFailure(error) {
+  return { status: 502, body: { ok: false, error_code: 502, description: `Bad Gateway: ${error.message}` } };
+}
+
+class TelegramDispatcher {
+  /**
+   * @param {object} opts
+   *   transport — async (job) => { status, body }: один вызов Bot API (createTransport)
+   *   limits    — DISPATCH_LIMITS с переопределениями (dispatchSettings)
+   *   now       — часы в мс; по умолчанию Date.now
+   */
+  constructor({ transport, limits = DISPATCH_LIMITS, now = Date.now } = {}) {
+    this.transport = transport;
+    this.limits = { ...DISPATCH_LIMITS, ...limits };
+    this.now = now;
+    this.seq = 0;
+    this.bots = new Map();
+    this.chats = new Map();
+    this.waiting = new Set();
+    this.direct = DISPATCH_CLASSES.map(() => []);
+    this.queued = 0;
+    this.inFlight = 0;
+    this.timer = null;
+    this.wakeAt = Infinity;
+    this.counters = { requests: 0, upstream: 0, ok: 0, failed: 0, limited: 0, retried: 0, errors: 0, rejected: 0, expired: 0, maxQueued: 0 };
+    this.latency = Object.fromEntries(DISPATCH_CLASSES.map(c => [c, { queue: new LatencyWindow(), total: new LatencyWindow() }]));
+    this.upstreamMs = new LatencyWindow();
+  }
+
+  /**
+   * Поставить вызов в очередь; промис — ответ Telegram (или отказ диспетчера).
+   * @param {{ token: string, method: string, body?: object, payload?: Buffer, contentType?: string }} call
+   * @returns {Promise<{ status: number, body: object }>}
+   */
+  submit({ token, method, body = {}, payload, contentType = 'application/json' }) {
+    this.counters.requests++;
+    if (this.queued >= this.limits.maxQueue) {
+      this.counters.rejected++;
+      return Promise.resolve(dispatchRefusal('dispatcher queue is full', 1));
+    }
+    const now = this.now();
+    const cls = methodClass(method);
+    const chatId = isChatMethod(method) && body && body.chat_id != null ? String(body.chat_id) : null;
+    return new Promise(resolve => {
+      const job = {
+        seq: ++this.seq, token, method, cls, prio: DISPATCH_CLASSES.indexOf(cls), chatId,
+        payload: payload || Buffer.from(JSON.stringify(body)), contentType,
+        enqueued: now, deadline: now + this.limits.maxWaitMs, notBefore: 0, attempts: 0, dispatched: false, resolve,
+      };
+      if (chatId === null) this.direct[job.prio].push(job);
+      else {
+        const chat = this.chat(token, chatId, now);
+        chat.queue.push(job);
+        this.waiting.add(chat);
+      }
+      this.queued++;
+      this.counters.maxQueued = Math.max(this.counters.maxQueued, this.queued);
+      this.pump();
+    });
+  }
+
+  bot(token, now) {
+    let bot = this.bots.get(token);
+    if (!bot) {
+      bot = { bucket: new TokenBucket(this.limits.botPerSec, this.limits.botBurst, now), blockedUntil: 0 };
+      this.bots.set(token, bot);
+    }
+    return bot;
+  }
+
+  chat(token, chatId, now) {
+    const key = token + ':' + chatId;
+    let chat = this.chats.get(key);
+    if (!chat) {
+      // Группы и каналы — отрицательный chat_id: 20 сообщений в минуту
+      const group = chatId.startsWith('-');
+      chat = {
+        key, queue: [], busy: false, blockedUntil: 0,
+        bucket: group
+          ? new TokenBucket(this.limits.groupPerMin / 60, this.limits.groupBurst, now)
+          : new TokenBucket(this.limits.chatPerSec, this.limits.chatBurst, now),
+      };
+      this.chats.set(key, chat);
+    }
+    return chat;
+  }
+
+  /** Сколько мс ждать вызову во главе очереди; 0 — можно отправлять. */
+  readyIn(job, chat, now) {
+    const bot = this.bot(job.token, now);
+    let wait = Math.max(job.notBefore - now, bot.blockedUntil - now);
+    if (chat) wait = Math.max(wait, bot.bucket.wait(now), chat.blockedUntil - now, chat.bucket.wait(now));
+    return Math.max(0, wait);
+  }
+
+  /** Снять с головы очереди вызовы, ждавшие дольше maxWaitMs. */
+  dropExpired(queue, now) {
+    while (queue.length && queue[0].deadline <= now) {
+      const job = queue.shift();
+      this.queued--;
+      this.counters.expired++;
+      this.finish(job, dispatchRefusal('waited too long in the dispatcher queue', 1), now);
+    }
+  }
+
+  /**
+   * Отправить всё, что можно отправить сейчас, по приоритету и порядку
+   * поступления; иначе — таймер до ближайшего готового. Перебор — только
+   * головы очередей чатов, где есть вызовы (waiting).
+   */
+  pump() {
+    while (this.inFlight < this.limits.maxInFlight && this.queued > 0) {
+      const now = this.now();
+      let best = null;
+      let bestChat = null;
+      let wake = Infinity;
+      const consider = (job, chat) => {
+        const wait = this.readyIn(job, chat, now);
+        if (wait > 0) wake = Math.min(wake, wait, job.deadline - now);
+        else if (!best || job.prio < best.prio || (job.prio === best.prio && job.seq < best.seq)) {
+          best = job;
+          bestChat = chat;
+        }
+      };
+      for (const queue of this.direct) {
+        this.dropExpired(queue, now);
+        if (queue.length) consider(queue[0], null);
+      }
+      for (const chat of this.waiting) {
+        this.dropExpired(chat.queue, now);
+        if (!chat.queue.length) {
+          if (!chat.busy) this.waiting.delete(chat);
+          continue;
+        }
+        // Чат ждёт ответа на прошлый вызов — следующий не раньше, но и не дольше maxWaitMs
+        if (chat.busy) wake = Math.min(wake, chat.queue[0].deadline - now);
+        else consider(chat.queue[0], chat);
+      }
+      if (!best) {
+        if (wake < Infinity) this.wakeIn(wake, now);
+        return;
+      }
+      (bestChat ? bestChat.queue : this.direct[best.prio]).shift();
+      this.queued--;
+      if (bestChat) {
+        this.bot(best.token, now).bucket.take(now);
+        bestChat.busy = true;
+        if (!bestChat.queue.length) this.waiting.delete(bestChat);
+      }
+      this.send(best, bestChat, now);
+    }
+  }
+
+  wakeIn(ms, now) {
+    const at = now + ms;
+    if (this.timer && this.wakeAt <= at) return;
+    clearTimeout(this.timer);
+    this.wakeAt = at;
+    this.timer = setTimeout(() => {
+      this.timer = null;
+      this.wakeAt = Infinity;
+      this.pump();
+    }, ms);
+  }
+
+  send(job, chat, now) {
+    this.inFlight++;
+    job.attempts++;
+    if (!job.dispatched) {
+      job.dispatched = true;
+      this.latency[job.cls].queue.add(now - job.enqueued);
+    }
+    this.counters.upstream++;
+    const started = now;
+    const done = (res, error) => {
+      const at = this.now();
+      this.inFlight--;
+      if (chat) {
+        // Токен чата списывается по ответу: Telegram считает вызовы по приходу,
+        // и следующий вызов чата придёт не раньше, чем через 1/chatPerSec
+        // после предыдущего, как бы ни гуляла задержка сети
+        chat.bucket.take(at);
+        chat.busy = false;
+      }
+      this.upstreamMs.add(at - started);
+      this.settle(job, chat, res, error, at);
+      this.pump();
+    };
+    Promise.resolve()
+      .then(() => this.transport(job))
+      .then(res => done(res, null), error => done(null, error));
+  }
+
+  /**
+   * Ответ Telegram: отдать вызывающему или поставить вызов обратно в голову
+   * очереди. 429 Telegram не выполнял — повтор всегда. Сетевая ошибка и 5xx —
+   * повтор, только если тело не ушло (error.sent === false, createTransport)
+   * или метод идемпотентен: иначе второй sendMessage — второе сообщение.
+   */
+  settle(job, chat, res, error, now) {
+    const limited = res && (res.status === 429 || (res.body && res.body.error_code === 429));
+    const failed = !!error || (res && res.status >= 500);
+    if (failed) this.counters.errors++;
+    const safe = (error && error.sent === false) || isIdempotentMethod(job.method);
+    if (!limited && !(failed && safe)) {
+      this.finish(job, res || upstreamFailure(error), now);
+      return;
+    }
+    let until;
+    if (limited) {
+      this.counters.limited++;
+      const params = (res.body && res.body.parameters) || {};
+      until = now + Math.max(1, Number(params.retry_after) || 1) * 1000;
+      // Лимит чата — ждёт только этот чат; вызов не из чата — весь бот
+      if (chat) chat.blockedUntil = Math.max(chat.blockedUntil, until);
+      else this.bot(job.token, now).blockedUntil = Math.max(this.bot(job.token, now).blockedUntil, until);
+    } else {
+      until = now + this.limits.retryBaseMs * 2 ** (job.attempts - 1);
+      job.notBefore = until;
+    }
+    if (job.attempts > this.limits.maxRetries || until >= job.deadline) {
+      this.finish(job, res || upstreamFailure(error), now);
+      return;
+    }
+    this.counters.retried++;
+    if (chat) {
+      chat.queue.unshift(job);
+      this.waiting.add(chat);
+    } else this.direct[job.prio].unshift(job);
+    this.queued++;
+  }
+
+  finish(job, res, now) {
+    this.counters[res.body && res.body.ok ? 'ok' : 'failed']++;
+    this.latency[job.cls].total.add(now - job.enqueued);
+    job.resolve(res);
+  }
+
+  /** Дождаться, пока очередь и вызовы в полёте опустеют (или истечёт timeoutMs). */
+  async drain(timeoutMs = this.limits.maxWaitMs) {
+    const until = this.now() + timeoutMs;
+    while ((this.queued || this.inFlight) && this.now() < until) await new Promise(resolve => setTimeout(resolve, 20));
+    return !this.queued && !this.inFlight;
+  }
+}
+
+/** Снимок метрик диспетчера (и пула соединений, если transport их считает). */
+function dispatcherMetrics(d) {
+  const queued = Object.fromEntries(DISPATCH_CLASSES.map(c => [c, 0]));
+  d.direct.forEach((q, i) => { queued[DISPATCH_CLASSES[i]] += q.length; });
+  for (const chat of d.waiting) for (const job of chat.queue) queued[job.cls]++;
+  return {
+    queued: { total: d.queued, ...queued },
+    inFlight: d.inFlight,
+    chatsWaiting: d.waiting.size,
+    ...d.counters,
+    latencyMs: Object.fromEntries(DISPATCH_CLASSES.map(c => [c, { queue: d.latency[c].queue.summary(), total: d.latency[c].total.summary() }])),
+    upstreamMs: d.upstreamMs.summary(),
+    connections: d.transport && d.transport.stats ? { ...d.transport.stats } : null,
+  };
+}
+
+/**
+ * Вызовы Bot API по пулу keep-alive соединений к base (api.telegram.org или
+ * заглушка). stats: requests, connections (новые сокеты), reused.
+ * Ошибка вызова несёт error.sent: false — запрос не дописан в сокет
+ * (отказ соединения, обрыв до записи), Telegram его точно не получил.
+ */
+function createTransport(base = TELEGRAM_API, { maxSockets = DISPATCH_LIMITS.maxSockets, timeoutMs = DISPATCH_LIMITS.timeoutMs } = {}) {
+  const url = new URL(base);
+  const lib = url.protocol === 'https:' ? require('https') : require('http');
+  const agent = new lib.Agent({ keepAlive: true, keepAliveMsecs: 30000, maxSockets });
+  const prefix = url.pathname.replace(/\/$/, '');
+  const stats = { requests: 0, connections: 0, reused: 0 };
+  const transport = job => new Promise((resolve, reject) => {
+    stats.requests++;
+    let sent = false;
+    const fail = error => {
+      error.sent = sent;
+      reject(error);
+    };
+    const req = lib.request({
+      agent,
+      method: 'POST',
+      protocol: url.protocol,
+      hostname: url.hostname,
+      port: url.port || undefined,
+      path: `${prefix}/bot${job.token}/${job.method}`,
+      headers: { 'content-type': job.contentType, 'content-length': job.payload.length },
+    }, res => {
+      const chunks = [];
+      res.on('data', c => chunks.push(c));
+      res.on('end', () => {
+        const text = Buffer.concat(chunks).toString('utf8');
+        let body;
+        try {
+          body = JSON.parse(text);
+        } catch (e) {
+          body = { ok: false, error_code: res.statusCode, description: text.slice(0, 200) };
+        }
+        resolve({ status: res.statusCode, body });
+      });
+      res.on('error', fail);
+    });
+    req.on('socket', socket => {
+      if (socket.counted) stats.reused++;
+      else {
+        socket.counted = true;
+        stats.connections++;
+      }
+    });
+    // finish — запрос целиком отдан в сокет; дальше Telegram мог его выполнить
+    req.on('finish', () => { sent = true; });
+    req.setTimeout(timeoutMs, () => req.destroy(new Error(`timeout after ${timeoutMs} ms`)));
+    req.on('error', fail);
+    req.end(job.payload);
+  });
+  transport.stats = stats;
+  transport.close = () => agent.destroy();
+  return transport;
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    TELEGRAM_API, DISPATCH_LIMITS, DISPATCH_ENV, DISPATCH_CLASSES, dispatchSettings, methodClass, isChatMethod, isIdempotentMethod,
+    TokenBucket, LatencyWindow, TelegramDispatcher, dispatcherMetrics, dispatchRefusal, createTransport,
+  };
+}
@@ -0,0 +1,64 @@
+/**
+ * «Живое» сообщение бота (календарь, меню) — правка без лишних вызовов Bot API.
+ *
+ * editMessageText с тем же текстом и клавиатурой Telegram отклоняет
+ * («400: message is not modified»): вызов расходует лимит чата, а
+ * send-or-edit считал его провалом правки и слал дубль сообщения.
+ * Поэтому рядом с message_id хранится отпечаток последней отрисовки —
+ * FNV-1a текста (вместе с parse_mode) и reply_markup, «tttttttt.kkkkkkkk»,
+ * — и следующая отрисовка сравнивается с ним (planUiEdit):
+ *
+ *   send    message_id нет — sendMessage
+ *   skip    текст и клавиатура те же — вызова нет
+ *   markup  изменилась только клавиатура — editMessageReplyMarkup
+ *   text    изменился текст или отпечатка нет — editMessageText
+ *
+ * ozon:ui:{<uid>}:<key>:message_id хранит «<message_id>:<отпечаток>»;
+ * старое значение без отпечатка читается как message_id.
+ */
+
+function fnv1a(str) {
+  let h = 0x811c9dc5;
+  for (let i = 0; i < str.length; i++) {
+    h ^= str.charCodeAt(i);
+    h = Math.imul(h, 0x01000193);
+  }
+  return (h >>> 0).toString(16).padStart(8, '0');
+}
+
+/** Отпечаток отрисовки { text, parse_mode, reply_markup }. */
+function uiRenderPrint({ text = '', parse_mode = '', reply_markup = null } = {}) {
+  return fnv1a(String(parse_mode || '') + '\n' + String(text)) + '.' + fnv1a(JSON.stringify(reply_markup || null));
+}
+
+/** @returns {'send'|'skip'|'markup'|'text'} */
+function planUiEdit(messageId, prevPrint, nextPrint) {
+  if (!messageId) return 'send';
+  if (!prevPrint || !nextPrint) return 'text';
+  if (prevPrint === nextPrint) return 'skip';
+  return prevPrint.split('.')[0] === nextPrint.split('.')[0] ? 'markup' : 'text';
+}
+
+function packUiMessage(messageId, print) {
+  return print ? `${messageId}:${print}` : String(messageId);
+}
+
+/** Значение ozon:ui:*:message_id → { messageId, print }. */
+function readUiMessage(value) {
+  if (value === undefined || value === null || value === '') return { messageId: null, print: null };
+  const [id, print] = String(value).split(':');
+  return { messageId: Number(id) || null, print: print || null };
+}
+
+/**
+ * Ответ правки (HTTP-нода: тело Bot API, { body } при полном ответе или
+ * { error } при continueOnFail): «message is not modified» — сообщение уже
+ * такое, как нужно.
+ */
+function isMessageNotModified(response) {
+  return /message is not modified/i.test(JSON.stringify(response || {}));
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { uiRenderPrint, planUiEdit, packUiMessage, readUiMessage, isMessageNotModified };
+}
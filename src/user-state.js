@@ -0,0 +1,105 @@
+/**
+ * Состояние пользователя одним hash — ozon:user:{<uid>}.
+ *
+ * Раньше каждый апдейт читал ACL, meta, выбранные даты, месяц и id
+ * сообщения календаря отдельными Redis GET — по сетевому обмену на ключ.
+ * Теперь всё это поля одного hash: «Load User State» читает их одним
+ * HGETALL, «User Context» раскладывает в типизированный контекст, а запись
+ * в конце маршрута — один HSET в форме n8n «поле значение поле значение».
+ *
+ * Значения полей — JSON (пробелы экранированы как \u0020: n8n делит
+ * строку HSET по пробелу). У групп полей свой срок — *_exp (мс), истёкшая
+ * группа при чтении считается пустой; сам ключ живёт USER_STATE_TTL_SEC
+ * с последней записи.
+ *
+ *   acl, acl_exp                         биты ACL_*, кэш ozon:acl:<uid> на ACL_CACHE_MS
+ *   meta, sess_exp                       meta отчёта (см. src/session-meta.js), 72 ч
+ *   dates, cal_month, calendar_msg_id,   выбор дат (снимок свёртки журнала, src/date-taps.js)
+ *   calendar_render, ui_exp              и календарь с отпечатком отрисовки (src/ui-message.js), 24 ч
+ *
+ * Тяжёлые :csv / :agg / :hist остаются отдельными ключами ozon:sess:{<uid>}:*.
+ *
+ * Фигурные скобки — hash tag Redis Cluster: хешируется только id, и все
+ * ключи пользователя (ozon:user:{<uid>}*, ozon:sess:{<uid>}:*,
+ * ozon:ui:{<uid>}:*) лежат в одном слоте — на одном шарде
+ * (scripts/redis_keys.py, docs/REDIS_SETUP.md).
+ *
+ * Права — ozon:acl:<uid> с битами ACL_* (src/acl-bits.js). Кэш в поле acl
+ * ездит в том же HGETALL; правка прав сбрасывает его у этого пользователя
+ * (HDEL ozon:user:<uid> acl acl_exp, docs/REDIS_SETUP.md).
+ */
+
+const USER_STATE_PREFIX = 'ozon:user:';
+const USER_STATE_TTL_SEC = 259200;
+const SESSION_STATE_MS = 259200 * 1000;
+const UI_STATE_MS = 86400 * 1000;
+const ACL_CACHE_MS = 5 * 60 * 1000;
+
+const USER_STATE_GROUPS = {
+  acl: { fields: ['acl'], exp: 'acl_exp', ms: ACL_CACHE_MS },
+  session: { fields: ['meta'], exp: 'sess_exp', ms: SESSION_STATE_MS },
+  ui: { fields: ['dates', 'cal_month', 'calendar_msg_id', 'calendar_render'], exp: 'ui_exp', ms: UI_STATE_MS },
+};
+
+function userStateKey(userId) {
+  return USER_STATE_PREFIX + '{' + userId + '}';
+}
+
+function decodeField(value) {
+  if (value === undefined || value === null || value === '') return null;
+  try { return JSON.parse(value); } catch (e) { return value; }
+}
+
+/**
+ * @typedef {object} UserContext
+ * @property {number|null} acl            биты ACL_*; null — кэша нет или истёк
+ * @property {object|null} meta           meta отчёта; null — файл не загружен
+ * @property {string[]} selectedDates     выбранные дни YYYY-MM-DD
+ * @property {string|null} calMonth       месяц календаря YYYY-MM
+ * @property {number|null} calendarMsgId  id сообщения с календарём
+ * @property {string|null} calendarRender отпечаток его последней отрисовки
+ */
+
+/**
+ * Контекст из результата HGETALL (объект полей; {} или null — ключа нет).
+ * @returns {UserContext}
+ */
+function readUserState(raw, { now = Date.now() } = {}) {
+  const h = raw && typeof raw === 'object' ? raw : {};
+  const live = group => Number(decodeField(h[USER_STATE_GROUPS[group].exp])) > now;
+  const field = (group, name) => (live(group) ? decodeField(h[name]) : null);
+  const acl = field('acl', 'acl');
+  const meta = field('session', 'meta');
+  const dates = field('ui', 'dates');
+  const msgId = field('ui', 'calendar_msg_id');
+  return {
+    acl: typeof acl === 'number' ? acl : null,
+    meta: meta && typeof meta === 'object' ? meta : null,
+    selectedDates: Array.isArray(dates) ? dates : [],
+    calMonth: field('ui', 'cal_month') || null,
+    calendarMsgId: msgId ? Number(msgId) : null,
+    calendarRender: field('ui', 'calendar_render') || null,
+  };
+}
+
+/**
+ * Значение для Redis HSET (keyType hash, valueIsJSON false): «f1 v1 f2 v2».
+ * Для каждой затронутой группы полей продлевается её *_exp; null в поле
+ * затирает его.
+ */
+function packUserState(fields, { now = Date.now() } = {}) {
+  const out = [];
+  for (const { fields: names, exp, ms } of Object.values(USER_STATE_GROUPS)) {
+    const touched = names.filter(name => name in fields);
+    if (!touched.length) continue;
+    for (const name of touched) out.push(name, JSON.stringify(fields[name] ?? null).replace(/ /g, '\\u0020'));
+    out.push(exp, String(now + ms));
+  }
+  return out.join(' ');
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = {
+    USER_STATE_PREFIX, USER_STATE_TTL_SEC, ACL_CACHE_MS, userStateKey, readUserState, packUserState,
+  };
+}
@@ -0,0 +1,374 @@
+/**
+ * Потоковое чтение XLSX выгрузки Ozon прямо из байтов файла (только чтение).
+ *
+ * Раньше «Extract from File (XLSX)» разворачивал весь лист в items n8n,
+ * и «Parse Report File» получал строки-объекты. Здесь лист распаковывается
+ * (DEFLATE, без зависимостей — в Code-ноде нет zlib) окнами по
+ * XLSX_OUT_BYTES, из XML вырезаются строки <row> по одной и отдаются в
+ * onRow(cells) — тот же контракт, что у parseCsvBuffer, поэтому дальше
+ * работает общий путь CSV (план колонок, индексы, :csv).
+ *
+ * В памяти одновременно: сжатый файл, окно распаковки, одна строка листа и
+ * текст sharedStrings (уникальные строки книги, плоскими сегментами — того
+ * же порядка, что словари order_id/sku в :csv). Распакованный XML листа
+ * целиком не собирается.
+ *
+ * Значения — как их показывает выгрузка: общие и inline-строки, числа
+ * текстом; числа в ячейках с форматом даты — 'YYYY-MM-DD HH:MM:SS'
+ * (серийная дата Excel без часового пояса, как строка даты в CSV).
+ */
+
+const XLSX_WINDOW = 1 << 15;          // максимальная дистанция DEFLATE
+const XLSX_OUT_BYTES = 1 << 18;       // окно распаковки: выдаётся кусками до ~224 КБ
+const XLSX_FLUSH_AT = XLSX_OUT_BYTES - 258;
+const XLSX_SST_SHIFT = 12;
+
+const DEFLATE_LEN_BASE = [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258];
+const DEFLATE_LEN_EXTRA = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0];
+const DEFLATE_DIST_BASE = [1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073, 4097, 6145, 8193, 12289, 16385, 24577];
+const DEFLATE_DIST_EXTRA = [0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13];
+const DEFLATE_CL_ORDER = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15];
+
+/** Таблица Хаффмана: индекс — следующие bits бит потока, значение — (символ << 4) | длина кода. */
+function huffmanTable(lengths) {
+  let bits = 1;
+  const count = new Uint16Array(16);
+  for (const len of lengths) { count[len]++; if (len > bits) bits = len; }
+  count[0] = 0;
+  const next = new Uint16Array(16);
+  for (let b = 1, code = 0; b < 16; b++) { code = (code + count[b - 1]) << 1; next[b] = code; }
+  const table = new Uint32Array(1 << bits);
+  for (let sym = 0; sym < lengths.length; sym++) {
+    const len = lengths[sym];
+    if (!len) continue;
+    let c = next[len]++, rev = 0;
+    for (let k = 0; k < len; k++) { rev = (rev << 1) | (c & 1); c >>= 1; }
+    for (let j = rev; j < table.length; j += 1 << len) table[j] = (sym << 4) | len;
+  }
+  return { table, mask: (1 << bits) - 1, bits };
+}
+
+let deflateFixed = null;
+function fixedTables() {
+  if (!deflateFixed) {
+    const lit = new Uint8Array(288);
+    lit.fill(8, 0, 144); lit.fill(9, 144, 256); lit.fill(7, 256, 280); lit.fill(8, 280, 288);
+    deflateFixed = { lit: huffmanTable(lit), dist: huffmanTable(new Uint8Array(30).fill(5)) };
+  }
+  return deflateFixed;
+}
+
+/**
+ * Распаковывает raw DEFLATE src[start, end) и отдаёт результат кусками в
+ * onChunk(Uint8Array). Кусок — вид на внутреннее окно: его нужно
+ * использовать (декодировать) до возврата из onChunk.
+ */
+function inflateRaw(src, start, end, onChunk) {
+  const out = new Uint8Array(XLSX_OUT_BYTES);
+  let op = 0, flushed = 0;
+  let pos = start, bb = 0, bc = 0;
+
+  const flush = () => {
+    onChunk(out.subarray(flushed, op));
+    out.copyWithin(0, op - XLSX_WINDOW, op);
+    op = flushed = XLSX_WINDOW;
+  };
+  const need = n => {
+    while (bc < n) {
+      if (pos >= end + 4) throw new Error('XLSX: truncated deflate stream');
+      bb |= (pos < end ? src[pos] : 0) << bc;
+      pos++;
+      bc += 8;
+    }
+  };
+  const take = n => { need(n); const v = bb & ((1 << n) - 1); bb >>>= n; bc -= n; return v; };
+  const decode = h => {
+    need(h.bits);
+    const e = h.table[bb & h.mask];
+    const len = e & 15;
+    if (!len) throw new Error('XLSX: bad deflate code');
+    bb >>>= len;
+    bc -= len;
+    return e >>> 4;
+  };
+
+  let final = 0;
+  while (!final) {
+    final = take(1);
+    const type = take(2);
+    if (type === 0) {
+      const drop = bc & 7;
+      bb >>>= drop; bc -= drop;
+      pos -= bc >> 3; bb = 0; bc = 0;
+      const len = src[pos] | (src[pos + 1] << 8);
+      pos += 4;
+      if (pos + len > end) throw new Error('XLSX: truncated stored block');
+      for (let k = 0; k < len; k++) {
+        if (op >= XLSX_FLUSH_AT) flush();
+        out[op++] = src[pos++];
+      }
+      continue;
+    }
+    let lit, dist;
+    if (type === 1) ({ lit, dist } = fixedTables());
+    else if (type === 2) {
+      const hlit = take(5) + 257, hdist = take(5) + 1, hclen = take(4) + 4;
+      const cl = new Uint8Array(19);
+      for (let k = 0; k < hclen; k++) cl[DEFLATE_CL_ORDER[k]] = take(3);
+      const clt = huffmanTable(cl);
+      const lens = new Uint8Array(hlit + hdist);
+      for (let k = 0; k < lens.length;) {
+        const sym = decode(clt);
+        if (sym < 16) { lens[k++] = sym; continue; }
+        let rep, v = 0;
+        if (sym === 16) { if (!k) throw new Error('XLSX: bad code lengths'); v = lens[k - 1]; rep = 3 + take(2); }
+        else if (sym === 17) rep = 3 + take(3);
+        else rep = 11 + take(7);
+        if (k + rep > lens.length) throw new Error('XLSX: bad code lengths');
+        lens.fill(v, k, k + rep);
+        k += rep;
+      }
+      lit = huffmanTable(lens.subarray(0, hlit));
+      dist = huffmanTable(lens.subarray(hlit));
+    } else throw new Error('XLSX: bad deflate block type');
+
+    for (;;) {
+      const sym = decode(lit);
+      if (sym < 256) {
+        if (op >= XLSX_FLUSH_AT) flush();
+        out[op++] = sym;
+        continue;
+      }
+      if (sym === 256) break;
+      const li = sym - 257;
+      const len = DEFLATE_LEN_BASE[li] + take(DEFLATE_LEN_EXTRA[li]);
+      const ds = decode(dist);
+      const d = DEFLATE_DIST_BASE[ds] + take(DEFLATE_DIST_EXTRA[ds]);
+      if (op >= XLSX_FLUSH_AT) flush();
+      if (d > op) throw new Error('XLSX: bad deflate distance');
+      for (let k = 0, from = op - d; k < len; k++) out[op++] = out[from++];
+    }
+  }
+  if (op > flushed) onChunk(out.subarray(flushed, op));
+}
+
+function isXlsxBuffer(buf) {
+  return !!buf && buf.length >= 4 && buf[0] === 0x50 && buf[1] === 0x4B && buf[2] === 3 && buf[3] === 4;
+}
+
+/** Центральный каталог ZIP: имя → { method, size, local }. */
+function readZipEntries(buf) {
+  let eocd = -1;
+  for (let i = buf.length - 22; i >= Math.max(0, buf.length - 65557); i--) {
+    if (buf.readUInt32LE(i) === 0x06054B50) { eocd = i; break; }
+  }
+  if (eocd < 0) throw new Error('XLSX: not a zip archive');
+  const entries = new Map();
+  let p = buf.readUInt32LE(eocd + 16);
+  for (let k = buf.readUInt16LE(eocd + 10); k > 0; k--) {
+    if (buf.readUInt32LE(p) !== 0x02014B50) throw new Error('XLSX: broken zip directory');
+    const nameLen = buf.readUInt16LE(p + 28);
+    entries.set(buf.toString('utf8', p + 46, p + 46 + nameLen), {
+      method: buf.readUInt16LE(p + 10),
+      size: buf.readUInt32LE(p + 20),
+      local: buf.readUInt32LE(p + 42),
+    });
+    p += 46 + nameLen + buf.readUInt16LE(p + 30) + buf.readUInt16LE(p + 32);
+  }
+  return entries;
+}
+
+/** Части архива текстом, кусками; многобайтовый символ на границе куска не режется. */
+function streamZipText(buf, entry, onText) {
+  const l = entry.local;
+  const start = l + 30 + buf.readUInt16LE(l + 26) + buf.readUInt16LE(l + 28);
+  let tail = null;
+  const onChunk = chunk => {
+    const b = tail ? Buffer.concat([tail, chunk]) : chunk;
+    let cut = b.length, i = b.length - 1;
+    while (i > 0 && b.length - i < 4 && (b[i] & 0xC0) === 0x80) i--;
+    const lead = b[i];
+    if (lead >= 0xC0 && i + (lead >= 0xF0 ? 4 : lead >= 0xE0 ? 3 : 2) > b.length) cut = i;
+    tail = cut < b.length ? Buffer.from(b.subarray(cut)) : null;
+    onText(Buffer.from(b.buffer, b.byteOffset, cut).toString('utf8'));
+  };
+  if (entry.method === 0) {
+    for (let off = start; off < start + entry.size; off += XLSX_OUT_BYTES) {
+      onChunk(buf.subarray(off, Math.min(off + XLSX_OUT_BYTES, start + entry.size)));
+    }
+  } else if (entry.method === 8) inflateRaw(buf, start, start + entry.size, onChunk);
+  else throw new Error(`XLSX: unsupported zip method ${entry.method}`);
+  if (tail) onText(tail.toString('utf8'));
+}
+
+function readZipText(buf, entries, name) {
+  const entry = entries.get(name);
+  if (!entry) return '';
+  const parts = [];
+  streamZipText(buf, entry, s => parts.push(s));
+  return parts.join('');
+}
+
+/** Значение атрибута из строки атрибутов тега (без разбора всего тега). */
+function xmlAttr(attrs, name) {
+  const i = attrs.indexOf(` ${name}="`);
+  if (i < 0) return null;
+  const from = i + name.length + 3;
+  return attrs.slice(from, attrs.indexOf('"', from));
+}
+
+const XML_ENTITIES = { amp: '&', lt: '<', gt: '>', quot: '"', apos: "'" };
+function xmlText(s) {
+  if (s.indexOf('&') >= 0) {
+    s = s.replace(/&(#x[0-9a-fA-F]+|#\d+|amp|lt|gt|quot|apos);/g, (_, e) => (e[0] === '#'
+      ? String.fromCodePoint(e[1] === 'x' ? parseInt(e.slice(2), 16) : Number(e.slice(1)))
+      : XML_ENTITIES[e]));
+  }
+  if (s.indexOf('_x') >= 0) s = s.replace(/_x([0-9a-fA-F]{4})_/g, (_, h) => String.fromCharCode(parseInt(h, 16)));
+  return s;
+}
+
+/** Текст <si>/<is>: все <t> подряд (rich text), без фонетических подсказок <rPh>. */
+function xmlRunsText(xml) {
+  if (xml.indexOf('<rPh') >= 0) xml = xml.replace(/<rPh\b[\s\S]*?<\/rPh>/g, '');
+  let s = '';
+  const re = /<t(?:\s[^>]*)?>([^<]*)<\/t>/g;
+  for (let m; (m = re.exec(xml));) s += m[1];
+  return xmlText(s);
+}
+
+/** Вызывает onElement(xml) для каждого <tag>…</tag>, не собирая часть целиком. */
+function streamXmlElements(buf, entry, closeTag, onElement) {
+  let carry = '';
+  streamZipText(buf, entry, text => {
+    carry += text;
+    let from = 0;
+    for (let i; (i = carry.indexOf(closeTag, from)) >= 0; from = i + closeTag.length) onElement(carry.slice(from, i));
+    carry = carry.slice(from);
+  });
+}
+
+/**
+ * sharedStrings → (индекс → строка). Строки склеиваются в плоские сегменты
+ * по 2^XLSX_SST_SHIFT штук с таблицей концов: срезы кусков XML по одному
+ * держали бы в памяти сами куски, а объект на строку дороже её текста.
+ */
+function readSharedStrings(buf, entries) {
+  const segments = [];
+  let batch = [];
+  const seal = () => {
+    const ends = new Uint32Array(batch.length);
+    for (let i = 0, p = 0; i < batch.length; i++) ends[i] = p += batch[i].length;
+    segments.push({ text: batch.join(''), ends });
+    batch = [];
+  };
+  const entry = entries.get('xl/sharedStrings.xml');
+  if (entry) {
+    streamXmlElements(buf, entry, '</si>', xml => {
+      batch.push(xmlRunsText(xml.slice(xml.indexOf('<si'))));
+      if (batch.length === 1 << XLSX_SST_SHIFT) seal();
+    });
+  }
+  if (batch.length) seal();
+  return i => {
+    const seg = segments[i >>> XLSX_SST_SHIFT];
+    const j = i & ((1 << XLSX_SST_SHIFT) - 1);
+    if (!seg || j >= seg.ends.length) return '';
+    return seg.text.slice(j ? seg.ends[j - 1] : 0, seg.ends[j]);
+  };
+}
+
+const XLSX_DATE_FORMAT_IDS = new Set([14, 15, 16, 17, 18, 19, 20, 21, 22, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 45, 46, 47, 50, 51, 52, 53, 54, 55, 56, 57, 58]);
+
+/** Индексы стилей ячеек (атрибут s), чей числовой формат — дата/время. */
+function readDateStyles(buf, entries) {
+  const xml = readZipText(buf, entries, 'xl/styles.xml');
+  const custom = new Map();
+  for (const m of xml.matchAll(/<numFmt\b([^>]*)\/?>/g)) custom.set(Number(xmlAttr(m[1], 'numFmtId')), xmlText(xmlAttr(m[1], 'formatCode') || ''));
+  const isDate = id => XLSX_DATE_FORMAT_IDS.has(id) ||
+    (custom.has(id) && /[dmyhs]/i.test(custom.get(id).replace(/"[^"]*"|\\.|\[[^\]]*\]/g, '')));
+  const xfs = /<cellXfs\b[^>]*>([\s\S]*?)<\/cellXfs>/.exec(xml);
+  if (!xfs) return [];
+  return Array.from(xfs[1].matchAll(/<xf\b([^>]*)>/g), m => isDate(Number(xmlAttr(m[1], 'numFmtId') || 0)));
+}
+
+/** Первый лист книги (как у Extract from File) и система дат 1900/1904. */
+function readWorkbook(buf, entries) {
+  const xml = readZipText(buf, entries, 'xl/workbook.xml');
+  const pr = /<workbookPr\b([^>]*)>/.exec(xml);
+  const date1904 = !!pr && /^(1|true)$/.test(xmlAttr(pr[1], 'date1904') || '');
+  const sheet = /<sheet\b([^>]*)>/.exec(xml);
+  const rid = sheet && (xmlAttr(sheet[1], 'r:id') || xmlAttr(sheet[1], 'id'));
+  let path = 'xl/worksheets/sheet1.xml';
+  for (const m of readZipText(buf, entries, 'xl/_rels/workbook.xml.rels').matchAll(/<Relationship\b([^>]*)>/g)) {
+    if (xmlAttr(m[1], 'Id') !== rid) continue;
+    const target = xmlAttr(m[1], 'Target');
+    path = target[0] === '/' ? target.slice(1) : `xl/${target}`;
+  }
+  return { sheet: path, date1904 };
+}
+
+/** Серийная дата Excel → 'YYYY-MM-DD HH:MM:SS' (та же запись, что даты FBS в CSV). */
+function excelSerialDate(v, date1904) {
+  const n = Number(v);
+  if (!Number.isFinite(n)) return v;
+  const iso = new Date(Math.round((n - (date1904 ? 24107 : 25569)) * 86400) * 1000).toISOString();
+  return `${iso.slice(0, 10)} ${iso.slice(11, 19)}`;
+}
+
+function columnIndex(ref) {
+  let col = 0;
+  for (let i = 0; i < ref.length; i++) {
+    const c = ref.charCodeAt(i);
+    if (c < 65 || c > 90) break;
+    col = col * 26 + c - 64;
+  }
+  return col - 1;
+}
+
+/**
+ * Читает первый лист XLSX и отдаёт непустые строки в onRow(cells: string[]);
+ * пропущенные ячейки — ''. Первая строка — заголовок, как у CSV.
+ */
+function parseXlsxBuffer(buf, onRow) {
+  const entries = readZipEntries(buf);
+  const { sheet, date1904 } = readWorkbook(buf, entries);
+  const entry = entries.get(sheet);
+  if (!entry) throw new Error(`XLSX: sheet not found: ${sheet}`);
+  const sharedString = readSharedStrings(buf, entries);
+  const dateStyles = readDateStyles(buf, entries);
+  const cellRe = /<c\b([^>]*?)(?:\/>|>([\s\S]*?)<\/c>)/g;
+
+  streamXmlElements(buf, entry, '</row>', xml => {
+    const rowAt = xml.lastIndexOf('<row');
+    if (rowAt < 0) return;
+    const cells = [];
+    let any = false;
+    cellRe.lastIndex = rowAt;
+    for (let m; (m = cellRe.exec(xml));) {
+      const attrs = m[1], inner = m[2] || '';
+      const ref = xmlAttr(attrs, 'r');
+      const col = ref ? columnIndex(ref) : cells.length;
+      const t = xmlAttr(attrs, 't');
+      let v = '';
+      if (t === 'inlineStr') v = xmlRunsText(inner);
+      else {
+        const at = inner.indexOf('<v>');
+        if (at >= 0) v = inner.slice(at + 3, inner.indexOf('</v>', at));
+        if (t === 's') v = sharedString(Number(v));
+        else if (t === 'str') v = xmlText(v);
+        else if (t === 'e') v = '';
+        else if (t === 'd') v = v.replace('T', ' ').slice(0, 19);
+        else if (t !== 'b' && v !== '' && dateStyles[Number(xmlAttr(attrs, 's') || 0)]) v = excelSerialDate(v, date1904);
+      }
+      while (cells.length < col) cells.push('');
+      cells[col] = v;
+      if (v !== '') any = true;
+    }
+    if (any) onRow(cells);
+  });
+}
+
+if (typeof module !== 'undefined') {
+  module.exports = { XLSX_OUT_BYTES, inflateRaw, isXlsxBuffer, readZipEntries, parseXlsxBuffer, excelSerialDate };
+}